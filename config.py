@@ -1,3 +1,75 @@
 # Configuration for Smart-Home application
 # (Place project-wide constants here if needed)
 
+# Raum-/Geräte-Registry (Räume, Geräte und Widget-Layout)
+ROOMS_CONFIG_PATH = "rooms.json"
+
+# Szenen (mehrere Geräte in einem Schritt schalten)
+SCENES_CONFIG_PATH = "scenes.json"
+
+# Speicherbudget für geladene Raum-Views (Hintergrundbilder), in MB.
+# Wird es überschritten, werden die am längsten nicht besuchten Views verworfen.
+VIEW_MEMORY_BUDGET_MB = 32
+
+# Ordner für gespeicherte Gerätezustände (Snapshot + Änderungsjournal)
+DEVICE_STATE_DIR = "device_state"
+
+# Geräte-Backend für Befehle: "simulated" (Aktor-Simulator im Prozess),
+# "mqtt" (lokaler Broker, siehe devices/broker.py) oder None (keine Befehle)
+DEVICE_BACKEND = "simulated"
+MQTT_HOST = "127.0.0.1"
+MQTT_PORT = 1884
+# Wartezeit auf Bestätigung (s) und Anzahl Wiederholungen je Befehl
+COMMAND_TIMEOUT = 1.0
+COMMAND_RETRIES = 3
+# Höchstens so viele Befehle pro Sekunde und Gerät (Slider-Züge werden
+# zusammengefasst, der Endwert beim Loslassen immer gesendet)
+COMMAND_MAX_RATE = 5
+# Simulator: Latenz (s) und Anteil verlorener Befehle
+SIMULATED_LATENCY = 0.05
+SIMULATED_FAILURE_RATE = 0.0
+
+
+# HTTP/WebSocket-Schnittstelle zum Gerätezustand (server/state_server.py).
+# Für Handys / zweites Panel im Heimnetz API_HOST = "0.0.0.0" setzen und
+# API_TOKEN vergeben (Header "Authorization: Bearer <token>" oder ?token=).
+# Standardmäßig aus: jedes Panel würde sonst einen Port öffnen.
+API_ENABLED = False
+API_HOST = "127.0.0.1"
+API_PORT = 8765
+API_TOKEN = None
+# Höchstens so viele ausstehende Nachrichten je WebSocket-Client, danach Snapshot
+API_CLIENT_QUEUE = 256
+
+# Multi-Panel-Betrieb: WebSocket-Adresse des zentralen State-Service
+# (python -m server.state_service), z.B. "ws://192.168.0.10:8765/ws".
+# None = dieses Panel hält die Zustände selbst.
+STATE_SERVICE_URL = None
+
+# Automationen (Zeitpläne, Abwesenheit), siehe devices/automation.py
+AUTOMATION_RULES_PATH = "automations.json"
+
+# Gesten-Zeiten in Sekunden (unabhängig von der Bildrate, siehe vision/timing.py)
+# Daumen und Zeigefinger so lange zusammen, bevor ein Pinch zählt; 0 = sofort
+# (die Hysterese unten verhindert das Flattern, siehe vision/pinch.py)
+PINCH_HOLD_SECONDS = 0.0
+# Pinch beginnt unter PINCH_ENTER und endet über PINCH_EXIT (Abstand der
+# Fingerkuppen in Handgrößen, unabhängig vom Abstand zur Kamera)
+PINCH_ENTER = 0.25
+PINCH_EXIT = 0.4
+# Vorhersage: schließen sich die Finger schnell, zählt der Abstand in so vielen
+# Sekunden (0 = aus); misst `python -m vision.pinch bench`
+PINCH_PREDICT_SECONDS = 0.0
+# Login: so viel Evidenz (Konfidenz x Sekunden) innerhalb des Zeitfensters
+# (siehe vision/login_classifier.py)
+LOGIN_EVIDENCE_SECONDS = 0.15
+LOGIN_WINDOW_SECONDS = 0.5
+# Angelernte Nutzer und ihre Login-Gesten (tools/enroll_user.py)
+USER_STORE_PATH = "users.npz"
+# Pause nach dem Abmelden, bevor der Login-Bildschirm erscheint
+LOGIN_DELAY_SECONDS = 0.5
+# So viele Hände werden gleichzeitig verfolgt (je Hand ein eigener Cursor)
+MAX_HANDS = 2
+# Kamera und Hand-Tracking in einem eigenen Thread (Kamera-Takt); die UI leert
+# dann nur noch die Ereignis-Queue (siehe vision/hand_events.py)
+TRACKING_THREAD = False
@@ -0,0 +1,88 @@
+"""Simulierte Aktoren (Lampen, Rollos) für Entwicklung und Lasttests.
+
+`SimulatedActuator` führt Befehle mit einstellbarer Latenz aus und "verliert"
+einen einstellbaren Anteil davon (keine Bestätigung -> Timeout beim
+Sender). Er kann direkt im Prozess (`InProcessTransport`) oder als
+Broker-Client laufen:
+
+    python -m devices.actuator --port 1884 --latency 0.05 --failure-rate 0.1
+"""
+
+import argparse
+import asyncio
+import random
+
+from devices.broker import BrokerClient
+
+
+class SimulatedActuator:
+    def __init__(self, latency=0.05, jitter=0.02, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        # zuletzt ausgeführter Zustand je Gerät
+        self.states = {}
+        self.executed = 0
+        self.dropped = 0
+
+    async def execute(self, device_id, state):
+        """Führt einen Befehl aus. Gibt False zurück, wenn er verloren ging."""
+        delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+        await asyncio.sleep(delay)
+        if self._random.random() < self.failure_rate:
+            self.dropped += 1
+            return False
+        self.states[device_id] = state
+        self.executed += 1
+        return True
+
+
+async def run_on_broker(actuator, host="127.0.0.1", port=1884):
+    """Verbindet den Simulator mit einem Broker und beantwortet `cmd/#`."""
+    client = BrokerClient(host, port)
+    # asyncio hält Tasks nur schwach referenziert
+    tasks = set()
+
+    async def handle(payload):
+        results = await asyncio.gather(*(
+            actuator.execute(device_id, state) for device_id, state in payload["commands"].items()
+        ))
+        if all(results):
+            await client.publish(payload["reply"], {"id": payload["id"], "ok": True})
+
+    def on_message(topic, payload):
+        if isinstance(payload, dict) and "reply" in payload and "commands" in payload:
+            task = asyncio.ensure_future(handle(payload))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    client.on_message = on_message
+    await client.connect()
+    await client.subscribe("cmd/#")
+    return client
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulierte Aktoren am lokalen Broker")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1884)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    async def run():
+        actuator = SimulatedActuator(args.latency, args.jitter, args.failure_rate)
+        client = await run_on_broker(actuator, args.host, args.port)  # noqa: F841 (Referenz halten)
+        print(f"Aktor-Simulator verbunden mit {args.host}:{args.port}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+"""Automationen: zeitgesteuerte und präsenzabhängige Regeln.
+
+Regeln stehen in `automations.json` und überleben Neustarts:
+
+    {"rules": [
+        {"id": "rollos_abends", "type": "cron", "cron": "0 20 * * *",
+         "actions": [{"targets": [{"type": "rollo", "state": {"is_open": false}}]}]},
+        {"id": "licht_aus", "type": "idle", "minutes": 30,
+         "actions": [{"scene": "alles_aus"}]},
+        {"id": "weihnachten", "type": "at", "at": "2026-12-24T18:00",
+         "actions": [{"set": {"wohnzimmer.licht": {"is_on": true}}}]}
+    ]}
+
+- "cron": Minute Stunde Tag Monat Wochentag (0 = Sonntag) mit `*`, `*/n`,
+  `a-b`, `a-b/n` und Listen, Ortszeit.
+- "at": einmalig zum angegebenen Zeitpunkt; danach wird die Regel gelöscht.
+  Verpasste Termine (Panel war aus) laufen beim Start nach, wenn sie nicht
+  älter als `misfire_grace` Sekunden sind.
+- "idle": nach `minutes` Minuten ohne Präsenz (`touch()`, z.B. erkannte
+  Hand), einmal pro Abwesenheit.
+
+Aktionen: `{"scene": id}`, `{"set": {id: {Felder}}}` oder
+`{"targets": [...]}` (Ziele wie in `scenes.json`). Sie laufen über denselben
+Weg wie Befehle von API-Clients: Der Handler übernimmt sie im Render-Thread
+in den `DeviceStateStore`, dessen Listener sie an den Befehlsbus geben.
+
+Die Termine liegen in einem Heap (Einfügen/Entnehmen O(log n)) und werden
+von einem eigenen Thread abgearbeitet, der bis zum nächsten Termin schläft.
+Im Render-Loop kostet `process()` nur das Leeren einer meist leeren Queue;
+`touch()` setzt nur einen Zeitstempel.
+"""
+
+import argparse
+import bisect
+import heapq
+import itertools
+import json
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+RULE_TYPES = ("at", "cron", "idle")
+
+# höchstens so lange schlafen (Uhrzeit-Sprünge, Sommerzeit)
+MAX_SLEEP = 60.0
+
+_CRON_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+class CronSpec:
+    """Cron-Ausdruck mit fünf Feldern; `next_after` sucht den nächsten Termin."""
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron-Ausdruck braucht 5 Felder: {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_cron_field(field, low, high) for field, (low, high) in zip(fields, _CRON_RANGES)
+        )
+        # 7 = Sonntag wie 0
+        self.weekdays = {0 if d == 7 else d for d in weekdays}
+        self._sorted_hours = sorted(self.hours)
+        self._sorted_minutes = sorted(self.minutes)
+        # wie bei Vixie-Cron: sind Tag und Wochentag eingeschränkt, reicht einer
+        self._day_or_weekday = fields[2] != "*" and fields[4] != "*"
+
+    def _day_matches(self, dt):
+        weekday = (dt.weekday() + 1) % 7  # Python: Montag = 0
+        if self._day_or_weekday:
+            return dt.day in self.days or weekday in self.weekdays
+        return dt.day in self.days and weekday in self.weekdays
+
+    def next_after(self, dt):
+        """Nächster Termin strikt nach `dt` (naive Ortszeit)."""
+        dt = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            # Stunde und Minute direkt auf den nächsten passenden Wert setzen
+            if dt.hour not in self.hours:
+                i = bisect.bisect_left(self._sorted_hours, dt.hour)
+                if i == len(self._sorted_hours):
+                    dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+                else:
+                    dt = dt.replace(hour=self._sorted_hours[i], minute=0)
+                continue
+            if dt.minute not in self.minutes:
+                i = bisect.bisect_left(self._sorted_minutes, dt.minute)
+                if i == len(self._sorted_minutes):
+                    dt = dt.replace(minute=0) + timedelta(hours=1)
+                else:
+                    dt = dt.replace(minute=self._sorted_minutes[i])
+                continue
+            return dt
+        raise ValueError(f"Cron-Ausdruck trifft nie zu: {self.expression!r}")
+
+
+def _parse_cron_field(field, low, high):
+    values = set()
+    for part in field.split(","):
+        spec, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (int(v) for v in spec.split("-", 1))
+        else:
+            start = end = int(spec)
+            if step > 1:
+                end = high
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Ungültiges Cron-Feld: {field!r}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class Rule:
+    def __init__(self, rule_id, rule_type, actions, name=None, enabled=True, cron=None, at=None, minutes=None):
+        if rule_type not in RULE_TYPES:
+            raise ValueError(f"Unbekannter Regeltyp: {rule_type}")
+        self.id = rule_id
+        self.type = rule_type
+        self.name = name or rule_id
+        self.actions = actions
+        self.enabled = enabled
+        self.cron = CronSpec(cron) if rule_type == "cron" else None
+        self.at = datetime.fromisoformat(at) if rule_type == "at" else None
+        self.minutes = float(minutes) if rule_type == "idle" else None
+        # idle: Präsenz-Zeitstempel, für den die Regel schon ausgelöst hat
+        self.fired_for = None
+        # erhöht sich bei jeder Neuplanung; ältere Heap-Einträge sind ungültig
+        self.generation = 0
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["id"],
+            data["type"],
+            data.get("actions", []),
+            name=data.get("name"),
+            enabled=data.get("enabled", True),
+            cron=data.get("cron"),
+            at=data.get("at"),
+            minutes=data.get("minutes"),
+        )
+
+    def to_dict(self):
+        data = {"id": self.id, "type": self.type, "name": self.name, "enabled": self.enabled, "actions": self.actions}
+        if self.cron is not None:
+            data["cron"] = self.cron.expression
+        if self.at is not None:
+            data["at"] = self.at.isoformat(timespec="minutes")
+        if self.minutes is not None:
+            data["minutes"] = self.minutes
+        return data
+
+
+class AutomationRequest:
+    """Fällige Aktion einer Regel; gleiche Form wie Befehle von API-Clients."""
+
+    def __init__(self, kind, target, rule):
+        self.kind = kind  # "scene", "set" oder "targets"
+        self.target = target
+        self.rule = rule
+
+
+def action_requests(rule):
+    requests = []
+    for action in rule.actions:
+        if "scene" in action:
+            requests.append(AutomationRequest("scene", action["scene"], rule))
+        elif "set" in action:
+            requests.append(AutomationRequest("set", action["set"], rule))
+        elif "targets" in action:
+            requests.append(AutomationRequest("targets", action["targets"], rule))
+        else:
+            raise ValueError(f"Unbekannte Aktion in Regel {rule.id}: {action}")
+    return requests
+
+
+class AutomationEngine:
+    def __init__(self, path=None, misfire_grace=300.0, clock=time.time):
+        self.path = path
+        self.misfire_grace = misfire_grace
+        self.clock = clock
+        self._rules = {}
+        # (Zeitpunkt, laufende Nummer, Regel-ID, Generation)
+        self._heap = []
+        self._counter = itertools.count()
+        # idle-Regeln, die ausgelöst haben und auf neue Präsenz warten
+        self._dormant = []
+        self._last_presence = clock()
+        self._due = queue.SimpleQueue()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stop = False
+
+        # Kennzahlen
+        self.fired = 0
+        self.errors = 0
+
+        if path:
+            self._load()
+
+    # ---------------------------------------------------------
+    # Regeln verwalten (beliebiger Thread)
+    # ---------------------------------------------------------
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with self._cond:
+            for entry in data.get("rules", []):
+                rule = Rule.from_dict(entry)
+                self._rules[rule.id] = rule
+                self._schedule(rule, self.clock(), startup=True)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._cond:
+            data = {"rules": [rule.to_dict() for rule in self._rules.values()]}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def add_rule(self, data, save=True):
+        """Fügt eine Regel hinzu oder ersetzt sie (gleiche ID). O(log n)."""
+        rule = data if isinstance(data, Rule) else Rule.from_dict(data)
+        action_requests(rule)  # Aktionen früh prüfen
+        with self._cond:
+            old = self._rules.get(rule.id)
+            if old is not None:
+                # Generation fortführen: die Heap-Einträge der alten Regel
+                # tragen die gleiche ID und dürfen für die neue nicht gelten
+                rule.generation = old.generation
+            self._rules[rule.id] = rule
+            self._schedule(rule, self.clock())
+            self._cond.notify()
+        if save:
+            self.save()
+        return rule
+
+    def remove_rule(self, rule_id, save=True):
+        with self._cond:
+            rule = self._rules.pop(rule_id, None)
+            if rule is None:
+                return False
+            # Heap-Eintrag bleibt liegen und wird beim Entnehmen verworfen
+            rule.generation += 1
+        if save:
+            self.save()
+        return True
+
+    def rules(self):
+        with self._cond:
+            return list(self._rules.values())
+
+    def _schedule(self, rule, now, startup=False):
+        """Legt den nächsten Termin der Regel in den Heap (Lock gehalten)."""
+        rule.generation += 1
+        if not rule.enabled:
+            return
+        if rule.type == "cron":
+            due = rule.cron.next_after(datetime.fromtimestamp(now)).timestamp()
+        elif rule.type == "at":
+            due = rule.at.timestamp()
+            if startup and due < now - self.misfire_grace:
+                return  # zu lange verpasst
+        else:
+            due = self._last_presence + rule.minutes * 60
+        heapq.heappush(self._heap, (due, next(self._counter), rule.id, rule.generation))
+
+    # ---------------------------------------------------------
+    # Render-Thread
+    # ---------------------------------------------------------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="automation", daemon=True)
+            self._thread.start()
+        return self
+
+    def touch(self):
+        """Präsenz erkannt (jeden Frame erlaubt: nur ein Zeitstempel)."""
+        self._last_presence = self.clock()
+        if self._dormant:
+            with self._cond:
+                now = self._last_presence
+                for rule in self._dormant:
+                    if self._rules.get(rule.id) is rule:
+                        self._schedule(rule, now)
+                self._dormant = []
+                self._cond.notify()
+
+    def process(self, handler, limit=20):
+        """Fällige Aktionen ausführen. Gibt [(Regel, Diff oder Fehler)] zurück.
+
+        `handler(request)` ist derselbe wie für API-Befehle und wirft
+        `KeyError`/`ValueError` bei unbekannten Geräten oder Szenen.
+        """
+        fired = []
+        for _ in range(limit):
+            try:
+                request = self._due.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fired.append((request.rule, handler(request)))
+            except (KeyError, ValueError) as exc:
+                self.errors += 1
+                fired.append((request.rule, exc))
+        return fired
+
+    def close(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def stats(self):
+        return {"rules": len(self._rules), "scheduled": len(self._heap), "fired": self.fired, "errors": self.errors}
+
+    # ---------------------------------------------------------
+    # Automations-Thread
+    # ---------------------------------------------------------
+    def _run(self):
+        with self._cond:
+            while not self._stop:
+                now = self.clock()
+                changed = False
+                while self._heap and self._heap[0][0] <= now:
+                    _, _, rule_id, generation = heapq.heappop(self._heap)
+                    rule = self._rules.get(rule_id)
+                    if rule is None or rule.generation != generation:
+                        continue  # gelöscht oder neu geplant
+                    changed |= self._fire(rule, now)
+                timeout = MAX_SLEEP
+                if self._heap:
+                    timeout = min(MAX_SLEEP, max(0.0, self._heap[0][0] - now))
+                if changed:
+                    self._cond.release()
+                    try:
+                        self.save()
+                    finally:
+                        self._cond.acquire()
+                    continue
+                self._cond.wait(timeout)
+
+    def _fire(self, rule, now):
+        """Regel ist fällig. Gibt True zurück, wenn Regeln gespeichert werden müssen."""
+        if rule.type == "idle":
+            presence = self._last_presence
+            if now - presence < rule.minutes * 60:
+                self._schedule(rule, now)  # inzwischen wieder Präsenz
+                return False
+            if rule.fired_for == presence:
+                return False
+            rule.fired_for = presence
+            self._dormant.append(rule)
+        self._emit(rule)
+        if rule.type == "at":
+            del self._rules[rule.id]
+            return True
+        if rule.type == "cron":
+            self._schedule(rule, now)
+        return False
+
+    def _emit(self, rule):
+        self.fired += 1
+        for request in action_requests(rule):
+            self._due.put(request)
+
+
+def benchmark(rules=10000, seed=1):
+    """Misst Einplanen und Abarbeiten vieler Cron-Regeln (ohne Warten)."""
+    rng = random.Random(seed)
+    now = [time.time()]
+    engine = AutomationEngine(clock=lambda: now[0])
+    start = time.perf_counter()
+    for i in range(rules):
+        engine.add_rule(
+            {
+                "id": f"regel{i}",
+                "type": "cron",
+                "cron": f"{rng.randrange(60)} {rng.randrange(24)} * * *",
+                "actions": [{"set": {"geraet": {"is_on": bool(i % 2)}}}],
+            },
+            save=False,
+        )
+    add_time = time.perf_counter() - start
+
+    # einen Tag im Schnelldurchlauf: Heap abarbeiten wie der Thread
+    start = time.perf_counter()
+    end = now[0] + 86400
+    fired = 0
+    while engine._heap and engine._heap[0][0] <= end:
+        due, _, rule_id, generation = heapq.heappop(engine._heap)
+        rule = engine._rules[rule_id]
+        if rule.generation != generation:
+            continue
+        now[0] = due
+        engine._fire(rule, due)
+        fired += 1
+    fire_time = time.perf_counter() - start
+    return {
+        "rules": rules,
+        "add_us_per_rule": round(add_time / rules * 1e6, 2),
+        "fired_in_24h": fired,
+        "fire_us_per_rule": round(fire_time / max(1, fired) * 1e6, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Automationen: Regeln anzeigen oder Scheduler messen")
+    parser.add_argument("--rules", default=None, help="Regeldatei (Standard: config.AUTOMATION_RULES_PATH)")
+    parser.add_argument("--bench", type=int, metavar="N", help="Benchmark mit N Cron-Regeln")
+    args = parser.parse_args(argv)
+    if args.bench:
+        print(json.dumps(benchmark(args.bench), indent=2))
+        return
+    from config import AUTOMATION_RULES_PATH
+
+    engine = AutomationEngine(args.rules or AUTOMATION_RULES_PATH)
+    for due, _, rule_id, generation in sorted(engine._heap):
+        rule = engine._rules[rule_id]
+        if rule.generation == generation:
+            print(f"{datetime.fromtimestamp(due):%Y-%m-%d %H:%M}  {rule.type:<5} {rule.id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Kleiner MQTT-artiger Broker für Tests und Lasttests (nur localhost).
+
+Protokoll: eine JSON-Nachricht pro Zeile über TCP.
+
+    Client -> Broker  {"op": "sub", "topic": "cmd/#"}
+    Client -> Broker  {"op": "pub", "topic": "cmd/kueche.licht", "payload": {...}}
+    Broker -> Client  {"op": "msg", "topic": "cmd/kueche.licht", "payload": {...}}
+
+Topics sind wie bei MQTT durch "/" getrennt; `+` passt auf genau eine
+Ebene, `#` (am Ende) auf beliebig viele. Der Broker speichert nichts
+(kein QoS, keine Retained Messages) – Zustellgarantien liefern die
+Bestätigungen des `CommandBus`.
+
+Standalone starten:  python -m devices.broker --port 1884
+"""
+
+import argparse
+import asyncio
+import json
+
+
+def topic_matches(pattern, topic):
+    p_parts = pattern.split("/")
+    t_parts = topic.split("/")
+    for i, part in enumerate(p_parts):
+        if part == "#":
+            return True
+        if i >= len(t_parts):
+            return False
+        if part != "+" and part != t_parts[i]:
+            return False
+    return len(p_parts) == len(t_parts)
+
+
+class LocalBroker:
+    def __init__(self, host="127.0.0.1", port=1884):
+        self.host = host
+        self.port = port
+        self._server = None
+        # writer -> Menge der abonnierten Topic-Muster
+        self._subscriptions = {}
+        self.forwarded = 0
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        # Port 0 = freien Port wählen lassen
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for writer in list(self._subscriptions):
+            writer.close()
+        self._subscriptions.clear()
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle_client(self, reader, writer):
+        self._subscriptions[writer] = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    continue
+                op = msg.get("op")
+                if op == "sub":
+                    self._subscriptions[writer].add(msg["topic"])
+                elif op == "unsub":
+                    self._subscriptions[writer].discard(msg["topic"])
+                elif op == "pub":
+                    await self._forward(msg["topic"], msg.get("payload"))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._subscriptions.pop(writer, None)
+            writer.close()
+
+    async def _forward(self, topic, payload):
+        data = (json.dumps({"op": "msg", "topic": topic, "payload": payload}) + "\n").encode()
+        for writer, patterns in list(self._subscriptions.items()):
+            if any(topic_matches(p, topic) for p in patterns):
+                try:
+                    writer.write(data)
+                    self.forwarded += 1
+                except ConnectionError:
+                    self._subscriptions.pop(writer, None)
+
+
+class BrokerClient:
+    """Asynchroner Client für `LocalBroker`.
+
+    `on_message(topic, payload)` wird für jede eingehende Nachricht aufgerufen
+    (im Event-Loop des Clients).
+    """
+
+    def __init__(self, host="127.0.0.1", port=1884, on_message=None):
+        self.host = host
+        self.port = port
+        self.on_message = on_message
+        self._reader = None
+        self._writer = None
+        self._task = None
+
+    @property
+    def connected(self):
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._task = asyncio.ensure_future(self._read_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def subscribe(self, topic):
+        await self._send({"op": "sub", "topic": topic})
+
+    async def publish(self, topic, payload):
+        await self._send({"op": "pub", "topic": topic, "payload": payload})
+
+    async def _send(self, msg):
+        if not self.connected:
+            raise ConnectionError("nicht mit dem Broker verbunden")
+        self._writer.write((json.dumps(msg) + "\n").encode())
+        await self._writer.drain()
+
+    async def _read_loop(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    continue
+                if msg.get("op") == "msg" and self.on_message is not None:
+                    self.on_message(msg["topic"], msg.get("payload"))
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokaler MQTT-artiger Test-Broker")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1884)
+    args = parser.parse_args()
+    print(f"Broker läuft auf {args.host}:{args.port}")
+    try:
+        asyncio.run(LocalBroker(args.host, args.port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+"""Geräte-Befehlsbus.
+
+Widgets (über den zentralen Gerätezustand) veröffentlichen Zustände mit
+`CommandBus.publish(device_id, state)`. Der Aufruf legt den Befehl nur in
+den Event-Loop eines Hintergrund-Threads und kehrt sofort zurück – der
+Render-Loop blockiert nie. Dort wird der Befehl über einen Transport
+gesendet, auf die Bestätigung gewartet und bei Timeout mit Backoff erneut
+gesendet. Ergebnisse holt der Haupt-Thread mit `poll()` ab.
+
+Pro Gerät gilt "nur der letzte Wert zählt": Mit `max_rate` werden höchstens
+so viele Befehle pro Sekunde gesendet; Zwischenwerte eines Slider-Zugs, die
+noch nicht gesendet wurden, werden verworfen (`coalesced`), und ein neuer
+Befehl beendet das Warten/Wiederholen des vorherigen (`superseded`). Der
+letzte Wert wird immer gesendet – sofort mit `publish(..., final=True)`
+oder `flush(device_id)` (z.B. beim Loslassen), sonst am Ende des Intervalls.
+
+Transporte:
+- `InProcessTransport`: Simulator im selben Prozess (Standard, ohne Netz).
+- `MqttTransport`: MQTT-artiges JSON-Zeilen-Protokoll über einen Broker
+  (`devices/broker.py`), Befehle auf `cmd/<gateway>`, Bestätigungen auf
+  `ack/<client_id>`.
+
+Eine Nachricht an den Transport enthält immer die Befehle für ein Gateway
+({device_id: state}); Einzelbefehle sind Nachrichten mit einem Gerät,
+`publish_batch` (z.B. Szenen) bündelt je Gateway und sendet alle Gateways
+parallel.
+"""
+
+import asyncio
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+
+from devices.actuator import SimulatedActuator
+from devices.broker import BrokerClient
+
+
+# Felder, die nur die Darstellung betreffen und nicht an Geräte gehen
+UI_ONLY_FIELDS = frozenset({"slider_open", "last_brightness", "last_position"})
+
+
+def command_payload(state):
+    """Gerätezustand ohne reine UI-Felder."""
+    return {k: v for k, v in state.items() if k not in UI_ONLY_FIELDS}
+
+
+class CommandResult:
+    __slots__ = ("device_id", "msg_id", "state", "ok", "attempts", "latency", "error")
+
+    def __init__(self, device_id, msg_id, state, ok, attempts, latency, error=None):
+        self.device_id = device_id
+        self.msg_id = msg_id
+        self.state = state
+        self.ok = ok
+        self.attempts = attempts
+        self.latency = latency
+        self.error = error
+
+    def __repr__(self):
+        status = "ok" if self.ok else f"fehlgeschlagen ({self.error})"
+        return f"<CommandResult {self.device_id} #{self.msg_id} {status} nach {self.attempts} Versuch(en)>"
+
+
+class InProcessTransport:
+    """Sendet Befehle direkt an einen `SimulatedActuator` im selben Prozess."""
+
+    def __init__(self, actuator=None):
+        self.actuator = actuator or SimulatedActuator()
+        self._bus = None
+        self._tasks = set()
+
+    async def start(self, bus):
+        self._bus = bus
+
+    async def stop(self):
+        # simulierte Ausführungen laufen nicht über das Ende des Loops hinaus
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def send(self, msg_id, gateway, commands):
+        async def run():
+            results = await asyncio.gather(*(
+                self.actuator.execute(device_id, state) for device_id, state in commands.items()
+            ))
+            if all(results):
+                self._bus.acknowledge(msg_id, True)
+
+        task = asyncio.ensure_future(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+class MqttTransport:
+    """Sendet Befehle über den MQTT-artigen Broker (siehe `devices/broker.py`)."""
+
+    def __init__(self, host="127.0.0.1", port=1884, client_id="panel"):
+        self.ack_topic = f"ack/{client_id}"
+        self.client = BrokerClient(host, port, on_message=self._on_message)
+        self._bus = None
+
+    async def start(self, bus):
+        self._bus = bus
+        await self._connect()
+
+    async def stop(self):
+        await self.client.close()
+
+    async def _connect(self):
+        await self.client.connect()
+        await self.client.subscribe(self.ack_topic)
+
+    def _on_message(self, topic, payload):
+        if topic == self.ack_topic and isinstance(payload, dict):
+            self._bus.acknowledge(payload.get("id"), payload.get("ok", True), payload.get("error"))
+
+    async def send(self, msg_id, gateway, commands):
+        if not self.client.connected:
+            await self._connect()
+        await self.client.publish(
+            f"cmd/{gateway}",
+            {"id": msg_id, "commands": commands, "reply": self.ack_topic},
+        )
+
+
+class CommandBus:
+    """Nicht blockierender Befehlsbus mit Bestätigung, Timeout und Retries.
+
+    Args:
+        transport: `InProcessTransport` oder `MqttTransport`.
+        timeout: Wartezeit (Sekunden) auf die Bestätigung pro Versuch.
+        retries: Anzahl Wiederholungen nach dem ersten Versuch.
+        backoff: Wartezeit vor der ersten Wiederholung, verdoppelt sich je Versuch.
+        max_rate: höchstens so viele Befehle pro Sekunde und Gerät (None = unbegrenzt).
+        gateway_of: Funktion device_id -> Gateway-Name (Standard: ein Gateway).
+    """
+
+    def __init__(self, transport, timeout=1.0, retries=3, backoff=0.1, max_rate=None, gateway_of=None):
+        self.transport = transport
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_rate = max_rate
+        self.gateway_of = gateway_of or (lambda device_id: "default")
+
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._tasks = set()
+        # pro Gerät (nur im Event-Loop): wartender letzter Wert, laufende
+        # Zustellung, frühester nächster Sendezeitpunkt, geplanter Timer
+        self._latest = {}
+        self._inflight = {}
+        self._next_send = {}
+        self._timers = {}
+        # Zustellungs-Task -> Geräte, die sie enthält
+        self._task_devices = {}
+        self._results = queue.SimpleQueue()
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._closed = False
+        self.start_error = None
+
+        # Kennzahlen
+        # published/sent/acked/failed zählen Gerätebefehle, messages die
+        # Nachrichten an die Gateways (ein Batch = eine Nachricht je Gateway)
+        self.published = 0
+        self.sent = 0
+        self.messages = 0
+        self.acked = 0
+        self.failed = 0
+        self.retried = 0
+        self.timeouts = 0
+        self.coalesced = 0
+        self.superseded = 0
+        # beim Schließen abgebrochen (wartend oder in Zustellung)
+        self.cancelled = 0
+        self.latencies = deque(maxlen=1000)
+
+    # ---------------------------------------------------------
+    # Haupt-Thread
+    # ---------------------------------------------------------
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._run_loop, name="command-bus", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5.0)
+        return self
+
+    def publish(self, device_id, state, final=False):
+        """Sendet `state` an das Gerät (nicht blockierend). Gibt die Befehls-ID zurück.
+
+        `final=True` umgeht die Ratenbegrenzung (z.B. letzter Wert beim Loslassen).
+        Nach `close()` wirkungslos (gibt None zurück).
+        """
+        if self._closed:
+            return None
+        msg_id = next(self._ids)
+        self.published += 1
+        self._loop.call_soon_threadsafe(self._submit, msg_id, device_id, command_payload(state), final)
+        return msg_id
+
+    def publish_batch(self, commands):
+        """Sendet mehrere Gerätezustände als Transaktion (nicht blockierend).
+
+        Die Befehle werden je Gateway zu einer Nachricht gebündelt und alle
+        Gateways gleichzeitig angesprochen; die Ratenbegrenzung gilt nicht.
+        """
+        if self._closed:
+            return []
+        groups = {}
+        for device_id, state in commands.items():
+            groups.setdefault(self.gateway_of(device_id), {})[device_id] = command_payload(state)
+        self.published += len(commands)
+        batches = [(next(self._ids), gateway, group) for gateway, group in groups.items()]
+        self._loop.call_soon_threadsafe(self._submit_batches, batches)
+        return [msg_id for msg_id, _, _ in batches]
+
+    def flush(self, device_id):
+        """Sendet einen noch wartenden Wert für `device_id` sofort."""
+        if self._closed:
+            return
+        self._loop.call_soon_threadsafe(self._send_latest, device_id)
+
+    @property
+    def outstanding(self):
+        """Veröffentlichte Befehle, die weder abgeschlossen noch verworfen sind."""
+        return self.published - self.acked - self.failed - self.coalesced - self.superseded - self.cancelled
+
+    def poll(self):
+        """Abgeschlossene Befehle seit dem letzten Aufruf (`CommandResult`-Liste)."""
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def close(self):
+        """Bricht wartende Werte, Zustellungen und Wiederholungen ab und stoppt den Transport.
+
+        Danach sind `publish`, `publish_batch` und `flush` wirkungslos.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._loop is None or self._thread is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        try:
+            future.result(timeout=2.0)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def stats(self):
+        lat = sorted(self.latencies)
+
+        def pct(p):
+            return round(lat[min(len(lat) - 1, int(p * len(lat)))] * 1000, 1) if lat else None
+
+        return {
+            "published": self.published,
+            "sent": self.sent,
+            "messages": self.messages,
+            "acked": self.acked,
+            "failed": self.failed,
+            "retried": self.retried,
+            "timeouts": self.timeouts,
+            "coalesced": self.coalesced,
+            "superseded": self.superseded,
+            "cancelled": self.cancelled,
+            "in_flight": len(self._pending),
+            "latency_ms_p50": pct(0.5),
+            "latency_ms_p95": pct(0.95),
+        }
+
+    # ---------------------------------------------------------
+    # Event-Loop-Thread
+    # ---------------------------------------------------------
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self.transport.start(self))
+        except Exception as exc:
+            # z.B. Broker nicht erreichbar: Befehle laufen in Timeouts/Retries
+            self.start_error = exc
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _shutdown(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self.cancelled += len(self._latest)
+        self._latest.clear()
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.transport.stop()
+
+    def acknowledge(self, msg_id, ok=True, error=None):
+        """Vom Transport im Event-Loop aufgerufen, wenn eine Antwort eintrifft."""
+        future = self._pending.get(msg_id)
+        if future is not None and not future.done():
+            future.set_result((ok, error))
+
+    def _submit(self, msg_id, device_id, state, final):
+        if device_id in self._latest:
+            # noch nicht gesendeter Zwischenwert wird ersetzt
+            self.coalesced += 1
+        self._latest[device_id] = (msg_id, state)
+        now = self._loop.time()
+        next_send = self._next_send.get(device_id, now)
+        if final or now >= next_send:
+            self._send_latest(device_id)
+        elif device_id not in self._timers:
+            self._timers[device_id] = self._loop.call_at(next_send, self._send_latest, device_id)
+
+    def _send_latest(self, device_id):
+        timer = self._timers.pop(device_id, None)
+        if timer is not None:
+            timer.cancel()
+        entry = self._latest.pop(device_id, None)
+        if entry is None:
+            return
+        msg_id, state = entry
+        if self.max_rate:
+            self._next_send[device_id] = self._loop.time() + 1.0 / self.max_rate
+        self._start_delivery(msg_id, self.gateway_of(device_id), {device_id: state})
+
+    def _submit_batches(self, batches):
+        for msg_id, gateway, commands in batches:
+            for device_id in commands:
+                # wartende Einzelwerte sind durch die Transaktion überholt
+                if self._latest.pop(device_id, None) is not None:
+                    self.coalesced += 1
+                timer = self._timers.pop(device_id, None)
+                if timer is not None:
+                    timer.cancel()
+            self._start_delivery(msg_id, gateway, commands)
+
+    def _start_delivery(self, msg_id, gateway, commands):
+        devices = set(commands)
+        for device_id in devices:
+            previous = self._inflight.get(device_id)
+            if previous is None or previous.done():
+                continue
+            # älterer Wert: nicht weiter auf Bestätigung warten / wiederholen –
+            # aber nur, wenn die neue Nachricht alle Geräte der alten abdeckt
+            if self._task_devices.get(previous, set()) <= devices:
+                previous.cancel()
+
+        task = asyncio.ensure_future(self._deliver(msg_id, gateway, commands))
+        self._task_devices[task] = devices
+        for device_id in devices:
+            self._inflight[device_id] = task
+        # asyncio hält Tasks nur schwach referenziert
+        self._tasks.add(task)
+        task.add_done_callback(self._delivery_done)
+
+    def _delivery_done(self, task):
+        self._tasks.discard(task)
+        devices = self._task_devices.pop(task, ())
+        if task.cancelled():
+            if self._closed:
+                self.cancelled += len(devices)
+            else:
+                self.superseded += len(devices)
+        for device_id in devices:
+            if self._inflight.get(device_id) is task:
+                del self._inflight[device_id]
+
+    async def _deliver(self, msg_id, gateway, commands):
+        started = time.monotonic()
+        ok, error = False, "timeout"
+        attempt = 0
+        future = self._loop.create_future()
+        self._pending[msg_id] = future
+        try:
+            for attempt in range(1, self.retries + 2):
+                if attempt > 1:
+                    self.retried += 1
+                    await asyncio.sleep(self.backoff * 2 ** (attempt - 2))
+                try:
+                    await self.transport.send(msg_id, gateway, commands)
+                    self.sent += len(commands)
+                    self.messages += 1
+                except (ConnectionError, OSError) as exc:
+                    error = f"verbindung: {exc}"
+                    continue
+                try:
+                    # shield: eine verspätete Bestätigung gilt auch für den nächsten Versuch
+                    ok, error = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+                    break
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    error = "timeout"
+        finally:
+            self._pending.pop(msg_id, None)
+
+        latency = time.monotonic() - started
+        if ok:
+            self.acked += len(commands)
+            self.latencies.append(latency)
+        else:
+            self.failed += len(commands)
+        for device_id, state in commands.items():
+            self._results.put(CommandResult(device_id, msg_id, state, ok, attempt, latency, None if ok else error))
+
+
+def create_command_bus(backend, **options):
+    """Erzeugt und startet den Bus für `backend` ("simulated", "mqtt" oder None)."""
+    if backend is None:
+        return None
+    bus_options = {k: options[k] for k in ("timeout", "retries", "backoff", "max_rate", "gateway_of") if k in options}
+    if backend == "simulated":
+        transport = InProcessTransport(SimulatedActuator(
+            latency=options.get("latency", 0.05),
+            failure_rate=options.get("failure_rate", 0.0),
+        ))
+    elif backend == "mqtt":
+        transport = MqttTransport(options.get("host", "127.0.0.1"), options.get("port", 1884))
+    else:
+        raise ValueError(f"Unbekanntes Geräte-Backend: {backend}")
+    return CommandBus(transport, **bus_options).start()
@@ -0,0 +1,132 @@
+"""Lasttest für den Befehlsbus gegen simulierte Aktoren.
+
+    python -m devices.loadtest --commands 5000 --devices 50 --latency 0.02 --failure-rate 0.05
+    python -m devices.loadtest --transport mqtt     # über einen lokalen Broker
+    python -m devices.loadtest --batch 40 --gateways 3   # Szenen-Transaktionen
+
+Misst, wie lange `publish()` im aufrufenden Thread dauert (darf den
+Render-Loop nie blockieren), Durchsatz, Bestätigungs-Latenzen und die
+Zahl der Timeouts/Wiederholungen.
+
+Der Durchsatz wird getrennt angegeben: veröffentlicht, tatsächlich
+gesendet und bestätigt pro Sekunde, jeweils in Gerätebefehlen, dazu die
+Nachrichten an die Gateways (bei `--batch` bündelt eine Nachricht mehrere
+Geräte). Pro Gerät zählt nur der letzte Wert:
+`--max-rate` (Standard wie im Panel: `COMMAND_MAX_RATE` aus config.py)
+fasst schnelle Folgen zusammen (`coalesced`); mit `--max-rate 0` wird jeder
+Befehl sofort gesendet und überholt die noch laufende Zustellung des
+vorherigen (`superseded`). Beides sind verworfene Zwischenwerte, keine
+Zustellungen.
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+from devices.actuator import SimulatedActuator, run_on_broker
+from devices.broker import LocalBroker
+from config import COMMAND_MAX_RATE
+from devices.command_bus import CommandBus, InProcessTransport, MqttTransport
+
+
+def start_broker_with_actuator(actuator):
+    """Startet Broker + Aktor-Simulator in einem eigenen Thread. Gibt den Port zurück."""
+    ready = threading.Event()
+    info = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        broker = loop.run_until_complete(LocalBroker(port=0).start())
+        # Referenzen halten, sonst räumt der GC Client und Lese-Task ab
+        info["client"] = loop.run_until_complete(run_on_broker(actuator, port=broker.port))
+        info["broker"] = broker
+        info["port"] = broker.port
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="loadtest-broker", daemon=True).start()
+    ready.wait(timeout=5.0)
+    return info["port"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m devices.loadtest", description="Lasttest für den Befehlsbus")
+    parser.add_argument("--transport", choices=["inproc", "mqtt"], default="inproc")
+    parser.add_argument("--commands", type=int, default=2000)
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=0.0, help="Befehle pro Sekunde (0 = so schnell wie möglich)")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=0.5)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--batch", type=int, default=0, help="Geräte je Transaktion (0 = Einzelbefehle)")
+    parser.add_argument("--gateways", type=int, default=1)
+    parser.add_argument("--max-rate", type=float, default=COMMAND_MAX_RATE,
+                        help=f"Befehle pro Sekunde und Gerät, Rest wird zusammengefasst "
+                             f"(Standard {COMMAND_MAX_RATE} wie im Panel, 0 = unbegrenzt)")
+    args = parser.parse_args(argv)
+
+    actuator = SimulatedActuator(args.latency, args.jitter, args.failure_rate, seed=1)
+    if args.transport == "mqtt":
+        transport = MqttTransport(port=start_broker_with_actuator(actuator), client_id="loadtest")
+    else:
+        transport = InProcessTransport(actuator)
+    bus = CommandBus(transport, timeout=args.timeout, retries=args.retries, backoff=0.05, max_rate=args.max_rate or None,
+                     gateway_of=lambda device_id: f"gw{int(device_id.split('.')[1]) % args.gateways}").start()
+
+    publish_times = []
+    started = time.perf_counter()
+    for i in range(args.commands):
+        t = time.perf_counter()
+        if args.batch:
+            bus.publish_batch({f"sim.{d}": {"is_on": True, "brightness": i % 101} for d in range(args.batch)})
+        else:
+            bus.publish(f"sim.{i % args.devices}", {"is_on": True, "brightness": i % 101})
+        publish_times.append(time.perf_counter() - t)
+        if args.rate:
+            time.sleep(max(0.0, started + (i + 1) / args.rate - time.perf_counter()))
+
+    # Endwert jedes Geräts wie beim Loslassen sofort senden
+    for d in range(min(args.devices, args.commands)):
+        bus.flush(f"sim.{d}")
+
+    done = 0
+    deadline = time.monotonic() + args.timeout * (args.retries + 2) + 5.0
+    while bus.outstanding > 0 and time.monotonic() < deadline:
+        done += len(bus.poll())
+        time.sleep(0.01)
+    done += len(bus.poll())
+    elapsed = time.perf_counter() - started
+    bus.close()
+
+    publish_times.sort()
+    report = bus.stats()
+
+    def per_second(count):
+        return round(count / elapsed, 1) if elapsed else None
+
+    report.update({
+        "max_rate": args.max_rate or None,
+        "completed": done,
+        "seconds": round(elapsed, 3),
+        # zugestellt = gesendet und bestätigt; verworfene Zwischenwerte zählen nicht
+        "published_per_second": per_second(bus.published),
+        "sent_per_second": per_second(bus.sent),
+        "messages_per_second": per_second(bus.messages),
+        "acked_per_second": per_second(bus.acked),
+        "discarded": bus.coalesced + bus.superseded,
+        "publish_us_p50": round(publish_times[len(publish_times) // 2] * 1e6, 1),
+        "publish_us_max": round(publish_times[-1] * 1e6, 1),
+        "actuator_executed": actuator.executed,
+        "actuator_dropped": actuator.dropped,
+    })
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    main()
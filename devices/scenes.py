@@ -0,0 +1,167 @@
+"""Szenen: mehrere Geräte in einem Schritt schalten.
+
+Szenen werden in `scenes.json` definiert. Jede Szene besteht aus Zielen,
+die Geräte nach Typ, Raum oder ID auswählen und ihnen Zustandsfelder
+zuweisen; spätere Ziele überschreiben frühere:
+
+    {"id": "abend", "name": "Abend", "targets": [
+        {"type": "light", "state": {"is_on": true, "brightness": 40}},
+        {"type": "rollo", "state": {"is_open": false}},
+        {"device": "wohnzimmer.licht", "state": {"brightness": 70}}
+    ]}
+
+Der Typ "room" steht für die Raum-Schalter der HOME-Ansicht.
+`resolve_scene` berechnet daraus den Zustands-Diff, der als eine
+Transaktion in den `DeviceStateStore` übernommen wird.
+"""
+
+import json
+import os
+
+
+ROOM_SWITCH = "room"
+
+# Zustandsfelder mit festem Wertebereich: bool oder (min, max) in Prozent
+FIELD_RANGES = {
+    "is_on": bool,
+    "is_open": bool,
+    "on": bool,
+    "slider_open": bool,
+    "brightness": (0, 100),
+    "last_brightness": (0, 100),
+    "position": (0, 100),
+    "last_position": (0, 100),
+}
+
+
+class SceneDef:
+    def __init__(self, scene_id, name, targets):
+        self.id = scene_id
+        self.name = name
+        self.targets = targets
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["id"], data.get("name", data["id"]), data.get("targets", []))
+
+
+def load_scenes(path):
+    """Liest `scenes.json`. Fehlt die Datei, gibt es keine Szenen."""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [SceneDef.from_dict(s) for s in data.get("scenes", [])]
+
+
+def normalize_state(device_type, state, fields=None):
+    """Hält abgeleitete Widget-Felder konsistent (wie nach einer Geste).
+
+    `fields` sind die angefragten Felder (ohne Angabe: keine); eine
+    Rollo-Position ohne `is_open` öffnet bzw. schließt wie die Scrollgeste.
+    """
+    if device_type == "light":
+        if state.get("is_on") and state.get("brightness", 0) <= 0:
+            # Einschalten ohne Helligkeit: letzte Helligkeit wie beim Antippen
+            state["brightness"] = state.get("last_brightness", 100)
+        if state.get("brightness", 0) <= 0:
+            state["brightness"] = 0
+            state["is_on"] = False
+        elif state.get("is_on"):
+            state["last_brightness"] = state["brightness"]
+        if "is_on" in state:
+            state["slider_open"] = state["is_on"]
+    elif device_type == "rollo":
+        if fields and "position" in fields and "is_open" not in fields:
+            state["is_open"] = fields["position"] > 0
+        if state.get("is_open") and state.get("position", 100) <= 0:
+            state["position"] = state.get("last_position", 100)
+        if state.get("is_open") is False:
+            state["position"] = 0
+        elif state.get("position", 100) > 0:
+            state["last_position"] = state.get("position", 100)
+        if "is_open" in state:
+            state["slider_open"] = state["is_open"]
+    return state
+
+
+def _targets_device(target, device):
+    if "device" in target and target["device"] != device.id:
+        return False
+    if "type" in target and target["type"] != device.type:
+        return False
+    if "room" in target and target["room"] != device.room:
+        return False
+    return True
+
+
+def resolve_scene(scene, registry, store, room_state_id):
+    """Berechnet {state_id: neuer Zustand} für alle von der Szene betroffenen Geräte.
+
+    `room_state_id(name)` liefert die State-ID eines HOME-Raum-Schalters.
+    """
+    return resolve_targets(scene.targets, registry, store, room_state_id)
+
+
+def resolve_targets(targets, registry, store, room_state_id):
+    """Wie `resolve_scene`, aber für eine Liste von Zielen (z.B. aus Automationen)."""
+    changes = {}
+    requested = {}
+    for target in targets:
+        fields = target.get("state", {})
+        if target.get("type") == ROOM_SWITCH:
+            for name in registry.names():
+                if "room" in target and target["room"] != name:
+                    continue
+                state_id = room_state_id(name)
+                state = changes.get(state_id) or store.get(state_id, {"on": False})
+                state.update(fields)
+                changes[state_id] = state
+            continue
+        for device in registry.devices():
+            if not _targets_device(target, device):
+                continue
+            state = changes.get(device.id) or store.get(device.id, {})
+            state.update(fields)
+            changes[device.id] = state
+            requested.setdefault(device.id, {}).update(fields)
+
+    for state_id, state in changes.items():
+        device = registry.device(state_id)
+        if device is not None:
+            normalize_state(device.type, state, requested.get(state_id))
+    return changes
+
+
+def validate_fields(state_id, fields):
+    """Prüft Feldwerte von außen (API, Automationen); `ValueError` bei ungültigen Werten."""
+    for name, value in fields.items():
+        allowed = FIELD_RANGES.get(name)
+        if allowed is bool:
+            if not isinstance(value, bool):
+                raise ValueError(f"{state_id}: {name} muss true oder false sein")
+        elif allowed is not None:
+            low, high = allowed
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+                raise ValueError(f"{state_id}: {name} muss eine Zahl von {low} bis {high} sein")
+
+
+def resolve_changes(target, registry, store):
+    """Ergänzt Teiländerungen {state_id: {Felder}} zu vollständigen Zuständen.
+
+    Erlaubt sind Geräte aus der Registry und Raum-Schalter ("room:<Name>");
+    bei unbekannten IDs wird `KeyError` geworfen, bei ungültigen Feldwerten
+    `ValueError`.
+    """
+    changes = {}
+    for state_id, fields in target.items():
+        device = registry.device(state_id)
+        if device is None and not (
+            isinstance(state_id, str) and state_id.startswith("room:") and state_id[len("room:"):] in registry.names()
+        ):
+            raise KeyError(f"Unbekanntes Gerät: {state_id}")
+        validate_fields(state_id, fields)
+        state = store.get(state_id, {})
+        state.update(fields)
+        changes[state_id] = normalize_state(device.type, state, fields) if device is not None else state
+    return changes
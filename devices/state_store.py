@@ -0,0 +1,244 @@
+"""Zentraler Gerätezustand mit Write-Behind-Persistenz.
+
+`DeviceStateStore` hält den Zustand aller Geräte (device_id -> Dict) und
+eine fortlaufende Versionsnummer. Geändert wird nur im Haupt-Thread.
+
+`StatePersister` schreibt im Hintergrund:
+- Änderungen werden gesammelt (pro Gerät zählt nur der letzte Wert, ein
+  Slider-Zug erzeugt also nur wenige Journal-Zeilen) und alle
+  `flush_interval` Sekunden an das Journal (`journal.jsonl`) angehängt.
+- Nach `compact_after` Journal-Zeilen wird ein kompakter Snapshot
+  (`snapshot.json`) atomar geschrieben (tmp-Datei + `os.replace`) und das
+  Journal geleert.
+
+Beim Start wird der Snapshot geladen und das Journal ab dessen Version
+nachgespielt; eine abgeschnittene letzte Zeile (Stromausfall) wird ignoriert.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+
+
+class StatePersister:
+    def __init__(self, directory, flush_interval=0.5, compact_after=1000):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.compact_after = compact_after
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self.journal_path = os.path.join(directory, "journal.jsonl")
+
+        # vom Hintergrund-Thread gespiegelter, persistierter Stand
+        self._persisted = {}
+        self._persisted_version = 0
+        self._journal_lines = 0
+        self._journal = None
+
+        self._dirty = {}
+        self._dirty_version = 0
+        self._lock = threading.Lock()
+        # serialisiert Journal-/Snapshot-Zugriffe (Hintergrund-Thread vs. flush())
+        self._io_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+
+        self.journal_writes = 0
+        self.coalesced = 0
+        self.snapshots = 0
+
+    # ---------------------------------------------------------
+    # Wiederherstellen
+    # ---------------------------------------------------------
+    def restore(self):
+        """Lädt Snapshot + Journal. Gibt (states, version) zurück."""
+        os.makedirs(self.directory, exist_ok=True)
+        states, version = {}, 0
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            states = snapshot.get("states", {})
+            version = snapshot.get("version", 0)
+        except (OSError, ValueError):
+            pass
+
+        snapshot_version = version
+        lines = 0
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # unvollständig geschriebene letzte Zeile
+                        break
+                    lines += 1
+                    # Einträge bis zur Snapshot-Version sind schon enthalten
+                    if entry["v"] > snapshot_version:
+                        states[entry["id"]] = entry["s"]
+                        version = max(version, entry["v"])
+        except OSError:
+            pass
+
+        self._persisted = dict(states)
+        self._persisted_version = version
+        self._journal_lines = lines
+        return states, version
+
+    # ---------------------------------------------------------
+    # Schreiben (Haupt-Thread)
+    # ---------------------------------------------------------
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="state-persister", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def mark(self, device_id, state, version):
+        """Merkt eine Änderung vor (nicht blockierend)."""
+        with self._lock:
+            if device_id in self._dirty:
+                self.coalesced += 1
+            self._dirty[device_id] = state
+            self._dirty_version = version
+
+    def flush(self):
+        """Schreibt alle vorgemerkten Änderungen sofort (blockierend)."""
+        self._write_pending()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+        self._write_pending()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    # ---------------------------------------------------------
+    # Hintergrund-Thread
+    # ---------------------------------------------------------
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            try:
+                self._write_pending()
+            except OSError:
+                # z.B. Datenträger voll: beim nächsten Durchlauf erneut versuchen
+                time.sleep(self.flush_interval)
+
+    def _write_pending(self):
+        with self._io_lock:
+            self._write_pending_locked()
+
+    def _write_pending_locked(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, {}
+            version = self._dirty_version
+
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        try:
+            # alle Einträge eines Durchlaufs tragen dieselbe (neueste) Version
+            for device_id, state in dirty.items():
+                self._journal.write(json.dumps({"v": version, "id": device_id, "s": state}, separators=(",", ":")) + "\n")
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+        except OSError:
+            # nicht geschriebene Änderungen wieder vormerken (neuere gewinnen)
+            with self._lock:
+                for device_id, state in dirty.items():
+                    self._dirty.setdefault(device_id, state)
+            raise
+        self._persisted.update(dirty)
+        self._persisted_version = version
+        self._journal_lines += len(dirty)
+        self.journal_writes += len(dirty)
+
+        if self._journal_lines >= self.compact_after:
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": self._persisted_version, "states": self._persisted}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        # Journal erst nach dem Snapshot leeren; ältere Einträge würden beim
+        # Start ohnehin anhand der Version übersprungen
+        self._journal.close()
+        self._journal = open(self.journal_path, "w", encoding="utf-8")
+        self._journal_lines = 0
+        self.snapshots += 1
+
+
+class DeviceStateStore:
+    """Gerätezustände (device_id -> Dict) mit Versionsnummer und Listenern.
+
+    `listeners` sind Funktionen (changes, version), die nach jeder Änderung
+    einmal mit dem Zustands-Diff {device_id: neuer Zustand} aufgerufen werden –
+    bei `apply()` (z.B. Szenen) einmal für alle Geräte gemeinsam.
+    """
+
+    def __init__(self, persister=None):
+        self.persister = persister
+        self._states = {}
+        self.version = 0
+        self.listeners = []
+        if persister is not None:
+            self._states, self.version = persister.restore()
+            persister.start()
+
+    def __contains__(self, device_id):
+        return device_id in self._states
+
+    def get(self, device_id, default=None):
+        state = self._states.get(device_id)
+        return dict(state) if state is not None else default
+
+    def items(self):
+        return [(device_id, dict(state)) for device_id, state in self._states.items()]
+
+    def set(self, device_id, state):
+        """Übernimmt den neuen Zustand. Gibt False zurück, wenn sich nichts ändert."""
+        return bool(self.apply({device_id: state}))
+
+    def apply(self, changes):
+        """Übernimmt mehrere Zustände als eine Transaktion (eine Version).
+
+        Gibt den tatsächlich geänderten Teil als Dict zurück.
+        """
+        diff = {
+            device_id: dict(state)
+            for device_id, state in changes.items()
+            if self._states.get(device_id) != state
+        }
+        if not diff:
+            return {}
+        self._states.update(diff)
+        self.version += 1
+        if self.persister is not None:
+            for device_id, state in diff.items():
+                self.persister.mark(device_id, state, self.version)
+        for listener in self.listeners:
+            listener(diff, self.version)
+        return diff
+
+    def update(self, device_id, **fields):
+        """Ändert einzelne Felder eines Gerätezustands."""
+        state = self.get(device_id, {})
+        state.update(fields)
+        return self.set(device_id, state)
+
+    def close(self):
+        if self.persister is not None:
+            self.persister.close()
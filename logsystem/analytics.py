@@ -0,0 +1,292 @@
+"""Streaming-Auswertung bestehender Aktivitäts-Logs.
+
+Liest eine oder viele `activity_log.csv`-Dateien (auch `.gz`/`.zst`-Segmente)
+zeilenweise mit konstantem Speicherbedarf und berechnet:
+
+- Sitzungen (Anmeldung bis Abmeldung/Programmende) je Nutzer
+- Verweildauer je View (HOME und Raum-Views)
+- Interaktionsraten (Aktionen pro Sitzungsminute)
+- Spitzenzeiten (Aktionen je Stunde und Wochentag)
+
+Jede Eingabe ist eine Einheit: eine Datei oder ein Log-Ordner einer
+Installation (dessen Segmente laut Manifest in Zeitreihenfolge gelesen
+werden). Einheiten werden parallel in einem Prozess-Pool ausgewertet und
+die Teilergebnisse anschließend zusammengeführt.
+
+    python -m logsystem.analytics logs/install_a logs/b/activity_log.csv.gz --jobs 4 --format csv
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from logsystem.segments import SegmentedLog, iter_log_rows, open_segment
+
+
+LOGIN = "Anmeldung erfolgreich"
+LOGOUT = "Abmeldung durchgeführt"
+PROGRAM_END = "Programm beendet"
+HOME = "HOME"
+
+# Obergrenzen (Sekunden) der Histogramm-Klassen für Sitzungsdauern
+SESSION_BUCKETS = [30, 60, 120, 300, 600, 1800, 3600, 3 * 3600, float("inf")]
+
+
+def unit_paths(path):
+    """Dateien einer Einheit in Zeitreihenfolge."""
+    if not os.path.isdir(path):
+        return [path]
+    manifest = glob.glob(os.path.join(path, "*.manifest.json"))
+    if manifest:
+        name = os.path.basename(manifest[0])[: -len(".manifest.json")]
+        return [p for p, _ in SegmentedLog(path, name=name).segments_for_range()]
+    files = sorted(glob.glob(os.path.join(path, "**", "*.csv*"), recursive=True))
+    return [f for f in files if f.endswith((".csv", ".csv.gz", ".csv.zst"))]
+
+
+def view_of(action):
+    """Ziel-View einer Navigationsaktion oder None."""
+    if action == "Zurück zur HOME-View":
+        return HOME
+    if action.startswith("Zu ") and action.endswith(" gewechselt") and not action.startswith("Zu Etage "):
+        return action[3:-len(" gewechselt")]
+    return None
+
+
+class Summary:
+    """Zusammenführbare Kennzahlen (nur Zähler, kein Puffer pro Zeile)."""
+
+    def __init__(self):
+        self.rows = 0
+        self.first_ts = None
+        self.last_ts = None
+        self.actions_per_hour = [0] * 24
+        self.actions_per_weekday = [0] * 7
+        self.sessions = 0
+        self.unterminated_sessions = 0
+        self.session_seconds = 0.0
+        self.session_actions = 0
+        self.session_max = 0.0
+        self.session_histogram = [0] * len(SESSION_BUCKETS)
+        self.users = {}
+        self.dwell = {}
+        self.view_visits = {}
+
+    def _user(self, user):
+        stats = self.users.get(user)
+        if stats is None:
+            stats = self.users[user] = {"sessions": 0, "seconds": 0.0, "actions": 0}
+        return stats
+
+    def add_session(self, user, seconds, actions, terminated):
+        self.sessions += 1
+        if not terminated:
+            self.unterminated_sessions += 1
+        self.session_seconds += seconds
+        self.session_actions += actions
+        self.session_max = max(self.session_max, seconds)
+        for i, limit in enumerate(SESSION_BUCKETS):
+            if seconds <= limit:
+                self.session_histogram[i] += 1
+                break
+        stats = self._user(user)
+        stats["sessions"] += 1
+        stats["seconds"] += seconds
+        stats["actions"] += actions
+
+    def add_dwell(self, view, seconds):
+        self.dwell[view] = self.dwell.get(view, 0.0) + seconds
+        self.view_visits[view] = self.view_visits.get(view, 0) + 1
+
+    def merge(self, other):
+        self.rows += other.rows
+        for attr, pick in (("first_ts", min), ("last_ts", max)):
+            values = [v for v in (getattr(self, attr), getattr(other, attr)) if v is not None]
+            setattr(self, attr, pick(values) if values else None)
+        self.actions_per_hour = [a + b for a, b in zip(self.actions_per_hour, other.actions_per_hour)]
+        self.actions_per_weekday = [a + b for a, b in zip(self.actions_per_weekday, other.actions_per_weekday)]
+        self.sessions += other.sessions
+        self.unterminated_sessions += other.unterminated_sessions
+        self.session_seconds += other.session_seconds
+        self.session_actions += other.session_actions
+        self.session_max = max(self.session_max, other.session_max)
+        self.session_histogram = [a + b for a, b in zip(self.session_histogram, other.session_histogram)]
+        for user, stats in other.users.items():
+            mine = self._user(user)
+            for key, value in stats.items():
+                mine[key] += value
+        for view, seconds in other.dwell.items():
+            self.dwell[view] = self.dwell.get(view, 0.0) + seconds
+        for view, n in other.view_visits.items():
+            self.view_visits[view] = self.view_visits.get(view, 0) + n
+        return self
+
+    def to_dict(self):
+        minutes = self.session_seconds / 60
+        fmt = "%d.%m.%Y %H:%M:%S"
+        return {
+            "rows": self.rows,
+            "from": datetime.fromtimestamp(self.first_ts).strftime(fmt) if self.first_ts else None,
+            "to": datetime.fromtimestamp(self.last_ts).strftime(fmt) if self.last_ts else None,
+            "sessions": {
+                "count": self.sessions,
+                "unterminated": self.unterminated_sessions,
+                "total_seconds": round(self.session_seconds, 1),
+                "mean_seconds": round(self.session_seconds / self.sessions, 1) if self.sessions else 0.0,
+                "max_seconds": round(self.session_max, 1),
+                "histogram": {
+                    ("<=" + str(int(limit)) if limit != float("inf") else "longer"): n
+                    for limit, n in zip(SESSION_BUCKETS, self.session_histogram)
+                },
+            },
+            "interaction_rate_per_minute": round(self.session_actions / minutes, 3) if minutes else 0.0,
+            "users": {
+                user: {
+                    "sessions": s["sessions"],
+                    "seconds": round(s["seconds"], 1),
+                    "actions": s["actions"],
+                    "actions_per_minute": round(s["actions"] / (s["seconds"] / 60), 3) if s["seconds"] else 0.0,
+                }
+                for user, s in sorted(self.users.items())
+            },
+            "dwell_seconds": {view: round(sec, 1) for view, sec in sorted(self.dwell.items())},
+            "view_visits": dict(sorted(self.view_visits.items())),
+            "actions_per_hour": self.actions_per_hour,
+            "actions_per_weekday": self.actions_per_weekday,
+            "peak_hour": max(range(24), key=self.actions_per_hour.__getitem__) if self.rows else None,
+        }
+
+
+class _OpenSession:
+    __slots__ = ("start", "last", "actions", "view", "view_since")
+
+    def __init__(self, ts):
+        self.start = ts
+        self.last = ts
+        self.actions = 0
+        self.view = HOME
+        self.view_since = ts
+
+
+def analyse_unit(path):
+    """Wertet eine Einheit aus (läuft im Worker-Prozess)."""
+    summary = Summary()
+    open_sessions = {}
+
+    def close(user, ts, terminated):
+        session = open_sessions.pop(user)
+        end = ts if terminated else session.last
+        summary.add_dwell(session.view, max(0.0, end - session.view_since))
+        summary.add_session(user, max(0.0, end - session.start), session.actions, terminated)
+
+    for file_path in unit_paths(path):
+        with open_segment(file_path) as f:
+            for ts, _date, _time, user, action in iter_log_rows(f):
+                summary.rows += 1
+                if summary.first_ts is None:
+                    summary.first_ts = ts
+                summary.last_ts = ts
+                local = datetime.fromtimestamp(ts)
+                summary.actions_per_hour[local.hour] += 1
+                summary.actions_per_weekday[local.weekday()] += 1
+
+                if action == LOGIN:
+                    # ein Panel hat immer nur einen angemeldeten Nutzer
+                    for other in list(open_sessions):
+                        close(other, ts, other != user)
+                    open_sessions[user] = _OpenSession(ts)
+                    continue
+
+                session = open_sessions.get(user)
+                if session is None:
+                    continue
+                session.last = ts
+                session.actions += 1
+
+                if action in (LOGOUT, PROGRAM_END):
+                    close(user, ts, True)
+                    continue
+                view = view_of(action)
+                if view is not None and view != session.view:
+                    summary.add_dwell(session.view, ts - session.view_since)
+                    session.view = view
+                    session.view_since = ts
+
+    for user in list(open_sessions):
+        close(user, None, False)
+    return summary
+
+
+def write_csv(result, out):
+    """Flache CSV-Ausgabe: Abschnitt, Schlüssel, Wert."""
+    writer = csv.writer(out)
+    writer.writerow(["section", "key", "value"])
+    for key in ("rows", "from", "to", "interaction_rate_per_minute", "peak_hour"):
+        writer.writerow(["total", key, result[key]])
+    for key, value in result["sessions"].items():
+        if key == "histogram":
+            for bucket, n in value.items():
+                writer.writerow(["session_length", bucket, n])
+        else:
+            writer.writerow(["sessions", key, value])
+    for user, stats in result["users"].items():
+        for key, value in stats.items():
+            writer.writerow([f"user:{user}", key, value])
+    for view, seconds in result["dwell_seconds"].items():
+        writer.writerow(["dwell_seconds", view, seconds])
+    for view, n in result["view_visits"].items():
+        writer.writerow(["view_visits", view, n])
+    for hour, n in enumerate(result["actions_per_hour"]):
+        writer.writerow(["actions_per_hour", f"{hour:02d}", n])
+    for day, n in zip(("Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"), result["actions_per_weekday"]):
+        writer.writerow(["actions_per_weekday", day, n])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m logsystem.analytics", description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="Log-Dateien oder Log-Ordner (je Installation)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Anzahl Worker-Prozesse")
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    parser.add_argument("--per-input", action="store_true", help="zusätzlich je Eingabe ausgeben (nur JSON)")
+    parser.add_argument("-o", "--output", help="Ausgabedatei (Standard: stdout)")
+    args = parser.parse_args(argv)
+
+    total = Summary()
+    per_input = {}
+    if args.jobs > 1 and len(args.inputs) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(args.inputs))) as pool:
+            results = pool.map(analyse_unit, args.inputs)
+            for path, summary in zip(args.inputs, results):
+                if args.per_input:
+                    per_input[path] = summary.to_dict()
+                total.merge(summary)
+    else:
+        for path in args.inputs:
+            summary = analyse_unit(path)
+            if args.per_input:
+                per_input[path] = summary.to_dict()
+            total.merge(summary)
+
+    result = total.to_dict()
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        if args.format == "csv":
+            write_csv(result, out)
+        else:
+            if args.per_input:
+                result = {"total": result, "inputs": per_input}
+            json.dump(result, out, indent=2, ensure_ascii=False)
+            out.write("\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Strukturierter Ereignisspeicher (SQLite) für Nutzungsauswertungen.
+
+Der `Logger` schreibt jedes Ereignis zusätzlich zur CSV-Datei als Zeile in
+eine SQLite-Datenbank: Zeitstempel (Wanduhr + monotone Uhr), Nutzer,
+Aktionstyp, Raum, Gerät, Wert und der lesbare Text. Indizes auf Zeit,
+Nutzer, Raum und Gerät machen Abfragen wie "wie oft wurde das Küchenlicht
+letzten Monat benutzt" auch bei Millionen Einträgen schnell.
+
+Eine `EventStore`-Instanz (SQLite-Verbindung) gehört immer genau einem
+Thread; der Logger-Thread schreibt, Abfragen öffnen eine eigene Verbindung
+(WAL-Modus: Lesen blockiert das Schreiben nicht).
+"""
+
+import os
+import sqlite3
+
+
+# Aktionstypen, die der Logger vergibt
+TYPE_LOGIN = "login"
+TYPE_LOGOUT = "logout"
+TYPE_NAVIGATE = "navigate"
+TYPE_MENU = "menu"
+TYPE_DEVICE = "device"
+TYPE_SCENE = "scene"
+TYPE_AUTOMATION = "automation"
+TYPE_SYSTEM = "system"
+TYPE_OTHER = "other"
+
+# Spalten, nach denen gefiltert / gruppiert werden darf
+FILTER_FIELDS = ("user", "type", "room", "device")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id     INTEGER PRIMARY KEY,
+    ts     REAL NOT NULL,
+    mono   REAL,
+    user   TEXT,
+    type   TEXT NOT NULL,
+    room   TEXT,
+    device TEXT,
+    value  REAL,
+    text   TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS idx_events_user_ts ON events (user, ts);
+CREATE INDEX IF NOT EXISTS idx_events_room_ts ON events (room, ts);
+CREATE INDEX IF NOT EXISTS idx_events_device_ts ON events (device, ts);
+"""
+
+
+def default_path():
+    """Standardpfad der Datenbank neben `activity_log.csv`."""
+    return os.path.join(os.path.dirname(__file__), "events.db")
+
+
+class EventStore:
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ---------------------------------------------------------
+    # Schreiben
+    # ---------------------------------------------------------
+    def insert_many(self, events):
+        """Schreibt Ereignisse (ts, mono, user, type, room, device, value, text)
+        in einer Transaktion."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO events (ts, mono, user, type, room, device, value, text) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                events,
+            )
+
+    # ---------------------------------------------------------
+    # Abfragen
+    # ---------------------------------------------------------
+    def _where(self, start, end, filters):
+        clauses = []
+        params = []
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end)
+        for field, value in filters.items():
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Unbekanntes Filterfeld: {field}")
+            if value is not None:
+                clauses.append(f"{field} = ?")
+                params.append(value)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return where, params
+
+    def events(self, start=None, end=None, limit=None, **filters):
+        """Ereignisse als Dicts, nach Zeit sortiert. Filter: user, type, room, device."""
+        where, params = self._where(start, end, filters)
+        sql = f"SELECT ts, mono, user, type, room, device, value, text FROM events{where} ORDER BY ts"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        keys = ("ts", "mono", "user", "type", "room", "device", "value", "text")
+        return [dict(zip(keys, row)) for row in self.conn.execute(sql, params)]
+
+    def count(self, start=None, end=None, **filters):
+        where, params = self._where(start, end, filters)
+        return self.conn.execute(f"SELECT COUNT(*) FROM events{where}", params).fetchone()[0]
+
+    def count_by(self, field, start=None, end=None, **filters):
+        """Anzahl je Wert von `field` (user, type, room oder device), absteigend."""
+        if field not in FILTER_FIELDS:
+            raise ValueError(f"Unbekanntes Gruppierfeld: {field}")
+        where, params = self._where(start, end, filters)
+        sql = f"SELECT {field}, COUNT(*) AS n FROM events{where} GROUP BY {field} ORDER BY n DESC"
+        return list(self.conn.execute(sql, params))
+
+    def hour_histogram(self, start=None, end=None, **filters):
+        """Anzahl je Stunde des Tages (Ortszeit) als Liste mit 24 Einträgen."""
+        where, params = self._where(start, end, filters)
+        sql = (
+            "SELECT CAST(strftime('%H', ts, 'unixepoch', 'localtime') AS INTEGER) AS h, COUNT(*) "
+            f"FROM events{where} GROUP BY h"
+        )
+        hist = [0] * 24
+        for hour, n in self.conn.execute(sql, params):
+            hist[hour] = n
+        return hist
+
+    def timeline(self, bucket=3600, start=None, end=None, **filters):
+        """Anzahl je Zeitfenster von `bucket` Sekunden: Liste (fensterbeginn, anzahl)."""
+        where, params = self._where(start, end, filters)
+        sql = (
+            "SELECT CAST(ts / ? AS INTEGER) AS b, COUNT(*) "
+            f"FROM events{where} GROUP BY b ORDER BY b"
+        )
+        return [(b * bucket, n) for b, n in self.conn.execute(sql, [bucket] + params)]
@@ -2,28 +2,194 @@
 # Datum: 26.01.2026
 # Projekt: Smart-Home
 
-import csv
+import atexit
 import os
-from datetime import datetime
+import queue
+import threading
+import time
+
+from logsystem.event_store import TYPE_OTHER, EventStore
+from logsystem.segments import COMPRESSION_GZIP, SegmentedLog
+
+
+# fsync-Strategien für den Hintergrund-Schreiber
+FSYNC_NEVER = "never"        # Betriebssystem entscheidet, wann geschrieben wird
+FSYNC_BATCH = "batch"        # nach jedem geschriebenen Batch
+FSYNC_INTERVAL = "interval"  # höchstens alle `fsync_interval` Sekunden
 
 
 class Logger:
-    def __init__(self):
+    """Aktivitäts-Logger mit Hintergrund-Thread.
+
+    `log()` legt den Eintrag nur in eine begrenzte Queue und kehrt sofort
+    zurück; ein Hintergrund-Thread schreibt die Einträge gesammelt in die
+    CSV-Datei. Ist die Queue voll, wird der Eintrag verworfen und in
+    `dropped` gezählt, damit der Render-Thread nie blockiert.
+
+    Die CSV-Datei ist das aktive Segment eines `SegmentedLog`: wird sie
+    größer als `max_bytes` oder älter als `max_age` Sekunden, wird sie
+    komprimiert archiviert (siehe `logsystem/segments.py`).
+
+    Zusätzlich landet jedes Ereignis strukturiert im SQLite-Ereignisspeicher
+    (`event_store_path`, None = abgeschaltet), siehe `logsystem/event_store.py`.
+    """
+
+    def __init__(self, file_path=None, max_queue=10000, batch_size=256,
+                 flush_interval=0.5, fsync=FSYNC_BATCH, fsync_interval=5.0,
+                 max_bytes=1024 * 1024, max_age=7 * 24 * 3600, compression=COMPRESSION_GZIP,
+                 max_segments=50, max_total_bytes=50 * 1024 * 1024, retention_days=None,
+                 event_store_path=""):
         # Pfad zur CSV-Datei im selben Ordner wie logger.py
-        self.file_path = os.path.join(os.path.dirname(__file__), "activity_log.csv")
+        self.file_path = file_path or os.path.join(os.path.dirname(__file__), "activity_log.csv")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
 
+        self.store = SegmentedLog(
+            os.path.dirname(os.path.abspath(self.file_path)),
+            name=os.path.splitext(os.path.basename(self.file_path))[0],
+            max_bytes=max_bytes,
+            max_age=max_age,
+            compression=compression,
+            max_segments=max_segments,
+            max_total_bytes=max_total_bytes,
+            retention_days=retention_days,
+        )
         # Falls Datei noch nicht existiert → Kopfzeile schreiben
-        if not os.path.exists(self.file_path):
-            with open(self.file_path, "w", newline="", encoding="utf-8") as file:
-                writer = csv.writer(file, delimiter="|")
-                writer.writerow(["Datum", "Uhrzeit", "Nutzer", "Aktion"])
-
-    def log(self, user, action):
-        """Speichert eine Aktivität in der CSV-Datei."""
-        now = datetime.now()
-        date = now.strftime("%d.%m.%Y")
-        time = now.strftime("%H:%M:%S")
-
-        with open(self.file_path, "a", newline="", encoding="utf-8") as file:
-            writer = csv.writer(file, delimiter="|")
-            writer.writerow([date, time, user, action])
\ No newline at end of file
+        self.store.open()
+        # "" = Standardpfad neben der CSV-Datei
+        if event_store_path == "":
+            event_store_path = os.path.join(self.store.directory, "events.db")
+        self.event_store_path = event_store_path
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self.dropped = 0
+        self.written = 0
+
+        self._thread = threading.Thread(target=self._run, name="activity-logger", daemon=True)
+        self._thread.start()
+        # Beim Programmende (auch via sys.exit) alles Ausstehende schreiben
+        atexit.register(self.close)
+
+    def log(self, user, action, kind=TYPE_OTHER, room=None, device=None, value=None):
+        """Speichert eine Aktivität (nicht blockierend).
+
+        `action` ist der lesbare Text für die CSV-Datei; `kind` (Aktionstyp),
+        `room`, `device` und `value` landen als eigene Spalten im Ereignisspeicher.
+        """
+        if self._closed:
+            return
+        try:
+            self._queue.put_nowait((time.time(), time.monotonic(), user, action, kind, room, device, value))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Blockiert, bis alle bisher geloggten Einträge geschrieben sind."""
+        if self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Schreibt ausstehende Einträge und beendet den Hintergrund-Thread."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(None, timeout=5.0)
+        except queue.Full:
+            return
+        self._thread.join(timeout=5.0)
+
+    def query(self, start=None, end=None):
+        """Einträge (ts, datum, uhrzeit, nutzer, aktion) im Zeitraum [start, end].
+
+        Öffnet nur die Segmente, deren Zeitbereich laut Manifest passt.
+        """
+        self.flush()
+        reader = SegmentedLog(self.store.directory, name=self.store.name)
+        return reader.iter_rows(start, end)
+
+    # ---------------------------------------------------------
+    # Hintergrund-Thread
+    # ---------------------------------------------------------
+    def _run(self):
+        last_fsync = time.monotonic()
+        # Datum/Uhrzeit nur neu formatieren, wenn sich die Sekunde ändert
+        cached_second = None
+        cached_stamp = ("", "")
+
+        store = self.store
+        events = None
+        if self.event_store_path:
+            try:
+                events = EventStore(self.event_store_path)
+            except Exception:
+                events = None
+        stop = False
+        while not stop:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # auch ohne neue Einträge zeitbasiert rotieren
+                try:
+                    store.maybe_rotate()
+                except OSError:
+                    pass
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            rows = []
+            records = []
+            first_ts = last_ts = None
+            for entry in batch:
+                if entry is None:
+                    stop = True
+                    continue
+                ts, mono, user, action, kind, room, device, value = entry
+                records.append((ts, mono, user, kind, room, device, value, action))
+                if first_ts is None:
+                    first_ts = ts
+                last_ts = ts
+                second = int(ts)
+                if second != cached_second:
+                    local = time.localtime(second)
+                    cached_second = second
+                    cached_stamp = (time.strftime("%d.%m.%Y", local), time.strftime("%H:%M:%S", local))
+                rows.append([cached_stamp[0], cached_stamp[1], user, action])
+
+            try:
+                if rows:
+                    store.write_rows(rows, first_ts, last_ts)
+                    now = time.monotonic()
+                    sync = self.fsync == FSYNC_BATCH or (
+                        self.fsync == FSYNC_INTERVAL and now - last_fsync >= self.fsync_interval
+                    )
+                    store.flush(fsync=sync)
+                    if sync:
+                        last_fsync = now
+                    self.written += len(rows)
+            except OSError:
+                # z.B. Datenträger voll: Batch verwerfen, Thread läuft weiter
+                self.dropped += len(rows)
+            finally:
+                if events is not None and records:
+                    try:
+                        events.insert_many(records)
+                    except Exception:
+                        pass
+                for _ in batch:
+                    self._queue.task_done()
+
+        try:
+            store.close(fsync=self.fsync != FSYNC_NEVER)
+        except OSError:
+            pass
+        if events is not None:
+            events.close()
@@ -0,0 +1,85 @@
+"""Kommandozeile für den Ereignisspeicher.
+
+Beispiele:
+    python -m logsystem.query count --room Kueche --type device --from 01.09.2026 --to 01.10.2026
+    python -m logsystem.query hours --user "User 1"
+    python -m logsystem.query top device
+    python -m logsystem.query list --limit 20
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+from logsystem.event_store import FILTER_FIELDS, EventStore, default_path
+
+
+def parse_date(text):
+    """Akzeptiert `TT.MM.JJJJ`, `TT.MM.JJJJ HH:MM` oder ISO-Format."""
+    for fmt in ("%d.%m.%Y %H:%M", "%d.%m.%Y"):
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            pass
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ungültiges Datum: {text}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m logsystem.query", description="Auswertung des Ereignisspeichers")
+    parser.add_argument("command", choices=["count", "hours", "timeline", "top", "list"])
+    parser.add_argument("field", nargs="?", choices=FILTER_FIELDS, help="Gruppierfeld für 'top'")
+    parser.add_argument("--db", help="Pfad zur Datenbank (Standard: logsystem/events.db)")
+    parser.add_argument("--from", dest="start", type=parse_date)
+    parser.add_argument("--to", dest="end", type=parse_date)
+    parser.add_argument("--user")
+    parser.add_argument("--type")
+    parser.add_argument("--room")
+    parser.add_argument("--device")
+    parser.add_argument("--bucket", type=int, default=3600, help="Fenstergröße in Sekunden für 'timeline'")
+    parser.add_argument("--limit", type=int, default=50)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    path = args.db or default_path()
+    # sqlite würde eine fehlende Datei stillschweigend leer anlegen
+    if not os.path.exists(path):
+        parser.error(f"Datenbank nicht gefunden: {path}")
+    store = EventStore(path)
+    filters = {f: getattr(args, f) for f in FILTER_FIELDS}
+    started = time.perf_counter()
+
+    if args.command == "count":
+        print(store.count(args.start, args.end, **filters))
+    elif args.command == "hours":
+        hist = store.hour_histogram(args.start, args.end, **filters)
+        peak = max(hist) or 1
+        for hour, n in enumerate(hist):
+            print(f"{hour:02d}:00 {n:8d} {'#' * round(40 * n / peak)}")
+    elif args.command == "timeline":
+        for bucket_start, n in store.timeline(args.bucket, args.start, args.end, **filters):
+            print(f"{datetime.fromtimestamp(bucket_start):%d.%m.%Y %H:%M} {n:8d}")
+    elif args.command == "top":
+        if args.field is None:
+            print("'top' braucht ein Gruppierfeld: " + ", ".join(FILTER_FIELDS), file=sys.stderr)
+            return 2
+        for value, n in store.count_by(args.field, args.start, args.end, **filters)[:args.limit]:
+            print(f"{n:8d}  {value}")
+    else:
+        for e in store.events(args.start, args.end, limit=args.limit, **filters):
+            print(f"{datetime.fromtimestamp(e['ts']):%d.%m.%Y %H:%M:%S} | {e['user']} | {e['type']} | {e['text']}")
+
+    store.close()
+    print(f"({(time.perf_counter() - started) * 1000:.1f} ms)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
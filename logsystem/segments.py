@@ -0,0 +1,302 @@
+"""Rotierende, komprimierte Ablage des Aktivitäts-Logs.
+
+Das Log wird in Segmente aufgeteilt: in das aktive Segment
+(`activity_log.csv`) wird geschrieben; wird es zu groß oder zu alt, wird es
+geschlossen, komprimiert (gzip oder – falls installiert – zstd) und in
+einem Manifest mit seinem Zeitbereich eingetragen. Aufbewahrungsgrenzen
+(Anzahl, Gesamtgröße, Alter) löschen die ältesten Segmente.
+
+Abfragen über einen Zeitraum öffnen dank Manifest nur die Segmente, die
+diesen Zeitraum überlappen.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+
+HEADER = ["Datum", "Uhrzeit", "Nutzer", "Aktion"]
+
+COMPRESSION_NONE = None
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_ZSTD = "zstd"
+
+_SUFFIX = {COMPRESSION_NONE: "", COMPRESSION_GZIP: ".gz", COMPRESSION_ZSTD: ".zst"}
+
+
+def parse_timestamp(date, clock):
+    """Wandelt Datum (`%d.%m.%Y`) und Uhrzeit (`%H:%M:%S`) in einen Unix-Zeitstempel."""
+    return datetime.strptime(f"{date.strip()} {clock.strip()}", "%d.%m.%Y %H:%M:%S").timestamp()
+
+
+def open_segment(path, compression=None):
+    """Öffnet ein (ggf. komprimiertes) Segment als Textdatei zum Lesen."""
+    if compression is None:
+        if path.endswith(".gz"):
+            compression = COMPRESSION_GZIP
+        elif path.endswith(".zst"):
+            compression = COMPRESSION_ZSTD
+    if compression == COMPRESSION_GZIP:
+        return gzip.open(path, "rt", newline="", encoding="utf-8")
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd-Segment gefunden, aber das Paket 'zstandard' ist nicht installiert")
+        raw = open(path, "rb")
+        stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(stream, newline="", encoding="utf-8")
+    return open(path, "r", newline="", encoding="utf-8")
+
+
+def iter_log_rows(file):
+    """Liest Zeilen (ts, date, time, user, action) aus einer geöffneten Log-Datei.
+
+    Kopfzeilen und kaputte Zeilen werden übersprungen.
+    """
+    for row in csv.reader(file, delimiter="|"):
+        if len(row) < 4 or row[0].strip() == "Datum":
+            continue
+        try:
+            ts = parse_timestamp(row[0], row[1])
+        except ValueError:
+            continue
+        yield ts, row[0].strip(), row[1].strip(), row[2].strip(), "|".join(row[3:]).strip()
+
+
+class SegmentedLog:
+    """Aktives CSV-Segment plus komprimierte, abgeschlossene Segmente.
+
+    Args:
+        directory: Ordner für aktives Segment, Archiv und Manifest.
+        name: Basisname (ohne Endung), z.B. "activity_log".
+        max_bytes: Rotation, sobald das aktive Segment größer ist.
+        max_age: Rotation, sobald das aktive Segment älter ist (Sekunden).
+        compression: "gzip", "zstd" oder None.
+        max_segments / max_total_bytes / retention_days: Aufbewahrungsgrenzen
+            für abgeschlossene Segmente (None = unbegrenzt).
+    """
+
+    def __init__(self, directory, name="activity_log", max_bytes=1024 * 1024, max_age=7 * 24 * 3600,
+                 compression=COMPRESSION_GZIP, max_segments=50, max_total_bytes=50 * 1024 * 1024,
+                 retention_days=None):
+        if compression == COMPRESSION_ZSTD and zstandard is None:
+            compression = COMPRESSION_GZIP
+        self.directory = directory
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compression = compression
+        self.max_segments = max_segments
+        self.max_total_bytes = max_total_bytes
+        self.retention_days = retention_days
+
+        self.active_path = os.path.join(directory, f"{name}.csv")
+        self.archive_dir = os.path.join(directory, "archiv")
+        self.manifest_path = os.path.join(directory, f"{name}.manifest.json")
+
+        self.segments = []
+        self.active_start = None
+        self.active_end = None
+        self._load_manifest()
+
+        self._file = None
+        self._writer = None
+
+    # ---------------------------------------------------------
+    # Manifest
+    # ---------------------------------------------------------
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.segments = data.get("segments", [])
+        active = data.get("active") or {}
+        self.active_start = active.get("start")
+        self.active_end = active.get("end")
+        if self.active_start is None and os.path.exists(self.active_path):
+            # bestehendes Log ohne Manifest: Zeitbereich einmalig ermitteln
+            with open_segment(self.active_path) as f:
+                for ts, *_ in iter_log_rows(f):
+                    if self.active_start is None:
+                        self.active_start = ts
+                    self.active_end = ts
+
+    def _save_manifest(self):
+        data = {
+            "active": {"file": os.path.basename(self.active_path), "start": self.active_start, "end": self.active_end},
+            "segments": self.segments,
+        }
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    # ---------------------------------------------------------
+    # Schreiben
+    # ---------------------------------------------------------
+    def open(self):
+        if self._file is not None:
+            return
+        new_file = not os.path.exists(self.active_path)
+        self._file = open(self.active_path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file, delimiter="|")
+        if new_file:
+            self._writer.writerow(HEADER)
+
+    @property
+    def file(self):
+        return self._file
+
+    def write_rows(self, rows, first_ts, last_ts):
+        """Schreibt Zeilen ins aktive Segment; rotiert vorher, falls nötig."""
+        self.open()
+        self.maybe_rotate(first_ts)
+        self._writer.writerows(rows)
+        if self.active_start is None:
+            self.active_start = first_ts
+            self._save_manifest()
+        self.active_end = last_ts
+
+    def maybe_rotate(self, now=None):
+        """Rotiert das aktive Segment, wenn Größe oder Alter überschritten sind."""
+        if self._file is None or self.active_start is None:
+            return False
+        now = time.time() if now is None else now
+        too_big = self.max_bytes is not None and self._file.tell() >= self.max_bytes
+        too_old = self.max_age is not None and now - self.active_start >= self.max_age
+        if not (too_big or too_old):
+            return False
+        self.rotate()
+        return True
+
+    def rotate(self):
+        """Schließt das aktive Segment, komprimiert es und beginnt ein neues."""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            self._writer = None
+        if not os.path.exists(self.active_path) or self.active_start is None:
+            return
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        stamp = datetime.fromtimestamp(self.active_start).strftime("%Y%m%d-%H%M%S")
+        base = f"{self.name}-{stamp}.csv"
+        target = os.path.join(self.archive_dir, base + _SUFFIX[self.compression])
+        n = 1
+        while os.path.exists(target):
+            target = os.path.join(self.archive_dir, f"{self.name}-{stamp}-{n}.csv" + _SUFFIX[self.compression])
+            n += 1
+
+        self._compress(self.active_path, target)
+        self.segments.append({
+            "file": os.path.relpath(target, self.directory),
+            "start": self.active_start,
+            "end": self.active_end,
+            "bytes": os.path.getsize(target),
+            "compression": self.compression,
+        })
+        self.active_start = None
+        self.active_end = None
+        self._apply_retention()
+        # erst das Manifest, dann das aktive Segment löschen: ein Absturz
+        # dazwischen hinterlässt höchstens doppelte Zeilen, kein verwaistes Archiv
+        self._save_manifest()
+        os.remove(self.active_path)
+        self.open()
+
+    def _compress(self, source, target):
+        tmp = target + ".tmp"
+        with open(source, "rb") as src:
+            if self.compression == COMPRESSION_GZIP:
+                with gzip.open(tmp, "wb") as dst:
+                    while chunk := src.read(1 << 16):
+                        dst.write(chunk)
+            elif self.compression == COMPRESSION_ZSTD:
+                with open(tmp, "wb") as raw:
+                    zstandard.ZstdCompressor(level=10).copy_stream(src, raw)
+            else:
+                with open(tmp, "wb") as dst:
+                    while chunk := src.read(1 << 16):
+                        dst.write(chunk)
+        os.replace(tmp, target)
+
+    def _apply_retention(self):
+        now = time.time()
+        keep = list(self.segments)
+        if self.retention_days is not None:
+            cutoff = now - self.retention_days * 86400
+            keep = [s for s in keep if (s.get("end") or s["start"]) >= cutoff]
+        if self.max_segments is not None and len(keep) > self.max_segments:
+            keep = keep[len(keep) - self.max_segments:]
+        if self.max_total_bytes is not None:
+            while keep and sum(s["bytes"] for s in keep) > self.max_total_bytes:
+                keep.pop(0)
+        for seg in self.segments:
+            if seg not in keep:
+                try:
+                    os.remove(os.path.join(self.directory, seg["file"]))
+                except OSError:
+                    pass
+        self.segments = keep
+
+    def flush(self, fsync=False):
+        if self._file is None:
+            return
+        self._file.flush()
+        if fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self, fsync=True):
+        if self._file is None:
+            return
+        self.flush(fsync=fsync)
+        self._file.close()
+        self._file = None
+        self._writer = None
+        self._save_manifest()
+
+    # ---------------------------------------------------------
+    # Abfragen
+    # ---------------------------------------------------------
+    def segments_for_range(self, start=None, end=None):
+        """Pfade (mit Kompression) aller Segmente, die [start, end] überlappen."""
+        result = []
+        entries = list(self.segments)
+        if os.path.exists(self.active_path):
+            # Ende des aktiven Segments ist offen (im Manifest evtl. veraltet)
+            entries.append({"file": os.path.basename(self.active_path), "start": self.active_start,
+                            "end": None, "compression": None})
+        for seg in entries:
+            seg_start, seg_end = seg.get("start"), seg.get("end")
+            if seg_start is None:
+                continue
+            if end is not None and seg_start > end:
+                continue
+            if start is not None and seg_end is not None and seg_end < start:
+                continue
+            result.append((os.path.join(self.directory, seg["file"]), seg.get("compression")))
+        return result
+
+    def iter_rows(self, start=None, end=None):
+        """Liefert (ts, date, time, user, action) im Zeitraum [start, end]."""
+        for path, compression in self.segments_for_range(start, end):
+            with open_segment(path, compression) as f:
+                for row in iter_log_rows(f):
+                    ts = row[0]
+                    if start is not None and ts < start:
+                        continue
+                    if end is not None and ts > end:
+                        continue
+                    yield row
@@ -0,0 +1,185 @@
+"""Lasttest für den State-Server: viele WebSocket-Clients, schnelle Änderungen.
+
+    python -m server.loadtest --clients 200 --rate 300 --seconds 5
+    python -m server.loadtest --clients 50 --slow 5      # 5 Clients lesen nie
+
+Der Haupt-Thread spielt den Render-Loop (60 FPS) und ändert pro Frame
+Gerätezustände im `DeviceStateStore`. Gemessen wird, wie lange das im
+Render-Thread dauert (darf mit der Zahl der Clients nicht wachsen), sowie
+Zustell-Latenz, Lücken in den Sequenznummern und Resyncs je Client.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import random
+import time
+
+from devices.state_store import DeviceStateStore
+from server.state_server import StateServer
+from server.websocket import OP_TEXT, client_handshake, encode_frame, read_frame
+
+
+class MirrorClient:
+    """Einfacher WebSocket-Client, der den Zustand aus Snapshot + Deltas nachbaut."""
+
+    def __init__(self, port, read=True):
+        self.port = port
+        self.read = read
+        self.states = {}
+        self.seq = None
+        self.gaps = 0
+        self.snapshots = 0
+        self.deltas = 0
+        self.receive_times = {}
+
+    async def run(self, stop):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        writer.write(client_handshake("localhost", "/ws", key))
+        await writer.drain()
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        if not self.read:
+            # langsamer Client: nie lesen, nur die Verbindung halten
+            await stop.wait()
+            writer.close()
+            return
+        while not stop.is_set():
+            try:
+                _fin, opcode, payload = await read_frame(reader, max_bytes=1 << 24)
+            except Exception:
+                break
+            if opcode != OP_TEXT:
+                continue
+            message = json.loads(payload)
+            if message["type"] == "snapshot":
+                self.states = message["states"]
+                self.seq = message["seq"]
+                self.snapshots += 1
+            elif message["type"] == "delta":
+                if self.seq is not None and message["from"] != self.seq + 1:
+                    self.gaps += 1
+                    writer.write(encode_frame(json.dumps({"type": "resync"}), mask=True))
+                for state_id, fields in message["changes"].items():
+                    state = self.states.setdefault(state_id, {})
+                    for name, value in fields.items():
+                        if value is None:
+                            state.pop(name, None)
+                        else:
+                            state[name] = value
+                self.seq = message["seq"]
+                self.deltas += 1
+                now = time.time()
+                for seq in range(message["from"], message["seq"] + 1):
+                    self.receive_times[seq] = now
+        writer.close()
+
+
+def _client_process(port, clients, slow, stop, results):
+    """Clients in einem eigenen Prozess, damit sie dem Server nicht die CPU (GIL) nehmen."""
+    mirrors = [MirrorClient(port, read=i >= slow) for i in range(clients)]
+
+    async def main():
+        stop_event = asyncio.Event()
+        tasks = [asyncio.ensure_future(m.run(stop_event)) for m in mirrors]
+        while not stop.is_set():
+            await asyncio.sleep(0.05)
+        stop_event.set()
+        await asyncio.wait(tasks, timeout=2.0)
+
+    asyncio.run(main())
+    results.put([
+        {
+            "read": m.read,
+            "seq": m.seq,
+            "states": m.states,
+            "gaps": m.gaps,
+            "snapshots": m.snapshots,
+            "receive_times": m.receive_times,
+        }
+        for m in mirrors
+    ])
+
+
+def run(clients=100, slow=0, devices=50, rate=300, seconds=5.0, queue_size=256):
+    store = DeviceStateStore()
+    for i in range(devices):
+        store.set(f"geraet{i}", {"is_on": False, "brightness": 0})
+    server = StateServer(store, port=0, queue_size=queue_size).start()
+
+    stop = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_client_process, args=(server.port, clients, slow, stop, results))
+    process.start()
+    deadline = time.time() + 10.0
+    while server.stats()["clients"] < clients and time.time() < deadline:
+        time.sleep(0.05)
+
+    # Render-Loop nachspielen
+    rng = random.Random(1)
+    per_frame = max(1, rate // 60)
+    frame_costs = []
+    apply_times = {}
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        frame_start = time.perf_counter()
+        for _ in range(per_frame):
+            device_id = f"geraet{rng.randrange(devices)}"
+            brightness = rng.randrange(101)
+            store.set(device_id, {"is_on": brightness > 0, "brightness": brightness})
+            apply_times[store.version] = time.time()
+        server.process(lambda request: {})
+        frame_costs.append(time.perf_counter() - frame_start)
+        time.sleep(max(0.0, 1 / 60 - (time.perf_counter() - frame_start)))
+    time.sleep(1.0)
+
+    stop.set()
+    mirrors = results.get(timeout=30.0)
+    process.join(timeout=5.0)
+
+    readers = [m for m in mirrors if m["read"]]
+    lags = sorted(
+        (m["receive_times"][seq] - t) * 1000
+        for m in readers
+        for seq, t in apply_times.items()
+        if seq in m["receive_times"]
+    )
+    frame_costs.sort()
+    final = dict(store.items())
+    report = {
+        "clients": clients,
+        "slow_clients": slow,
+        "changes": len(apply_times),
+        "frame_ms_p50": round(frame_costs[len(frame_costs) // 2] * 1000, 3),
+        "frame_ms_p99": round(frame_costs[int(len(frame_costs) * 0.99)] * 1000, 3),
+        "frame_ms_max": round(frame_costs[-1] * 1000, 3),
+        "lag_ms_p50": round(lags[len(lags) // 2], 2) if lags else None,
+        "lag_ms_p99": round(lags[int(len(lags) * 0.99)], 2) if lags else None,
+        "gaps": sum(m["gaps"] for m in readers),
+        "snapshots": sum(m["snapshots"] for m in readers),
+        "mirrors_consistent": f"{sum(m['states'] == final for m in readers)}/{len(readers)}",
+        "server": server.stats(),
+    }
+    server.close()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lasttest für den State-Server")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--slow", type=int, default=0, help="Clients, die nie lesen")
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--rate", type=int, default=300, help="Änderungen pro Sekunde")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--queue-size", type=int, default=256)
+    args = parser.parse_args(argv)
+    report = run(args.clients, args.slow, args.devices, args.rate, args.seconds, args.queue_size)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Simulation mehrerer Panels an einem State-Service (ohne Fenster/Kamera).
+
+    python -m server.multipanel --panels 4 --seconds 5
+    python -m server.multipanel --panels 8 --hot 0.8    # viele gleichzeitige Züge
+
+Startet einen `StateService` (im Prozess, Zustände in einem temporären
+Ordner, ohne Geräte-Backend) und je Panel einen eigenen Prozess mit der
+Zustandsschicht eines Panels (`DeviceStateStore` + `StateSync`). Die Panels
+spielen mit 60 FPS Gesten nach wie `SmartHomeUI`: Slider-Züge
+(`hold` -> viele `set` -> `release`) und Antippen. Mit `--hot` ziehen sie
+bevorzugt am selben Licht, um Konflikte zu erzeugen.
+
+Am Ende müssen alle Panels denselben Zustand zeigen wie der Service.
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import tempfile
+import threading
+import time
+
+from devices.scenes import normalize_state
+from devices.state_store import DeviceStateStore
+from server.state_service import StateService
+from server.state_sync import StateSync
+from ui.room_registry import RoomRegistry
+
+
+def _panel_process(index, url, device_ids, seconds, hot, results):
+    rng = random.Random(index)
+    store = DeviceStateStore()
+    sync = StateSync(store, url).start()
+    frame_costs = []
+    drag = None  # (device_id, verbleibende Frames, Richtung)
+    drags = taps = 0
+    deadline = time.perf_counter() + seconds
+    settle = deadline + 1.5
+
+    while time.perf_counter() < settle:
+        frame_start = time.perf_counter()
+        sync.poll()
+        if frame_start < deadline:
+            if drag is None and rng.random() < 0.05:
+                device_id = device_ids[0] if rng.random() < hot else rng.choice(device_ids)
+                if rng.random() < 0.3:
+                    state = store.get(device_id, {})
+                    state["is_on"] = not state.get("is_on", False)
+                    store.set(device_id, normalize_state("light", state))
+                    taps += 1
+                else:
+                    drag = (device_id, rng.randrange(10, 40), rng.choice((-3, 3)))
+                    sync.hold(device_id)
+                    drags += 1
+            if drag is not None:
+                device_id, frames_left, step = drag
+                state = store.get(device_id, {})
+                brightness = max(0, min(100, state.get("brightness", 50) + step))
+                state.update(is_on=brightness > 0, brightness=brightness)
+                store.set(device_id, normalize_state("light", state))
+                if frames_left <= 1:
+                    sync.release(device_id)
+                    drag = None
+                else:
+                    drag = (device_id, frames_left - 1, step)
+        elif drag is not None:
+            sync.release(drag[0])
+            drag = None
+        frame_costs.append(time.perf_counter() - frame_start)
+        time.sleep(max(0.0, 1 / 60 - (time.perf_counter() - frame_start)))
+
+    frame_costs.sort()
+    results.put({
+        "panel": index,
+        "states": dict(store.items()),
+        "drags": drags,
+        "taps": taps,
+        "poll_ms_p99": round(frame_costs[int(len(frame_costs) * 0.99)] * 1000, 3),
+        "sync": sync.stats(),
+    })
+    sync.close()
+
+
+def run(panels=4, seconds=5.0, hot=0.5):
+    registry = RoomRegistry.load_default()
+    with tempfile.TemporaryDirectory() as state_dir:
+        service = StateService(
+            registry, state_dir=state_dir, host="127.0.0.1", port=0, token=None, backend=None, rules_path=None
+        )
+        service.start()
+        worker = threading.Thread(target=service.run, name="state-service", daemon=True)
+        worker.start()
+        url = f"ws://127.0.0.1:{service.server.port}/ws"
+        lights = [d.id for d in registry.devices() if d.type == "light"]
+
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=_panel_process, args=(i, url, lights, seconds, hot, results))
+            for i in range(panels)
+        ]
+        for process in processes:
+            process.start()
+        reports = sorted((results.get(timeout=seconds + 30) for _ in processes), key=lambda r: r["panel"])
+        for process in processes:
+            process.join(timeout=5.0)
+
+        service.stop()
+        worker.join(timeout=2.0)
+        final = dict(service.store.items())
+        summary = {
+            "panels": panels,
+            "version": service.store.version,
+            "consistent": f"{sum(r['states'] == final for r in reports)}/{panels}",
+            "drags": sum(r["drags"] for r in reports),
+            "taps": sum(r["taps"] for r in reports),
+            "rejected": sum(r["sync"]["rejected"] for r in reports),
+            "poll_ms_p99": max(r["poll_ms_p99"] for r in reports),
+            "server": service.server.stats(),
+            "per_panel": [{k: r[k] for k in ("panel", "drags", "taps", "poll_ms_p99", "sync")} for r in reports],
+        }
+        service.close()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mehrere Panels an einem State-Service simulieren")
+    parser.add_argument("--panels", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--hot", type=float, default=0.5, help="Anteil der Gesten am selben Licht")
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.panels, args.seconds, args.hot), indent=2))
+
+
+if __name__ == "__main__":
+    main()
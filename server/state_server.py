@@ -0,0 +1,616 @@
+"""HTTP/WebSocket-Schnittstelle zum Gerätezustand (nur Standardbibliothek).
+
+Der Server läuft in einem eigenen Thread mit eigenem asyncio-Event-Loop und
+spiegelt den `DeviceStateStore`: Der Listener im Render-Thread reicht jeden
+Zustands-Diff nur per `call_soon_threadsafe` weiter, alles Weitere
+(Delta-Berechnung, JSON, Verteilen an Clients) passiert im Server-Thread.
+
+REST:
+    GET  /api/state              {"version": v, "states": {id: state}}
+    GET  /api/state/<id>         {"id": id, "version": v, "state": {...}}
+    GET  /api/devices            Geräte aus der Registry
+    GET  /api/scenes             verfügbare Szenen
+    GET  /api/stats              Kennzahlen des Servers
+    POST /api/state/<id>         Felder setzen, z.B. {"brightness": 40}
+    POST /api/state              mehrere Geräte: {id: {Felder}, ...}
+    POST /api/scenes/<id>        Szene aktivieren
+
+WebSocket (/ws):
+    Server -> Client  {"type": "snapshot", "seq": v, "states": {...}}   beim Verbinden
+    Server -> Client  {"type": "delta", "from": v1, "seq": v2, "changes": {id: {Feld: Wert}}}
+    Client -> Server  {"type": "set", "id": ..., "state": {...}, "ref": ..., "lease": bool}
+    Client -> Server  {"type": "set", "changes": {id: {...}}, "ref": ..., "lease": bool}
+    Client -> Server  {"type": "release", "id": ...}
+    Client -> Server  {"type": "scene", "id": ..., "ref": ...}
+    Client -> Server  {"type": "resync"}
+    Client -> Server  {"type": "presence"}                 jemand ist am Panel (Automationen)
+    Server -> Client  {"type": "result", "ref": ..., "ok": ..., "version": ...}
+
+Deltas enthalten nur geänderte Felder (entfernte Felder als null) und tragen
+die Versionen des Stores als fortlaufende Sequenznummern: ein Delta fasst
+alle Änderungen von Version `from` bis `seq` zusammen (meist ein Frame). Ein
+Client, der eine Lücke sieht (from != letzte seq + 1), fordert mit "resync"
+einen neuen Snapshot an. Jeder Client hat eine begrenzte Warteschlange; läuft sie über (langsamer
+Client), wird sie verworfen und der Client bekommt stattdessen einen
+Snapshot – ein langsamer Client bremst weder andere Clients noch die UI.
+
+Befehle (POST, "set", "scene") werden nicht im Server-Thread ausgeführt,
+sondern im Render-Thread mit `process(handler)` abgeholt, damit Store,
+Widgets und Befehlsbus nur von einem Thread verändert werden.
+
+Gleichzeitige Slider-Züge an mehreren Panels: Ein "set" mit `"lease": true`
+reserviert die Geräte für diese Verbindung, bis sie "release" sendet oder
+`lease_timeout` Sekunden lang nichts mehr setzt. Änderungen anderer Clients
+an reservierten Geräten werden mit `"conflict"` abgelehnt (REST: 409) –
+deren Slider folgen stattdessen den Deltas des ziehenden Panels.
+"""
+
+import asyncio
+import hmac
+import json
+import queue
+import threading
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from server.websocket import (
+    OP_TEXT,
+    WebSocketClosed,
+    encode_frame,
+    handshake_response,
+    read_message,
+)
+
+
+MAX_HEADER_LINES = 64
+MAX_BODY_BYTES = 64 * 1024
+
+_REASONS = {
+    200: "OK",
+    202: "Accepted",
+    204: "No Content",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def field_delta(old, new):
+    """Nur die Felder von `new`, die sich gegenüber `old` geändert haben."""
+    if old is None:
+        return dict(new)
+    delta = {key: value for key, value in new.items() if old.get(key) != value}
+    for key in old.keys() - new.keys():
+        delta[key] = None
+    return delta
+
+
+class RemoteRequest:
+    """Befehl eines Clients, der im Render-Thread ausgeführt wird."""
+
+    def __init__(self, kind, target, future):
+        self.kind = kind  # "set", "scene" oder "presence"
+        self.target = target  # {id: {Felder}} bei "set", Szenen-ID bei "scene"
+        self.future = future
+
+
+class _Client:
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        # zuletzt gesendete Sequenznummer (ältere Deltas werden übersprungen)
+        self.sent_seq = -1
+
+
+# Platzhalter in der Client-Warteschlange: Snapshot beim Versand erzeugen
+_SNAPSHOT = object()
+
+
+class StateServer:
+    def __init__(
+        self,
+        store,
+        host="127.0.0.1",
+        port=8765,
+        token=None,
+        queue_size=256,
+        command_timeout=2.0,
+        write_timeout=10.0,
+        lease_timeout=2.0,
+        devices=None,
+        scenes=None,
+    ):
+        self.store = store
+        self.host = host
+        self.port = port
+        self.token = token
+        self.queue_size = queue_size
+        self.command_timeout = command_timeout
+        self.write_timeout = write_timeout
+        self.lease_timeout = lease_timeout
+        self.devices = devices or []
+        self.scenes = scenes or []
+
+        # Spiegel des Stores, nur im Server-Thread verändert
+        self._states = {}
+        self.version = 0
+        # noch nicht verschickte Deltas (Versionen ab _pending_from)
+        self._pending = {}
+        self._pending_from = None
+        self._clients = set()
+        # device_id -> (Client, Ablaufzeit) für laufende Slider-Züge
+        self._leases = {}
+        self._tasks = set()
+        self._requests = queue.SimpleQueue()
+        self._server = None
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self.start_error = None
+
+        # Kennzahlen
+        self.deltas = 0
+        self.frames_sent = 0
+        self.resyncs = 0
+        self.dropped_clients = 0
+        self.http_requests = 0
+        self.commands = 0
+        self.conflicts = 0
+
+    # ---------------------------------------------------------
+    # Render-Thread
+    # ---------------------------------------------------------
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._states = dict(self.store.items())
+        self.version = self.store.version
+        self._thread = threading.Thread(target=self._run_loop, name="state-server", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5.0)
+        if self.start_error is None:
+            self.store.listeners.append(self._on_change)
+        return self
+
+    def _on_change(self, changes, version):
+        # Store-Listener: nur weiterreichen, nichts berechnen
+        self._loop.call_soon_threadsafe(self._publish, changes, version)
+
+    def process(self, handler, limit=100, timeout=None):
+        """Führt wartende Client-Befehle aus (jeden Frame im Render-Thread aufrufen).
+
+        `handler(request)` gibt den übernommenen Diff zurück und wirft
+        `KeyError`/`ValueError` bei unbekannten Geräten oder Szenen; jede
+        andere Ausnahme wird als Fehler 500 gemeldet und nicht an den
+        Aufrufer weitergegeben. Mit `timeout` wird bis zu so vielen Sekunden
+        auf den ersten Befehl gewartet (für Dienste ohne eigenen Render-Loop).
+        """
+        for i in range(limit):
+            try:
+                if i == 0 and timeout:
+                    request = self._requests.get(timeout=timeout)
+                else:
+                    request = self._requests.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                changes = handler(request)
+                result = {"ok": True, "version": self.store.version, "changed": sorted(changes)}
+            except (KeyError, ValueError) as exc:
+                # unbekannte ID -> 404, ungültige Feldwerte -> 400
+                result = {
+                    "ok": False,
+                    "error": str(exc.args[0] if exc.args else exc),
+                    "status": 404 if isinstance(exc, KeyError) else 400,
+                }
+            except Exception as exc:
+                # Fehler im Handler darf weder Render-Thread noch Dienst beenden
+                result = {"ok": False, "error": f"Interner Fehler: {exc!r}", "status": 500}
+            self._loop.call_soon_threadsafe(_resolve, request.future, result)
+
+    def close(self):
+        if self._on_change in self.store.listeners:
+            self.store.listeners.remove(self._on_change)
+        if self._loop is None or self._thread is None or self.start_error is not None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._stop(), self._loop)
+        try:
+            future.result(timeout=2.0)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "clients": len(self._clients),
+            "deltas": self.deltas,
+            "frames_sent": self.frames_sent,
+            "resyncs": self.resyncs,
+            "dropped_clients": self.dropped_clients,
+            "http_requests": self.http_requests,
+            "commands": self.commands,
+            "conflicts": self.conflicts,
+            "leases": len(self._leases),
+        }
+
+    # ---------------------------------------------------------
+    # Server-Thread
+    # ---------------------------------------------------------
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle_connection, self.host, self.port)
+            )
+            # Port 0 = freien Port wählen lassen
+            self.port = self._server.sockets[0].getsockname()[1]
+        except OSError as exc:
+            # z.B. Port belegt: UI läuft ohne Schnittstelle weiter
+            self.start_error = exc
+            self._ready.set()
+            self._loop.close()
+            return
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _stop(self):
+        self._server.close()
+        for client in list(self._clients):
+            client.writer.close()
+        for task in list(self._tasks):
+            task.cancel()
+        await self._server.wait_closed()
+
+    def _spawn(self, coro):
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _publish(self, changes, version):
+        if self._pending_from is None:
+            # alle Diffs bis zum nächsten Loop-Durchlauf (i.d.R. ein Frame) bündeln
+            self._pending_from = version
+            self._loop.call_soon(self._flush)
+        for state_id, state in changes.items():
+            fields = field_delta(self._states.get(state_id), state)
+            if fields:
+                self._pending.setdefault(state_id, {}).update(fields)
+            self._states[state_id] = state
+        self.version = version
+        self.deltas += 1
+
+    def _flush(self):
+        first, delta = self._pending_from, self._pending
+        self._pending_from, self._pending = None, {}
+        if not self._clients:
+            return
+        # einmal kodieren, an alle Clients dieselben Bytes
+        message = {"type": "delta", "from": first, "seq": self.version, "changes": delta}
+        frame = encode_frame(json.dumps(message, separators=(",", ":")))
+        for client in self._clients:
+            self._enqueue(client, (self.version, frame))
+
+    def _enqueue(self, client, item):
+        try:
+            client.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # zu langsam: Rückstand verwerfen, stattdessen Snapshot senden
+            self._resync(client)
+
+    def _resync(self, client):
+        while not client.queue.empty():
+            client.queue.get_nowait()
+        client.queue.put_nowait(_SNAPSHOT)
+        self.resyncs += 1
+
+    def _snapshot_frame(self):
+        return encode_frame(
+            json.dumps(
+                {"type": "snapshot", "seq": self.version, "states": self._states},
+                separators=(",", ":"),
+            )
+        )
+
+    def _authorized(self, headers, query):
+        if not self.token:
+            return True
+        auth = headers.get("authorization", "")
+        supplied = auth[7:] if auth.lower().startswith("bearer ") else query.get("token", [""])[0]
+        return hmac.compare_digest(supplied.encode(), self.token.encode())
+
+    async def _submit(self, kind, target):
+        """Reicht einen Befehl an den Render-Thread weiter und wartet auf das Ergebnis."""
+        self.commands += 1
+        future = self._loop.create_future()
+        self._requests.put(RemoteRequest(kind, target, future))
+        try:
+            return await asyncio.wait_for(future, self.command_timeout)
+        except asyncio.TimeoutError:
+            # UI hängt oder läuft nicht: Befehl bleibt vorgemerkt
+            return {"ok": True, "pending": True}
+
+    # ---------------------------------------------------------
+    # HTTP
+    # ---------------------------------------------------------
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as exc:
+                    # Anfrage nicht lesbar: Fehler melden, dann die Verbindung schließen
+                    await self._respond(writer, exc.status, {"error": str(exc)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, query, headers, body = request
+                self.http_requests += 1
+                if headers.get("upgrade", "").lower() == "websocket" and path == "/ws":
+                    if not self._authorized(headers, query):
+                        await self._respond(writer, 401, {"error": "Token fehlt oder ist falsch"})
+                        break
+                    await self._serve_websocket(reader, writer, headers)
+                    break
+                try:
+                    if not self._authorized(headers, query):
+                        raise HttpError(401, "Token fehlt oder ist falsch")
+                    status, payload = await self._route(method, path, body)
+                except HttpError as exc:
+                    status, payload = exc.status, {"error": str(exc)}
+                await self._respond(writer, status, payload, keep_alive=headers.get("connection", "").lower() != "close")
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _version = line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(400, "Ungültige Anfragezeile")
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HttpError(400, "Zu viele Header")
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            raise HttpError(400, "Ungültige Content-Length")
+        if length < 0:
+            raise HttpError(400, "Ungültige Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, "Anfrage zu groß")
+        body = await reader.readexactly(length) if length else b""
+        url = urlsplit(target)
+        return method.upper(), unquote(url.path), parse_qs(url.query), headers, body
+
+    async def _respond(self, writer, status, payload, keep_alive=True):
+        body = b"" if payload is None else json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Access-Control-Allow-Origin: *\r\n"
+            "Access-Control-Allow-Headers: Authorization, Content-Type\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _route(self, method, path, body):
+        parts = [p for p in path.split("/") if p]
+        if method == "OPTIONS":
+            return 204, None
+        if len(parts) < 2 or parts[0] != "api":
+            raise HttpError(404, f"Unbekannter Pfad: {path}")
+        resource, ident = parts[1], "/".join(parts[2:]) or None
+
+        if method == "GET":
+            if resource == "state" and ident is None:
+                return 200, {"version": self.version, "states": self._states}
+            if resource == "state":
+                if ident not in self._states:
+                    raise HttpError(404, f"Unbekanntes Gerät: {ident}")
+                return 200, {"id": ident, "version": self.version, "state": self._states[ident]}
+            if resource == "devices" and ident is None:
+                return 200, {"devices": self.devices}
+            if resource == "scenes" and ident is None:
+                return 200, {"scenes": self.scenes}
+            if resource == "stats" and ident is None:
+                return 200, self.stats()
+            raise HttpError(404, f"Unbekannter Pfad: {path}")
+
+        if method == "POST":
+            data = _parse_json(body)
+            if resource == "state":
+                changes = {ident: data} if ident is not None else data
+                if not all(isinstance(fields, dict) for fields in changes.values()):
+                    raise HttpError(400, "Erwartet {id: {Felder}}")
+                if self._blocked(None, changes):
+                    self.conflicts += 1
+                    raise HttpError(409, "Gerät wird an einem anderen Panel bedient")
+                result = await self._submit("set", changes)
+            elif resource == "scenes" and ident is not None:
+                result = await self._submit("scene", ident)
+            else:
+                raise HttpError(404, f"Unbekannter Pfad: {path}")
+            if not result["ok"]:
+                raise HttpError(result.get("status", 400), result["error"])
+            return (202 if result.get("pending") else 200), result
+
+        raise HttpError(405, f"Methode {method} nicht erlaubt")
+
+    # ---------------------------------------------------------
+    # WebSocket
+    # ---------------------------------------------------------
+    async def _serve_websocket(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            await self._respond(writer, 400, {"error": "Sec-WebSocket-Key fehlt"}, keep_alive=False)
+            return
+        writer.write(handshake_response(key))
+        client = _Client(writer, self.queue_size)
+        client.queue.put_nowait(_SNAPSHOT)
+        self._clients.add(client)
+        sender = self._spawn(self._send_loop(client))
+        try:
+            while True:
+                opcode, payload = await read_message(reader, writer)
+                if opcode == OP_TEXT:
+                    await self._on_ws_message(client, payload)
+        except WebSocketClosed:
+            pass
+        finally:
+            self._clients.discard(client)
+            for device_id in [d for d, (holder, _) in self._leases.items() if holder is client]:
+                del self._leases[device_id]
+            sender.cancel()
+
+    async def _send_loop(self, client):
+        try:
+            while True:
+                items = [await client.queue.get()]
+                # alles, was inzwischen ansteht, in einem Schreibvorgang senden
+                while not client.queue.empty():
+                    items.append(client.queue.get_nowait())
+                frames = []
+                for item in items:
+                    if item is _SNAPSHOT:
+                        frames.append(self._snapshot_frame())
+                        client.sent_seq = self.version
+                        continue
+                    seq, frame = item
+                    if seq is not None:
+                        if seq <= client.sent_seq:
+                            continue  # schon im Snapshot enthalten
+                        client.sent_seq = seq
+                    frames.append(frame)
+                client.writer.write(b"".join(frames))
+                await asyncio.wait_for(client.writer.drain(), self.write_timeout)
+                self.frames_sent += len(frames)
+        except asyncio.TimeoutError:
+            # hängender Client: Verbindung trennen statt Speicher anzusammeln
+            self.dropped_clients += 1
+            self._clients.discard(client)
+            client.writer.close()
+        except ConnectionError:
+            self._clients.discard(client)
+
+    async def _on_ws_message(self, client, payload):
+        try:
+            message = json.loads(payload)
+            kind = message["type"]
+        except (ValueError, KeyError, TypeError):
+            self._reply(client, {"type": "error", "error": "Ungültige Nachricht"})
+            return
+        if kind == "resync":
+            self._resync(client)
+            return
+        if kind in ("release", "scene") or (kind == "set" and message.get("changes") is None):
+            # IDs kommen als Schlüssel in Dicts und Queues: nur Strings annehmen
+            if not isinstance(message.get("id"), str):
+                self._reply(client, {"type": "error", "ref": message.get("ref"), "error": "id muss ein String sein"})
+                return
+        if kind == "release":
+            lease = self._leases.get(message["id"])
+            if lease is not None and lease[0] is client:
+                del self._leases[message["id"]]
+            return
+        if kind == "set":
+            changes = message.get("changes")
+            if changes is None:
+                changes = {message["id"]: message.get("state")}
+            if not isinstance(changes, dict) or not all(isinstance(s, dict) for s in changes.values()):
+                self._reply(client, {"type": "error", "ref": message.get("ref"), "error": "state muss ein Objekt sein"})
+                return
+            blocked = self._blocked(client, changes)
+            if blocked:
+                self.conflicts += 1
+                self._reply(client, {
+                    "type": "result",
+                    "ref": message.get("ref"),
+                    "ok": False,
+                    "error": "Gerät wird an einem anderen Panel bedient",
+                    "conflict": blocked,
+                })
+                return
+            if message.get("lease"):
+                expires = self._loop.time() + self.lease_timeout
+                for device_id in changes:
+                    self._leases[device_id] = (client, expires)
+            request = self._submit("set", changes)
+        elif kind == "scene":
+            request = self._submit("scene", message["id"])
+        elif kind == "presence":
+            request = self._submit("presence", None)
+        else:
+            self._reply(client, {"type": "error", "error": f"Unbekannter Typ: {kind}"})
+            return
+        # nicht auf die UI warten, damit der Client weiter lesen kann
+        task = self._spawn(request)
+        task.add_done_callback(
+            lambda t: self._reply(client, {"type": "result", "ref": message.get("ref"), **t.result()})
+            if not t.cancelled()
+            else None
+        )
+
+    def _blocked(self, client, device_ids):
+        """Geräte, die gerade von einem anderen Client reserviert sind."""
+        now = self._loop.time()
+        blocked = []
+        for device_id in device_ids:
+            lease = self._leases.get(device_id)
+            if lease is None:
+                continue
+            holder, expires = lease
+            if expires < now:
+                del self._leases[device_id]
+            elif holder is not client:
+                blocked.append(device_id)
+        return blocked
+
+    def _reply(self, client, payload):
+        if client in self._clients:
+            # Antworten tragen keine Sequenznummer
+            self._enqueue(client, (None, encode_frame(json.dumps(payload, separators=(",", ":")))))
+
+
+def _resolve(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def _parse_json(body):
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise HttpError(400, "Ungültiges JSON")
+    if not isinstance(data, dict):
+        raise HttpError(400, "Erwartet ein JSON-Objekt")
+    return data
@@ -0,0 +1,187 @@
+"""Zentraler State-Service für Installationen mit mehreren Panels.
+
+Hält die maßgeblichen Gerätezustände (persistiert wie im Einzelbetrieb),
+sendet die Gerätebefehle und stellt den `StateServer` bereit, an den sich
+die Panels mit `STATE_SERVICE_URL` (siehe `config.py`) anhängen. Der Dienst
+hat keinen Render-Loop: Befehle der Panels werden in einem eigenen Thread
+abgearbeitet, sobald sie eintreffen.
+
+    python -m server.state_service --host 0.0.0.0 --port 8765
+
+Ein Panel mit aktiviertem API-Server kann dieselbe Rolle übernehmen; der
+eigenständige Dienst lohnt sich, sobald kein Panel ausgezeichnet sein soll
+(z.B. bei mehr als zwei Bildschirmen).
+"""
+
+import argparse
+import threading
+
+import config
+from devices.automation import AutomationEngine
+from devices.command_bus import create_command_bus
+from devices.scenes import load_scenes, resolve_changes, resolve_scene, resolve_targets
+from devices.state_store import DeviceStateStore, StatePersister
+from logsystem.event_store import TYPE_AUTOMATION, TYPE_SYSTEM
+from logsystem.logger import Logger
+from server.state_server import StateServer
+from ui.room_registry import RoomRegistry
+
+
+def room_state_id(room_name):
+    return f"room:{room_name}"
+
+
+def describe_devices(registry):
+    """Geräte und Raum-Schalter für `GET /api/devices`."""
+    devices = [
+        {"id": d.id, "type": d.type, "name": d.name, "room": d.room, "gateway": d.gateway}
+        for d in registry.devices()
+    ]
+    devices += [{"id": room_state_id(name), "type": "room", "name": name, "room": name} for name in registry.names()]
+    return devices
+
+
+def describe_scenes(scenes):
+    return [{"id": scene.id, "name": scene.name} for scene in scenes]
+
+
+class StateService:
+    def __init__(
+        self,
+        registry,
+        state_dir=config.DEVICE_STATE_DIR,
+        host=config.API_HOST,
+        port=config.API_PORT,
+        token=config.API_TOKEN,
+        backend=config.DEVICE_BACKEND,
+        scenes_path=config.SCENES_CONFIG_PATH,
+        rules_path=config.AUTOMATION_RULES_PATH,
+        logger=None,
+    ):
+        self.registry = registry
+        self.logger = logger or Logger()
+        self.store = DeviceStateStore(StatePersister(state_dir))
+        self.scenes = {scene.id: scene for scene in load_scenes(scenes_path)}
+        self.command_bus = create_command_bus(
+            backend,
+            host=config.MQTT_HOST,
+            port=config.MQTT_PORT,
+            timeout=config.COMMAND_TIMEOUT,
+            retries=config.COMMAND_RETRIES,
+            max_rate=config.COMMAND_MAX_RATE,
+            latency=config.SIMULATED_LATENCY,
+            failure_rate=config.SIMULATED_FAILURE_RATE,
+            gateway_of=self._gateway_of,
+        )
+        self.store.listeners.append(self._on_state_change)
+        self.server = StateServer(
+            self.store,
+            host=host,
+            port=port,
+            token=token,
+            queue_size=config.API_CLIENT_QUEUE,
+            devices=describe_devices(registry),
+            scenes=describe_scenes(self.scenes.values()),
+        )
+        self.automation = AutomationEngine(rules_path)
+        self._stop = threading.Event()
+        self.failed_commands = 0
+
+    def _gateway_of(self, device_id):
+        device = self.registry.device(device_id)
+        return device.gateway if device is not None else "default"
+
+    def _on_state_change(self, changes, version):
+        commands = {d: s for d, s in changes.items() if self.registry.device(d) is not None}
+        if self.command_bus is None or not commands:
+            return
+        if len(commands) == 1:
+            device_id, state = next(iter(commands.items()))
+            self.command_bus.publish(device_id, state)
+        else:
+            self.command_bus.publish_batch(commands)
+
+    def _apply(self, request):
+        if request.kind == "presence":
+            self.automation.touch()
+            return {}
+        if request.kind == "scene":
+            scene = self.scenes.get(request.target)
+            if scene is None:
+                raise KeyError(f"Unbekannte Szene: {request.target}")
+            changes = resolve_scene(scene, self.registry, self.store, room_state_id)
+        elif request.kind == "targets":
+            changes = resolve_targets(request.target, self.registry, self.store, room_state_id)
+        else:
+            changes = resolve_changes(request.target, self.registry, self.store)
+        return self.store.apply(changes)
+
+    def start(self):
+        self.server.start()
+        if self.server.start_error is not None:
+            raise self.server.start_error
+        self.automation.start()
+        return self
+
+    def run(self):
+        """Arbeitet Befehle ab, bis `stop()` aufgerufen wird."""
+        while not self._stop.is_set():
+            try:
+                self._step()
+            except Exception as exc:
+                # ein fehlerhafter Befehl darf den Dienst nicht für alle Panels beenden
+                self.logger.log(user="System", action=f"State-Service: Fehler ({exc!r})", kind=TYPE_SYSTEM)
+
+    def _step(self):
+        self.server.process(self._apply, timeout=0.1)
+        for rule, outcome in self.automation.process(self._apply):
+            if isinstance(outcome, Exception):
+                action = f"Automation {rule.name} fehlgeschlagen ({outcome})"
+            else:
+                action = f"Automation {rule.name} ausgeführt ({len(outcome)} Änderungen)"
+            self.logger.log(user="Automatik", action=action, kind=TYPE_AUTOMATION)
+        if self.command_bus is not None:
+            self.failed_commands += sum(not result.ok for result in self.command_bus.poll())
+
+    def stop(self):
+        self._stop.set()
+
+    def close(self):
+        self.automation.close()
+        self.server.close()
+        if self.command_bus is not None:
+            self.command_bus.close()
+        self.store.close()
+        self.logger.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Zentraler State-Service für mehrere Panels")
+    parser.add_argument("--host", default=config.API_HOST)
+    parser.add_argument("--port", type=int, default=config.API_PORT)
+    parser.add_argument("--token", default=config.API_TOKEN)
+    parser.add_argument("--state-dir", default=config.DEVICE_STATE_DIR)
+    parser.add_argument("--backend", default=config.DEVICE_BACKEND, help='"simulated", "mqtt" oder "none"')
+    parser.add_argument("--rules", default=config.AUTOMATION_RULES_PATH, help="Automationen (JSON)")
+    args = parser.parse_args(argv)
+
+    service = StateService(
+        RoomRegistry.load_default(),
+        state_dir=args.state_dir,
+        host=args.host,
+        port=args.port,
+        token=args.token,
+        backend=None if args.backend == "none" else args.backend,
+        rules_path=args.rules,
+    ).start()
+    print(f"State-Service läuft auf ws://{args.host}:{service.server.port}/ws")
+    try:
+        service.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
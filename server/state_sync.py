@@ -0,0 +1,285 @@
+"""Panel-Anbindung an einen zentralen State-Service (Multi-Panel-Betrieb).
+
+Jedes Panel behält seinen lokalen `DeviceStateStore` (Widgets, Raum-Schalter
+und Listener funktionieren unverändert), aber die maßgeblichen Zustände
+liegen beim Service (`server/state_service.py` oder ein Panel mit
+aktiviertem API-Server). `StateSync` verbindet beide über den WebSocket des
+`StateServer`:
+
+- Lokale Änderungen werden sofort angezeigt (optimistisch) und einmal pro
+  Frame gebündelt an den Service geschickt. Bis dessen Antwort da ist,
+  liegen sie als "Overlay" über dem Service-Zustand.
+- Deltas des Service (Snapshot beim Verbinden, danach fortlaufende
+  Sequenznummern) werden in `poll()` im Render-Thread übernommen; bei einer
+  Lücke wird ein neuer Snapshot angefordert.
+- Während eines Slider-Zugs reserviert das Panel das Gerät (`hold`, Lease
+  beim Service). Zieht ein anderes Panel gleichzeitig, lehnt der Service
+  dessen Änderungen ab; dort springt der Slider auf den Service-Zustand
+  zurück und folgt danach dem ziehenden Panel.
+
+Netzwerk läuft in einem eigenen Thread; `poll()` kostet im Render-Thread nur
+das Übernehmen bereits empfangener Nachrichten.
+"""
+
+import asyncio
+import base64
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from urllib.parse import urlsplit
+
+from server.websocket import OP_TEXT, WebSocketClosed, client_handshake, encode_frame, read_message
+
+
+# Snapshots großer Installationen dürfen größer sein als Client-Befehle
+MAX_SNAPSHOT_BYTES = 16 * 1024 * 1024
+
+# Präsenz-Meldungen an den Service höchstens so oft (s)
+PRESENCE_INTERVAL = 5.0
+
+
+class StateSync:
+    def __init__(self, store, url, token=None, reconnect_delay=0.5):
+        self.store = store
+        url = urlsplit(url)
+        self.host = url.hostname or "127.0.0.1"
+        self.port = url.port or 80
+        self.path = (url.path or "/ws") + (f"?{url.query}" if url.query else "")
+        if token:
+            self.path += ("&" if "?" in self.path else "?") + f"token={token}"
+        self.reconnect_delay = reconnect_delay
+
+        # Zustand laut Service und dessen Version (None = noch kein Snapshot)
+        self._auth = {}
+        self.version = None
+        # device_id -> (ref, Zustand): lokal angezeigt, vom Service noch nicht bestätigt
+        self._overlay = {}
+        self._refs = {}
+        self._ids = itertools.count(1)
+        # in diesem Frame lokal geänderte Zustände (werden in poll() gesendet)
+        self._outgoing = {}
+        self._held = set()
+        self._releases = []
+        self._applying = False
+        self._awaiting_snapshot = False
+        self._presence_sent = float("-inf")
+
+        self._incoming = queue.SimpleQueue()
+        self._writer = None
+        self._loop = None
+        self._thread = None
+        self._closed = False
+        self._first_snapshot = threading.Event()
+
+        # Kennzahlen
+        self.sent = 0
+        self.rejected = 0
+        self.resyncs = 0
+        self.snapshots = 0
+        self.reconnects = 0
+
+        store.listeners.append(self._on_local_change)
+
+    # ---------------------------------------------------------
+    # Render-Thread
+    # ---------------------------------------------------------
+    def start(self, wait=2.0):
+        """Startet die Verbindung und übernimmt den ersten Snapshot (bis `wait` s)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_loop, name="state-sync", daemon=True)
+            self._thread.start()
+            self._first_snapshot.wait(timeout=wait)
+            self.poll()
+        return self
+
+    @property
+    def connected(self):
+        return self._writer is not None
+
+    def hold(self, device_id):
+        """Gerät für einen Slider-Zug reservieren (bis `release`)."""
+        self._held.add(device_id)
+
+    def release(self, device_id):
+        """Zug beendet: Reservierung nach dem letzten Wert freigeben."""
+        if device_id in self._held:
+            self._held.discard(device_id)
+            self._releases.append(device_id)
+
+    def note_presence(self):
+        """Präsenz an den Service melden (für Abwesenheits-Automationen), höchstens alle 5 s."""
+        now = time.monotonic()
+        if now - self._presence_sent >= PRESENCE_INTERVAL:
+            self._presence_sent = now
+            self._send({"type": "presence"})
+
+    def _on_local_change(self, changes, version):
+        if self._applying:
+            return  # vom Service übernommen, nicht zurückschicken
+        self._outgoing.update(changes)
+        # sofort als Overlay, damit ein Delta im selben Frame sie nicht überschreibt
+        for device_id, state in changes.items():
+            self._overlay[device_id] = (None, state)
+
+    def poll(self):
+        """Jeden Frame: Service-Nachrichten übernehmen, lokale Änderungen senden."""
+        touched = set()
+        while True:
+            try:
+                message = self._incoming.get_nowait()
+            except queue.Empty:
+                break
+            kind = message.get("type")
+            if kind == "snapshot":
+                touched.update(self._auth)
+                self._auth = message["states"]
+                self.version = message["seq"]
+                self._awaiting_snapshot = False
+                touched.update(self._auth)
+                self.snapshots += 1
+                # nach (Wieder-)Verbindung unbestätigte Änderungen erneut senden
+                for device_id, (_, state) in self._overlay.items():
+                    self._outgoing.setdefault(device_id, state)
+            elif kind == "delta":
+                if self._awaiting_snapshot:
+                    continue
+                if self.version is None or message["from"] != self.version + 1:
+                    self._send({"type": "resync"})
+                    self._awaiting_snapshot = True
+                    self.resyncs += 1
+                    continue
+                for device_id, fields in message["changes"].items():
+                    state = dict(self._auth.get(device_id, {}))
+                    for name, value in fields.items():
+                        if value is None:
+                            state.pop(name, None)
+                        else:
+                            state[name] = value
+                    self._auth[device_id] = state
+                    touched.add(device_id)
+                self.version = message["seq"]
+            elif kind == "result":
+                ref = message.get("ref")
+                if not message.get("ok"):
+                    self.rejected += 1
+                for device_id in self._refs.pop(ref, ()):
+                    overlay = self._overlay.get(device_id)
+                    # nur die neueste eigene Änderung beendet das Overlay
+                    if overlay is not None and overlay[0] == ref:
+                        del self._overlay[device_id]
+                        touched.add(device_id)
+
+        # angezeigter Zustand = Service-Zustand, überlagert von eigenen offenen Änderungen
+        changes = {}
+        for device_id in touched:
+            overlay = self._overlay.get(device_id)
+            state = overlay[1] if overlay is not None else self._auth.get(device_id)
+            if state is not None and self.store.get(device_id) != state:
+                changes[device_id] = state
+        if changes:
+            self._applying = True
+            try:
+                self.store.apply(changes)
+            finally:
+                self._applying = False
+
+        self._flush_outgoing()
+
+    def _flush_outgoing(self):
+        if self._outgoing:
+            held = {d: s for d, s in self._outgoing.items() if d in self._held}
+            free = {d: s for d, s in self._outgoing.items() if d not in self._held}
+            self._outgoing = {}
+            for changes, lease in ((held, True), (free, False)):
+                if not changes:
+                    continue
+                ref = next(self._ids)
+                self._refs[ref] = list(changes)
+                for device_id, state in changes.items():
+                    self._overlay[device_id] = (ref, state)
+                self._send({"type": "set", "changes": changes, "ref": ref, "lease": lease})
+                self.sent += 1
+        for device_id in self._releases:
+            self._send({"type": "release", "id": device_id})
+        self._releases = []
+
+    def _send(self, message):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._write, json.dumps(message, separators=(",", ":")))
+
+    def close(self):
+        self._closed = True
+        if self._on_local_change in self.store.listeners:
+            self.store.listeners.remove(self._on_local_change)
+        if self._loop is None or self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._shutdown)
+        self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def stats(self):
+        return {
+            "connected": self.connected,
+            "version": self.version,
+            "sent": self.sent,
+            "rejected": self.rejected,
+            "pending": len(self._overlay),
+            "resyncs": self.resyncs,
+            "snapshots": self.snapshots,
+            "reconnects": self.reconnects,
+        }
+
+    # ---------------------------------------------------------
+    # Netzwerk-Thread
+    # ---------------------------------------------------------
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._task = self._loop.create_task(self._connection_loop())
+        self._loop.run_until_complete(asyncio.gather(self._task, return_exceptions=True))
+        self._loop.close()
+
+    def _shutdown(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._task.cancel()
+
+    def _write(self, text):
+        if self._writer is not None:
+            self._writer.write(encode_frame(text, mask=True))
+
+    async def _connection_loop(self):
+        while not self._closed:
+            try:
+                await self._connect_and_read()
+            except (OSError, WebSocketClosed, asyncio.IncompleteReadError):
+                pass
+            self._writer = None
+            if self._closed:
+                return
+            # Service weg: lokal weiterarbeiten, später neu verbinden
+            self.reconnects += 1
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _connect_and_read(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        writer.write(client_handshake(f"{self.host}:{self.port}", self.path, key))
+        status = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        if b" 101 " not in status:
+            writer.close()
+            raise WebSocketClosed(status.decode("latin-1").strip())
+        self._writer = writer
+        while True:
+            opcode, payload = await read_message(reader, writer, mask=True, max_bytes=MAX_SNAPSHOT_BYTES)
+            if opcode != OP_TEXT:
+                continue
+            message = json.loads(payload)
+            self._incoming.put(message)
+            if message.get("type") == "snapshot":
+                self._first_snapshot.set()
@@ -0,0 +1,139 @@
+"""Minimales WebSocket-Protokoll (RFC 6455) auf asyncio-Streams, nur Standardbibliothek.
+
+Unterstützt Handshake, Text-/Binär-Nachrichten (auch fragmentiert), Ping/Pong
+und Close. Frames vom Server sind unmaskiert und können einmal kodiert und
+an beliebig viele Clients verschickt werden (`encode_frame`); Clients (z.B.
+`server/state_sync.py`) maskieren ihre Frames (`mask=True`).
+"""
+
+import base64
+import hashlib
+import os
+import struct
+
+
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+# größte angenommene Nachricht vom Client (Befehle sind klein)
+MAX_MESSAGE_BYTES = 64 * 1024
+
+
+class WebSocketClosed(Exception):
+    """Die Verbindung wurde (ordentlich oder durch Fehler) beendet."""
+
+
+def accept_key(key):
+    """Wert für `Sec-WebSocket-Accept` zum `Sec-WebSocket-Key` des Clients."""
+    digest = hashlib.sha1((key + GUID).encode("ascii")).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def handshake_response(key):
+    return (
+        "HTTP/1.1 101 Switching Protocols\r\n"
+        "Upgrade: websocket\r\n"
+        "Connection: Upgrade\r\n"
+        f"Sec-WebSocket-Accept: {accept_key(key)}\r\n"
+        "\r\n"
+    ).encode("ascii")
+
+
+def encode_frame(payload, opcode=OP_TEXT, mask=False):
+    """Ein vollständiger Frame; unmaskiert (Server -> Client) oder maskiert (Client -> Server)."""
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, mask_bit | length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, mask_bit | 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, mask_bit | 127, length)
+    if mask:
+        key = os.urandom(4)
+        return header + key + _unmask(payload, key)
+    return header + payload
+
+
+def client_handshake(host, path, key):
+    """Upgrade-Anfrage eines Clients (Antwort: `handshake_response`)."""
+    return (
+        f"GET {path} HTTP/1.1\r\n"
+        f"Host: {host}\r\n"
+        "Upgrade: websocket\r\n"
+        "Connection: Upgrade\r\n"
+        f"Sec-WebSocket-Key: {key}\r\n"
+        "Sec-WebSocket-Version: 13\r\n"
+        "\r\n"
+    ).encode("ascii")
+
+
+def _unmask(payload, mask):
+    # XOR über den ganzen Block statt Byte für Byte
+    if not payload:
+        return payload
+    key = (mask * (len(payload) // 4 + 1))[: len(payload)]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(key, "big")).to_bytes(len(payload), "big")
+
+
+async def read_frame(reader, max_bytes=MAX_MESSAGE_BYTES):
+    """Liest einen Frame. Gibt (fin, opcode, payload) zurück."""
+    try:
+        b1, b2 = await reader.readexactly(2)
+        length = b2 & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", await reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", await reader.readexactly(8))
+        if length > max_bytes:
+            raise WebSocketClosed("Nachricht zu groß")
+        mask = await reader.readexactly(4) if b2 & 0x80 else None
+        payload = await reader.readexactly(length)
+    except (ConnectionError, EOFError) as exc:
+        raise WebSocketClosed(str(exc)) from exc
+    if mask is not None:
+        payload = _unmask(payload, mask)
+    return bool(b1 & 0x80), b1 & 0x0F, payload
+
+
+async def read_message(reader, writer, mask=False, max_bytes=MAX_MESSAGE_BYTES):
+    """Liest die nächste Text-/Binär-Nachricht; beantwortet Pings unterwegs.
+
+    Gibt (opcode, payload) zurück und wirft `WebSocketClosed` bei Close.
+    `mask=True` auf Client-Seite (Antworten müssen maskiert sein); Clients
+    erlauben mit `max_bytes` auch große Snapshots.
+    """
+    opcode = None
+    parts = []
+    size = 0
+    while True:
+        fin, op, payload = await read_frame(reader, max_bytes)
+        if op == OP_PING:
+            writer.write(encode_frame(payload, OP_PONG, mask))
+            continue
+        if op == OP_PONG:
+            continue
+        if op == OP_CLOSE:
+            try:
+                writer.write(encode_frame(payload[:2], OP_CLOSE, mask))
+            except (ConnectionError, RuntimeError):
+                pass
+            raise WebSocketClosed("Close vom Client")
+        if op != OP_CONTINUATION:
+            opcode = op
+            parts = []
+            size = 0
+        parts.append(payload)
+        size += len(payload)
+        if size > max_bytes:
+            raise WebSocketClosed("Nachricht zu groß")
+        if fin:
+            return opcode, b"".join(parts)
@@ -0,0 +1,118 @@
+"""Tests für den Automations-Scheduler und die Cron-Auswertung."""
+
+import heapq
+from datetime import datetime
+
+import pytest
+
+from devices.automation import AutomationEngine, CronSpec
+
+T0 = datetime(2026, 3, 2, 12, 0).timestamp()  # Montag
+
+
+def _engine():
+    now = [T0]
+    return AutomationEngine(clock=lambda: now[0]), now
+
+
+def _rule(rule_id, at, value=True):
+    return {
+        "id": rule_id,
+        "type": "at",
+        "at": datetime.fromtimestamp(at).isoformat(timespec="minutes"),
+        "actions": [{"set": {"licht": {"is_on": value}}}],
+    }
+
+
+def _live(engine):
+    """Gültige Heap-Einträge als [(Zeitpunkt, Regel-ID)]."""
+    return sorted(
+        (due, rule_id)
+        for due, _, rule_id, generation in engine._heap
+        if rule_id in engine._rules and engine._rules[rule_id].generation == generation
+    )
+
+
+def _run_until(engine, now, until):
+    """Heap bis `until` abarbeiten wie der Automations-Thread; gibt ausgelöste Regeln zurück."""
+    fired = []
+    while engine._heap and engine._heap[0][0] <= until:
+        due, _, rule_id, generation = heapq.heappop(engine._heap)
+        rule = engine._rules.get(rule_id)
+        if rule is None or rule.generation != generation:
+            continue
+        now[0] = due
+        fired.append((due, rule))
+        engine._fire(rule, due)
+    return fired
+
+
+def test_replace_rule_invalidates_old_entry():
+    engine, now = _engine()
+    engine.add_rule(_rule("r", T0 + 600), save=False)
+    new = engine.add_rule(_rule("r", T0 + 1200, value=False), save=False)
+
+    assert _live(engine) == [(T0 + 1200, "r")]
+    fired = _run_until(engine, now, T0 + 3600)
+    assert [(due, rule) for due, rule in fired] == [(T0 + 1200, new)]
+    assert engine.rules() == []
+
+
+def test_replace_rule_twice():
+    engine, now = _engine()
+    for minutes in (10, 20, 30):
+        engine.add_rule(_rule("r", T0 + minutes * 60), save=False)
+    assert _live(engine) == [(T0 + 1800, "r")]
+
+
+def test_remove_rule_drops_entry():
+    engine, now = _engine()
+    engine.add_rule(_rule("r", T0 + 600), save=False)
+    engine.add_rule(_rule("r", T0 + 1200), save=False)
+    assert engine.remove_rule("r", save=False)
+    assert not engine.remove_rule("r", save=False)
+
+    assert _live(engine) == []
+    assert _run_until(engine, now, T0 + 3600) == []
+
+
+def test_cron_rule_reschedules_after_firing():
+    engine, now = _engine()
+    engine.add_rule(
+        {"id": "c", "type": "cron", "cron": "30 * * * *", "actions": [{"scene": "abend"}]},
+        save=False,
+    )
+    fired = _run_until(engine, now, T0 + 3 * 3600)
+    assert [datetime.fromtimestamp(due).strftime("%H:%M") for due, _ in fired] == ["12:30", "13:30", "14:30"]
+    assert _live(engine) == [(datetime(2026, 3, 2, 15, 30).timestamp(), "c")]
+
+
+@pytest.mark.parametrize(
+    "expression, after, expected",
+    [
+        ("0 20 * * *", datetime(2026, 3, 2, 19, 59), datetime(2026, 3, 2, 20, 0)),
+        # strikt danach: derselbe Termin zählt nicht
+        ("0 20 * * *", datetime(2026, 3, 2, 20, 0), datetime(2026, 3, 3, 20, 0)),
+        ("*/15 * * * *", datetime(2026, 3, 2, 10, 7, 45), datetime(2026, 3, 2, 10, 15)),
+        ("0 8 * * 1-5", datetime(2026, 3, 6, 9, 0), datetime(2026, 3, 9, 8, 0)),  # Fr -> Mo
+        ("0 0 * * 7", datetime(2026, 3, 2, 0, 0), datetime(2026, 3, 8, 0, 0)),  # 7 = Sonntag
+        ("0 0 29 2 *", datetime(2026, 3, 1, 0, 0), datetime(2028, 2, 29, 0, 0)),
+        ("59 23 31 12 *", datetime(2026, 12, 31, 23, 59), datetime(2027, 12, 31, 23, 59)),
+        # Tag und Wochentag eingeschränkt: einer von beiden genügt
+        ("0 12 1 * 1", datetime(2026, 3, 2, 12, 0), datetime(2026, 3, 9, 12, 0)),
+        ("5,10-12 6 * * *", datetime(2026, 3, 2, 6, 5), datetime(2026, 3, 2, 6, 10)),
+    ],
+)
+def test_cron_next_after(expression, after, expected):
+    assert CronSpec(expression).next_after(after) == expected
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* 24 * * *", "5-1 * * * *", "*/0 * * * *"])
+def test_cron_rejects_invalid(expression):
+    with pytest.raises(ValueError):
+        CronSpec(expression)
+
+
+def test_cron_never_matching():
+    with pytest.raises(ValueError):
+        CronSpec("0 0 31 2 *").next_after(datetime(2026, 1, 1))
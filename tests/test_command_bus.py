@@ -0,0 +1,46 @@
+"""Tests für Zählung und Schließen des Geräte-Befehlsbusses."""
+
+import time
+
+from devices.actuator import SimulatedActuator
+from devices.command_bus import CommandBus, InProcessTransport
+
+
+def test_close_cancels_pending_deliveries():
+    # Aktor antwortet nie rechtzeitig: Zustellungen und Wiederholungen laufen noch
+    bus = CommandBus(InProcessTransport(SimulatedActuator(latency=5.0)), timeout=0.2, retries=5, max_rate=1).start()
+    for i in range(10):
+        bus.publish(f"gerät.{i % 3}", {"is_on": True, "brightness": i})
+    time.sleep(0.05)
+    bus.close()
+
+    stats = bus.stats()
+    assert stats["acked"] == stats["failed"] == 0
+    assert stats["cancelled"] > 0
+    assert stats["in_flight"] == 0
+    assert bus.outstanding == 0
+
+
+def test_publish_after_close_is_ignored():
+    bus = CommandBus(InProcessTransport(SimulatedActuator(latency=0.0))).start()
+    bus.close()
+    assert bus.publish("gerät.1", {"is_on": True}) is None
+    assert bus.publish_batch({"gerät.1": {"is_on": True}}) == []
+    bus.flush("gerät.1")
+    bus.close()
+    assert bus.published == 0
+
+
+def test_batch_counts_devices_and_messages():
+    gateways = {"a.1": "a", "a.2": "a", "b.1": "b"}
+    bus = CommandBus(InProcessTransport(SimulatedActuator(latency=0.0)), gateway_of=gateways.get).start()
+    bus.publish_batch({device_id: {"is_on": True} for device_id in gateways})
+    deadline = time.monotonic() + 2.0
+    while bus.outstanding and time.monotonic() < deadline:
+        time.sleep(0.01)
+    bus.close()
+
+    stats = bus.stats()
+    # Gerätebefehle und Nachrichten (eine je Gateway) getrennt
+    assert stats["sent"] == stats["acked"] == 3
+    assert stats["messages"] == 2
@@ -0,0 +1,56 @@
+"""Tests für das Verhalten des Hand-Trackers bei kurzen Aussetzern."""
+
+import pytest
+
+from vision.handtracking import HandTracker
+from vision.synthetic import SyntheticHand
+from vision.timing import ManualClock
+
+FPS = 30.0
+
+
+@pytest.fixture
+def tracker():
+    tracker = HandTracker(clock=ManualClock())
+    yield tracker
+    tracker.hands.close()
+
+
+def _play(tracker, hand, steps):
+    """Spielt die Frames eines `SyntheticHand`-Schritts ab, liefert die Ereignis-Arten."""
+    kinds = []
+    for visible in steps:
+        now = tracker.clock.advance(1.0 / FPS)
+        tracker.process_hands([h.detection() for h in visible], now)
+        kinds += [event.kind for event in tracker.events.drain()]
+    return kinds
+
+
+def _pinched(tracker):
+    hand = SyntheticHand(FPS, tracker.width, tracker.height, handedness="Right")
+    kinds = _play(tracker, hand, hand.close(True))
+    kinds += _play(tracker, hand, hand.hold(0.5))
+    assert kinds.count("down") == 1
+    return hand
+
+
+def test_short_dropout_keeps_pinch(tracker):
+    hand = _pinched(tracker)
+    kinds = _play(tracker, hand, [[]])
+    kinds += _play(tracker, hand, hand.hold(0.2))
+    assert "down" not in kinds
+    assert "up" not in kinds
+    assert "leave" not in kinds
+    assert kinds[-1] == "drag"
+
+
+def test_lost_hand_drops_pinch(tracker):
+    hand = _pinched(tracker)
+    kinds = _play(tracker, hand, [[]] * int(FPS * HandTracker.LOST_GRACE + 2))
+    # laufende Gesten enden vorher mit "end"
+    assert kinds[-1] == "leave"
+    assert set(kinds) <= {"gesture", "leave"}
+    assert not tracker.tracked
+    kinds = _play(tracker, hand, hand.hold(0.5))
+    assert kinds[0] == "enter"
+    assert kinds.count("down") == 1
@@ -0,0 +1,68 @@
+"""Tests für den Raster-Index der Raum-Treffertests."""
+
+import pygame
+import pytest
+
+from ui.hit_index import RoomHitIndex, _shape_contains
+
+WIDTH, HEIGHT = 160, 120
+
+ZONES = {
+    # schräge Kanten, Überlappung mit "flur" (der zuerst definierte Raum gewinnt)
+    "kueche": [(10, 10), (70, 14), (64, 60), (6, 52)],
+    "flur": [(50, 40), (110, 40), (110, 70), (50, 70)],
+    # konkav (L-Form)
+    "wohnzimmer": [(90, 5), (150, 5), (150, 35), (120, 35), (120, 60), (90, 60)],
+    "bad": pygame.Rect(20, 75, 45, 30),
+    # spitzes Dreieck über den Rand hinaus
+    "balkon": [(100, 80), (170, 118), (95, 125)],
+}
+
+
+def _expected(zones, x, y):
+    for room, shape in zones.items():
+        if _shape_contains(shape, x, y):
+            return room
+    return None
+
+
+def _mismatches(index, zones):
+    return [
+        (x, y, index.room_at(x, y), _expected(zones, x, y))
+        for y in range(HEIGHT)
+        for x in range(WIDTH)
+        if index.room_at(x, y) != _expected(zones, x, y)
+    ]
+
+
+@pytest.mark.parametrize("cell", [1, 2, 3, 4, 8])
+def test_room_at_matches_polygon_test(cell):
+    index = RoomHitIndex(WIDTH, HEIGHT, ZONES, cell=cell)
+    assert _mismatches(index, ZONES) == []
+
+
+def test_room_at_outside_and_missing_cursor():
+    index = RoomHitIndex(WIDTH, HEIGHT, ZONES)
+    assert index.room_at(None, 10) is None
+    assert index.room_at(-1, 10) is None
+    assert index.room_at(WIDTH, 10) is None
+    assert index.room_at(10, HEIGHT) is None
+
+
+@pytest.mark.parametrize("cell", [1, 4])
+def test_update_zones_rasterizes_changes(cell):
+    index = RoomHitIndex(WIDTH, HEIGHT, ZONES, cell=cell)
+    zones = dict(ZONES)
+    zones["kueche"] = [(12, 8), (40, 8), (40, 30), (12, 30)]
+    del zones["bad"]
+    zones["keller"] = [(0, 100), (30, 100), (30, 119), (0, 119)]
+
+    assert index.update_zones(zones) == {"kueche", "bad", "keller"}
+    assert _mismatches(index, zones) == []
+    # unveränderte Zonen: nichts zu tun
+    assert index.update_zones(zones) == set()
+
+    # andere Reihenfolge ändert die Priorität bei Überlappung
+    reordered = {"flur": zones["flur"], **{r: s for r, s in zones.items() if r != "flur"}}
+    index.update_zones(reordered)
+    assert _mismatches(index, reordered) == []
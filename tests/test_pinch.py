@@ -0,0 +1,83 @@
+"""Tests für die Pinch-Erkennung mit Hysterese, Haltezeit und Vorhersage."""
+
+import pytest
+
+from vision.pinch import PinchDetector
+from vision.timing import ManualClock
+
+ENTER, EXIT = 0.25, 0.4
+FRAME = 1 / 30
+
+
+def _detector(predict=0.0, hold=0.0):
+    clock = ManualClock()
+    return PinchDetector(enter=ENTER, exit=EXIT, predict=predict, hold=hold, clock=clock), clock
+
+
+def _feed(detector, clock, distances):
+    """Ein Abstand pro Frame; gibt die Pinch-Zustände und die Frames mit `pinch_start` zurück."""
+    states, starts = [], []
+    for frame, distance in enumerate(distances):
+        was_active = detector.active
+        states.append(detector.update(distance, clock.advance(FRAME)))
+        if states[-1] and not was_active:
+            starts.append(frame)
+    return states, starts
+
+
+def test_single_frame_below_enter_starts_pinch():
+    detector, clock = _detector()
+    states, starts = _feed(detector, clock, [0.6, 0.5, 0.2, 0.2])
+    assert states == [False, False, True, True]
+    assert starts == [2]
+
+
+def test_no_flicker_around_enter():
+    detector, clock = _detector()
+    states, starts = _feed(detector, clock, [0.3, 0.24, 0.26, 0.24, 0.3, 0.35, 0.26, 0.24])
+    assert starts == [1]
+    assert all(states[1:])
+
+
+def test_release_only_above_exit():
+    detector, clock = _detector()
+    states, starts = _feed(detector, clock, [0.2, 0.39, 0.4, 0.41, 0.3, 0.26, 0.24])
+    assert states == [True, True, True, False, False, False, True]
+    assert starts == [0, 6]
+
+
+def test_hold_requires_uninterrupted_time():
+    detector, clock = _detector(hold=2.5 * FRAME)
+    # aktiv im dritten Frame nach Beginn; die Unterbrechung startet die Messung neu
+    states, starts = _feed(detector, clock, [0.2, 0.2, 0.3, 0.2, 0.2, 0.2, 0.2, 0.2])
+    assert states == [False, False, False, False, False, False, True, True]
+    assert starts == [6]
+
+
+@pytest.mark.parametrize("distances, predict, expected", [
+    # schnell schließend: vorhergesagter Abstand unter `enter` -> früher Start
+    ([0.5, 0.45, 0.35], 0.1, True),
+    # ohne Vorhersage erst unter `enter`
+    ([0.5, 0.45, 0.35], 0.0, False),
+    # langsam schließend: Vorhersage bleibt über `enter`
+    ([0.34, 0.33, 0.32], 0.1, False),
+    # sich öffnende Finger lösen nie aus
+    ([0.26, 0.29, 0.32], 0.1, False),
+    # Vorhersage gilt nur unter `exit`
+    ([0.7, 0.55, 0.41], 0.5, False),
+])
+def test_prediction_only_while_closing(distances, predict, expected):
+    detector, clock = _detector(predict=predict)
+    states, _ = _feed(detector, clock, distances)
+    assert states[-1] is expected
+    assert not any(states[:-1])
+
+
+def test_reset_forgets_velocity():
+    detector, clock = _detector(predict=0.1)
+    _feed(detector, clock, [0.6, 0.5])
+    detector.reset()
+    assert detector.velocity is None
+    # ohne Geschwindigkeit keine Vorhersage im ersten Frame
+    states, _ = _feed(detector, clock, [0.3])
+    assert states == [False]
@@ -0,0 +1,67 @@
+"""Tests für das Auflösen von Zustandsänderungen aus API und Automationen."""
+
+import os
+
+import pytest
+
+from devices.scenes import resolve_changes
+from devices.state_store import DeviceStateStore
+from ui.room_registry import RoomRegistry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def registry():
+    return RoomRegistry.load(os.path.join(ROOT, "rooms.json"))
+
+
+def test_resolve_changes_merges_and_normalizes(registry):
+    store = DeviceStateStore()
+    store.set("kueche.licht", {"is_on": False, "brightness": 70, "last_brightness": 70})
+    changes = resolve_changes({"kueche.licht": {"is_on": True}}, registry, store)
+    assert changes["kueche.licht"]["brightness"] == 70
+    assert changes["kueche.licht"]["slider_open"] is True
+
+
+def test_unknown_device_raises_key_error(registry):
+    with pytest.raises(KeyError):
+        resolve_changes({"keller.licht": {"is_on": True}}, registry, DeviceStateStore())
+
+
+@pytest.mark.parametrize("fields", [
+    {"brightness": "abc"},
+    {"brightness": 150},
+    {"brightness": True},
+    {"is_on": 1},
+    {"position": -5},
+])
+def test_invalid_field_values_raise_value_error(registry, fields):
+    device_id = "kueche.rollo" if "position" in fields else "kueche.licht"
+    with pytest.raises(ValueError):
+        resolve_changes({device_id: fields}, registry, DeviceStateStore())
+
+
+def test_rollo_position_opens_closed_rollo(registry):
+    store = DeviceStateStore()
+    store.set("schlafzimmer.rollo", {"is_open": False, "position": 0, "last_position": 80})
+    changes = resolve_changes({"schlafzimmer.rollo": {"position": 50}}, registry, store)
+    state = changes["schlafzimmer.rollo"]
+    assert state["is_open"] is True and state["slider_open"] is True
+    assert state["position"] == state["last_position"] == 50
+
+
+def test_rollo_position_zero_closes(registry):
+    store = DeviceStateStore()
+    store.set("schlafzimmer.rollo", {"is_open": True, "position": 60, "last_position": 60})
+    state = resolve_changes({"schlafzimmer.rollo": {"position": 0}}, registry, store)["schlafzimmer.rollo"]
+    assert state["is_open"] is False and state["position"] == 0
+    assert state["last_position"] == 60
+
+
+def test_rollo_explicit_close_wins_over_position(registry):
+    store = DeviceStateStore()
+    state = resolve_changes(
+        {"schlafzimmer.rollo": {"is_open": False, "position": 50}}, registry, store
+    )["schlafzimmer.rollo"]
+    assert state["is_open"] is False and state["position"] == 0
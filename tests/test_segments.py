@@ -0,0 +1,45 @@
+"""Tests für die Rotation des segmentierten Aktivitätslogs."""
+
+import os
+
+import pytest
+
+from logsystem.segments import SegmentedLog, open_segment
+
+T0 = 1_770_000_000.0
+
+
+def _log(tmp_path):
+    log = SegmentedLog(str(tmp_path))
+    log.open()
+    log.write_rows([["01.01.2026", "10:00:00", "User 1", "Anmeldung erfolgreich"]], T0, T0)
+    return log
+
+
+def test_rotate_archives_active_segment(tmp_path):
+    log = _log(tmp_path)
+    log.rotate()
+
+    assert len(log.segments) == 1
+    with open_segment(os.path.join(log.directory, log.segments[0]["file"])) as f:
+        assert "Anmeldung erfolgreich" in f.read()
+    reloaded = SegmentedLog(str(tmp_path))
+    assert reloaded.segments == log.segments
+    assert reloaded.active_start is None
+
+
+def test_rotate_keeps_manifest_when_removing_fails(tmp_path, monkeypatch):
+    log = _log(tmp_path)
+
+    def crash(path):
+        raise OSError("Absturz beim Löschen")
+
+    monkeypatch.setattr(os, "remove", crash)
+    with pytest.raises(OSError):
+        log.rotate()
+    monkeypatch.undo()
+
+    # das Archiv steht schon im Manifest, nichts ist verwaist
+    reloaded = SegmentedLog(str(tmp_path))
+    assert [s["file"] for s in reloaded.segments] == [s["file"] for s in log.segments]
+    assert os.path.exists(os.path.join(str(tmp_path), reloaded.segments[0]["file"]))
@@ -0,0 +1,118 @@
+"""Tests für fehlerhafte Client-Eingaben an den State-Server."""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from devices.state_store import DeviceStateStore
+from server.state_server import StateServer
+from server.websocket import OP_TEXT, client_handshake, encode_frame, read_message
+
+
+@pytest.fixture
+def server():
+    store = DeviceStateStore()
+    store.set("kueche.licht", {"is_on": False})
+    server = StateServer(store, port=0, command_timeout=5.0).start()
+    yield server
+    server.close()
+
+
+class _Render:
+    """Ruft `process(handler)` wie der Render-Thread auf."""
+
+    def __init__(self, server, handler):
+        self.server = server
+        self.handler = handler
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.stop.is_set():
+            self.server.process(self.handler, timeout=0.01)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+
+
+def _apply(request):
+    if request.kind == "scene" and request.target not in {"abend": None}:
+        raise KeyError(f"Unbekannte Szene: {request.target}")
+    return {}
+
+
+async def _ws(server):
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    writer.write(client_handshake("127.0.0.1", "/ws", "dGhlIHNhbXBsZSBub25jZQ=="))
+    while await reader.readline() != b"\r\n":
+        pass
+    opcode, payload = await read_message(reader, writer, mask=True)
+    assert json.loads(payload)["type"] == "snapshot"
+    return reader, writer
+
+
+async def _send(reader, writer, message):
+    writer.write(encode_frame(json.dumps(message), OP_TEXT, mask=True))
+    _, payload = await asyncio.wait_for(read_message(reader, writer, mask=True), 5.0)
+    return json.loads(payload)
+
+
+async def _http(server, raw):
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    writer.write(raw)
+    status = await asyncio.wait_for(reader.readline(), 5.0)
+    writer.close()
+    return int(status.split()[1]) if status else None
+
+
+@pytest.mark.parametrize("message", [
+    {"type": "scene", "id": [1]},
+    {"type": "scene"},
+    {"type": "set", "id": {"a": 1}, "state": {"is_on": True}},
+    {"type": "release", "id": [1]},
+])
+def test_ws_rejects_non_string_ids(server, message):
+    async def run():
+        reader, writer = await _ws(server)
+        reply = await _send(reader, writer, {**message, "ref": 1})
+        assert reply == {"type": "error", "ref": 1, "error": "id muss ein String sein"}
+        # Verbindung und Render-Thread laufen weiter
+        reply = await _send(reader, writer, {"type": "scene", "id": "abend", "ref": 2})
+        assert reply["ok"] and reply["ref"] == 2
+        writer.close()
+
+    with _Render(server, _apply):
+        asyncio.run(run())
+
+
+def test_handler_exception_becomes_500(server):
+    def broken(request):
+        raise TypeError("kaputt")
+
+    async def run():
+        reader, writer = await _ws(server)
+        reply = await _send(reader, writer, {"type": "scene", "id": "abend", "ref": 1})
+        assert reply["ok"] is False and reply["status"] == 500
+        writer.close()
+
+    with _Render(server, broken):
+        asyncio.run(run())
+        status = asyncio.run(_http(server, b"POST /api/scenes/abend HTTP/1.1\r\nContent-Length: 0\r\n\r\n"))
+    assert status == 500
+
+
+@pytest.mark.parametrize("raw, status", [
+    (b"KAPUTT\r\n\r\n", 400),
+    (b"POST /api/state HTTP/1.1\r\nContent-Length: viel\r\n\r\n", 400),
+    (b"POST /api/state HTTP/1.1\r\nContent-Length: -5\r\n\r\n", 400),
+    (b"POST /api/state HTTP/1.1\r\nContent-Length: 10000000\r\n\r\n", 413),
+])
+def test_unreadable_request_gets_error_response(server, raw, status):
+    assert asyncio.run(_http(server, raw)) == status
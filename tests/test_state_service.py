@@ -0,0 +1,69 @@
+"""Tests für die Robustheit des zentralen State-Service."""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from logsystem.logger import Logger
+from server.state_service import StateService
+from tests.test_state_server import _send, _ws
+from ui.room_registry import RoomRegistry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = StateService(
+        RoomRegistry.load(os.path.join(ROOT, "rooms.json")),
+        state_dir=str(tmp_path / "state"),
+        port=0,
+        token=None,
+        backend=None,
+        scenes_path=os.path.join(ROOT, "scenes.json"),
+        rules_path=str(tmp_path / "automations.json"),
+        logger=Logger(str(tmp_path / "activity_log.csv")),
+    ).start()
+    thread = threading.Thread(target=service.run, daemon=True)
+    thread.start()
+    yield service
+    service.stop()
+    thread.join()
+    service.close()
+
+
+def test_malformed_scene_id_keeps_service_running(service):
+    async def run():
+        reader, writer = await _ws(service.server)
+        reply = await _send(reader, writer, {"type": "scene", "id": [1], "ref": 1})
+        assert reply["type"] == "error"
+        reply = await _send(reader, writer, {"type": "scene", "id": "gibt-es-nicht", "ref": 2})
+        assert reply["ok"] is False and reply["status"] == 404
+        writer.close()
+
+    asyncio.run(run())
+
+
+def test_run_survives_handler_exceptions(service, monkeypatch):
+    calls = []
+
+    def broken(handler, limit=20):
+        calls.append(handler)
+        raise TypeError("kaputt")
+
+    monkeypatch.setattr(service.automation, "process", broken)
+    deadline = time.monotonic() + 5.0
+    while len(calls) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(calls) >= 3
+
+    async def run():
+        reader, writer = await _ws(service.server)
+        reply = await _send(reader, writer, {"type": "presence", "ref": 1})
+        assert reply["ok"] is True
+        writer.close()
+
+    asyncio.run(run())
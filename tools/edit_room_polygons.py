@@ -5,30 +5,49 @@
 """Interaktiver Polygon-Editor für Raum-Zonen.
 
 Verwendung:
-    python tools/edit_room_polygons.py
+    python tools/edit_room_polygons.py [ETAGE]
+
+    ETAGE ist die Etagen-ID aus `rooms.json` (Standard: erste Etage).
 
 Beschreibung:
-- Lädt `Bilder/grundriss_neu.png` und zeigt es an.
-- Für jeden Raum (Badezimmer, Schlafzimmer, Wohnzimmer, Kueche) können
-  Punkte per Mausklick gesetzt werden, um ein Polygon zu definieren.
+- Lädt den Grundriss der Etage und zeigt ihn an.
+- Für jeden Raum der Etage aus `rooms.json` können Punkte per Mausklick
+  gesetzt werden, um ein Polygon zu definieren.
 - Drücke ENTER, um das aktuelle Polygon abzuschließen, BACKSPACE um den
   letzten Punkt zu löschen.
 - Drücke 'n' um zum nächsten Raum zu wechseln, 's' um zu speichern und zu beenden.
-- Die Polygone werden in `tools/room_polygons.json` im normalisierten
-  Format (0..1 relativ zur Bildgröße) gespeichert.
+- Die Polygone werden in die Polygon-Datei der Etage (z.B.
+  `tools/room_polygons.json`) im normalisierten Format (0..1 relativ zur
+  Bildgröße) gespeichert.
 """
 
 import os
+import sys
 import json
 import cv2
 import numpy as np
 
 
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-IMG_PATH = os.path.join(ROOT, "Bilder", "grundriss_neu.png")
-OUT_PATH = os.path.join(ROOT, "tools", "room_polygons.json")
 
-ROOMS = ["Badezimmer", "Schlafzimmer", "Wohnzimmer", "Kueche"]
+# Etage, Grundriss, Polygon-Datei und Raumnamen aus der Registry (rooms.json)
+with open(os.path.join(ROOT, "rooms.json"), "r", encoding="utf-8") as f:
+    _config = json.load(f)
+_floors = _config.get("floors") or [{
+    "id": "EG",
+    "floorplan": "Bilder/grundriss_neu.png",
+    "polygons": "tools/room_polygons.json",
+    "rooms": _config.get("rooms", []),
+}]
+_floor_id = sys.argv[1] if len(sys.argv) > 1 else _floors[0]["id"]
+_floor = next((fl for fl in _floors if fl["id"] == _floor_id), None)
+if _floor is None or not _floor.get("polygons"):
+    print("Unbekannte Etage oder keine Polygon-Datei:", _floor_id)
+    raise SystemExit(1)
+
+IMG_PATH = os.path.join(ROOT, _floor["floorplan"])
+OUT_PATH = os.path.join(ROOT, _floor["polygons"])
+ROOMS = [r["name"] for r in _floor["rooms"]]
 
 img = cv2.imread(IMG_PATH)
 if img is None:
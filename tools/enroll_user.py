@@ -0,0 +1,112 @@
+"""Nutzer mit eigener Login-Geste anlernen.
+
+Verwendung (aus dem Projektordner):
+    python tools/enroll_user.py NAME [--seconds 6] [--color 255,160,0] [--shape diamond]
+    python tools/enroll_user.py --add ID        # weitere Aufnahmen für Nutzer ID
+    python tools/enroll_user.py --list
+    python tools/enroll_user.py --remove ID
+
+Beschreibung:
+- Nach einem kurzen Countdown wird die Login-Geste einige Sekunden lang
+  aufgenommen. Dabei die Hand leicht drehen und näher/weiter weg halten,
+  damit die Vorlagen verschiedene Haltungen abdecken.
+- Ist die Geste der eines anderen Nutzers zu ähnlich, wird abgebrochen
+  (`--force` übernimmt sie trotzdem).
+- Nutzer und Vorlagen werden in `USER_STORE_PATH` (config.py) gespeichert;
+  die Standard-Nutzer (Faust/offene Hand) bleiben erhalten, bis sie mit
+  `--remove` gelöscht werden.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from vision.login_classifier import capture_features  # noqa: E402
+from vision.user_store import UserStore  # noqa: E402
+
+
+def _preview(label):
+    def show(frame, hand_found):
+        color = (0, 200, 0) if hand_found else (0, 0, 255)
+        cv2.putText(frame, label, (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, color, 2)
+        cv2.imshow("Anlernen", frame)
+        cv2.waitKey(1)
+    return show
+
+
+def _capture(seconds, camera):
+    for remaining in (3, 2, 1):
+        print(f"Aufnahme beginnt in {remaining} ...")
+        time.sleep(1.0)
+    print(f"Geste {seconds:.0f} s lang zeigen, Hand dabei leicht bewegen")
+    try:
+        features, _ = capture_features(seconds, camera, preview=_preview("Geste zeigen"))
+    finally:
+        cv2.destroyAllWindows()
+    print(f"{len(features)} Frames mit Hand aufgenommen")
+    return features
+
+
+def _color(text):
+    parts = [int(p) for p in text.split(",")]
+    if len(parts) != 3 or not all(0 <= p <= 255 for p in parts):
+        raise argparse.ArgumentTypeError("Farbe als R,G,B (0-255)")
+    return tuple(parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nutzer mit eigener Login-Geste anlernen")
+    parser.add_argument("name", nargs="?", help="Name des neuen Nutzers")
+    parser.add_argument("--seconds", type=float, default=6.0)
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--color", type=_color, help="Cursor-Farbe als R,G,B")
+    parser.add_argument("--shape", choices=UserStore.SHAPES, help="Cursor-Form")
+    parser.add_argument("--hint", default="eigene Geste", help="Hinweis im Login-Bildschirm")
+    parser.add_argument("--force", action="store_true", help="auch bei ähnlicher Geste anlernen")
+    parser.add_argument("--add", type=int, metavar="ID", help="weitere Aufnahmen für Nutzer ID")
+    parser.add_argument("--list", action="store_true")
+    parser.add_argument("--remove", type=int, metavar="ID")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    store = UserStore.load_default()
+
+    if args.list:
+        for user in store.users():
+            print(f"{user.id:3d}  {user.name:20s} {len(store.templates_of(user.id)):3d} Vorlagen  "
+                  f"{user.shape} {user.color}  {user.hint}")
+        return 0
+    if args.remove is not None:
+        store.remove(args.remove)
+        store.save()
+        print(f"Nutzer {args.remove} gelöscht")
+        return 0
+    if args.add is not None:
+        if store.user(args.add) is None:
+            parser.error(f"Unbekannter Nutzer: {args.add}")
+        store.add_templates(args.add, _capture(args.seconds, args.camera))
+        store.save()
+        print(f"{store.name(args.add)}: jetzt {len(store.templates_of(args.add))} Vorlagen")
+        return 0
+    if not args.name:
+        parser.error("NAME, --add, --list oder --remove angeben")
+
+    features = _capture(args.seconds, args.camera)
+    try:
+        user = store.enroll(args.name, features, args.color, args.shape, args.hint, force=args.force)
+    except ValueError as exc:
+        print(f"Nicht angelernt: {exc}")
+        return 1
+    store.save()
+    print(f"{user.name} angelernt (ID {user.id}, {len(store.templates_of(user.id))} Vorlagen)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
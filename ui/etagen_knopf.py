@@ -0,0 +1,61 @@
+"""Etagen-Umschalter für die HOME-Ansicht.
+
+Ein `FloorButton` pro Etage; der Knopf der aktiven Etage wird hervorgehoben.
+"""
+
+import pygame
+
+
+class FloorButton:
+    def __init__(self, floor_id, label, x, y, width=80, height=60):
+        self.floor_id = floor_id
+        self.label = label
+        self.rect = pygame.Rect(x, y, width, height)
+
+        # Normalzustand
+        self.color_normal = (100, 100, 100)  # Grau
+        self.text_normal = (255, 255, 255)  # Weiß
+
+        # Aktive Etage
+        self.color_active = (255, 215, 0)  # Gelb
+        self.text_active = (0, 0, 0)  # Schwarz
+
+        self.radius = 10
+
+        pygame.font.init()
+        self.font = pygame.font.SysFont("Arial", 20, bold=True)
+        # Beschriftung ändert sich nie -> beide Varianten vorrendern
+        self._text_normal = self.font.render(label, True, self.text_normal)
+        self._text_active = self.font.render(label, True, self.text_active)
+
+    def draw(self, screen, is_active=False):
+        """Zeichnet den Etagen-Knopf auf den Screen."""
+        pygame.draw.rect(
+            screen,
+            self.color_active if is_active else self.color_normal,
+            self.rect,
+            border_radius=self.radius,
+        )
+
+        text_surface = self._text_active if is_active else self._text_normal
+        text_rect = text_surface.get_rect(center=self.rect.center)
+        screen.blit(text_surface, text_rect)
+
+    def is_clicked(self, cursor_x, cursor_y):
+        """Prüft, ob der Knopf angeklickt wurde."""
+        return self.rect.collidepoint(cursor_x, cursor_y)
+
+
+def create_floor_buttons(floor_defs, screen_width, y=20, width=80, height=60, gap=10, margin=20):
+    """Legt die Etagen-Knöpfe rechtsbündig oben nebeneinander an.
+
+    Bei nur einer Etage wird kein Umschalter angezeigt (leere Liste).
+    """
+    if len(floor_defs) < 2:
+        return []
+    buttons = []
+    x = screen_width - margin - len(floor_defs) * (width + gap) + gap
+    for floor in floor_defs:
+        buttons.append(FloorButton(floor.id, floor.id, x, y, width, height))
+        x += width + gap
+    return buttons
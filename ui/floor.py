@@ -0,0 +1,281 @@
+"""Etagen: Grundriss, Raum-Zonen und Hit-Index pro Etage.
+
+Jede Etage (`Floor`) besitzt ihren eigenen Grundriss, ihre Polygon-Datei,
+den Raster-Hit-Index und die vorgerenderten Raum-Labels. `FloorManager`
+hält nur die aktive Etage und ihre direkten Nachbarn im Speicher; die
+Nachbarn werden im Hintergrund vorgeladen, damit ein Etagenwechsel keinen
+Frame blockiert.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from ui.hit_index import RoomHitIndex
+from ui.label_manager import LabelManager
+
+
+def fit_floorplan(img, width, height):
+    """Skaliert den Grundriss proportional und zentriert ihn im Fenster.
+
+    Gibt (skaliertes Bild, Position oben links) zurück.
+    """
+    img_width, img_height = img.get_size()
+    window_ratio = width / height
+    img_ratio = img_width / img_height
+
+    if img_ratio > window_ratio:
+        # Bild ist breiter → Breite anpassen
+        new_width = width
+        new_height = int(width / img_ratio)
+    else:
+        # Bild ist höher → Höhe anpassen
+        new_height = height
+        new_width = int(height * img_ratio)
+
+    scaled = pygame.transform.scale(img, (new_width, new_height))
+    return scaled, ((width - new_width) // 2, (height - new_height) // 2)
+
+
+class Floor:
+    """Laufzeit-Daten einer Etage.
+
+    `load()` erledigt den teuren, thread-sicheren Teil (Bild dekodieren und
+    skalieren, Polygone lesen, Hit-Index rastern). `finalize(font)` läuft im
+    Haupt-Thread (Pixelformat konvertieren, Labels rendern).
+    """
+
+    # Wie oft (Sekunden) die Polygon-Datei auf Änderungen geprüft wird
+    POLYGONS_POLL_INTERVAL = 1.0
+
+    def __init__(self, definition, width, height):
+        self.definition = definition
+        self.id = definition.id
+        self.name = definition.name
+        self.width = width
+        self.height = height
+
+        self.polygons_path = None
+        if definition.polygons:
+            self.polygons_path = os.path.join(os.getcwd(), definition.polygons)
+        self._polygons_mtime = None
+        self._polygons_checked = 0.0
+
+        self.loaded = False
+        self.ready = False
+        self.floorplan = None
+        self.floorplan_pos = (0, 0)
+        self.room_zones = {}
+        self.hit_index = None
+        self.label_manager = None
+
+    # ---------------------------------------------------------
+    # Laden / Entladen
+    # ---------------------------------------------------------
+    def load(self):
+        """Thread-sicherer Teil des Ladens (kein Display-Zugriff)."""
+        img = pygame.image.load(self.definition.floorplan)
+        self.floorplan, self.floorplan_pos = fit_floorplan(img, self.width, self.height)
+
+        loaded = self._load_room_zones()
+        self.room_zones = loaded if loaded else self.definition.default_zones()
+        self.hit_index = RoomHitIndex(self.width, self.height, self.room_zones)
+        self.loaded = True
+        return self
+
+    def finalize(self, font):
+        """Haupt-Thread-Teil: Pixelformat konvertieren und Labels vorrendern."""
+        self.floorplan = self.floorplan.convert_alpha()
+        self.label_manager = LabelManager(
+            font, self.floorplan, self.floorplan_pos, self.room_zones, self.definition.label_fallbacks()
+        )
+        self.ready = True
+
+    def unload(self):
+        self.loaded = False
+        self.ready = False
+        self.floorplan = None
+        self.room_zones = {}
+        self.hit_index = None
+        self.label_manager = None
+
+    # ---------------------------------------------------------
+    # Raum-Zonen
+    # ---------------------------------------------------------
+    def _load_room_zones(self):
+        """Liest die Polygon-Datei und rechnet die normalisierten Punkte in
+        Bildschirmkoordinaten um. Gibt None zurück, wenn nichts geladen wurde."""
+        if not self.polygons_path or not os.path.exists(self.polygons_path):
+            return None
+        try:
+            self._polygons_mtime = os.path.getmtime(self.polygons_path)
+            with open(self.polygons_path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+        except Exception:
+            return None
+        if not loaded:
+            return None
+
+        # convert normalized coordinates into screen coordinates (floorplan_pos + scaled)
+        fp_w, fp_h = self.floorplan.get_width(), self.floorplan.get_height()
+        zones = {}
+        for room, pts in loaded.items():
+            try:
+                conv = [
+                    (int(self.floorplan_pos[0] + x * fp_w), int(self.floorplan_pos[1] + y * fp_h))
+                    for (x, y) in pts
+                ]
+                zones[room] = conv
+            except Exception:
+                pass
+        return zones
+
+    def refresh(self, font):
+        """Lädt die Polygon-Datei neu, wenn sie sich geändert hat.
+
+        Die Prüfung ist auf `POLYGONS_POLL_INTERVAL` gedrosselt und kann daher
+        in jedem Frame aufgerufen werden. Der Hit-Index rastert nur die
+        geänderten Räume neu.
+        """
+        if not self.ready or not self.polygons_path:
+            return False
+        now = time.monotonic()
+        if now - self._polygons_checked < self.POLYGONS_POLL_INTERVAL:
+            return False
+        self._polygons_checked = now
+        try:
+            mtime = os.path.getmtime(self.polygons_path)
+        except OSError:
+            return False
+        if mtime == self._polygons_mtime:
+            return False
+
+        loaded = self._load_room_zones()
+        if not loaded:
+            return False
+        self.room_zones = loaded
+        self.hit_index.update_zones(self.room_zones)
+        self.label_manager = LabelManager(
+            font, self.floorplan, self.floorplan_pos, self.room_zones, self.definition.label_fallbacks()
+        )
+        return True
+
+
+class FloorManager:
+    """Verwaltet die Etagen: aktive Etage resident, Nachbarn vorgeladen.
+
+    - `activate(floor_id)`: synchroner Start (z.B. beim Programmstart).
+    - `switch(floor_id)`: Etagenwechsel ohne Blockieren; ist die Ziel-Etage
+      noch nicht fertig, wird sie umgeschaltet, sobald `poll()` sie fertigstellt.
+    - `poll()`: jeden Frame im Haupt-Thread aufrufen.
+    """
+
+    def __init__(self, floor_defs, width, height, font, neighbours=1):
+        self.font = font
+        self.neighbours = neighbours
+        self.order = [d.id for d in floor_defs]
+        self.floors = {d.id: Floor(d, width, height) for d in floor_defs}
+        self.active_id = None
+        self.pending_id = None
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="floor-prefetch")
+        self._futures = {}
+
+    @property
+    def active(self):
+        return self.floors.get(self.active_id)
+
+    def floor_of_room(self, room_name):
+        for floor in self.floors.values():
+            if room_name in floor.definition.names():
+                return floor
+        return None
+
+    def activate(self, floor_id):
+        floor = self.floors[floor_id]
+        if not floor.ready:
+            future = self._futures.pop(floor_id, None)
+            if future is not None:
+                future.result()
+            elif not floor.loaded:
+                floor.load()
+            floor.finalize(self.font)
+        self._set_active(floor_id)
+
+    def switch(self, floor_id):
+        """Wechselt die Etage, ohne auf das Laden zu warten. Gibt True zurück,
+        wenn die Etage sofort aktiv ist."""
+        if floor_id not in self.floors or floor_id == self.active_id:
+            return floor_id == self.active_id
+        if self.floors[floor_id].ready:
+            self.pending_id = None
+            self._set_active(floor_id)
+            return True
+        self.pending_id = floor_id
+        self._schedule(floor_id)
+        return False
+
+    def poll(self):
+        """Stellt höchstens eine fertig geladene Etage pro Frame fertig."""
+        for floor_id, future in list(self._futures.items()):
+            if not future.done():
+                continue
+            del self._futures[floor_id]
+            floor = self.floors[floor_id]
+            try:
+                future.result()
+            except Exception:
+                floor.unload()
+                if self.pending_id == floor_id:
+                    self.pending_id = None
+                continue
+            if not self._wanted(floor_id):
+                floor.unload()
+                continue
+            floor.finalize(self.font)
+            if self.pending_id == floor_id:
+                self.pending_id = None
+                self._set_active(floor_id)
+            break
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---------------------------------------------------------
+    # intern
+    # ---------------------------------------------------------
+    def _wanted(self, floor_id):
+        """Aktive Etage, Ziel-Etage und deren Nachbarn bleiben geladen."""
+        keep = set()
+        for center in (self.active_id, self.pending_id):
+            if center is None:
+                continue
+            i = self.order.index(center)
+            lo = max(0, i - self.neighbours)
+            keep.update(self.order[lo:i + self.neighbours + 1])
+        return floor_id in keep
+
+    def _schedule(self, floor_id):
+        floor = self.floors[floor_id]
+        if floor.ready or floor_id in self._futures:
+            return
+        self._futures[floor_id] = self._executor.submit(floor.load)
+
+    def _set_active(self, floor_id):
+        self.active_id = floor_id
+        # Nachbarn vorladen, entfernte Etagen entladen
+        for other_id, floor in self.floors.items():
+            if self._wanted(other_id):
+                if other_id != floor_id:
+                    self._schedule(other_id)
+            else:
+                future = self._futures.pop(other_id, None)
+                if future is not None and not future.cancel():
+                    # läuft schon: Ergebnis verwerfen, sobald es fertig ist
+                    self._futures[other_id] = future
+                    continue
+                if floor.loaded:
+                    floor.unload()
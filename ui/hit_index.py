@@ -0,0 +1,200 @@
+"""Raster-Index für schnelle Raum-Treffertests.
+
+Statt für jeden Cursor-Punkt alle Raum-Polygone per Ray-Casting zu prüfen,
+rastert `RoomHitIndex` die Polygone einmalig in ein kompaktes uint8-Raster
+(ein Raum-ID-Wert pro Zelle). Ein Treffertest ist danach ein einzelner
+Array-Zugriff. Zellen, die auf einer Raumkante liegen, werden als
+`MIXED` markiert und fallen auf den exakten Polygon-Test zurück.
+"""
+
+import cv2
+import numpy as np
+import pygame
+
+
+NO_ROOM = 0
+MIXED = 255
+MAX_ROOMS = MIXED - 1
+
+
+def point_in_polygon(x, y, polygon):
+    """Ray-Casting Punkt-in-Polygon-Test (exakt, ohne Raster)."""
+    inside = False
+    n = len(polygon)
+    for i in range(n):
+        x1, y1 = polygon[i]
+        x2, y2 = polygon[(i + 1) % n]
+        if (y1 > y) != (y2 > y):
+            xinters = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+            if xinters > x:
+                inside = not inside
+    return inside
+
+
+def _shape_points(shape):
+    """Gibt die Eckpunkte eines Polygons oder Rects als Liste zurück."""
+    if isinstance(shape, pygame.Rect):
+        return [shape.topleft, shape.topright, shape.bottomright, shape.bottomleft]
+    return [(int(p[0]), int(p[1])) for p in shape]
+
+
+def _shape_bbox(shape):
+    pts = _shape_points(shape)
+    xs = [p[0] for p in pts]
+    ys = [p[1] for p in pts]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _shape_contains(shape, x, y):
+    if isinstance(shape, pygame.Rect):
+        return shape.collidepoint(x, y)
+    return point_in_polygon(x, y, shape)
+
+
+class RoomHitIndex:
+    """Raum-ID-Raster für O(1)-Treffertests.
+
+    - `room_at(x, y)` gibt den Raumnamen unter dem Punkt zurück (oder None).
+    - `update_zones(room_zones)` rastert nur die Bereiche neu, deren Räume
+      sich geändert haben.
+
+    `cell` > 1 erzeugt ein gröberes Raster (weniger Speicher); Zellen, die
+    mehrere Räume oder eine Kante enthalten, nutzen dann den Polygon-Test.
+    Bei überlappenden Polygonen gewinnt wie bisher der zuerst definierte Raum.
+    """
+
+    def __init__(self, width, height, room_zones, cell=1):
+        self.width = width
+        self.height = height
+        self.cell = max(1, int(cell))
+
+        self.room_zones = {}
+        self.room_ids = {}
+        self.id_rooms = {}
+
+        # Volles Raster (Render-Auflösung) und ggf. gröberes Lookup-Raster
+        self._fine = np.zeros((height, width), dtype=np.uint8)
+        self.grid = self._fine
+        if self.cell > 1:
+            gh = -(-height // self.cell)
+            gw = -(-width // self.cell)
+            self.grid = np.zeros((gh, gw), dtype=np.uint8)
+
+        self.update_zones(room_zones)
+
+    # ---------------------------------------------------------
+    # Lookup
+    # ---------------------------------------------------------
+    def room_at(self, x, y):
+        """Gibt den Raum unter (x, y) zurück oder None."""
+        if x is None or y is None:
+            return None
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return None
+        label = self.grid[int(y) // self.cell, int(x) // self.cell]
+        if label == NO_ROOM:
+            return None
+        if label != MIXED:
+            return self.id_rooms.get(int(label))
+        # Kanten-/Mischzelle: exakter Test in Prioritätsreihenfolge
+        for room, shape in self.room_zones.items():
+            if _shape_contains(shape, x, y):
+                return room
+        return None
+
+    # ---------------------------------------------------------
+    # Aufbau / inkrementelles Update
+    # ---------------------------------------------------------
+    def update_zones(self, room_zones):
+        """Übernimmt neue Raum-Zonen und rastert nur geänderte Bereiche neu.
+
+        Gibt die Menge der geänderten Raumnamen zurück.
+        """
+        old_zones = self.room_zones
+        changed = set(old_zones) ^ set(room_zones)
+        for room in set(old_zones) & set(room_zones):
+            if _shape_points(old_zones[room]) != _shape_points(room_zones[room]):
+                changed.add(room)
+        order_changed = [r for r in old_zones if r in room_zones] != [r for r in room_zones if r in old_zones]
+
+        self.room_zones = dict(room_zones)
+        self._assign_ids()
+
+        if order_changed or not old_zones:
+            self._rasterize((0, 0, self.width, self.height))
+            return changed
+
+        # betroffene Fläche = alte + neue Bounding-Boxen der geänderten Räume
+        region = None
+        for room in changed:
+            for zones in (old_zones, room_zones):
+                if room not in zones:
+                    continue
+                x0, y0, x1, y1 = _shape_bbox(zones[room])
+                if region is None:
+                    region = [x0, y0, x1, y1]
+                else:
+                    region = [min(region[0], x0), min(region[1], y0), max(region[2], x1), max(region[3], y1)]
+        if region is not None:
+            self._rasterize((region[0] - 1, region[1] - 1, region[2] + 2, region[3] + 2))
+        return changed
+
+    def _assign_ids(self):
+        # IDs bleiben für bestehende Räume stabil, freie IDs werden wiederverwendet
+        for room in list(self.room_ids):
+            if room not in self.room_zones:
+                del self.id_rooms[self.room_ids.pop(room)]
+        free = (i for i in range(1, MAX_ROOMS + 1) if i not in self.id_rooms)
+        for room in self.room_zones:
+            if room not in self.room_ids:
+                rid = next(free, None)
+                if rid is None:
+                    raise ValueError(f"Zu viele Räume für den Hit-Index (max. {MAX_ROOMS})")
+                self.room_ids[room] = rid
+                self.id_rooms[rid] = room
+
+    def _rasterize(self, region):
+        """Rastert alle Räume, die `region` (x0, y0, x1, y1) schneiden, neu."""
+        c = self.cell
+        # Region auf Zellgrenzen erweitern und an das Raster klemmen
+        x0 = max(0, (int(region[0]) // c) * c)
+        y0 = max(0, (int(region[1]) // c) * c)
+        x1 = min(self.width, -(-int(region[2]) // c) * c)
+        y1 = min(self.height, -(-int(region[3]) // c) * c)
+        if x1 <= x0 or y1 <= y0:
+            return
+
+        sub = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        # umgekehrte Reihenfolge: der zuerst definierte Raum überschreibt zuletzt
+        for room in reversed(list(self.room_zones)):
+            shape = self.room_zones[room]
+            bx0, by0, bx1, by1 = _shape_bbox(shape)
+            if bx1 < x0 or bx0 > x1 or by1 < y0 or by0 > y1:
+                continue
+            pts = np.array(_shape_points(shape), dtype=np.int32).reshape((-1, 1, 2)) - (x0, y0)
+            cv2.fillPoly(sub, [pts.astype(np.int32)], int(self.room_ids[room]))
+        # Kanten exakt prüfen lassen: fillPoly und die gerasterte Kante weichen
+        # an schrägen Kanten bis zu einem Pixel von der echten Kante ab, daher
+        # wird die Kante um ein Pixel verbreitert (mit Rand für Kanten knapp
+        # außerhalb der Region)
+        edges = np.zeros((y1 - y0 + 2, x1 - x0 + 2), dtype=np.uint8)
+        for shape in self.room_zones.values():
+            pts = np.array(_shape_points(shape), dtype=np.int32).reshape((-1, 1, 2)) - (x0 - 1, y0 - 1)
+            cv2.polylines(edges, [pts.astype(np.int32)], True, 1, 1)
+        edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))[1:-1, 1:-1]
+        sub[edges > 0] = MIXED
+
+        self._fine[y0:y1, x0:x1] = sub
+        if c == 1:
+            return
+
+        # Grobes Raster: Zelle eindeutig, wenn alle Pixel dieselbe ID haben
+        fine = self._fine[y0:y1, x0:x1]
+        h, w = fine.shape
+        ph, pw = -(-h // c) * c, -(-w // c) * c
+        if (ph, pw) != (h, w):
+            fine = np.pad(fine, ((0, ph - h), (0, pw - w)), mode="edge")
+        blocks = fine.reshape(ph // c, c, pw // c, c)
+        lo = blocks.min(axis=(1, 3))
+        hi = blocks.max(axis=(1, 3))
+        self.grid[y0 // c:y0 // c + lo.shape[0], x0 // c:x0 // c + lo.shape[1]] = np.where(lo == hi, lo, MIXED)
@@ -0,0 +1,287 @@
+"""Hierarchischer Hit-Test-Baum für alle interaktiven Elemente.
+
+Statt in jedem Frame jedes Widget sein eigenes Rechteck prüfen zu lassen,
+hält `EventDispatcher` einen Baum aus `HitNode`-Objekten mit Bounding-Boxen.
+Pro Frame wird nur der Pfad der Knoten unter dem Cursor bestimmt und nur
+diese Knoten bekommen Hover-, Pinch- und Drag-Ereignisse.
+
+Knoten mit vielen Kindern legen intern ein Raster-Bucket-Verzeichnis an,
+damit die Suche nicht linear mit der Anzahl der Widgets wächst.
+"""
+
+import pygame
+
+
+class HitNode:
+    """Ein interaktiver Knoten im Hit-Test-Baum.
+
+    Args:
+        name: Bezeichnung (nur für Debugging/Logs).
+        rect: Bounding-Box als `pygame.Rect`; None = ganze Fläche.
+        hit_test: optionale Funktion (x, y) -> bool für nicht-rechteckige Knoten.
+        enabled: optionale Funktion () -> bool; deaktivierte Knoten werden übersprungen.
+        on_enter, on_leave: Hover beginnt/endet (ohne Argumente).
+        on_hover(cursor): jeden Frame, solange der Knoten unter dem Cursor liegt.
+        on_pinch_start(cursor): Pinch beginnt über dem Knoten.
+        on_drag(cursor): Pinch gehalten über dem Knoten (oder Knoten hat Capture).
+        on_release(cursor): Pinch endet, nachdem der Knoten ihn gestartet hat.
+
+    Ereignisse ohne Handler steigen zum Elternknoten auf.
+    """
+
+    # ab so vielen Kindern wird ein Bucket-Raster verwendet
+    BUCKET_THRESHOLD = 8
+    BUCKET_SIZE = 64
+
+    def __init__(self, name, rect=None, *, hit_test=None, enabled=None,
+                 on_enter=None, on_leave=None, on_hover=None,
+                 on_pinch_start=None, on_drag=None, on_release=None):
+        self.name = name
+        self.rect = rect
+        self.hit_test = hit_test
+        self.enabled = enabled
+        self.on_enter = on_enter
+        self.on_leave = on_leave
+        self.on_hover = on_hover
+        self.on_pinch_start = on_pinch_start
+        self.on_drag = on_drag
+        self.on_release = on_release
+
+        self.parent = None
+        self.children = []
+        self._buckets = None
+
+    # ---------------------------------------------------------
+    # Baum aufbauen
+    # ---------------------------------------------------------
+    def add(self, child):
+        """Hängt `child` an; zuerst hinzugefügte Kinder liegen oben."""
+        child.parent = self
+        self.children.append(child)
+        self._buckets = None
+        return child
+
+    def remove(self, child):
+        if child in self.children:
+            self.children.remove(child)
+            child.parent = None
+            self._buckets = None
+
+    def invalidate(self):
+        """Nach Änderung der Kinder-Rechtecke aufrufen (Bucket-Raster neu)."""
+        self._buckets = None
+
+    # ---------------------------------------------------------
+    # Hit-Test
+    # ---------------------------------------------------------
+    def is_enabled(self):
+        return self.enabled is None or self.enabled()
+
+    def contains(self, x, y):
+        if self.rect is not None and not self.rect.collidepoint(x, y):
+            return False
+        if self.hit_test is not None:
+            return self.hit_test(x, y)
+        return True
+
+    def _candidates(self, x, y):
+        if len(self.children) < self.BUCKET_THRESHOLD:
+            return self.children
+        if self._buckets is None:
+            self._build_buckets()
+        key = (int(x) // self.BUCKET_SIZE, int(y) // self.BUCKET_SIZE)
+        return self._buckets.get(key, self._unbounded)
+
+    def _build_buckets(self):
+        # Kinder ohne Rechteck liegen in jedem Bucket (z.B. Vollbild-Ebenen)
+        self._unbounded = [c for c in self.children if c.rect is None]
+        self._buckets = {}
+        s = self.BUCKET_SIZE
+        for child in self.children:
+            if child.rect is None:
+                continue
+            r = child.rect
+            for bx in range(r.left // s, (r.right - 1) // s + 1):
+                for by in range(r.top // s, (r.bottom - 1) // s + 1):
+                    self._buckets.setdefault((bx, by), [])
+        for key, bucket in self._buckets.items():
+            cell = pygame.Rect(key[0] * s, key[1] * s, s, s)
+            # Reihenfolge der Kinder (oben zuerst) bleibt erhalten
+            bucket.extend(c for c in self.children if c.rect is None or c.rect.colliderect(cell))
+
+    def child_at(self, x, y):
+        """Oberstes aktives Kind unter (x, y) oder None."""
+        for child in self._candidates(x, y):
+            if child.is_enabled() and child.contains(x, y):
+                return child
+        return None
+
+    def hit_path(self, x, y):
+        """Liste der Knoten von diesem Knoten bis zum tiefsten Treffer."""
+        if not (self.is_enabled() and self.contains(x, y)):
+            return []
+        path = [self]
+        node = self
+        while True:
+            node = node.child_at(x, y)
+            if node is None:
+                return path
+            path.append(node)
+
+
+class SwitchNode(HitNode):
+    """Knoten, der immer nur eine von mehreren Ebenen aktiv hat.
+
+    `select()` liefert den Schlüssel der aktiven Ebene (z.B. `current_view`),
+    sodass die Suche nicht über alle Views laufen muss. Fehlt eine Ebene,
+    wird sie über `factory(key)` erst bei Bedarf erzeugt.
+    """
+
+    def __init__(self, name, select, factory=None, **kwargs):
+        super().__init__(name, **kwargs)
+        self.select = select
+        self.factory = factory
+        self.layers = {}
+
+    def set_layer(self, key, node):
+        node.parent = self
+        self.layers[key] = node
+        return node
+
+    def remove_layer(self, key):
+        node = self.layers.pop(key, None)
+        if node is not None:
+            node.parent = None
+
+    def child_at(self, x, y):
+        key = self.select()
+        node = self.layers.get(key)
+        if node is None and self.factory is not None:
+            node = self.factory(key)
+            if node is not None:
+                self.set_layer(key, node)
+        if node is not None and node.is_enabled() and node.contains(x, y):
+            return node
+        return None
+
+
+class EventDispatcher:
+    """Verteilt Cursor-/Pinch-Zustände eines Frames über den Hit-Test-Baum.
+
+    `dispatch(cursor, pinch_start, pinch_active)` wird einmal pro Frame
+    aufgerufen. Der Knoten, der einen Pinch annimmt und `on_drag` oder
+    `on_release` besitzt, erhält bis zum Loslassen alle Drag-Ereignisse
+    (Capture), auch wenn der Cursor ihn verlässt.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or HitNode("root")
+        self.hover_path = []
+        self.captured = None
+
+    def _handler_node(self, path, attr):
+        # Ereignis vom tiefsten Knoten aus nach oben "blubbern" lassen
+        for node in reversed(path):
+            if getattr(node, attr) is not None:
+                return node
+        return None
+
+    def _update_hover(self, path, cursor):
+        old = self.hover_path
+        new_ids = {id(n) for n in path}
+        for node in old:
+            if id(node) not in new_ids and node.on_leave is not None:
+                node.on_leave()
+        old_ids = {id(n) for n in old}
+        for node in path:
+            if id(node) not in old_ids and node.on_enter is not None:
+                node.on_enter()
+            if node.on_hover is not None:
+                node.on_hover(cursor)
+        self.hover_path = path
+
+    def reset(self):
+        """Alle Hover-Zustände verlassen und Capture aufheben."""
+        self._update_hover([], None)
+        self.captured = None
+
+    def dispatch(self, cursor, pinch_start, pinch_active):
+        if cursor is None or cursor[0] is None:
+            if self.captured is not None and self.captured.on_release is not None:
+                self.captured.on_release(None)
+            self.reset()
+            return
+
+        path = self.root.hit_path(*cursor)
+        self._update_hover(path, cursor)
+
+        if self.captured is not None:
+            if pinch_active and not pinch_start:
+                if self.captured.on_drag is not None:
+                    self.captured.on_drag(cursor)
+                return
+            if self.captured.on_release is not None:
+                self.captured.on_release(cursor)
+            self.captured = None
+
+        if pinch_start:
+            node = self._handler_node(path, "on_pinch_start")
+            if node is not None:
+                node.on_pinch_start(cursor)
+                if node.on_drag is not None or node.on_release is not None:
+                    self.captured = node
+            return
+
+        if pinch_active:
+            node = self._handler_node(path, "on_drag")
+            if node is not None:
+                node.on_drag(cursor)
+
+
+def widget_node(name, widget, enabled=None, on_change=None, on_update=None):
+    """Erzeugt einen Knoten für ein Licht-/Rollo-Widget.
+
+    Die Bounding-Box umfasst Widget und Slider; die eigentliche Logik bleibt
+    in `widget.handle_gesture`. `on_change(widget, before, after)` wird einmal
+    pro Geste (Pinch bis Loslassen) aufgerufen, wenn sich der Gerätezustand
+    geändert hat – ein Slider-Zug erzeugt also nur ein Ereignis.
+    `on_update(widget)` dagegen bei jeder einzelnen Zustandsänderung (jeder
+    Frame eines Slider-Zugs), z.B. für den zentralen Gerätezustand.
+    """
+    bounds = widget.rect.union(widget.slider_rect)
+    gesture = {"before": None}
+
+    def on_leave():
+        widget.is_hovered = False
+
+    def handle(cursor, pinch_start, pinch_active):
+        if on_update is None or not (pinch_start or pinch_active):
+            widget.handle_gesture(cursor, pinch_start, pinch_active)
+            return
+        before = widget.get_state()
+        widget.handle_gesture(cursor, pinch_start, pinch_active)
+        if widget.get_state() != before:
+            on_update(widget)
+
+    def on_pinch_start(cursor):
+        gesture["before"] = widget.get_state()
+        handle(cursor, True, True)
+
+    def on_release(cursor):
+        before, gesture["before"] = gesture["before"], None
+        if before is None:
+            return
+        after = widget.get_state()
+        if after != before:
+            on_change(widget, before, after)
+
+    return HitNode(
+        name,
+        bounds,
+        enabled=enabled,
+        on_leave=on_leave,
+        on_hover=lambda cursor: widget.handle_gesture(cursor, False, False),
+        on_pinch_start=on_pinch_start,
+        on_drag=lambda cursor: handle(cursor, False, True),
+        on_release=on_release if on_change is not None else None,
+    )
@@ -3,7 +3,8 @@
 # Projekt: Smart-Home
 
 import pygame
-import time
+
+from vision.timing import Timer
 
 
 class ExitButton:
@@ -27,8 +28,7 @@ class ExitButton:
 
         # Bestätigungszustand
         self.is_confirming = False
-        self.confirm_time = None
-        self.confirm_timeout = 5.0  # 5 Sekunden
+        self.confirm_timer = Timer(5.0)  # 5 Sekunden
 
         self.radius = 10
         pygame.font.init()
@@ -56,7 +56,7 @@ class ExitButton:
         if not self.is_confirming:
             # Wechsel zu Bestätigungsmodus
             self.is_confirming = True
-            self.confirm_time = time.time()
+            self.confirm_timer.start()
             self.current_color = self.color_confirm
             self.current_text_color = self.text_confirm
             self.current_text_content = self.text_content_confirm
@@ -67,17 +67,14 @@ class ExitButton:
 
     def update(self):
         """Aktualisiert den Zustand des Knopfs (z.B. Timeout-Check)."""
-        if self.is_confirming and self.confirm_time is not None:
-            elapsed_time = time.time() - self.confirm_time
-
-            if elapsed_time > self.confirm_timeout:
-                # Timeout → Zurücksetzen zu Normalzustand
-                self.reset()
+        if self.is_confirming and self.confirm_timer.expired():
+            # Timeout → Zurücksetzen zu Normalzustand
+            self.reset()
 
     def reset(self):
         """Setzt den Knopf auf den Normalzustand zurück."""
         self.is_confirming = False
-        self.confirm_time = None
+        self.confirm_timer.cancel()
         self.current_color = self.color_normal
         self.current_text_color = self.text_normal
         self.current_text_content = self.text_content_normal
@@ -16,11 +16,13 @@ class LabelManager:
     `blit_label(screen, room, is_selected)`, um die passende Surface zu zeichnen.
     """
 
-    def __init__(self, font, floorplan, floorplan_pos, room_zones):
+    def __init__(self, font, floorplan, floorplan_pos, room_zones, label_fallbacks=None):
         self.font = font
         self.floorplan = floorplan
         self.floorplan_pos = floorplan_pos
         self.room_zones = room_zones
+        # Fallback-Positionen (relativ zum Grundriss) je Raum, aus der Registry
+        self.label_fallbacks = label_fallbacks or {}
 
         self.room_bboxes = {}
         self.label_surfaces = {}
@@ -43,13 +45,7 @@ class LabelManager:
         if fp_x <= cx <= fp_x + fp_w and fp_y <= cy <= fp_y + fp_h:
             return (cx, cy)
         # reasonable fallbacks per room to avoid off-screen labels
-        mapping = {
-            "Badezimmer": (0.15, 0.15),
-            "Schlafzimmer": (0.75, 0.15),
-            "Wohnzimmer": (0.25, 0.75),
-            "Kueche": (0.75, 0.75),
-        }
-        frac = mapping.get(room, (0.5, 0.5))
+        frac = self.label_fallbacks.get(room, (0.5, 0.5))
         return (int(fp_x + frac[0] * fp_w), int(fp_y + frac[1] * fp_h))
 
     def _prepare(self):
@@ -0,0 +1,106 @@
+"""Vorausschauendes Laden von Raum-Views beim Hovern.
+
+Sobald der Cursor auf dem Grundriss über einem Raum steht, lädt
+`ViewPrefetcher` im Hintergrund das Raumbild (Dekodieren + Skalieren).
+Im nächsten Frame nach Fertigstellung wird daraus im Haupt-Thread die
+komplette View gebaut (statische Ebene, vorgerenderte Widget-Texte). Beim
+Pinch liegt die View dann schon bereit. Verlässt der Cursor den Raum, wird
+der Auftrag abgebrochen bzw. die vorbereitete View verworfen.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+
+def load_room_image(path, size):
+    """Lädt und skaliert ein Raumbild ohne Display-Abhängigkeit.
+
+    Kann in einem Worker-Thread laufen; `convert_alpha` folgt im Haupt-Thread.
+    """
+    image = pygame.image.load(path)
+    return pygame.transform.scale(image, size)
+
+
+class ViewPrefetcher:
+    """Bereitet höchstens eine Raum-View (die gerade gehoverte) im Voraus vor.
+
+    - `hover(view_key)`: jeden Frame mit der View des gehoverten Raums (oder None).
+    - `poll()`: jeden Frame im Haupt-Thread; baut fertig geladene Views.
+    - `take(view_key)`: gibt eine vorbereitete View heraus (oder None).
+    """
+
+    def __init__(self, ui, build_view):
+        self.ui = ui
+        self.build_view = build_view
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="view-prefetch")
+
+        self.target = None
+        self._future = None
+        self._ready_key = None
+        self._ready_view = None
+
+        # Zähler für Diagnose
+        self.started = 0
+        self.cancelled = 0
+        self.hits = 0
+
+    def hover(self, view_key):
+        if view_key == self.target:
+            return
+        self._cancel()
+        self.target = view_key
+        if view_key is None or view_key in self.ui.views:
+            return
+        room = self.ui.registry.room_for_view(view_key)
+        if room is None:
+            return
+        if room.image:
+            size = (self.ui.WIDTH, self.ui.HEIGHT)
+            self._future = self._executor.submit(load_room_image, room.image, size)
+        else:
+            self._future = self._executor.submit(lambda: None)
+        self.started += 1
+
+    def poll(self):
+        future = self._future
+        if future is None or not future.done():
+            return
+        self._future = None
+        if future.cancelled():
+            return
+        try:
+            image = future.result()
+        except Exception:
+            # Fehler beim Vorladen: die View wird beim Betreten normal gebaut
+            return
+        key = self.target
+        if key is None or key in self.ui.views:
+            return
+        room = self.ui.registry.room_for_view(key)
+        self._ready_key = key
+        self._ready_view = self.build_view(room, image)
+
+    def take(self, view_key):
+        if view_key != self._ready_key:
+            return None
+        view = self._ready_view
+        self._ready_key = None
+        self._ready_view = None
+        self.hits += 1
+        return view
+
+    def _cancel(self):
+        if self._future is not None:
+            # läuft der Auftrag schon, wird sein Ergebnis in poll() ignoriert
+            self._future.cancel()
+            self._future = None
+            self.cancelled += 1
+        if self._ready_view is not None:
+            self._ready_key = None
+            self._ready_view = None
+            self.cancelled += 1
+
+    def shutdown(self):
+        self._cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
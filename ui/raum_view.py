@@ -0,0 +1,91 @@
+"""Generische Raum-Nahaufnahme mit Widgets.
+
+`RaumView` ersetzt die früheren, einzeln ausgeschriebenen Raum-Views
+(Schlafzimmer, Wohnzimmer, Badezimmer, Küche). Hintergrundbild und Widgets
+werden aus der `RoomDef` der Registry erzeugt.
+"""
+
+from ui.prefetch import load_room_image
+from ui.zuruck_knopf import BackButton
+from widgets.light import LightWidget
+from widgets.rollo import RolloWidget
+
+
+# Gerätetyp aus rooms.json -> Widget-Klasse
+WIDGET_TYPES = {
+    "light": LightWidget,
+    "rollo": RolloWidget,
+}
+
+
+def create_widget(device):
+    """Erzeugt das passende Widget für eine `DeviceDef`."""
+    widget_cls = WIDGET_TYPES.get(device.type)
+    if widget_cls is None:
+        raise ValueError(f"Unbekannter Gerätetyp: {device.type}")
+    kwargs = {"name": device.name, "device_id": device.id}
+    if device.width is not None:
+        kwargs["width"] = device.width
+    if device.height is not None:
+        kwargs["height"] = device.height
+    return widget_cls(device.x, device.y, **kwargs)
+
+
+class RaumView:
+    def __init__(self, ui, room, image=None):
+        """Baut die View für `room`.
+
+        `image` kann ein bereits geladenes und skaliertes (aber noch nicht
+        konvertiertes) Raumbild sein, z.B. vom `ViewPrefetcher`.
+        """
+        self.ui = ui
+        self.room = room
+        self.font = ui.font
+
+        # Raum-Bild laden (falls nicht schon vorgeladen)
+        if image is None and room.image:
+            image = load_room_image(room.image, (ui.WIDTH, ui.HEIGHT))
+
+        # Menu Button wird von der UI bereitgestellt
+        self.menu_button = ui.menu_button
+
+        # Zurück-Button rechts neben dem Menü-Button (10px Abstand)
+        back_button_x = self.menu_button.rect.x + self.menu_button.rect.width + 10
+        back_button_y = self.menu_button.rect.y
+        self.back_button = BackButton(x=back_button_x, y=back_button_y, width=80, height=60)
+
+        # Statische Ebene: Hintergrund + Zurück-Button, einmalig zusammengesetzt
+        self.static_layer = None
+        if image is not None:
+            self.static_layer = image.convert_alpha()
+            self.back_button.draw(self.static_layer)
+
+        # Widgets aus der Registry erzeugen (Reihenfolge = Zeichenreihenfolge)
+        self.widgets = [create_widget(device) for device in room.devices]
+
+    def memory_size(self):
+        """Geschätzter Speicherbedarf der View in Bytes (für das View-Budget)."""
+        if self.static_layer is None:
+            return 0
+        layer = self.static_layer
+        return layer.get_width() * layer.get_height() * layer.get_bytesize()
+
+    def draw(self):
+        screen = self.ui.screen
+
+        # Hintergrund + Zurück-Button
+        if self.static_layer is not None:
+            screen.blit(self.static_layer, (0, 0))
+        else:
+            self.back_button.draw(screen)
+
+        # Menu Button zeichnen (Farbe hängt vom Menüzustand ab)
+        self.menu_button.draw(screen)
+
+        # Widgets zeichnen
+        for widget in self.widgets:
+            widget.draw(screen)
+
+    def handle_click(self, pos):
+        if self.back_button.is_clicked(pos[0], pos[1]):
+            self.ui.current_view = "HOME"
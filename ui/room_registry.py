@@ -0,0 +1,176 @@
+"""Raum- und Geräte-Registry.
+
+Alle Etagen, Räume, ihre Geräte und das Widget-Layout werden in einer
+einzigen Konfigurationsdatei (`rooms.json`) definiert. Dieses Modul liest die Datei
+und stellt die Definitionen für UI, Label-Manager und Views bereit. Es
+importiert bewusst kein Pygame, damit auch Tools es nutzen können.
+"""
+
+import json
+import os
+
+
+class DeviceDef:
+    """Ein Gerät in einem Raum (z.B. Licht oder Rollo) mit Widget-Position.
+
+    `gateway` ist das Gateway (z.B. Zigbee- oder KNX-Bridge), über das das
+    Gerät angesprochen wird; Befehle werden je Gateway gebündelt.
+    """
+
+    DEFAULT_GATEWAY = "default"
+
+    def __init__(self, device_id, device_type, name, x, y, room=None, width=None, height=None, gateway=None):
+        self.id = device_id
+        self.type = device_type
+        self.name = name
+        self.x = x
+        self.y = y
+        self.room = room
+        self.width = width
+        self.height = height
+        self.gateway = gateway or self.DEFAULT_GATEWAY
+
+    @classmethod
+    def from_dict(cls, data, room=None):
+        return cls(
+            device_id=data["id"],
+            device_type=data["type"],
+            name=data.get("name", data["id"]),
+            x=data.get("x", 100),
+            y=data.get("y", 200),
+            room=room,
+            width=data.get("width"),
+            height=data.get("height"),
+            gateway=data.get("gateway"),
+        )
+
+
+class RoomDef:
+    """Ein Raum mit View-Schlüssel, Hintergrundbild und Geräten."""
+
+    def __init__(self, name, view, image=None, label_fallback=None, default_zone=None, devices=None, floor=None):
+        self.name = name
+        self.view = view
+        self.floor = floor
+        self.image = image
+        self.label_fallback = tuple(label_fallback) if label_fallback else (0.5, 0.5)
+        self.default_zone = [tuple(p) for p in default_zone] if default_zone else None
+        self.devices = devices or []
+
+    @classmethod
+    def from_dict(cls, data, floor=None):
+        name = data["name"]
+        return cls(
+            name=name,
+            view=data.get("view", name.upper()),
+            image=data.get("image"),
+            label_fallback=data.get("label_fallback"),
+            default_zone=data.get("default_zone"),
+            devices=[DeviceDef.from_dict(d, room=name) for d in data.get("devices", [])],
+            floor=floor,
+        )
+
+
+class FloorDef:
+    """Eine Etage mit eigenem Grundriss, Polygon-Datei und Räumen."""
+
+    def __init__(self, floor_id, name, floorplan, polygons, rooms):
+        self.id = floor_id
+        self.name = name
+        self.floorplan = floorplan
+        self.polygons = polygons
+        self.rooms = rooms
+
+    @classmethod
+    def from_dict(cls, data):
+        floor_id = data["id"]
+        return cls(
+            floor_id=floor_id,
+            name=data.get("name", floor_id),
+            floorplan=data["floorplan"],
+            polygons=data.get("polygons"),
+            rooms=[RoomDef.from_dict(r, floor=floor_id) for r in data.get("rooms", [])],
+        )
+
+    def names(self):
+        return [r.name for r in self.rooms]
+
+    def label_fallbacks(self):
+        return {r.name: r.label_fallback for r in self.rooms}
+
+    def default_zones(self):
+        return {r.name: r.default_zone for r in self.rooms if r.default_zone}
+
+
+class RoomRegistry:
+    """Alle Etagen und Räume aus `rooms.json`.
+
+    Die Reihenfolge der Räume in der Datei bestimmt auch die Priorität bei
+    überlappenden Zonen. Raumnamen und View-Schlüssel sind hausweit eindeutig.
+    """
+
+    # Grundriss/Polygone für Konfigurationen ohne "floors" (eine Etage)
+    DEFAULT_FLOORPLAN = "Bilder/grundriss_neu.png"
+    DEFAULT_POLYGONS = "tools/room_polygons.json"
+
+    def __init__(self, floors):
+        self.floors = list(floors)
+        self.rooms = [r for f in self.floors for r in f.rooms]
+        self._floors = {f.id: f for f in self.floors}
+        self._by_name = {r.name: r for r in self.rooms}
+        self._by_view = {r.view: r for r in self.rooms}
+        self._devices = {d.id: d for r in self.rooms for d in r.devices}
+
+    @classmethod
+    def from_dict(cls, data):
+        if "floors" in data:
+            return cls(FloorDef.from_dict(f) for f in data["floors"])
+        # altes Format: nur eine Raumliste -> eine Etage
+        floor = FloorDef.from_dict({
+            "id": "EG",
+            "name": "Erdgeschoss",
+            "floorplan": cls.DEFAULT_FLOORPLAN,
+            "polygons": cls.DEFAULT_POLYGONS,
+            "rooms": data.get("rooms", []),
+        })
+        return cls([floor])
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls.from_dict(data)
+
+    @classmethod
+    def load_default(cls):
+        """Lädt die Registry aus `config.ROOMS_CONFIG_PATH` (relativ zum Arbeitsverzeichnis)."""
+        from config import ROOMS_CONFIG_PATH
+        return cls.load(os.path.join(os.getcwd(), ROOMS_CONFIG_PATH))
+
+    def floor(self, floor_id):
+        return self._floors.get(floor_id)
+
+    def room(self, name):
+        return self._by_name.get(name)
+
+    def room_for_view(self, view):
+        return self._by_view.get(view)
+
+    def view_for_room(self, name):
+        room = self._by_name.get(name)
+        return room.view if room else None
+
+    def device(self, device_id):
+        return self._devices.get(device_id)
+
+    def devices(self):
+        return list(self._devices.values())
+
+    def names(self):
+        return [r.name for r in self.rooms]
+
+    def label_fallbacks(self):
+        return {r.name: r.label_fallback for r in self.rooms}
+
+    def default_zones(self):
+        return {r.name: r.default_zone for r in self.rooms if r.default_zone}
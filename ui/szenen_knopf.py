@@ -0,0 +1,51 @@
+"""Szenen-Knöpfe für die HOME-Ansicht.
+
+Ein `SceneButton` pro Szene aus `scenes.json`; ein Pinch schaltet alle
+Geräte der Szene in einem Schritt.
+"""
+
+import pygame
+
+
+class SceneButton:
+    def __init__(self, scene_id, label, x, y, width=130, height=50):
+        self.scene_id = scene_id
+        self.label = label
+        self.rect = pygame.Rect(x, y, width, height)
+
+        self.color_normal = (40, 60, 90)  # Dunkelblau
+        self.color_border = (255, 255, 255)  # Weiß
+        self.color_hover = (255, 215, 0)  # Gelb
+        self.radius = 10
+
+        pygame.font.init()
+        self.font = pygame.font.SysFont("Arial", 20, bold=True)
+        # Beschriftung ändert sich nie -> vorrendern
+        self._text = self.font.render(label, True, (255, 255, 255))
+
+    def draw(self, screen, is_hovered=False):
+        """Zeichnet den Szenen-Knopf auf den Screen."""
+        pygame.draw.rect(screen, self.color_normal, self.rect, border_radius=self.radius)
+        pygame.draw.rect(
+            screen,
+            self.color_hover if is_hovered else self.color_border,
+            self.rect,
+            3,
+            border_radius=self.radius,
+        )
+        screen.blit(self._text, self._text.get_rect(center=self.rect.center))
+
+    def is_clicked(self, cursor_x, cursor_y):
+        """Prüft, ob der Knopf angeklickt wurde."""
+        return self.rect.collidepoint(cursor_x, cursor_y)
+
+
+def create_scene_buttons(scenes, screen_height, width=130, height=50, gap=10, margin=20):
+    """Legt die Szenen-Knöpfe unten links nebeneinander an."""
+    buttons = []
+    x = margin
+    y = screen_height - margin - height
+    for scene in scenes:
+        buttons.append(SceneButton(scene.id, scene.name, x, y, width, height))
+        x += width + gap
+    return buttons
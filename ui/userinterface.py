@@ -5,27 +5,49 @@ Grundriss, verwaltet Raum-Zustände und stellt die Raum-Views bereit.
 """
 
 import pygame
-import os
-import json
 from ui.abmeldeknopf import LogoutButton
 from ui.knopf_beenden import ExitButton
 from ui.menu_knopf import MenuButton
-from ui.Schlafzimmer import SchlafzimmerView
-from ui.Wohnzimmer import WohnzimmerView
-from ui.badezimmer import BadezimmerView
-from ui.kueche import KuecheView
-from ui.label_manager import LabelManager
+from ui.floor import FloorManager
+from ui.etagen_knopf import create_floor_buttons
+from ui.szenen_knopf import create_scene_buttons
+from ui.raum_view import RaumView
+from ui.room_registry import RoomRegistry
+from ui.view_cache import ViewCache
+from ui.prefetch import ViewPrefetcher
+import config
+from config import DEVICE_STATE_DIR, SCENES_CONFIG_PATH, VIEW_MEMORY_BUDGET_MB
+from devices.automation import AutomationEngine
+from devices.command_bus import create_command_bus
+from devices.scenes import load_scenes, resolve_changes, resolve_scene, resolve_targets
+from devices.state_store import DeviceStateStore, StatePersister
+from server.state_server import StateServer
+from server.state_service import describe_devices, describe_scenes
+from server.state_sync import StateSync
+from ui.hit_index import point_in_polygon
 
 
 class SmartHomeUI:
-    def __init__(self):
+    """Grundriss, Raum-Views und Gerätezustände eines Panels.
+
+    `state_dir` ist der Ordner der persistierten Gerätezustände. Mit
+    `services=False` laufen weder Befehlsbus, API-Server und Automationen
+    noch die Anbindung an den State-Service (`STATE_SERVICE_URL`) – für
+    Last- und Dauertests, die keine echten Geräte ansprechen sollen.
+    """
+
+    def __init__(self, registry: RoomRegistry | None = None, screen: pygame.Surface | None = None,
+                 state_dir=DEVICE_STATE_DIR, services=True):
         pygame.init()
 
-        # Fenster
+        # Fenster (ein übergebenes Surface wird verwendet, z.B. ohne Anzeige)
         self.WIDTH = 1100
         self.HEIGHT = 650
-        self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
-        pygame.display.set_caption("Gestenbasiertes Smart Home")
+        if screen is None:
+            self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
+            pygame.display.set_caption("Gestenbasiertes Smart Home")
+        else:
+            self.screen = screen
 
         self.clock = pygame.time.Clock()
 
@@ -39,70 +61,64 @@ class SmartHomeUI:
         # Schrift
         self.font = pygame.font.SysFont("arial", 22, bold=True)
 
-        # Grundriss PNG laden (proportional skalieren und zentrieren)
-        img = pygame.image.load("Bilder/grundriss_neu.png").convert_alpha()
-        img_width, img_height = img.get_size()
-        window_ratio = self.WIDTH / self.HEIGHT
-        img_ratio = img_width / img_height
+        # Räume, Geräte und Widget-Layout aus der Registry (rooms.json)
+        self.registry = registry or RoomRegistry.load_default()
 
-        if img_ratio > window_ratio:
-            # Bild ist breiter → Breite anpassen
-            new_width = self.WIDTH
-            new_height = int(self.WIDTH / img_ratio)
+        # Multi-Panel-Betrieb: Zustände und Gerätebefehle liegen beim zentralen
+        # State-Service, dieses Panel hält nur einen synchronisierten Spiegel
+        self.state_sync = None
+        if config.STATE_SERVICE_URL and services:
+            self.device_states = DeviceStateStore()
+            self.state_sync = StateSync(self.device_states, config.STATE_SERVICE_URL, token=config.API_TOKEN).start()
         else:
-            # Bild ist höher → Höhe anpassen
-            new_height = self.HEIGHT
-            new_width = int(self.HEIGHT * img_ratio)
-
-        self.floorplan = pygame.transform.scale(img, (new_width, new_height))
-        self.floorplan_pos = ((self.WIDTH - new_width) // 2, (self.HEIGHT - new_height) // 2)
-
-        # Interaktionszonen werden via Polygone definiert (keine externen Masken)
+            # Gerätezustände (device_id -> state), überleben Neustarts
+            self.device_states = DeviceStateStore(StatePersister(state_dir))
+
+        # Befehle an die Geräte (Hintergrund-Thread, blockiert nie den Render-Loop)
+        self.command_bus = None if self.state_sync is not None or not services else create_command_bus(
+            config.DEVICE_BACKEND,
+            host=config.MQTT_HOST,
+            port=config.MQTT_PORT,
+            timeout=config.COMMAND_TIMEOUT,
+            retries=config.COMMAND_RETRIES,
+            max_rate=config.COMMAND_MAX_RATE,
+            latency=config.SIMULATED_LATENCY,
+            failure_rate=config.SIMULATED_FAILURE_RATE,
+            gateway_of=self._gateway_of,
+        )
+        self.device_states.listeners.append(self._on_state_change)
 
         # Smart-Home-Zustände
         self.rooms = {
-            "Wohnzimmer": False,
-            "Schlafzimmer": False,
-            "Badezimmer": False,
-            "Kueche": False,
+            name: self.device_states.get(self.room_state_id(name), {}).get("on", False)
+            for name in self.registry.names()
         }
 
-        # Interaktionszonen (an Grundriss anpassen!)
-        # Versuche zuerst, polygonale Definitionen aus `room_polygons.json` zu laden.
-        # Die Datei sollte normalisierte Koordinaten (0..1) relativ zum Floorplan-Bild enthalten.
-        jp = os.path.join(os.getcwd(), "tools", "room_polygons.json")
-        loaded = None
-        if os.path.exists(jp):
-            try:
-                with open(jp, "r", encoding="utf-8") as f:
-                    loaded = json.load(f)
-            except Exception:
-                loaded = None
-
-        if loaded:
-            # convert normalized coordinates into screen coordinates (floorplan_pos + scaled)
-            fp_w, fp_h = self.floorplan.get_width(), self.floorplan.get_height()
-            self.room_zones = {}
-            for room, pts in loaded.items():
-                try:
-                    conv = [
-                        (int(self.floorplan_pos[0] + x * fp_w), int(self.floorplan_pos[1] + y * fp_h))
-                        for (x, y) in pts
-                    ]
-                    self.room_zones[room] = conv
-                except Exception:
-                    pass
-        else:
-            # Default polygon approximations (falls keine JSON vorhanden)
-            self.room_zones = {
-                "Badezimmer": [(150, 80), (420, 80), (420, 260), (150, 260)],
-                "Schlafzimmer": [(600, 60), (980, 60), (980, 300), (600, 300)],
-                "Wohnzimmer": [(120, 300), (520, 300), (520, 560), (120, 560)],
-                "Kueche": [(560, 320), (1020, 320), (1020, 560), (560, 560)],
-            }
+        # Etagen: Grundriss, Raum-Zonen (Polygone) und Hit-Index je Etage.
+        # Nur die aktive Etage und ihre Nachbarn bleiben geladen.
+        self.floors = FloorManager(self.registry.floors, self.WIDTH, self.HEIGHT, self.font)
+        self.floors.activate(self.registry.floors[0].id)
+
+        # Etagen-Umschalter (nur bei mehr als einer Etage)
+        self.floor_buttons = create_floor_buttons(self.registry.floors, self.WIDTH)
+
+        # Szenen (scenes.json), auf HOME unten links
+        self.scenes = {scene.id: scene for scene in load_scenes(SCENES_CONFIG_PATH)}
+        self.scene_buttons = create_scene_buttons(self.scenes.values(), self.HEIGHT)
 
-        # compact label manager: precomputes bboxes and cached label surfaces
-        self.label_manager = LabelManager(self.font, self.floorplan, self.floorplan_pos, self.room_zones)
+        # HTTP/WebSocket-Schnittstelle (eigener Thread, spiegelt device_states);
+        # ein Startfehler landet in `api_error` und wird vom Fenster geloggt
+        self.api_error = None
+        self.api_server = (
+            self._start_api_server() if config.API_ENABLED and services and self.state_sync is None else None
+        )
+
+        # Automationen (automations.json); im Multi-Panel-Betrieb laufen sie beim Service
+        self.automation = (
+            AutomationEngine(config.AUTOMATION_RULES_PATH).start()
+            if services and self.state_sync is None
+            else None
+        )
 
         # Aktuell ausgewählter Raum
         self.selected_room = None
@@ -119,17 +135,177 @@ class SmartHomeUI:
         # Exit Button (nur im Menü sichtbar)
         self.exit_button = ExitButton(x=20, y=160)
 
-        # Raum-Views
-        self.schlafzimmer_view = SchlafzimmerView(self)
-        self.wohnzimmer_view = WohnzimmerView(self)
-        self.badezimmer_view = BadezimmerView(self)
-        self.kueche_view = KuecheView(self)
+        # Raum-Views: erst beim ersten Besuch erzeugt, LRU-Verwerfen nach Budget
+        self.views = ViewCache(
+            factory=self._build_view,
+            budget_bytes=VIEW_MEMORY_BUDGET_MB * 1024 * 1024,
+            save_state=self._save_view_state,
+            restore_state=self._restore_view_state,
+        )
+        # Hover über einem Raum lädt dessen View schon im Hintergrund vor
+        self.prefetcher = ViewPrefetcher(self, lambda room, image: RaumView(self, room, image=image))
+
+    # -------- Raum-Views --------
+    def _build_view(self, view_key):
+        room = self.registry.room_for_view(view_key)
+        if room is None:
+            raise KeyError(f"Keine Raum-View für {view_key}")
+        return RaumView(self, room)
+
+    def _save_view_state(self, view):
+        for widget in view.widgets:
+            self.device_states.set(widget.device_id, widget.get_state())
+
+    def _restore_view_state(self, view):
+        for widget in view.widgets:
+            state = self.device_states.get(widget.device_id)
+            if state is not None:
+                widget.set_state(state)
+
+    def get_view(self, view_key):
+        """Gibt die Raum-View zu `view_key` zurück (wird bei Bedarf erzeugt)."""
+        if view_key not in self.views:
+            prepared = self.prefetcher.take(view_key)
+            if prepared is not None:
+                return self.views.put(view_key, prepared)
+        return self.views.get(view_key)
+
+    def prefetch_hovered(self, room):
+        """Startet/stoppt das Vorladen der View des gehoverten Raums (jeden Frame)."""
+        self.prefetcher.hover(self.registry.view_for_room(room) if room else None)
+        self.prefetcher.poll()
+
+    def _gateway_of(self, device_id):
+        device = self.registry.device(device_id)
+        return device.gateway if device is not None else "default"
+
+    def _on_state_change(self, changes, version):
+        """Ein Zustands-Diff (Geste, Szene, ...) -> Widgets, Raum-Schalter, Geräte."""
+        commands = {}
+        for state_id, state in changes.items():
+            if self.registry.device(state_id) is not None:
+                commands[state_id] = state
+            elif state_id.startswith("room:"):
+                name = state_id[len("room:"):]
+                if name in self.rooms:
+                    self.rooms[name] = state.get("on", False)
+
+        # geladene Views übernehmen den Diff (nicht geladene lesen beim Erzeugen)
+        for view in self.views.values():
+            for widget in view.widgets:
+                state = commands.get(widget.device_id)
+                if state is not None and widget.get_state() != state:
+                    widget.set_state(state)
+
+        # nur echte Geräte aus der Registry, keine Raum-Schalter der HOME-Ansicht
+        if self.command_bus is None or not commands:
+            return
+        if len(commands) == 1:
+            device_id, state = next(iter(commands.items()))
+            self.command_bus.publish(device_id, state)
+        else:
+            self.command_bus.publish_batch(commands)
+
+    def _start_api_server(self):
+        server = StateServer(
+            self.device_states,
+            host=config.API_HOST,
+            port=config.API_PORT,
+            token=config.API_TOKEN,
+            queue_size=config.API_CLIENT_QUEUE,
+            devices=describe_devices(self.registry),
+            scenes=describe_scenes(self.scenes.values()),
+        ).start()
+        if server.start_error is not None:
+            self.api_error = server.start_error
+            return None
+        return server
+
+    def _apply_remote(self, request):
+        """Befehl eines API-Clients (im Render-Thread, siehe `poll_remote`)."""
+        if request.kind == "presence":
+            self.note_presence()
+            return {}
+        if request.kind == "scene":
+            if request.target not in self.scenes:
+                raise KeyError(f"Unbekannte Szene: {request.target}")
+            return self.apply_scene(request.target)
+        if request.kind == "targets":
+            changes = resolve_targets(request.target, self.registry, self.device_states, self.room_state_id)
+        else:
+            changes = resolve_changes(request.target, self.registry, self.device_states)
+        return self.device_states.apply(changes)
+
+    def poll_remote(self):
+        """Jeden Frame: Befehle von API-Clients bzw. Deltas des State-Service übernehmen."""
+        if self.api_server is not None:
+            self.api_server.process(self._apply_remote)
+        if self.state_sync is not None:
+            self.state_sync.poll()
+
+    def poll_automation(self):
+        """Jeden Frame: fällige Automationen ausführen. Gibt [(Regel, Diff oder Fehler)] zurück."""
+        if self.automation is None:
+            return []
+        return self.automation.process(self._apply_remote)
+
+    def note_presence(self):
+        """Jemand ist vor dem Panel (z.B. Hand erkannt); setzt Abwesenheits-Regeln zurück."""
+        if self.automation is not None:
+            self.automation.touch()
+        if self.state_sync is not None:
+            self.state_sync.note_presence()
+
+    def close_services(self):
+        """Hintergrund-Threads beenden und Zustände sichern (beim Programmende)."""
+        if self.automation is not None:
+            self.automation.close()
+        if self.api_server is not None:
+            self.api_server.close()
+        if self.state_sync is not None:
+            self.state_sync.close()
+        self.device_states.close()
+        if self.command_bus is not None:
+            self.command_bus.close()
+
+    def apply_scene(self, scene_id):
+        """Schaltet alle Geräte einer Szene als eine Transaktion. Gibt den Diff zurück."""
+        scene = self.scenes.get(scene_id)
+        if scene is None:
+            return {}
+        changes = resolve_scene(scene, self.registry, self.device_states, self.room_state_id)
+        return self.device_states.apply(changes)
+
+    def finish_device(self, device_id):
+        """Geste beendet: zurückgehaltenen Endwert sofort an das Gerät senden."""
+        if self.command_bus is not None:
+            self.command_bus.flush(device_id)
+        if self.state_sync is not None:
+            self.state_sync.release(device_id)
+
+    def poll_devices(self):
+        """Jeden Frame: abgeschlossene Gerätebefehle abholen (`CommandResult`-Liste)."""
+        if self.command_bus is None:
+            return []
+        return self.command_bus.poll()
+
+    def update_device(self, widget):
+        """Übernimmt den aktuellen Widget-Zustand in den Gerätezustand."""
+        if self.state_sync is not None:
+            # während der Geste gehört das Gerät diesem Panel (bis finish_device)
+            self.state_sync.hold(widget.device_id)
+        self.device_states.set(widget.device_id, widget.get_state())
+
+    @staticmethod
+    def room_state_id(room_name):
+        return f"room:{room_name}"
 
     # Handtracking erkennen
     def toggle_room(self, room_name):
         # Schaltet Raum ein und aus
         if room_name in self.rooms:
             self.rooms[room_name] = not self.rooms[room_name]
+            self.device_states.set(self.room_state_id(room_name), {"on": self.rooms[room_name]})
 
     def select_room(self, room_name):
         # Markiert einen Raum als ausgewählt
@@ -138,18 +314,7 @@ class SmartHomeUI:
 
     def point_in_polygon(self, x, y, polygon):
         # Ray-casting algorithm for point-in-polygon
-        inside = False
-        n = len(polygon)
-        for i in range(n):
-            x1, y1 = polygon[i]
-            x2, y2 = polygon[(i + 1) % n]
-            # Check if point is between y1 and y2
-            if (y1 > y) != (y2 > y):
-                # compute x coordinate of intersection
-                xinters = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
-                if xinters > x:
-                    inside = not inside
-        return inside
+        return point_in_polygon(x, y, polygon)
 
     def is_point_in_room(self, x, y, room_name):
         shape = self.room_zones.get(room_name)
@@ -165,6 +330,59 @@ class SmartHomeUI:
         # otherwise assume polygon list
         return self.point_in_polygon(x, y, shape)
 
+    # -------- Etagen --------
+    @property
+    def floor(self):
+        """Aktive Etage (`ui.floor.Floor`)."""
+        return self.floors.active
+
+    @property
+    def floorplan(self):
+        return self.floor.floorplan
+
+    @property
+    def floorplan_pos(self):
+        return self.floor.floorplan_pos
+
+    @property
+    def room_zones(self):
+        return self.floor.room_zones
+
+    @property
+    def hit_index(self):
+        return self.floor.hit_index
+
+    @property
+    def label_manager(self):
+        return self.floor.label_manager
+
+    def switch_floor(self, floor_id):
+        """Wechselt die Etage ohne Blockieren (siehe `FloorManager.switch`)."""
+        if self.floors.switch(floor_id):
+            self.selected_room = None
+            return True
+        return False
+
+    def update_floors(self):
+        """Jeden Frame: vorgeladene Etagen fertigstellen, Polygon-Datei prüfen."""
+        previous = self.floors.active_id
+        self.floors.poll()
+        if self.floors.active_id != previous:
+            self.selected_room = None
+        self.refresh_room_zones()
+
+    def room_at(self, x, y):
+        """Gibt den Raum unter (x, y) über den Raster-Index zurück (oder None)."""
+        return self.hit_index.room_at(x, y)
+
+    def refresh_room_zones(self):
+        """Lädt die Polygon-Datei der aktiven Etage neu, wenn sie sich geändert hat.
+
+        Die Prüfung ist gedrosselt und kann daher in jedem Frame aufgerufen
+        werden. Der Hit-Index rastert nur die geänderten Räume neu.
+        """
+        return self.floor.refresh(self.font)
+
     def get_room_centroid(self, shape):
         # return centroid (x,y) for polygon or rect
         if isinstance(shape, pygame.Rect):
@@ -222,12 +440,7 @@ class SmartHomeUI:
             return (cx, cy)
 
         # fallback positions per room (relative to floorplan)
-        mapping = {
-            "Badezimmer": (0.15, 0.15),
-            "Schlafzimmer": (0.75, 0.15),
-            "Wohnzimmer": (0.25, 0.75),
-            "Kueche": (0.75, 0.75),
-        }
+        mapping = self.registry.label_fallbacks()
         frac = mapping.get(room, (0.5, 0.5))
         return (int(fp_x + frac[0] * fp_w), int(fp_y + frac[1] * fp_h))
 
@@ -298,6 +511,15 @@ class SmartHomeUI:
     def get_label_surface(self, room, is_selected):
         return self.label_manager.get_label_surface(room, is_selected)
 
+    def draw_floor_buttons(self):
+        for button in self.floor_buttons:
+            button.draw(self.screen, is_active=(button.floor_id == self.floors.active_id))
+
+    def draw_scene_buttons(self, cursor=None):
+        for button in self.scene_buttons:
+            hovered = cursor is not None and cursor[0] is not None and button.is_clicked(*cursor)
+            button.draw(self.screen, is_hovered=hovered)
+
     # -------- Overlay für Fokus --------
     def draw_focus_overlay(self, selected_shape):
         # Abdunkeln der gesamten Fläche
@@ -320,7 +542,9 @@ class SmartHomeUI:
         running = True
         while running:
             self.clock.tick(60)
-            
+            self.poll_remote()
+            self.poll_automation()
+
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
@@ -328,32 +552,26 @@ class SmartHomeUI:
                 # Mausklick, um in Raum-Details zu wechseln
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if self.current_view == "HOME":
-                        for room, shape in self.room_zones.items():
-                            if self.is_point_in_room(event.pos[0], event.pos[1], room):
-                                if room == "Schlafzimmer":
-                                    self.current_view = "SCHLAFZIMMER"
-                                elif room == "Wohnzimmer":
-                                    self.current_view = "WOHNZIMMER"
-                                elif room == "Badezimmer":
-                                    self.current_view = "BADEZIMMER"
-                                elif room == "Kueche":
-                                    self.current_view = "KUECHE"
-                                else:
-                                    self.selected_room = room
-
-                    elif self.current_view == "SCHLAFZIMMER":
-                        self.schlafzimmer_view.handle_click(event.pos)
-                    elif self.current_view == "WOHNZIMMER":
-                        self.wohnzimmer_view.handle_click(event.pos)
-                    elif self.current_view == "BADEZIMMER":
-                        self.badezimmer_view.handle_click(event.pos)
-                    elif self.current_view == "KUECHE":
-                        self.kueche_view.handle_click(event.pos)
+                        floor_button = next((b for b in self.floor_buttons if b.is_clicked(*event.pos)), None)
+                        scene_button = next((b for b in self.scene_buttons if b.is_clicked(*event.pos)), None)
+                        room = None if floor_button or scene_button else self.room_at(*event.pos)
+                        if scene_button is not None:
+                            self.apply_scene(scene_button.scene_id)
+                        elif floor_button is not None:
+                            self.switch_floor(floor_button.floor_id)
+                        elif room is not None:
+                            view_key = self.registry.view_for_room(room)
+                            if view_key is not None:
+                                self.current_view = view_key
+                            else:
+                                self.selected_room = room
+                    else:
+                        self.get_view(self.current_view).handle_click(event.pos)
 
                 # Zustand wechseln (Platzhalter für Geste)
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_SPACE and self.selected_room:
-                        self.rooms[self.selected_room] = not self.rooms[self.selected_room]
+                        self.toggle_room(self.selected_room)
 
             # -------- ZEICHNEN --------
             if self.current_view == "HOME":
@@ -365,12 +583,10 @@ class SmartHomeUI:
                 fp_w, fp_h = self.floorplan.get_width(), self.floorplan.get_height()
 
                 # Hover-Detection (Maus)
+                self.update_floors()
                 mouse_x, mouse_y = pygame.mouse.get_pos()
-                hovered = None
-                for room, shape in self.room_zones.items():
-                    if self.is_point_in_room(mouse_x, mouse_y, room):
-                        hovered = room
-                        break
+                hovered = self.room_at(mouse_x, mouse_y)
+                self.prefetch_hovered(hovered)
 
                 # Interaktionszonen sind unsichtbar — nur Hover/Selection hervorheben
                 for room, shape in self.room_zones.items():
@@ -384,22 +600,16 @@ class SmartHomeUI:
                     is_selected = (room == self.selected_room) or (room == hovered)
                     self.label_manager.blit_label(self.screen, room, is_selected)
 
-            elif self.current_view == "SCHLAFZIMMER":
-                # Schlafzimmer View zeichnen
-                self.schlafzimmer_view.draw()
-
-            elif self.current_view == "WOHNZIMMER":
-                # Wohnzimmer View zeichnen
-                self.wohnzimmer_view.draw()
-
-            elif self.current_view == "BADEZIMMER":
-                # Badezimmer View zeichnen
-                self.badezimmer_view.draw()
+                self.draw_floor_buttons()
+                self.draw_scene_buttons(pygame.mouse.get_pos())
 
-            elif self.current_view == "KUECHE":
-                # Küche View zeichnen
-                self.kueche_view.draw()
+            else:
+                # Raum-View zeichnen
+                self.get_view(self.current_view).draw()
 
             pygame.display.flip()
 
+        self.prefetcher.shutdown()
+        self.floors.shutdown()
+        self.close_services()
         pygame.quit()
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""Lazy erzeugte Raum-Views mit Speicherbudget.
+
+`ViewCache` erzeugt eine View erst beim ersten Besuch und verwirft die am
+längsten nicht benutzten Views, sobald das Speicherbudget überschritten
+ist. Vor dem Verwerfen wird der Gerätezustand der Widgets gesichert und
+beim erneuten Aufbau wiederhergestellt.
+"""
+
+from collections import OrderedDict
+
+
+class ViewCache:
+    """LRU-Cache für Views.
+
+    Args:
+        factory: Funktion key -> View; erzeugt eine neue View.
+        budget_bytes: maximaler geschätzter Speicherbedarf aller Views.
+        save_state: optionale Funktion (view) -> None, vor dem Verwerfen.
+        restore_state: optionale Funktion (view) -> None, nach dem Erzeugen.
+    """
+
+    def __init__(self, factory, budget_bytes, save_state=None, restore_state=None):
+        self.factory = factory
+        self.budget_bytes = budget_bytes
+        self.save_state = save_state
+        self.restore_state = restore_state
+
+        self._views = OrderedDict()
+        self._sizes = {}
+        self.total_bytes = 0
+
+        # Listener (key) -> None, z.B. um Hit-Test-Ebenen zu entfernen
+        self.on_evict = []
+
+    def __contains__(self, key):
+        return key in self._views
+
+    def keys(self):
+        return list(self._views)
+
+    def values(self):
+        """Alle geladenen Views (ohne die LRU-Reihenfolge zu ändern)."""
+        return list(self._views.values())
+
+    def get(self, key):
+        """Gibt die View zu `key` zurück und erzeugt sie bei Bedarf."""
+        view = self._views.get(key)
+        if view is not None:
+            self._views.move_to_end(key)
+            return view
+        return self.put(key, self.factory(key))
+
+    def put(self, key, view):
+        """Legt eine (z.B. vorab vorbereitete) View in den Cache."""
+        if key in self._views:
+            self.evict(key)
+        if self.restore_state is not None:
+            self.restore_state(view)
+        size = view.memory_size() if hasattr(view, "memory_size") else 0
+        self._views[key] = view
+        self._sizes[key] = size
+        self.total_bytes += size
+        self._enforce_budget(keep=key)
+        return view
+
+    def evict(self, key):
+        view = self._views.pop(key, None)
+        if view is None:
+            return
+        if self.save_state is not None:
+            self.save_state(view)
+        self.total_bytes -= self._sizes.pop(key, 0)
+        for listener in self.on_evict:
+            listener(key)
+
+    def clear(self):
+        for key in list(self._views):
+            self.evict(key)
+
+    def _enforce_budget(self, keep):
+        # älteste zuerst; die gerade benutzte View bleibt immer erhalten
+        for key in list(self._views):
+            if self.total_bytes <= self.budget_bytes:
+                break
+            if key != keep:
+                self.evict(key)
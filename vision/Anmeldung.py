@@ -1,49 +1,44 @@
 """Anmelde-UI und Erkennungs-Wrapper.
 
 Dieses Modul kapselt die Login-Zeichenlogik und die
-stabillisierte Erkennungs-Logik (Debounce). Es zeigt kein
+stabilisierte Erkennungs-Logik (Abstimmung der Konfidenzen über ein
+Zeitfenster, siehe `vision/login_classifier.py`). Es zeigt kein
 Kamerabild im Login-Bildschirm.
 """
 import pygame
+
+from vision.login_classifier import ConfidenceVoter
 from vision.user_detection import UserDetector
+from vision.user_store import UserStore
 
 
 class Anmeldung:
-    def __init__(self, width: int, height: int, user_detector: UserDetector | None = None, threshold: int = 8):
+    def __init__(self, width: int, height: int, user_detector: UserDetector | None = None,
+                 voter: ConfidenceVoter | None = None, clock=None, users: UserStore | None = None):
         self.width = width
         self.height = height
-        self.user_detector = user_detector or UserDetector()
+        self.users = users or UserStore.defaults()
+        self.user_detector = user_detector or UserDetector(self.users.classifier())
+
+        # Konfidenzen der letzten Frames; einzelne Fehlerkennungen setzen nichts zurück
+        self.login_voter = voter or ConfidenceVoter(clock=clock)
 
-        # Debounce / stable-frame state
-        self.login_detect_candidate = None
-        self.login_detect_counter = 0
-        self.login_detect_threshold = threshold
+    @property
+    def login_detect_candidate(self):
+        return self.login_voter.leader
 
-    def process_frame(self, rgb_frame):
+    def process_frame(self, rgb_frame, now=None):
         """Analysiere ein RGB-Frame und gib die erkannte User-ID zurück
-        sobald die Geste über mehrere Frames stabil erkannt wurde.
+        sobald die Geste lange genug stabil erkannt wurde.
 
         Rückgabe: User-ID (z.B. 1/2) oder None
         """
-        user = self.user_detector.detect_user(rgb_frame)
-        if user is not None:
-            if self.login_detect_candidate != user:
-                self.login_detect_candidate = user
-                self.login_detect_counter = 1
-            else:
-                self.login_detect_counter += 1
-
-            if self.login_detect_counter >= self.login_detect_threshold:
-                # Reset intern und bestätige Login
-                confirmed = self.login_detect_candidate
-                self.login_detect_candidate = None
-                self.login_detect_counter = 0
-                return confirmed
-        else:
-            self.login_detect_candidate = None
-            self.login_detect_counter = 0
-
-        return None
+        user, confidence = self.user_detector.classify(rgb_frame)
+        confirmed = self.login_voter.add(user, confidence, now)
+        if confirmed is not None:
+            # Reset intern und bestätige Login
+            self.login_voter.reset()
+        return confirmed
 
     def draw_login_screen(self, screen: pygame.Surface, title_font: pygame.font.Font, instr_font: pygame.font.Font, small_font: pygame.font.Font):
         """Zeichnet das Login-Panel (ohne Kamerabild)."""
@@ -67,30 +62,24 @@ class Anmeldung:
         title = title_font.render("Bitte Geste zeigen", True, (240, 240, 240))
         screen.blit(title, (panel_x + 20, panel_y + 20))
 
-        # Instruction boxes
-        box_w = (panel_w - 80) // 2
-        box_h = 120
-        left_x = panel_x + 20
-        right_x = panel_x + 40 + box_w
-        box_y = panel_y + 80
-
-        # left box (Faust)
-        lbox = pygame.Surface((box_w, box_h), pygame.SRCALPHA)
-        pygame.draw.rect(lbox, (255, 255, 255, 12), (0, 0, box_w, box_h), border_radius=8)
-        lbl1 = instr_font.render("Faust → Anmeldung: User 1", True, (230, 230, 230))
-        lsub = small_font.render("Faust kurz zeigen", True, (180, 180, 180))
-        lbox.blit(lbl1, (12, 12))
-        lbox.blit(lsub, (12, 12 + lbl1.get_height() + 6))
-        screen.blit(lbox, (left_x, box_y))
-
-        # right box (open hand)
-        rbox = pygame.Surface((box_w, box_h), pygame.SRCALPHA)
-        pygame.draw.rect(rbox, (255, 255, 255, 12), (0, 0, box_w, box_h), border_radius=8)
-        rlbl1 = instr_font.render("Offene Hand → Anmeldung: User 2", True, (230, 230, 230))
-        rsub = small_font.render("Hand offen zeigen (Finger sichtbar)", True, (180, 180, 180))
-        rbox.blit(rlbl1, (12, 12))
-        rbox.blit(rsub, (12, 12 + rlbl1.get_height() + 6))
-        screen.blit(rbox, (right_x, box_y))
+        # Instruction boxes: eine pro Nutzer, zwei pro Zeile
+        users = self.users.users()
+        columns = 2 if len(users) > 1 else 1
+        rows = max(1, (len(users) + columns - 1) // columns)
+        box_w = (panel_w - 20 * (columns + 1)) // columns
+        box_h = min(120, (panel_h - 130 - 10 * (rows - 1)) // rows)
+        for i, user in enumerate(users):
+            box_x = panel_x + 20 + (i % columns) * (box_w + 20)
+            box_y = panel_y + 80 + (i // columns) * (box_h + 10)
+            box = pygame.Surface((box_w, box_h), pygame.SRCALPHA)
+            pygame.draw.rect(box, (255, 255, 255, 12), (0, 0, box_w, box_h), border_radius=8)
+            pygame.draw.rect(box, (*user.color, 90), (0, 0, 6, box_h), border_top_left_radius=8, border_bottom_left_radius=8)
+            label = instr_font.render(f"Anmeldung: {user.name}", True, (230, 230, 230))
+            sub = small_font.render(user.hint, True, (180, 180, 180))
+            box.blit(label, (16, 12))
+            if box_h > 12 + label.get_height() + 6 + sub.get_height():
+                box.blit(sub, (16, 12 + label.get_height() + 6))
+            screen.blit(box, (box_x, box_y))
 
         # hint
         hint = small_font.render("Warte auf Gestenerkennung...", True, (180, 180, 180))
@@ -99,5 +88,6 @@ class Anmeldung:
         # progress overlay
         if self.login_detect_candidate is not None:
             cand = self.login_detect_candidate
-            ok_text = title_font.render(f"Erkannt: User {cand} ({self.login_detect_counter}/{self.login_detect_threshold})", True, (200, 255, 200))
+            percent = int(self.login_voter.progress() * 100)
+            ok_text = title_font.render(f"Erkannt: {self.users.name(cand)} ({percent}%)", True, (200, 255, 200))
             screen.blit(ok_text, ((sw - ok_text.get_width()) // 2, int(sh * 0.65)))
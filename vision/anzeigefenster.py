@@ -7,64 +7,127 @@ leben hier.
 """
 
 import cv2
+import os
 import pygame
 import sys
 
+import config
+
 from vision.handtracking import HandTracker
+from vision.hand_events import TrackingThread
+from vision.run_stats import RunStats
 from vision.user_detection import UserDetector
 from vision.kamera_anzeige import KameraAnzeige
 from vision.Anmeldung import Anmeldung
+from vision.timing import CLOCK, Timer
+from vision.user_store import UserStore
+from logsystem.event_store import (
+    TYPE_AUTOMATION, TYPE_DEVICE, TYPE_LOGIN, TYPE_LOGOUT, TYPE_MENU, TYPE_NAVIGATE, TYPE_SCENE, TYPE_SYSTEM,
+)
 from logsystem.logger import Logger
 from ui.userinterface import SmartHomeUI
+from ui.hit_tree import EventDispatcher, HitNode, SwitchNode, widget_node
 
 
 class AnzeigeFenster:
-    def __init__(self, width=1280, height=720, ui: SmartHomeUI | None = None):
+    """Hauptfenster: Kamera, Hand-Tracking, Login und UI in einer Schleife.
+
+    Ohne Anzeige (`headless=True`) läuft alles mit dem Dummy-Videotreiber von
+    SDL und ohne Begrenzung der Bildrate; `frame_source` ersetzt die Kamera
+    (alles mit `read()`/`release()` wie `cv2.VideoCapture`), `render_every`
+    zeichnet nur jeden n-ten Frame (0 = nie). `stats` misst jeden Frame
+    (siehe `vision/run_stats.py`). `clock` und `logger` lassen sich für
+    Simulationen ersetzen (siehe `vision/synthetic.py`); `state_dir` und
+    `services` gehen an die selbst erstellte `SmartHomeUI`, damit Tests
+    weder die echten Gerätezustände noch echte Geräte anfassen.
+    """
+
+    # so lange (Sekunden) ohne Kamerabild, dann endet die Hauptschleife
+    FRAME_TIMEOUT = 5.0
+
+    def __init__(self, width=1280, height=720, ui: SmartHomeUI | None = None, frame_source=None,
+                 headless=False, render_every=1, stats: RunStats | None = None, clock=None,
+                 logger: Logger | None = None, state_dir=config.DEVICE_STATE_DIR, services=True):
+        if headless:
+            # vor pygame.init(), SDL liest den Treiber beim Start
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
         pygame.init()
         self.width = width
         self.height = height
+        self.headless = headless
+        self.render_every = render_every
+        self.stats = stats or RunStats()
+        # Lesevorgänge ohne Bild (Kamera, Video, Tracking-Thread)
+        self.failed_reads = 0
+        # ohne Anzeige nicht auf die Bildrate warten
+        self.max_fps = 0 if headless else 60
 
         self.screen = pygame.display.set_mode((width, height))
         pygame.display.set_caption("Handtracking – Anzeige")
         self.clock = pygame.time.Clock()
 
         # UI: entweder externe SmartHomeUI verwenden oder selbst erstellen
-        self.ui = ui or SmartHomeUI()
+        # (ohne Anzeige in dasselbe Surface, statt ein zweites Fenster zu öffnen)
+        screen = self.screen if headless else None
+        self.ui = ui or SmartHomeUI(screen=screen, state_dir=state_dir, services=services)
         # ensure UI draws into the same screen
         self.ui.screen = self.screen
 
         # Kamera-Anzeige (kleines Overlay)
         self.kamera_anzeige = KameraAnzeige(width, height)
 
+        # Zeitbasis für alle Verzögerungen (Sekunden, unabhängig von der Bildrate)
+        self.time = clock or CLOCK
+
         # Hand-Tracker (nur Erkennung)
-        self.tracker = HandTracker(width, height)
+        self.tracker = HandTracker(width, height, clock=self.time)
 
-        # User-Detection (für Login-Phase)
-        self.user_detector = UserDetector()
+        # Angelernte Nutzer (Login-Gesten, Cursor-Darstellung) und Login-Erkennung
+        self.users = UserStore.load_default()
+        self.user_detector = UserDetector(self.users.classifier())
 
         # Logging
-        self.logger = Logger()
+        self.logger = logger or Logger()
+        if self.ui.api_error is not None:
+            self.logger.log(user="System", action=f"API-Server nicht gestartet ({self.ui.api_error})", kind=TYPE_SYSTEM)
+
+        # Hit-Test-Baum für alle interaktiven Elemente
+        self.dispatcher = EventDispatcher()
+        self._build_hit_tree()
+        # je verfolgter Hand ein eigener Dispatcher über demselben Baum
+        # (eigener Hover-Pfad und Capture) und der letzte Cursor, nach Hand-ID
+        self.hand_dispatchers = {}
+        self.hand_cursors = {}
 
         # Login / state
         self.login_done = False
         self.user_id = None
         self.login_allowed = True
-        self.login_cooldown = 0
         # delay (in seconds) before showing the login screen after logout
-        self.login_delay_seconds = 0.5
+        self.login_delay_seconds = config.LOGIN_DELAY_SECONDS
+        self.login_cooldown = Timer(self.login_delay_seconds, self.time)
         self.pending_logout = False
         # If set, freeze the cursor appearance (id + position) until cleared
         self.frozen_cursor_id = None
         self.frozen_cursor_pos = None
+        # Widgets, die gerade per Dreh-/Scrollgeste verstellt werden:
+        # {Hand-ID: (widget, Zustand vorher)}
+        self.gesture_widgets = {}
         # Anmeldung helper (separate module handles debounce and drawing)
-        self.anmeldung = Anmeldung(width, height, self.user_detector, threshold=8)
-
-        # Kamera
-        self.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-        self.cap.set(3, width)
-        self.cap.set(4, height)
-        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        self.cap.set(cv2.CAP_PROP_FPS, 30)
+        self.anmeldung = Anmeldung(width, height, self.user_detector, clock=self.time, users=self.users)
+
+        # Kamera (oder eine andere Bildquelle, z.B. Videodatei für Dauertests)
+        if frame_source is not None:
+            self.cap = frame_source
+        else:
+            self.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
+            self.cap.set(3, width)
+            self.cap.set(4, height)
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            self.cap.set(cv2.CAP_PROP_FPS, 30)
+        # optional: Kamera und Tracking im eigenen Thread (Kamera-Takt statt UI-Takt)
+        self.tracking = TrackingThread(self.tracker, self.cap, self.time).start() if config.TRACKING_THREAD else None
         # Fonts für Login
         self.title_font = pygame.font.SysFont("Arial", 36, bold=True)
         self.instr_font = pygame.font.SysFont("Arial", 22)
@@ -74,301 +137,513 @@ class AnzeigeFenster:
         self.instr_font = pygame.font.SysFont("Arial", 22)
         self.small_font = pygame.font.SysFont("Arial", 16)
 
-    def run(self):
-        while True:
-            self.clock.tick(60)
-
-            # Kamera frame lesen
-            success, frame = self.cap.read()
+    def run(self, max_frames=None, max_seconds=None):
+        """Hauptschleife; endet nach `max_frames` Frames bzw. `max_seconds` Sekunden (None = nie).
+
+        Endet auch, wenn `FRAME_TIMEOUT` Sekunden lang kein Bild kommt. Gibt
+        die Kennzahlen des Laufs zurück (`RunStats.report()` und die Zahl
+        fehlgeschlagener Lesevorgänge).
+        """
+        stats = self.stats
+        started = last_frame = self.time.now()
+        while max_frames is None or stats.frames < max_frames:
+            if max_seconds is not None and self.time.now() - started >= max_seconds:
+                break
+            self.clock.tick(self.max_fps)
+            stats.begin()
+            render = bool(self.render_every) and stats.frames % self.render_every == 0
+
+            if self.tracking is not None:
+                # letztes Bild des Tracking-Threads; Ereignisse kommen über die Queue
+                latest = self.tracking.latest()
+                success = latest is not None
+            else:
+                # Kamera frame lesen
+                success, frame = self.cap.read()
             if not success:
+                # kein Bild (Video zu Ende, Kamera getrennt, Tracking-Thread ohne Bild):
+                # Fenster bedienbar halten, nach FRAME_TIMEOUT Sekunden aufgeben
+                self.failed_reads += 1
+                self._handle_pygame_events()
+                if self.time.now() - last_frame >= self.FRAME_TIMEOUT:
+                    self.logger.log(
+                        user=self.user_name if self.user_id is not None else "System",
+                        action=f"Keine Kamerabilder seit {self.FRAME_TIMEOUT:.0f} s, Programm beendet",
+                        kind=TYPE_SYSTEM,
+                    )
+                    break
+                pygame.time.wait(5)
                 continue
 
-            if self.login_cooldown > 0:
-                self.login_cooldown -= 1
-                if self.login_cooldown == 0:
-                    # cooldown finished -> allow login UI to appear
-                    self.login_allowed = True
-
-            frame = cv2.flip(frame, 1)
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-            # MediaPipe / Hand-Tracking
-            res = self.tracker.process_frame(rgb_frame)
-            result = res.get("result")
-            cursor = res.get("cursor")
-            pinch_active = res.get("pinch_active")
-            pinch_start = res.get("pinch_start")
-            touching = res.get("touching")
-            
-            #Widget Steuerung, wenn man den den Raum öffnet
-            if self.ui.current_view == "SCHLAFZIMMER":
-                self.ui.schlafzimmer_view.rollo_widget.handle_gesture(cursor, pinch_start, pinch_active)
-                self.ui.schlafzimmer_view.light_widget.handle_gesture(
-                    cursor,
-                    pinch_start,
-                    pinch_active
-                )
-
-            if self.ui.current_view == "WOHNZIMMER":
-                self.ui.wohnzimmer_view.rollo_widget.handle_gesture(cursor, pinch_start, pinch_active)
-                self.ui.wohnzimmer_view.light_widget.handle_gesture(
-                    cursor,
-                    pinch_start,
-                    pinch_active
-                )
-
-            if self.ui.current_view == "KUECHE":
-                self.ui.kueche_view.rollo_widget.handle_gesture(cursor, pinch_start, pinch_active)
-                self.ui.kueche_view.light_widget.handle_gesture(
-                    cursor,
-                    pinch_start,
-                    pinch_active
-                )
-
-            if self.ui.current_view == "BADEZIMMER":
-                self.ui.badezimmer_view.rollo_widget.handle_gesture(cursor, pinch_start, pinch_active)
-                self.ui.badezimmer_view.light_widget.handle_gesture(
-                    cursor,
-                    pinch_start,
-                    pinch_active
-                )
-            
-            
-
-            hands_in_frame = bool(result.multi_hand_landmarks) if result is not None else False
-            # Pending logout: Abmelden wenn Hand verschwunden
-            if self.pending_logout and not hands_in_frame:
-                # perform actual logout now that the hand left the frame
-                self.logger.log(user=f"User {self.user_id}", action="Abmeldung durchgeführt")
-                self.login_done = False
-                self.user_id = None
-                self.pending_logout = False
-                try:
-                    self.ui.logout_button.reset()
-                except Exception:
-                    pass
-                if self.ui.menu_button.is_open:
-                    self.ui.menu_button.toggle()
-                # clear frozen cursor appearance now that logout completed
-                self.frozen_cursor_id = None
-                self.frozen_cursor_pos = None
-                # start delay before showing the login screen
-                self.login_allowed = False
-                self.login_cooldown = int(self.login_delay_seconds * 60)
-
-            # Login-Phase: erkennungsbasiert (delegiert an Anmeldung)
-            if not self.login_done and self.login_allowed and self.login_cooldown == 0:
+            if self.tracking is not None:
+                rgb_frame, frame_time, hands_in_frame, fresh = latest
+                now = last_frame = self.time.now()
+                stats.mark("capture")
+            else:
+                # ein Zeitstempel pro Frame für Tracking, Login und Verzögerungen
+                now = frame_time = last_frame = self.time.now()
+                fresh = True
+
+                frame = cv2.flip(frame, 1)
+                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                stats.mark("capture")
+
+                # MediaPipe / Hand-Tracking
+                res = self.tracker.process_frame(rgb_frame, now)
+                hands_in_frame = bool(res["hands"])
+                stats.mark("tracking")
+
+            self.update(now, hands_in_frame, render, rgb_frame, frame_time, fresh)
+            stats.end()
+
+        # cleanup (Gerätezustände werden zusätzlich per atexit gesichert)
+        self._close_camera()
+        self.ui.close_services()
+        pygame.quit()
+        report = stats.report()
+        report["failed_reads"] = self.failed_reads
+        return report
+
+    def update(self, now, hands_in_frame, render=True, rgb_frame=None, frame_time=None, fresh=False):
+        """Ein UI-Frame nach dem Tracking: Ereignisse, Login/Logout, Dienste, Zeichnen.
+
+        Die Hand-Ereignisse kommen aus `tracker.events`; `rgb_frame` (mit
+        `fresh` = neues Kamerabild) braucht nur der Login und die
+        Kamera-Vorschau. Misst in `stats` (zwischen `begin()` und `end()` des
+        Aufrufers).
+        """
+        stats = self.stats
+        # alle Hand-Ereignisse seit dem letzten UI-Frame, in Reihenfolge
+        hand_events = self.tracker.events.drain()
+
+        if self.login_cooldown.expired(now):
+            # cooldown finished -> allow login UI to appear
+            self.login_cooldown.cancel()
+            self.login_allowed = True
+
+        if hands_in_frame:
+            self.ui.note_presence()
+        # Pending logout: Abmelden wenn Hand verschwunden
+        if self.pending_logout and not hands_in_frame:
+            # perform actual logout now that the hand left the frame
+            self.logger.log(user=self.user_name, action="Abmeldung durchgeführt", kind=TYPE_LOGOUT)
+            self.login_done = False
+            self.user_id = None
+            self.pending_logout = False
+            try:
+                self.ui.logout_button.reset()
+            except Exception:
+                pass
+            if self.ui.menu_button.is_open:
+                self.ui.menu_button.toggle()
+            # clear frozen cursor appearance now that logout completed
+            self.frozen_cursor_id = None
+            self.frozen_cursor_pos = None
+            # start delay before showing the login screen
+            self.login_allowed = False
+            self.login_cooldown.start(now, self.login_delay_seconds)
+
+        # Login-Phase: erkennungsbasiert (delegiert an Anmeldung)
+        if not self.login_done and self.login_allowed and not self.login_cooldown.started:
+            # Bedienereignisse gelten erst nach dem Login; verschwundene Hände aufräumen
+            for event in hand_events:
+                if event.kind == "leave":
+                    self._on_hand_event(event)
+            stats.mark("events")
+
+            user = self.anmeldung.process_frame(rgb_frame, frame_time) if fresh else None
+            if user is not None:
+                self.login(user)
+            stats.mark("tracking")
+
+            if render:
                 # draw login UI (no camera preview)
                 self.anmeldung.draw_login_screen(self.screen, self.title_font, self.instr_font, self.small_font)
-
-                user = self.anmeldung.process_frame(rgb_frame)
-                if user is not None:
-                    # clear any frozen cursor when a new user logs in
-                    self.frozen_cursor_id = None
-                    self.frozen_cursor_pos = None
-                    self.user_id = user
-                    self.login_done = True
-                    self.login_allowed = False
-                    try:
-                        self.ui.logout_button.reset()
-                    except Exception:
-                        pass
-                    self.logger.log(user=f"User {user}", action="Anmeldung erfolgreich")
-
+                stats.mark("render")
                 pygame.display.flip()
-                continue
+                stats.mark("flip")
+            self._handle_pygame_events()
+            return
+
+        # Hover/Pinch/Drag und Gesten je Hand verteilen (Ereignisse in Reihenfolge)
+        for event in hand_events:
+            self._on_hand_event(event)
+        # erste Hand (kleinste ID) für Raum-Vorschau, Szenen-Buttons und eingefrorenen Cursor
+        primary_id = min(self.hand_cursors, default=None)
+        cursor = self.hand_cursors[primary_id] if primary_id is not None else (None, None)
+        stats.mark("events")
+
+        # Befehle von API-Clients, Automationen und Rückmeldungen der Geräte
+        self.ui.poll_remote()
+        for rule, outcome in self.ui.poll_automation():
+            if isinstance(outcome, Exception):
+                action = f"Automation {rule.name} fehlgeschlagen ({outcome})"
+            else:
+                action = f"Automation {rule.name} ausgeführt ({len(outcome)} Änderungen)"
+            self.logger.log(user="Automatik", action=action, kind=TYPE_AUTOMATION)
+        for result in self.ui.poll_devices():
+            if not result.ok:
+                self.logger.log(
+                    user=self.user_name,
+                    action=f"Befehl an {result.device_id} fehlgeschlagen ({result.error})",
+                    kind=TYPE_SYSTEM,
+                    device=result.device_id,
+                )
 
-            # Normales Tracking / Zeichnen
-            self.screen.fill((0, 0, 0))
+        if self.ui.current_view == "HOME":
+            # Vorgeladene Etagen fertigstellen, Polygon-Datei prüfen (gedrosselt)
+            self.ui.update_floors()
+            # View des gehoverten Raums im Hintergrund vorbereiten
+            hovered = None
+            if cursor and cursor[0] is not None:
+                hovered = self.ui.room_at(*cursor)
+            self.ui.prefetch_hovered(None if self.ui.menu_button.is_open else hovered)
+        stats.mark("services")
+
+        if render:
+            self._draw(rgb_frame, cursor, primary_id)
+            stats.mark("render")
+            pygame.display.flip()
+            stats.mark("flip")
+        self._handle_pygame_events()
 
-            # Zeichne UI je nach View
-            if self.ui.current_view == "HOME":
-                self.ui.draw_gradient(self.screen, (20, 25, 40), (10, 10, 10))
-                self.screen.blit(self.ui.floorplan, self.ui.floorplan_pos)
+    def _draw(self, rgb_frame, cursor, primary_id):
+        """Zeichnet View, Menü, Cursor und Kamera-Vorschau eines Frames."""
+        # Normales Tracking / Zeichnen
+        self.screen.fill((0, 0, 0))
 
-                # Highlight selected/hovered Räume
-                hovered = None
-                if cursor and cursor[0] is not None:
-                    cx, cy = cursor
-                    for room, shape in self.ui.room_zones.items():
-                        if self.ui.is_point_in_room(cx, cy, room):
-                            hovered = room
-                            break
+        # Zeichne UI je nach View
+        if self.ui.current_view == "HOME":
+            self.ui.draw_gradient(self.screen, (20, 25, 40), (10, 10, 10))
+            self.screen.blit(self.ui.floorplan, self.ui.floorplan_pos)
 
-                if self.ui.selected_room and not self.ui.menu_button.is_open:
-                    try:
-                        self.ui.draw_focus_overlay(self.ui.room_zones[self.ui.selected_room])
-                    except Exception:
-                        pass
+            # Highlight selected/hovered Räume (Raster-Index, ein Array-Zugriff je Hand)
+            hovered_rooms = {self.ui.room_at(*c) for c in self.hand_cursors.values()}
 
-                if not self.ui.menu_button.is_open:
-                    for room, shape in self.ui.room_zones.items():
-                        is_selected = (room == self.ui.selected_room) or (room == hovered)
-                        if is_selected:
-                            self.ui.draw_room(room, shape, self.ui.rooms[room], True)
-                    for room, shape in self.ui.room_zones.items():
-                        is_selected = (room == self.ui.selected_room) or (room == hovered)
-                        try:
-                            self.ui.label_manager.blit_label(self.screen, room, is_selected)
-                        except Exception:
-                            pass
-
-            elif self.ui.current_view == "SCHLAFZIMMER":
-                self.ui.schlafzimmer_view.draw()
-            elif self.ui.current_view == "WOHNZIMMER":
-                self.ui.wohnzimmer_view.draw()
-            elif self.ui.current_view == "BADEZIMMER":
-                self.ui.badezimmer_view.draw()
-            elif self.ui.current_view == "KUECHE":
-                self.ui.kueche_view.draw()
-
-            # Menu Overlay
-            if self.ui.menu_button.is_open:
+            if self.ui.selected_room and not self.ui.menu_button.is_open:
                 try:
-                    self.ui.menu_button.draw_overlay(self.screen, self.width, self.height)
+                    self.ui.draw_focus_overlay(self.ui.room_zones[self.ui.selected_room])
                 except Exception:
                     pass
 
-            if self.ui.current_view == "HOME":
-                try:
-                    self.ui.menu_button.draw(self.screen)
-                except Exception:
-                    pass
-
-            # Menü Buttons zeichnen
-            if self.ui.menu_button.is_open:
-                try:
-                    self.ui.logout_button.draw(self.screen)
-                    if hasattr(self.ui.logout_button, "update"):
-                        self.ui.logout_button.update()
-                except Exception:
-                    pass
-                try:
-                    self.ui.exit_button.draw(self.screen)
-                    self.ui.exit_button.update()
-                except Exception:
-                    pass
+            if not self.ui.menu_button.is_open:
+                for room, shape in self.ui.room_zones.items():
+                    is_selected = (room == self.ui.selected_room) or (room in hovered_rooms)
+                    if is_selected:
+                        self.ui.draw_room(room, shape, self.ui.rooms[room], True)
+                for room, shape in self.ui.room_zones.items():
+                    is_selected = (room == self.ui.selected_room) or (room in hovered_rooms)
+                    try:
+                        self.ui.label_manager.blit_label(self.screen, room, is_selected)
+                    except Exception:
+                        pass
+                self.ui.draw_floor_buttons()
+                self.ui.draw_scene_buttons(cursor)
 
-            # Cursor zeichnen (nur visuell)
-            # Prefer live cursor position if available; fall back to frozen position (should be None normally)
-            draw_id = self.frozen_cursor_id if self.frozen_cursor_id is not None else (self.user_id or 0)
-            draw_cursor_pos = cursor if cursor and cursor[0] is not None else self.frozen_cursor_pos
-            self.tracker.draw_cursor(self.screen, draw_cursor_pos, draw_id)
+        else:
+            self.ui.get_view(self.ui.current_view).draw()
 
-            # Kamera-Feed
+        # Menu Overlay
+        if self.ui.menu_button.is_open:
             try:
-                self.kamera_anzeige.draw_camera_feed(self.screen, rgb_frame)
+                self.ui.menu_button.draw_overlay(self.screen, self.width, self.height)
             except Exception:
                 pass
 
-            # Ausgelöste Pinch-Events verarbeiten (nur beim Start eines Pinches)
-            if pinch_start:
-                # Wenn ein Pending-Logout aktiv ist, ignorieren wir alle Interaktionen
-                if self.pending_logout:
-                    # Menü bleibt sichtbar und gedrückter Zustand bleibt erhalten; keine Klicks erlauben
-                    pass
-                else:
-                    # Menü offen: nur Menü-Buttons verarbeiten
-                    if self.ui.menu_button.is_open:
-                        # Menu Button Toggle
-                        if self.ui.menu_button.is_clicked(*cursor):
-                            self.ui.menu_button.toggle()
-                            menu_state = "geöffnet" if self.ui.menu_button.is_open else "geschlossen"
-                            self.logger.log(user=f"User {self.user_id}", action=f"Menü wurde {menu_state}")
-
-                        elif self.ui.logout_button.is_clicked(*cursor):
-                            # Start pending logout: mark button pressed and wait for hand removal
-                            self.logger.log(user=f"User {self.user_id}", action="Abmeldeknopf wurde gedrückt (pending)")
-                            self.pending_logout = True
-                            # visually mark button pressed
-                            try:
-                                self.ui.logout_button.set_pressed()
-                            except Exception:
-                                pass
-                            # freeze cursor appearance (ID/shape) but allow position to continue following
-                            try:
-                                self.frozen_cursor_id = self.user_id
-                                # do not freeze position; keep following the live cursor
-                                self.frozen_cursor_pos = None
-                            except Exception:
-                                self.frozen_cursor_id = None
-                                self.frozen_cursor_pos = None
-
-                        elif self.ui.exit_button.is_clicked(*cursor):
-                            should_exit = self.ui.exit_button.click()
-                            if should_exit:
-                                self.logger.log(user=f"User {self.user_id}", action="Programm beendet")
-                                self.cap.release()
-                                pygame.quit()
-                                sys.exit()
-
-                        else:
-                            # außerhalb: Menü schließen
-                            self.ui.menu_button.toggle()
-                            self.logger.log(user=f"User {self.user_id}", action="Menü wurde geschlossen")
-
-                    else:
-                        # Menü geschlossen: Navigation
-                        # Zurück-Buttons in Room-Views
-                        if self.ui.current_view == "SCHLAFZIMMER":
-                            if self.ui.schlafzimmer_view.back_button.is_clicked(*cursor):
-                                self.ui.current_view = "HOME"
-                                self.logger.log(user=f"User {self.user_id}", action="Zurück zur HOME-View")
-                        if self.ui.current_view == "WOHNZIMMER":
-                            if self.ui.wohnzimmer_view.back_button.is_clicked(*cursor):
-                                self.ui.current_view = "HOME"
-                                self.logger.log(user=f"User {self.user_id}", action="Zurück zur HOME-View")
-                        if self.ui.current_view == "BADEZIMMER":
-                            if self.ui.badezimmer_view.back_button.is_clicked(*cursor):
-                                self.ui.current_view = "HOME"
-                                self.logger.log(user=f"User {self.user_id}", action="Zurück zur HOME-View")
-                        if self.ui.current_view == "KUECHE":
-                            if self.ui.kueche_view.back_button.is_clicked(*cursor):
-                                self.ui.current_view = "HOME"
-                                self.logger.log(user=f"User {self.user_id}", action="Zurück zur HOME-View")
-
-                        # Menu Button
-                        if self.ui.menu_button.is_clicked(*cursor):
-                            self.ui.menu_button.toggle()
-                            menu_state = "geöffnet" if self.ui.menu_button.is_open else "geschlossen"
-                            self.logger.log(user=f"User {self.user_id}", action=f"Menü wurde {menu_state}")
-
-                        else:
-                            # Räume (nur wenn Menü nicht offen) — aber nur aus HOME heraus auswählbar
-                            if self.ui.current_view == "HOME" and cursor and cursor[0] is not None:
-                                cx, cy = cursor
-                                for room, shape in self.ui.room_zones.items():
-                                    if self.ui.is_point_in_room(cx, cy, room):
-                                        if room == "Schlafzimmer":
-                                            self.ui.current_view = "SCHLAFZIMMER"
-                                            self.logger.log(user=f"User {self.user_id}", action=f"Zu {room} gewechselt")
-                                        elif room == "Wohnzimmer":
-                                            self.ui.current_view = "WOHNZIMMER"
-                                            self.logger.log(user=f"User {self.user_id}", action=f"Zu {room} gewechselt")
-                                        elif room == "Badezimmer":
-                                            self.ui.current_view = "BADEZIMMER"
-                                            self.logger.log(user=f"User {self.user_id}", action=f"Zu {room} gewechselt")
-                                        elif room == "Kueche":
-                                            self.ui.current_view = "KUECHE"
-                                            self.logger.log(user=f"User {self.user_id}", action=f"Zu {room} gewechselt")
-                                        else:
-                                            self.ui.select_room(room)
-                                            self.ui.toggle_room(room)
-                                            room_state = "eingeschaltet" if self.ui.rooms[room] else "ausgeschaltet"
-                                            self.logger.log(user=f"User {self.user_id}", action=f"{room} wurde {room_state}")
-
-            # Events (nur QUIT behandeln hier; UI weitere Events intern)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.cap.release()
-                    pygame.quit()
-                    sys.exit()
+        if self.ui.current_view == "HOME":
+            try:
+                self.ui.menu_button.draw(self.screen)
+            except Exception:
+                pass
 
-            pygame.display.flip()
+        # Menü Buttons zeichnen
+        if self.ui.menu_button.is_open:
+            try:
+                self.ui.logout_button.draw(self.screen)
+                if hasattr(self.ui.logout_button, "update"):
+                    self.ui.logout_button.update()
+            except Exception:
+                pass
+            try:
+                self.ui.exit_button.draw(self.screen)
+                self.ui.exit_button.update()
+            except Exception:
+                pass
 
-        # cleanup
+        # Cursor zeichnen (nur visuell)
+        # Prefer live cursor position if available; fall back to frozen position (should be None normally)
+        draw_id = self.frozen_cursor_id if self.frozen_cursor_id is not None else (self.user_id or 0)
+        draw_cursor_pos = cursor if cursor and cursor[0] is not None else self.frozen_cursor_pos
+        self.tracker.draw_cursor(self.screen, draw_cursor_pos, draw_id, self.users.style(draw_id))
+        # weitere Hände mit eigenem Cursor in der Darstellung des Nutzers
+        for hand_id, hand_cursor in self.hand_cursors.items():
+            if hand_id != primary_id:
+                self.tracker.draw_cursor(self.screen, hand_cursor, draw_id, self.users.style(draw_id))
+
+        # Kamera-Feed
+        try:
+            self.kamera_anzeige.draw_camera_feed(self.screen, rgb_frame)
+        except Exception:
+            pass
+
+    def _handle_pygame_events(self):
+        # Events (nur QUIT behandeln hier; UI weitere Events intern)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self._close_camera()
+                pygame.quit()
+                sys.exit()
+
+    def _close_camera(self):
+        # Tracking-Thread zuerst anhalten, er liest sonst noch von der Kamera
+        if self.tracking is not None:
+            self.tracking.close()
         self.cap.release()
-        pygame.quit()
+
+    # ---------------------------------------------------------
+    # Hit-Test-Baum und Interaktions-Handler
+    # ---------------------------------------------------------
+    def _build_hit_tree(self):
+        """Baut den Hit-Test-Baum: modale Menü-Ebene über der aktiven View."""
+        ui = self.ui
+        root = self.dispatcher.root
+
+        menu_layer = root.add(HitNode(
+            "menu",
+            enabled=lambda: ui.menu_button.is_open,
+            on_pinch_start=self._on_menu_outside,
+        ))
+        menu_layer.add(HitNode("menu_button", ui.menu_button.rect, on_pinch_start=self._on_menu_button))
+        menu_layer.add(HitNode("logout", ui.logout_button.rect, on_pinch_start=self._on_logout))
+        menu_layer.add(HitNode("exit", ui.exit_button.rect, on_pinch_start=self._on_exit))
+
+        self.view_switch = root.add(SwitchNode(
+            "views",
+            select=lambda: ui.current_view,
+            factory=self._build_view_layer,
+        ))
+
+        home = self.view_switch.set_layer("HOME", HitNode("HOME"))
+        home.add(HitNode("menu_button", ui.menu_button.rect, on_pinch_start=self._on_menu_button))
+        for button in ui.floor_buttons:
+            home.add(HitNode(
+                f"floor_{button.floor_id}",
+                button.rect,
+                on_pinch_start=lambda cursor, floor_id=button.floor_id: self._on_floor(floor_id),
+            ))
+        for button in ui.scene_buttons:
+            home.add(HitNode(
+                f"scene_{button.scene_id}",
+                button.rect,
+                on_pinch_start=lambda cursor, scene_id=button.scene_id: self._on_scene(scene_id),
+            ))
+        home.add(HitNode(
+            "rooms",
+            hit_test=lambda x, y: ui.room_at(x, y) is not None,
+            on_pinch_start=self._on_room,
+        ))
+
+        # Raum-Ebenen entstehen erst mit der View und verschwinden mit ihr
+        ui.views.on_evict.append(self.view_switch.remove_layer)
+
+    def _build_view_layer(self, view_key):
+        """Erzeugt die Hit-Test-Ebene einer Raum-View (lazy, beim ersten Besuch)."""
+        if self.ui.registry.room_for_view(view_key) is None:
+            return None
+        view = self.ui.get_view(view_key)
+        layer = HitNode(view_key)
+        layer.add(HitNode("back_button", view.back_button.rect, on_pinch_start=self._on_back))
+        layer.add(HitNode("menu_button", self.ui.menu_button.rect, on_pinch_start=self._on_menu_button))
+        for widget in view.widgets:
+            layer.add(widget_node(
+                widget.device_id, widget, on_change=self._on_device_change, on_update=self.ui.update_device
+            ))
+        return layer
+
+    def login(self, user):
+        """Meldet `user` an (nach erkannter Login-Geste oder direkt, z.B. im Dauertest)."""
+        # clear any frozen cursor when a new user logs in
+        self.frozen_cursor_id = None
+        self.frozen_cursor_pos = None
+        self.user_id = user
+        self.login_done = True
+        self.login_allowed = False
+        try:
+            self.ui.logout_button.reset()
+        except Exception:
+            pass
+        self.logger.log(user=self.user_name, action="Anmeldung erfolgreich", kind=TYPE_LOGIN)
+
+    @property
+    def user_name(self):
+        """Name des angemeldeten Nutzers für das Aktivitätslog."""
+        return self.users.name(self.user_id)
+
+    def _on_hand_event(self, event):
+        """Ein Hand-Ereignis (siehe `vision/hand_events.py`) auf Hit-Test-Baum und Gesten verteilen.
+
+        Während eines Pending-Logouts sind keine Klicks erlaubt; kurz verdeckte
+        Hände erzeugen keine Ereignisse und behalten so ihr Capture.
+        """
+        if event.kind == "leave":
+            # Capture lösen; laufende Gesten wurden vorher mit "end" beendet
+            self.hand_cursors.pop(event.hand_id, None)
+            dispatcher = self.hand_dispatchers.pop(event.hand_id, None)
+            if dispatcher is not None:
+                dispatcher.dispatch(None, False, False)
+            self.gesture_widgets.pop(event.hand_id, None)
+            return
+        if event.kind == "gesture":
+            # Wischen / Drehen / Scrollen; begonnene Gesten dürfen noch enden
+            if not self.pending_logout or event.gesture.phase == "end":
+                self._on_gesture(event.gesture, event.cursor, event.hand_id)
+            return
+
+        self.hand_cursors[event.hand_id] = event.cursor
+        dispatcher = self.hand_dispatchers.get(event.hand_id)
+        if dispatcher is None:
+            dispatcher = self.hand_dispatchers[event.hand_id] = EventDispatcher(self.dispatcher.root)
+        if self.pending_logout:
+            dispatcher.dispatch(event.cursor, False, False)
+        else:
+            dispatcher.dispatch(event.cursor, event.kind == "down", event.kind in ("down", "drag"))
+
+    def _on_menu_button(self, cursor):
+        self.ui.menu_button.toggle()
+        menu_state = "geöffnet" if self.ui.menu_button.is_open else "geschlossen"
+        self.logger.log(user=self.user_name, action=f"Menü wurde {menu_state}", kind=TYPE_MENU)
+
+    def _on_menu_outside(self, cursor):
+        # außerhalb der Menü-Buttons: Menü schließen
+        self.ui.menu_button.toggle()
+        self.logger.log(user=self.user_name, action="Menü wurde geschlossen", kind=TYPE_MENU)
+
+    def _on_logout(self, cursor):
+        # Start pending logout: mark button pressed and wait for hand removal
+        self.logger.log(user=self.user_name, action="Abmeldeknopf wurde gedrückt (pending)", kind=TYPE_MENU)
+        self.pending_logout = True
+        # visually mark button pressed
+        try:
+            self.ui.logout_button.set_pressed()
+        except Exception:
+            pass
+        # freeze cursor appearance (ID/shape) but allow position to continue following
+        self.frozen_cursor_id = self.user_id
+        self.frozen_cursor_pos = None
+
+    def _on_exit(self, cursor):
+        should_exit = self.ui.exit_button.click()
+        if should_exit:
+            self.logger.log(user=self.user_name, action="Programm beendet", kind=TYPE_SYSTEM)
+            self._close_camera()
+            pygame.quit()
+            sys.exit()
+
+    def _on_back(self, cursor):
+        self.ui.current_view = "HOME"
+        self.logger.log(user=self.user_name, action="Zurück zur HOME-View", kind=TYPE_NAVIGATE)
+
+    def _on_floor(self, floor_id):
+        if floor_id == self.ui.floors.active_id:
+            return
+        self.ui.switch_floor(floor_id)
+        self.logger.log(user=self.user_name, action=f"Zu Etage {floor_id} gewechselt", kind=TYPE_NAVIGATE)
+
+    def _on_scene(self, scene_id):
+        changes = self.ui.apply_scene(scene_id)
+        self.logger.log(
+            user=self.user_name,
+            action=f"Szene {self.ui.scenes[scene_id].name} aktiviert ({len(changes)} Änderungen)",
+            kind=TYPE_SCENE,
+            value=len(changes),
+        )
+
+    def _on_room(self, cursor):
+        # Räume sind nur aus HOME heraus auswählbar (eigene Ebene im Baum)
+        room = self.ui.room_at(*cursor)
+        if room is None:
+            return
+        view_key = self.ui.registry.view_for_room(room)
+        if view_key is not None:
+            self.ui.current_view = view_key
+            self.logger.log(user=self.user_name, action=f"Zu {room} gewechselt", kind=TYPE_NAVIGATE, room=room)
+        else:
+            self.ui.select_room(room)
+            self.ui.toggle_room(room)
+            room_state = "eingeschaltet" if self.ui.rooms[room] else "ausgeschaltet"
+            self.logger.log(user=self.user_name, action=f"{room} wurde {room_state}", kind=TYPE_DEVICE, room=room,
+                            value=1 if self.ui.rooms[room] else 0)
+
+    def _on_device_change(self, widget, before, after):
+        # Endwert der Geste nicht erst nach Ablauf der Ratenbegrenzung senden
+        self.ui.finish_device(widget.device_id)
+        device = self.ui.registry.device(widget.device_id)
+        room = device.room if device is not None else None
+        if "is_on" in after:
+            active, level = after["is_on"], after["brightness"]
+            state = f"an ({level}%)" if active else "aus"
+        else:
+            active, level = after["is_open"], after["position"]
+            state = f"offen ({level}%)" if active else "geschlossen"
+        self.logger.log(
+            user=self.user_name,
+            action=f"{widget.name} in {room}: {state}",
+            kind=TYPE_DEVICE,
+            room=room,
+            device=widget.device_id,
+            value=level if active else 0,
+        )
+
+    # Prozent pro Grad Drehung bzw. pro Handgröße Scrollweg
+    ROTATE_GAIN = 1.0
+    SCROLL_GAIN = 40.0
+
+    def _widget_at(self, cursor):
+        if self.ui.current_view == "HOME" or not cursor or cursor[0] is None:
+            return None
+        for widget in self.ui.get_view(self.ui.current_view).widgets:
+            if widget.rect.collidepoint(cursor):
+                return widget
+        return None
+
+    def _on_gesture(self, event, cursor, hand_id=None):
+        """Wischen wechselt die Etage, Drehen dimmt Lichter, Scrollen fährt Rollos.
+
+        Jede Hand (`hand_id`) kann gleichzeitig ein eigenes Widget verstellen.
+        """
+        if event.name == "swipe":
+            if self.ui.current_view == "HOME" and not self.ui.menu_button.is_open:
+                # nach links wischen = nächste Etage
+                order = self.ui.floors.order
+                index = order.index(self.ui.floors.active_id) - event.value
+                if 0 <= index < len(order):
+                    self._on_floor(order[index])
+            return
+
+        if event.name not in ("rotate", "scroll"):
+            return
+        if event.phase == "start":
+            widget = self._widget_at(cursor)
+            kind = "brightness" if event.name == "rotate" else "position"
+            if widget is not None and hasattr(widget, kind):
+                self.gesture_widgets[hand_id] = (widget, widget.get_state())
+        elif hand_id in self.gesture_widgets:
+            widget, before = self.gesture_widgets[hand_id]
+            if event.phase == "update":
+                if event.name == "rotate":
+                    level = widget.level + event.value * self.ROTATE_GAIN
+                else:
+                    # Hand nach oben = Rollo auf
+                    level = widget.level - event.value * self.SCROLL_GAIN
+                previous = widget.get_state()
+                widget.set_level(level)
+                if widget.get_state() != previous:
+                    self.ui.update_device(widget)
+            elif event.phase == "end":
+                del self.gesture_widgets[hand_id]
+                after = widget.get_state()
+                if after != before:
+                    self._on_device_change(widget, before, after)
 
     def draw_gradient(self, surface, top_color, bottom_color):
         # simple vertical gradient
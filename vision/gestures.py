@@ -0,0 +1,432 @@
+"""Gesten-Engine: Merkmalsvektor pro Frame, statische und zeitliche Gesten.
+
+Aus den 21 MediaPipe-Landmarks einer Hand wird pro Frame mit NumPy ein
+normierter Merkmalsvektor berechnet (Gelenkwinkel, Abstände der
+Fingerkuppen in Handgrößen, Handmitte, Handgröße, Neigung). Positionen sind
+in Bildhöhen angegeben, Wege in Handgrößen (Handgelenk bis
+Mittelfinger-Grundgelenk), damit Schwellwerte nicht vom Abstand zur Kamera
+abhängen. Aus den Gelenkwinkeln ergibt sich die Pose als Bitmaske der
+gestreckten Finger.
+
+- Statische Gesten sind Posen mit Namen (z.B. Faust, offene Hand); sie
+  melden Beginn und Ende.
+- Zeitliche Gesten (Wischen, Drehen zum Dimmen, Zwei-Finger-Scrollen) sind
+  kleine Zustandsautomaten über einem Ringpuffer der letzten Frames.
+
+Gesten werden nach der Pose indiziert, in der sie beginnen: pro Frame
+laufen nur die Automaten der aktuellen Pose und die gerade aktiven. Weitere
+Gesten für andere Posen kosten pro Frame also nichts.
+
+    python -m vision.gestures --bench 1000    # Kosten pro Frame messen
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+
+from vision.hand_model import hand_points
+from vision.timing import CLOCK, Debounce
+
+
+# Landmark-Ketten je Finger (Handgelenk bis Fingerkuppe)
+FINGER_CHAINS = np.array([
+    [0, 1, 2, 3, 4],       # Daumen
+    [0, 5, 6, 7, 8],       # Zeigefinger
+    [0, 9, 10, 11, 12],    # Mittelfinger
+    [0, 13, 14, 15, 16],   # Ringfinger
+    [0, 17, 18, 19, 20],   # kleiner Finger
+])
+FINGERTIPS = FINGER_CHAINS[:, -1]
+PALM = np.array([0, 5, 9, 13, 17])
+_TIP_PAIRS = np.triu_indices(5, 1)
+
+# Bits der Pose (gestreckte Finger)
+THUMB, INDEX, MIDDLE, RING, PINKY = 1, 2, 4, 8, 16
+OPEN_HAND = THUMB | INDEX | MIDDLE | RING | PINKY
+FINGER_BITS = np.array([THUMB, INDEX, MIDDLE, RING, PINKY])
+
+# Aufbau des Merkmalsvektors
+CENTER_X, CENTER_Y, SCALE, ROLL = 0, 1, 2, 3  # Handmitte und Handgröße in Bildhöhen, Neigung in rad
+ANGLES = slice(4, 19)          # 5 Finger x 3 Gelenke, Beugung in rad (0 = gestreckt)
+TIP_DISTANCES = slice(19, 29)  # 10 Fingerkuppen-Paare, in Handgrößen
+PINCH = TIP_DISTANCES.start    # Daumen-Zeigefinger ist das erste Paar
+THUMB_SPREAD = 29              # Daumenkuppe bis Zeigefinger-Grundgelenk, in Handgrößen
+FEATURE_SIZE = 30
+
+# Finger gilt als gestreckt, wenn die Beugung der beiden äußeren Gelenke darunter liegt
+EXTENDED_BEND = 1.2
+THUMB_EXTENDED_BEND = 0.9
+# Daumen zusätzlich so weit (Handgrößen) vom Zeigefinger-Grundgelenk entfernt
+THUMB_MIN_SPREAD = 0.6
+
+
+def landmark_array(hand_landmarks):
+    """MediaPipe-Landmarks einer Hand als (21, 3)-Array (x, y in Bildanteilen, z)."""
+    return np.array([(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark], dtype=np.float64)
+
+
+def hand_features(points, aspect=1.0):
+    """Berechnet den Merkmalsvektor (Länge `FEATURE_SIZE`) einer Hand.
+
+    `points` ist ein (21, 3)-Array wie von `landmark_array`; `aspect` ist
+    Bildbreite / Bildhöhe, damit Winkel und Abstände nicht verzerrt sind.
+    """
+    pts = np.array(points, dtype=np.float64)
+    pts[:, 0] *= aspect
+    xy = pts[:, :2]
+
+    features = np.empty(FEATURE_SIZE)
+    features[CENTER_X:CENTER_Y + 1] = xy[PALM].mean(axis=0)
+    axis = xy[9] - xy[0]
+    scale = math.hypot(axis[0], axis[1]) or 1e-6
+    features[SCALE] = scale
+    # 0 = Finger nach oben, positiv = im Uhrzeigersinn geneigt
+    features[ROLL] = math.atan2(axis[0], -axis[1])
+
+    segments = pts[FINGER_CHAINS[:, 1:]] - pts[FINGER_CHAINS[:, :-1]]
+    a, b = segments[:, :-1], segments[:, 1:]
+    cos = (a * b).sum(axis=2) / (np.linalg.norm(a, axis=2) * np.linalg.norm(b, axis=2) + 1e-9)
+    features[ANGLES] = np.arccos(np.clip(cos, -1.0, 1.0)).ravel()
+
+    tips = xy[FINGERTIPS]
+    features[TIP_DISTANCES] = np.linalg.norm(tips[_TIP_PAIRS[0]] - tips[_TIP_PAIRS[1]], axis=1) / scale
+    features[THUMB_SPREAD] = math.hypot(*(xy[4] - xy[5])) / scale
+    return features
+
+
+def pose_of(features):
+    """Bitmaske der gestreckten Finger (siehe `THUMB` ... `PINKY`)."""
+    bend = features[ANGLES].reshape(5, 3)
+    outer = bend[:, 1] + bend[:, 2]
+    extended = outer < EXTENDED_BEND
+    extended[0] = outer[0] < THUMB_EXTENDED_BEND and features[THUMB_SPREAD] > THUMB_MIN_SPREAD
+    return int(FINGER_BITS[extended].sum())
+
+
+def angle_diff(a, b):
+    """Kleinster Winkelunterschied a - b in rad (-pi..pi)."""
+    return (a - b + math.pi) % (2 * math.pi) - math.pi
+
+
+class GestureEvent:
+    """Ein erkanntes Gestenereignis.
+
+    `phase` ist "start", "update", "end" (andauernde Gesten) oder
+    "trigger" (einmalige Gesten wie Wischen). `value` hängt von der Geste ab
+    (Richtung, Drehwinkel in Grad, Scrollweg in Handgrößen).
+    """
+
+    __slots__ = ("name", "phase", "value", "timestamp")
+
+    def __init__(self, name, phase, value=None, timestamp=None):
+        self.name = name
+        self.phase = phase
+        self.value = value
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return f"GestureEvent({self.name!r}, {self.phase!r}, {self.value!r})"
+
+
+class FeatureBuffer:
+    """Ringpuffer der letzten Merkmalsvektoren mit Zeitstempeln."""
+
+    def __init__(self, capacity=32):
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.rows = np.zeros((capacity, FEATURE_SIZE))
+        self.head = 0
+        self.count = 0
+
+    def push(self, timestamp, row):
+        self.times[self.head] = timestamp
+        self.rows[self.head] = row
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def clear(self):
+        self.count = 0
+
+    def latest(self):
+        return self.rows[(self.head - 1) % self.capacity]
+
+    def window(self, since):
+        """Zeitstempel und Merkmale aller Frames ab `since`, chronologisch."""
+        index = (self.head - self.count + np.arange(self.count)) % self.capacity
+        times = self.times[index]
+        keep = times >= since
+        return times[keep], self.rows[index[keep]]
+
+
+class TemporalGesture:
+    """Basisklasse für zeitliche Gesten.
+
+    `poses` sind die Posen, in denen die Geste beginnen und weiterlaufen
+    kann. `step` wird nur in diesen Posen aufgerufen und gibt zurück, ob die
+    Geste aktiv bleibt; `cancel` beendet sie (Posenwechsel, Hand weg).
+    """
+
+    name = ""
+    poses = ()
+
+    def __init__(self):
+        self.active = False
+
+    def step(self, engine, now, events):
+        raise NotImplementedError
+
+    def cancel(self, now, events):
+        if self.active:
+            events.append(GestureEvent(self.name, "end", None, now))
+        self.active = False
+
+
+class Swipe(TemporalGesture):
+    """Schnelles seitliches Wischen mit offener Hand. `value`: +1 rechts, -1 links."""
+
+    name = "swipe"
+    poses = (OPEN_HAND, OPEN_HAND & ~THUMB)
+
+    def __init__(self, distance=2.0, window=0.35, cooldown=0.6):
+        super().__init__()
+        self.distance = distance  # in Handgrößen
+        self.window = window
+        self.cooldown = cooldown
+        self._blocked_until = float("-inf")
+
+    def step(self, engine, now, events):
+        if now < self._blocked_until:
+            return False
+        times, rows = engine.buffer.window(max(now - self.window, engine.pose_since))
+        if len(times) < 3:
+            return False
+        scale = rows[:, SCALE].mean()
+        dx = (rows[-1, CENTER_X] - rows[0, CENTER_X]) / scale
+        dy = (rows[-1, CENTER_Y] - rows[0, CENTER_Y]) / scale
+        if abs(dx) >= self.distance and abs(dy) < abs(dx) * 0.6:
+            events.append(GestureEvent(self.name, "trigger", 1 if dx > 0 else -1, now))
+            self._blocked_until = now + self.cooldown
+        return False
+
+
+class Rotate(TemporalGesture):
+    """Drehen der offenen Hand wie an einem Drehknopf (z.B. Dimmen).
+
+    Beginnt, sobald die Hand ohne große Bewegung um `start_angle` Grad
+    geneigt wird; danach meldet jedes "update" den Drehwinkel in Grad seit
+    dem letzten (positiv = im Uhrzeigersinn). Bleibt die Hand `idle_end`
+    Sekunden ruhig, endet die Geste.
+    """
+
+    name = "rotate"
+    poses = (OPEN_HAND, OPEN_HAND & ~THUMB)
+
+    def __init__(self, start_angle=20.0, step_angle=2.0, max_move=0.8, window=0.5, idle_end=0.7):
+        super().__init__()
+        self.start_angle = math.radians(start_angle)
+        self.step_angle = math.radians(step_angle)
+        self.max_move = max_move
+        self.window = window
+        self.idle_end = idle_end
+        self._last_roll = 0.0
+        self._last_change = 0.0
+
+    def step(self, engine, now, events):
+        roll = engine.buffer.latest()[ROLL]
+        if not self.active:
+            times, rows = engine.buffer.window(max(now - self.window, engine.pose_since))
+            if len(times) < 3:
+                return False
+            turned = angle_diff(roll, rows[0, ROLL])
+            moved = math.hypot(*(rows[-1, CENTER_X:CENTER_Y + 1] - rows[0, CENTER_X:CENTER_Y + 1]))
+            moved /= rows[:, SCALE].mean()
+            if abs(turned) < self.start_angle or moved > self.max_move:
+                return False
+            self.active = True
+            self._last_roll = rows[0, ROLL]
+            self._last_change = now
+            events.append(GestureEvent(self.name, "start", None, now))
+
+        delta = angle_diff(roll, self._last_roll)
+        if abs(delta) >= self.step_angle:
+            events.append(GestureEvent(self.name, "update", math.degrees(delta), now))
+            self._last_roll = roll
+            self._last_change = now
+        elif now - self._last_change >= self.idle_end:
+            self.cancel(now, events)
+            return False
+        return True
+
+
+class TwoFingerScroll(TemporalGesture):
+    """Zeige- und Mittelfinger gestreckt, Hand auf und ab bewegen.
+
+    "update" meldet den Weg seit dem letzten Ereignis in Handgrößen
+    (positiv = nach unten).
+    """
+
+    name = "scroll"
+    poses = (INDEX | MIDDLE, THUMB | INDEX | MIDDLE)
+
+    def __init__(self, step=0.08):
+        super().__init__()
+        self.step_size = step
+        self._last_y = 0.0
+
+    def step(self, engine, now, events):
+        row = engine.buffer.latest()
+        y = row[CENTER_Y] / row[SCALE]
+        if not self.active:
+            self.active = True
+            self._last_y = y
+            events.append(GestureEvent(self.name, "start", None, now))
+            return True
+        delta = y - self._last_y
+        if abs(delta) >= self.step_size:
+            events.append(GestureEvent(self.name, "update", float(delta), now))
+            self._last_y = y
+        return True
+
+
+# Standard-Posen mit Namen (statische Gesten)
+STATIC_GESTURES = {
+    0: "faust",
+    THUMB: "faust",
+    OPEN_HAND: "offene_hand",
+    INDEX: "zeigen",
+    THUMB | INDEX: "zeigen",
+    INDEX | MIDDLE: "zwei_finger",
+    THUMB | INDEX | MIDDLE: "zwei_finger",
+}
+
+
+class GestureEngine:
+    """Wertet pro Frame alle registrierten Gesten einer Hand aus.
+
+    `update(points, now)` nimmt die Landmarks (siehe `landmark_array`) und
+    gibt die Ereignisse dieses Frames zurück; `lost(now)` aufrufen, wenn die
+    Hand verschwindet. Eine neue Pose gilt erst nach `pose_hold` Sekunden,
+    damit einzelne Fehlerkennungen laufende Gesten nicht abbrechen.
+    """
+
+    def __init__(self, aspect=1.0, clock=None, pose_hold=0.06, capacity=32, gestures=None):
+        self.aspect = aspect
+        self.clock = clock or CLOCK
+        self.buffer = FeatureBuffer(capacity)
+        self.static = {}
+        self._by_pose = {}
+        self._active = []
+        self._pose_debounce = Debounce(pose_hold, self.clock)
+        self.pose = None
+        self.pose_since = float("-inf")
+        self.static_name = None
+        self.features = None
+
+        for pose, name in STATIC_GESTURES.items():
+            self.add_static(pose, name)
+        for gesture in (gestures if gestures is not None else (Swipe(), Rotate(), TwoFingerScroll())):
+            self.add(gesture)
+
+    def add_static(self, pose, name):
+        self.static[pose] = name
+
+    def add(self, gesture):
+        for pose in gesture.poses:
+            self._by_pose.setdefault(pose, []).append(gesture)
+        return gesture
+
+    def remove(self, gesture):
+        for pose in gesture.poses:
+            candidates = self._by_pose.get(pose, [])
+            if gesture in candidates:
+                candidates.remove(gesture)
+        if gesture in self._active:
+            self._active.remove(gesture)
+
+    def update(self, points, now=None):
+        now = self.clock.now() if now is None else now
+        events = []
+        self.features = hand_features(points, self.aspect)
+        self.buffer.push(now, self.features)
+
+        stable = self._pose_debounce.update(pose_of(self.features), now)
+        if stable is not None and stable != self.pose:
+            self.pose = stable
+            self.pose_since = self._pose_debounce.since
+            self._set_static(self.static.get(stable), now, events)
+        if self.pose is None:
+            return events
+
+        candidates = self._by_pose.get(self.pose, ())
+        for gesture in self._active:
+            if gesture not in candidates:
+                gesture.cancel(now, events)
+        self._active = [g for g in candidates if g.step(self, now, events)]
+        return events
+
+    def lost(self, now=None):
+        """Hand nicht mehr im Bild: laufende Gesten beenden, Puffer leeren."""
+        now = self.clock.now() if now is None else now
+        events = []
+        for gesture in self._active:
+            gesture.cancel(now, events)
+        self._active = []
+        self._set_static(None, now, events)
+        self.buffer.clear()
+        self._pose_debounce.reset()
+        self.pose = None
+        self.pose_since = float("-inf")
+        self.features = None
+        return events
+
+    def _set_static(self, name, now, events):
+        if name == self.static_name:
+            return
+        if self.static_name is not None:
+            events.append(GestureEvent(self.static_name, "end", None, now))
+        if name is not None:
+            events.append(GestureEvent(name, "start", None, now))
+        self.static_name = name
+
+
+# ---------------------------------------------------------
+# Messung
+# ---------------------------------------------------------
+class _IdleGesture(TemporalGesture):
+    """Platzhalter für die Messung: registriert, aber nie in der aktuellen Pose."""
+
+    def __init__(self, pose):
+        super().__init__()
+        self.poses = (pose,)
+
+    def step(self, engine, now, events):
+        return False
+
+
+def benchmark(frames=1000, extra=300):
+    """Kosten pro Frame mit den Standardgesten und mit `extra` zusätzlichen."""
+    results = {}
+    hands = [hand_points(roll=math.radians(i % 60), center=(0.5 + 0.001 * (i % 50), 0.5)) for i in range(frames)]
+    for label, count in (("standard", 0), (f"+{extra}", extra)):
+        engine = GestureEngine(aspect=16 / 9)
+        for i in range(count):
+            engine.add(_IdleGesture(pose=1 + i % (OPEN_HAND - 1)))
+        started = time.perf_counter()
+        for i, points in enumerate(hands):
+            engine.update(points, now=i / 30)
+        results[label] = round((time.perf_counter() - started) / frames * 1e6, 1)
+    return {"frames": frames, "us_per_frame": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gesten-Engine messen")
+    parser.add_argument("--bench", type=int, default=1000, metavar="FRAMES")
+    parser.add_argument("--extra", type=int, default=300, help="zusätzliche Gesten für den Vergleich")
+    args = parser.parse_args(argv)
+    print(benchmark(args.bench, args.extra))
+
+
+if __name__ == "__main__":
+    main()
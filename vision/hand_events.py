@@ -0,0 +1,137 @@
+"""Hand-Ereignisse mit Zeitstempel und optionaler Tracking-Thread.
+
+Statt Zustände pro Frame abzufragen (`pinch_active`, `pinch_start`), legt
+der `HandTracker` für jede Hand einzelne Ereignisse in eine thread-sichere
+Queue. Die UI leert sie einmal pro Frame. Ein `pinch_start` geht so auch
+dann nicht verloren, wenn die UI einen Frame auslässt oder mehrere
+Kamera-Frames auf einen UI-Frame kommen:
+
+- "enter" / "leave": Hand erscheint bzw. ist endgültig verschwunden
+- "move": Cursor bewegt ohne Pinch
+- "down" / "drag" / "up": Pinch beginnt, wird gehalten, endet
+- "gesture": Gestenereignis (siehe `vision/gestures.py`) in `gesture`
+
+Hover-Beginn und -Ende einzelner Elemente ergeben sich daraus im
+Hit-Test-Baum der UI (`ui/hit_tree.py`).
+
+`TrackingThread` liest die Kamera und verfolgt die Hände in einem eigenen
+Thread mit Kamera-Takt; die UI übernimmt dann nur noch das letzte Bild und
+die Ereignisse (`TRACKING_THREAD` in `config.py`).
+"""
+
+import queue
+import threading
+
+import cv2
+
+from vision.timing import CLOCK
+
+
+class HandEvent:
+    """Ein Ereignis einer Hand; `timestamp` ist die Zeit des Kamera-Frames."""
+
+    __slots__ = ("kind", "hand_id", "cursor", "timestamp", "gesture")
+
+    def __init__(self, kind, hand_id, cursor=None, timestamp=None, gesture=None):
+        self.kind = kind
+        self.hand_id = hand_id
+        self.cursor = cursor
+        self.timestamp = timestamp
+        self.gesture = gesture
+
+    def __repr__(self):
+        return f"HandEvent({self.kind!r}, {self.hand_id!r}, {self.cursor!r})"
+
+
+class HandEventQueue:
+    """Thread-sichere Queue der Hand-Ereignisse (Tracking schreibt, UI leert)."""
+
+    # Bewegungen, von denen bei einem Rückstau nur die letzte zählt
+    COALESCE = ("move", "drag")
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        # Kennzahlen
+        self.pushed = 0
+        self.coalesced = 0
+
+    def push(self, event):
+        self._queue.put(event)
+        self.pushed += 1
+
+    def drain(self):
+        """Alle wartenden Ereignisse in Reihenfolge.
+
+        Folgen mehrere Bewegungen derselben Hand direkt aufeinander, bleibt nur
+        die letzte; "enter", "down", "up", "leave" und Gesten bleiben alle erhalten.
+        """
+        events = []
+        last = {}
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                return events
+            index = last.get(event.hand_id)
+            if (index is not None and event.kind in self.COALESCE
+                    and events[index].kind == event.kind):
+                events[index] = event
+                self.coalesced += 1
+                continue
+            last[event.hand_id] = len(events)
+            events.append(event)
+
+
+class TrackingThread:
+    """Liest die Kamera und verfolgt die Hände in einem eigenen Thread.
+
+    Die Ereignisse landen in `tracker.events`; `latest()` liefert das zuletzt
+    verarbeitete Bild (gespiegelt, RGB) für Anzeige und Login.
+    """
+
+    def __init__(self, tracker, capture, clock=None):
+        self.tracker = tracker
+        self.capture = capture
+        self.clock = clock or CLOCK
+        self._lock = threading.Lock()
+        self._latest = None
+        self._fresh = False
+        self._stop = threading.Event()
+        self._thread = None
+        # Kennzahlen
+        self.frames = 0
+        self.read_errors = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="hand-tracking", daemon=True)
+            self._thread.start()
+        return self
+
+    def latest(self):
+        """(RGB-Bild, Zeitstempel, Hand im Bild, neu seit dem letzten Aufruf) oder None."""
+        with self._lock:
+            if self._latest is None:
+                return None
+            fresh, self._fresh = self._fresh, False
+            return self._latest + (fresh,)
+
+    def close(self, timeout=1.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            success, frame = self.capture.read()
+            if not success:
+                self.read_errors += 1
+                self._stop.wait(0.01)
+                continue
+            now = self.clock.now()
+            rgb_frame = cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2RGB)
+            res = self.tracker.process_frame(rgb_frame, now)
+            with self._lock:
+                self._latest = (rgb_frame, now, bool(res["hands"]))
+                self._fresh = True
+            self.frames += 1
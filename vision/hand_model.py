@@ -0,0 +1,95 @@
+"""Einfaches Handmodell: erzeugt die 21 Landmarks einer Hand aus Gelenkwinkeln.
+
+Dient als Referenz für Vorlagen (z.B. Faust/offene Hand im Login-Klassifikator)
+und für Messungen ohne Kamera. Die Hand liegt in Handkoordinaten vor
+(Handgelenk im Ursprung, Mittelfinger-Grundgelenk bei (0, -1), Finger zeigen
+nach oben = -y, Handfläche zur Kamera) und wird anschließend gedreht,
+skaliert und ins Bild verschoben. Ausgabe wie MediaPipe: x, y als
+Bildanteile, z als relative Tiefe (kleiner = näher an der Kamera).
+"""
+
+import math
+
+import numpy as np
+
+
+# Grundgelenke (MCP) bzw. beim Daumen das Sattelgelenk (CMC), in Handgrößen
+_BASES = np.array([
+    [-0.35, -0.25],   # Daumen
+    [-0.32, -0.95],   # Zeigefinger
+    [0.0, -1.0],      # Mittelfinger
+    [0.25, -0.95],    # Ringfinger
+    [0.47, -0.85],    # kleiner Finger
+])
+# Knochenlängen je Finger (drei Glieder ab dem Basisgelenk)
+_BONES = np.array([
+    [0.40, 0.33, 0.28],
+    [0.45, 0.27, 0.22],
+    [0.50, 0.30, 0.23],
+    [0.46, 0.28, 0.22],
+    [0.36, 0.22, 0.20],
+])
+# Richtung der gestreckten Finger (Grad, 0 = nach oben, positiv = nach rechts)
+_SPLAY = np.array([-50.0, -8.0, 0.0, 8.0, 16.0])
+# Beugung der drei Gelenke bei voller Krümmung (rad)
+_FULL_BEND = np.array([
+    [0.5, 0.6, 0.9],
+    [1.4, 1.7, 0.9],
+    [1.4, 1.7, 0.9],
+    [1.4, 1.7, 0.9],
+    [1.4, 1.7, 0.9],
+])
+
+# Krümmung je Finger (Daumen ... kleiner Finger), 0 = gestreckt, 1 = eingerollt
+OPEN = (0.0, 0.0, 0.0, 0.0, 0.0)
+FIST = (1.0, 1.0, 1.0, 1.0, 1.0)
+POINT = (1.0, 0.0, 1.0, 1.0, 1.0)
+TWO_FINGERS = (1.0, 0.0, 0.0, 1.0, 1.0)
+
+
+def hand_points(curls=OPEN, roll=0.0, yaw=0.0, center=(0.5, 0.5), size=0.15, aspect=16 / 9, spread=1.0):
+    """Landmarks (21, 3) einer Hand.
+
+    Args:
+        curls: Krümmung je Finger (0..1).
+        roll: Neigung in der Bildebene (rad, positiv = im Uhrzeigersinn).
+        yaw: Drehung um die Längsachse der Hand (rad).
+        center: Lage des Handgelenks im Bild (Bildanteile).
+        size: Handgröße (Handgelenk bis Mittelfinger-Grundgelenk) in Bildhöhen.
+        aspect: Bildbreite / Bildhöhe.
+        spread: Faktor für die Spreizung der Finger.
+    """
+    points = np.zeros((21, 3))
+    palm_normal = np.array([0.0, 0.0, -1.0])
+    curls = np.clip(np.asarray(curls, dtype=np.float64), 0.0, 1.0)
+    for finger in range(5):
+        angle = math.radians(_SPLAY[finger] * spread)
+        direction = np.array([math.sin(angle), -math.cos(angle), 0.0])
+        # Beugung dreht die Fingerrichtung zur Handfläche hin
+        if finger == 0:
+            # Daumen klappt zusätzlich über die Handfläche
+            bend_axis = np.array([math.cos(angle), math.sin(angle), 0.0]) * 0.6 + palm_normal * 0.8
+        else:
+            bend_axis = palm_normal
+        bend_axis = bend_axis - direction * (bend_axis @ direction)
+        bend_axis /= np.linalg.norm(bend_axis)
+        joint = np.array([*_BASES[finger], 0.0])
+        points[1 + finger * 4] = joint
+        total = 0.0
+        for bone in range(3):
+            total += _FULL_BEND[finger, bone] * curls[finger]
+            step = direction * math.cos(total) + bend_axis * math.sin(total)
+            joint = joint + step * _BONES[finger, bone]
+            points[2 + finger * 4 + bone] = joint
+
+    # Drehung um die Längsachse (y), dann in der Bildebene
+    cos_y, sin_y = math.cos(yaw), math.sin(yaw)
+    points = points @ np.array([[cos_y, 0.0, -sin_y], [0.0, 1.0, 0.0], [sin_y, 0.0, cos_y]])
+    cos_r, sin_r = math.cos(roll), math.sin(roll)
+    x = points[:, 0] * cos_r - points[:, 1] * sin_r
+    y = points[:, 0] * sin_r + points[:, 1] * cos_r
+    out = np.empty_like(points)
+    out[:, 0] = center[0] + x * size / aspect
+    out[:, 1] = center[1] + y * size
+    out[:, 2] = points[:, 2] * size
+    return out
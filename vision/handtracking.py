@@ -5,30 +5,77 @@ Handerkennung durchführt und Cursor-/Pinch-Informationen bereitstellt.
 Die Fenster- und UI-Steuerung wurde in `vision/anzeigefenster.py` ausgelagert.
 """
 
+import itertools
+
 import mediapipe as mp
-import math
+import numpy as np
+
+import config
+from vision.gestures import PALM, PINCH, GestureEngine, landmark_array
+from vision.hand_events import HandEvent, HandEventQueue
+from vision.pinch import PinchDetector
+from vision.timing import CLOCK
+
+
+class TrackedHand:
+    """Zustand einer verfolgten Hand: eigener Cursor-Filter, Pinch und Gesten."""
+
+    def __init__(self, hand_id, pinch_hold, aspect, clock):
+        self.id = hand_id
+        self.handedness = None
+        self.centroid = None
+        self.last_seen = None
+        self.cursor_x = None
+        self.cursor_y = None
+        self.pinch = PinchDetector(hold=pinch_hold, clock=clock)
+        self.last_pinch_active = False
+        self.last_touching = False
+        self.gestures = GestureEngine(aspect=aspect, clock=clock)
+        # "enter" schon gemeldet
+        self.announced = False
 
 
 class HandTracker:
     """Leichte Klasse, die MediaPipe initialisiert und pro Frame
     Cursor- und Pinch-Zustände liefert.
 
+    Bis zu `max_hands` Hände werden gleichzeitig verfolgt. Jede Hand behält
+    über die Frames ihre ID (Zuordnung über den Handflächen-Mittelpunkt und
+    die Händigkeit) und hat einen eigenen Cursor-Filter, Pinch-Zustand und
+    eigene Gesten. MediaPipe erkennt alle Hände in einem Aufruf; die
+    Handflächen-Suche läuft nur, wenn eine Hand verloren geht, danach wird
+    nur noch das Landmark-Modell je Hand ausgeführt.
+
     Methoden:
-    - process_frame(rgb_frame) -> dict: verarbeitet das RGB-Frame und
-      gibt ein Dict mit keys `result`, `cursor`, `pinch_active`, `pinch_start`, `touching` zurück.
+    - process_frame(rgb_frame, now=None) -> dict: verarbeitet das RGB-Frame und
+      gibt ein Dict mit keys `result`, `cursor`, `pinch_active`, `pinch_start`, `touching`,
+      `gestures` (erste Hand), `hands` (alle sichtbaren Hände) und `lost` zurück.
+      Zusätzlich landen alle Übergänge als `HandEvent` in `events` (siehe
+      `vision/hand_events.py`), damit kein Klick verloren geht, wenn die UI
+      einen Frame auslässt.
     - draw_cursor(screen, cursor, user_id): einfache Helfer, um Cursor auf ein Pygame-Surface
       zu zeichnen (optional, verwendet von Anzeige-Manager).
     """
 
-    def __init__(self, width=1280, height=720):
+    # Hände, die weiter als so viele Bildhöhen springen, gelten als neue Hand
+    MATCH_DISTANCE = 0.25
+    # so lange (s) bleibt eine nicht erkannte Hand mit ihrer ID erhalten
+    LOST_GRACE = 0.25
+
+    def __init__(self, width=1280, height=720, pinch_hold=config.PINCH_HOLD_SECONDS, clock=None,
+                 max_hands=config.MAX_HANDS):
         self.width = width
         self.height = height
+        self.aspect = width / height
+        self.pinch_hold = pinch_hold
+        self.clock = clock or CLOCK
+        self.max_hands = max_hands
 
         # MediaPipe Setup
         self.mp_hands = mp.solutions.hands
         self.hands = self.mp_hands.Hands(
             static_image_mode=False,
-            max_num_hands=1,
+            max_num_hands=max_hands,
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5,
         )
@@ -36,104 +83,183 @@ class HandTracker:
         self.mp_draw = mp.solutions.drawing_utils
 
         # interne Zustände
-        self.cursor_x = None
-        self.cursor_y = None
         self.smoothing_factor = 0.7
-        self.pinch_counter = 0
-        self.pinch_threshold = 2
-        self.last_pinch_active = False
-        self.last_touching = False
         self.frame_counter = 0
+        # verfolgte Hände nach ID
+        self.tracked = {}
+        self._ids = itertools.count(1)
+        # Ereignisse aller Hände mit Zeitstempel, von der UI einmal pro Frame geleert
+        self.events = HandEventQueue()
 
-    def process_frame(self, rgb_frame):
+    def process_frame(self, rgb_frame, now=None):
         """Verarbeitet ein RGB-Frame und bestimmt Cursor- und Pinch-Status.
 
+        `now` ist der Zeitpunkt des Frames (siehe `vision/timing.py`);
+        ohne Angabe gilt die aktuelle Zeit.
+
         Rückgabe: dict mit Feldern:
           - result: MediaPipe-Ergebnisobjekt
+          - hands: Liste je sichtbarer Hand (nach ID sortiert) mit `id` und den
+            folgenden Feldern
+          - lost: {ID: Gesten-Ereignisse} der Hände, die in diesem Frame
+            endgültig verloren gingen (laufende Gesten enden mit "end")
+          - cursor, touching, pinch_active, pinch_start, gestures: wie in
+            `hands`, für die Hand mit der kleinsten ID (bzw. leer ohne Hand):
           - cursor: (x,y) oder (None, None)
-          - touching: bool (aktueller Abstand < Schwellwert)
-          - pinch_active: bool (aktiver Pinch, nach Debounce)
+          - touching: bool (Fingerkuppen-Abstand unter der Pinch-Schwelle, ohne Hysterese)
+          - pinch_active: bool (aktiver Pinch, mit Hysterese, siehe `vision/pinch.py`)
           - pinch_start: bool (True in dem Frame, in dem Pinch erstmals aktiv wird)
+          - gestures: Liste der `GestureEvent`s dieses Frames
         """
         result = self.hands.process(rgb_frame)
         self.frame_counter += 1
+        return self.process_result(result, now)
+
+    def process_result(self, result, now=None):
+        """Wertet ein MediaPipe-Ergebnis aus (alles nach der Inferenz, siehe `process_frame`)."""
+        detections = []
+        for i, hand_lms in enumerate(result.multi_hand_landmarks or ()):
+            points = landmark_array(hand_lms)
+            handedness = None
+            if result.multi_handedness and i < len(result.multi_handedness):
+                handedness = result.multi_handedness[i].classification[0].label
+            detections.append((points, handedness))
+        return self.process_hands(detections, now, result)
+
+    def process_hands(self, detections, now=None, result=None):
+        """Verfolgt Hände aus Landmark-Arrays: [(points (21, 3), Händigkeit oder None)].
 
-        pinch_active = False
-        pinch_start = False
-        touching = False
-
-        if not result.multi_hand_landmarks:
-            # reset smoothing when no hand
-            self.cursor_x = None
-            self.cursor_y = None
-            self.pinch_counter = 0
-            self.last_pinch_active = False
-            return {
-                "result": result,
+        Ohne MediaPipe nutzbar, z.B. mit synthetischen Landmarks
+        (`vision/synthetic.py`); Rückgabe wie `process_frame`.
+        """
+        if now is None:
+            now = self.clock.now()
+
+        hands = []
+        for hand, (points, handedness) in self._associate(detections, now):
+            hands.append(self._update_hand(hand, points, handedness, now))
+
+        # Hände ohne Erkennung: nach der Karenzzeit endgültig entfernen
+        lost = {}
+        for hand_id, hand in list(self.tracked.items()):
+            if hand.last_seen < now and now - hand.last_seen > self.LOST_GRACE:
+                lost[hand_id] = hand.gestures.lost(now)
+                del self.tracked[hand_id]
+                for event in lost[hand_id]:
+                    self.events.push(HandEvent("gesture", hand_id, None, now, event))
+                self.events.push(HandEvent("leave", hand_id, None, now))
+            elif hand.last_seen < now:
+                # kurz nicht erkannt: Cursor-Filter neu beginnen; ID und Pinch
+                # bleiben, damit ein Aussetzer mitten im Ziehen kein neues "down" auslöst
+                hand.cursor_x = hand.cursor_y = None
+
+        hands.sort(key=lambda h: h["id"])
+        if hands:
+            primary = dict(hands[0])
+        else:
+            primary = {
+                "id": None,
                 "cursor": (None, None),
                 "touching": False,
                 "pinch_active": False,
                 "pinch_start": False,
+                "gestures": [],
             }
+        primary["result"] = result
+        primary["hands"] = hands
+        primary["lost"] = lost
+        return primary
+
+    def _associate(self, detections, now):
+        """Ordnet Erkennungen den verfolgten Händen zu (nächster Mittelpunkt zuerst)."""
+        centroids = np.array([self._centroid(points) for points, _ in detections]).reshape(-1, 2)
+        tracks = [h for h in self.tracked.values() if h.centroid is not None]
+        pairs = []
+        if len(tracks) and len(detections):
+            previous = np.array([h.centroid for h in tracks])
+            cost = np.linalg.norm(previous[:, None, :] - centroids[None, :, :], axis=2)
+            # andere Händigkeit: erst zuordnen, wenn nichts Besseres passt
+            for t, hand in enumerate(tracks):
+                for d, (_, handedness) in enumerate(detections):
+                    if hand.handedness and handedness and hand.handedness != handedness:
+                        cost[t, d] += self.MATCH_DISTANCE * 0.5
+            used_tracks, used_detections = set(), set()
+            for flat in np.argsort(cost, axis=None):
+                t, d = divmod(int(flat), len(detections))
+                if t in used_tracks or d in used_detections or cost[t, d] > self.MATCH_DISTANCE:
+                    continue
+                used_tracks.add(t)
+                used_detections.add(d)
+                pairs.append((tracks[t], detections[d]))
+        else:
+            used_detections = set()
+
+        for d, detection in enumerate(detections):
+            if d in used_detections:
+                continue
+            hand = TrackedHand(next(self._ids), self.pinch_hold, self.aspect, self.clock)
+            self.tracked[hand.id] = hand
+            pairs.append((hand, detection))
+        for hand, (points, _) in pairs:
+            hand.centroid = self._centroid(points)
+            hand.last_seen = now
+        return pairs
+
+    def _centroid(self, points):
+        return points[PALM, :2].mean(axis=0) * (self.aspect, 1.0)
+
+    def _update_hand(self, hand, points, handedness, now):
+        hand.handedness = handedness or hand.handedness
+        thumb_x, thumb_y = int(points[4, 0] * self.width), int(points[4, 1] * self.height)
+
+        if hand.cursor_x is None:
+            hand.cursor_x, hand.cursor_y = thumb_x, thumb_y
+        else:
+            hand.cursor_x = int(hand.cursor_x * (1 - self.smoothing_factor) + thumb_x * self.smoothing_factor)
+            hand.cursor_y = int(hand.cursor_y * (1 - self.smoothing_factor) + thumb_y * self.smoothing_factor)
+
+        gestures = hand.gestures.update(points, now)
+        # Fingerkuppen-Abstand in Handgrößen (aus dem Merkmalsvektor der Gesten)
+        distance = hand.gestures.features[PINCH]
+        touching = bool(distance < hand.pinch.enter)
+
+        pinch_active = hand.pinch.update(distance, now)
+        pinch_start = pinch_active and not hand.last_pinch_active
+
+        cursor = (hand.cursor_x, hand.cursor_y)
+        if not hand.announced:
+            hand.announced = True
+            self.events.push(HandEvent("enter", hand.id, cursor, now))
+        if pinch_start:
+            kind = "down"
+        elif pinch_active:
+            kind = "drag"
+        elif hand.last_pinch_active:
+            kind = "up"
+        else:
+            kind = "move"
+        self.events.push(HandEvent(kind, hand.id, cursor, now))
+        for event in gestures:
+            self.events.push(HandEvent("gesture", hand.id, cursor, now, event))
+
+        # update state for next frame
+        hand.last_pinch_active = pinch_active
+        hand.last_touching = touching
 
-        for hand_lms in result.multi_hand_landmarks:
-            thumb_tip = None
-            index_tip = None
-
-            for id, lm in enumerate(hand_lms.landmark):
-                cx, cy = int(lm.x * self.width), int(lm.y * self.height)
-                if id == 4:
-                    thumb_tip = (cx, cy)
-                if id == 8:
-                    index_tip = (cx, cy)
-
-            if thumb_tip and index_tip:
-                thumb_x, thumb_y = thumb_tip
-                if self.cursor_x is None:
-                    self.cursor_x, self.cursor_y = thumb_x, thumb_y
-                else:
-                    self.cursor_x = int(
-                        self.cursor_x * (1 - self.smoothing_factor) + thumb_x * self.smoothing_factor
-                    )
-                    self.cursor_y = int(
-                        self.cursor_y * (1 - self.smoothing_factor) + thumb_y * self.smoothing_factor
-                    )
-
-                distance = math.hypot(index_tip[0] - thumb_tip[0], index_tip[1] - thumb_tip[1])
-                touching = distance < 40
-
-                if touching:
-                    self.pinch_counter += 1
-                else:
-                    self.pinch_counter = 0
-
-                pinch_active = self.pinch_counter >= self.pinch_threshold
-                pinch_start = pinch_active and not self.last_pinch_active
-
-                # update state for next frame
-                self.last_pinch_active = pinch_active
-                self.last_touching = touching
-
-                return {
-                    "result": result,
-                    "cursor": (self.cursor_x, self.cursor_y),
-                    "touching": touching,
-                    "pinch_active": pinch_active,
-                    "pinch_start": pinch_start,
-                }
-
-        # Fallback
         return {
-            "result": result,
-            "cursor": (None, None),
-            "touching": False,
-            "pinch_active": False,
-            "pinch_start": False,
+            "id": hand.id,
+            "cursor": cursor,
+            "touching": touching,
+            "pinch_active": pinch_active,
+            "pinch_start": pinch_start,
+            "gestures": gestures,
         }
 
-    def draw_cursor(self, surface, cursor, user_id):
+    def draw_cursor(self, surface, cursor, user_id, style=None):
         """Zeichnet den Cursor auf das gegebene Pygame-Surface.
 
+        `style` ist (Farbe, Form) des Nutzers (siehe `vision/user_store.py`);
+        ohne Angabe gelten die Standard-Nutzer 1 (roter Kreis) und 2 (grünes Quadrat).
         Dieses Hilfsverfahren ist bewusst klein gehalten; komplexe UI-Aktionen
         bleiben Aufgabe von `anzeigefenster.py`.
         """
@@ -145,15 +271,17 @@ class HandTracker:
         if cursor is None or cursor[0] is None:
             return
 
-        color = (0, 255, 255)
-        if user_id == 1:
-            color = (255, 0, 0)
-        elif user_id == 2:
-            color = (0, 255, 0)
+        if style is None:
+            style = {1: ((255, 0, 0), "circle"), 2: ((0, 255, 0), "square")}.get(user_id, ((0, 255, 255), "square"))
+        color, shape = style
 
         x, y = cursor
-        if user_id == 1:
+        if shape == "circle":
             pygame.draw.circle(surface, color, (x, y), 10)
+        elif shape == "diamond":
+            pygame.draw.polygon(surface, color, [(x, y - 12), (x + 12, y), (x, y + 12), (x - 12, y)])
+        elif shape == "triangle":
+            pygame.draw.polygon(surface, color, [(x, y - 12), (x + 11, y + 9), (x - 11, y + 9)])
         else:
             rect = pygame.Rect(x - 10, y - 10, 20, 20)
             pygame.draw.rect(surface, color, rect)
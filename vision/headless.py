@@ -0,0 +1,140 @@
+"""Betrieb ohne Anzeige und Kamera für Last- und Dauertests.
+
+Startet `AnzeigeFenster` mit dem Dummy-Videotreiber von SDL, ohne
+Begrenzung der Bildrate und mit einer austauschbaren Bildquelle. Am Ende
+werden Bildrate, Speicherwachstum und Perzentile je Verarbeitungsschritt
+ausgegeben (siehe `vision/run_stats.py`):
+
+    python -m vision.headless --seconds 3600 --video aufnahme.mp4 --user 1
+    python -m vision.headless --frames 5000 --render-every 0 --json bericht.json
+
+Ohne `--video` laufen leere Bilder durch die ganze Pipeline (MediaPipe
+findet keine Hand). `--user` meldet direkt an, damit die UI-Schleife statt
+des Login-Bildschirms läuft.
+
+Aktivitätslog (`--log-dir`) und Gerätezustände (`--state-dir`) landen
+standardmäßig in einem temporären Ordner; Befehlsbus, API-Server,
+Automationen und State-Service laufen nur mit `--services` (dann mit der
+Konfiguration aus `config.py`, also auch gegen echte Geräte).
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+
+class BlankFrames:
+    """Bildquelle mit schwarzen Bildern; `fps` bremst auf Kamera-Takt (None = so schnell wie möglich)."""
+
+    def __init__(self, width=1280, height=720, fps=None):
+        self.frame = np.zeros((height, width, 3), np.uint8)
+        self.fps = fps
+        self._next = None
+
+    def read(self):
+        _pace(self)
+        return True, self.frame
+
+    def release(self):
+        pass
+
+
+class VideoFrames:
+    """Bildquelle aus einer Videodatei, am Ende wieder von vorn (`loop`)."""
+
+    def __init__(self, path, loop=True, fps=None):
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise OSError(f"Video nicht lesbar: {path}")
+        self.loop = loop
+        self.fps = fps
+        self._next = None
+
+    def read(self):
+        _pace(self)
+        success, frame = self.capture.read()
+        if not success and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.capture.read()
+        return success, frame
+
+    def release(self):
+        self.capture.release()
+
+
+def _pace(source):
+    # wie eine Kamera: höchstens `fps` Bilder pro Sekunde liefern
+    if not source.fps:
+        return
+    now = time.monotonic()
+    if source._next is not None and now < source._next:
+        time.sleep(source._next - now)
+        now = source._next
+    source._next = now + 1.0 / source.fps
+
+
+def run(frames=None, seconds=None, source=None, render_every=1, user=None, trace_python=False,
+        width=1280, height=720, log_dir=None, state_dir=None, services=False):
+    """Startet die Anzeige ohne Bildschirm und gibt die Kennzahlen des Laufs zurück.
+
+    Ohne `log_dir` wird ein temporärer Ordner angelegt; `state_dir` liegt
+    standardmäßig darin.
+    """
+    from logsystem.logger import Logger
+    from vision.anzeigefenster import AnzeigeFenster
+    from vision.run_stats import RunStats
+
+    log_dir = log_dir or tempfile.mkdtemp(prefix="headless_log_")
+    window = AnzeigeFenster(
+        width,
+        height,
+        frame_source=source or BlankFrames(width, height),
+        headless=True,
+        render_every=render_every,
+        stats=RunStats(trace_python=trace_python),
+        logger=Logger(os.path.join(log_dir, "activity_log.csv")),
+        state_dir=state_dir or os.path.join(log_dir, "device_state"),
+        services=services,
+    )
+    if user is not None:
+        window.login(user)
+    report = window.run(max_frames=frames, max_seconds=seconds)
+    report["log_dir"] = log_dir
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Anzeige ohne Bildschirm für Last- und Dauertests")
+    parser.add_argument("--frames", type=int, help="nach so vielen Frames beenden")
+    parser.add_argument("--seconds", type=float, help="nach so vielen Sekunden beenden")
+    parser.add_argument("--video", help="Videodatei statt leerer Bilder (läuft in Schleife)")
+    parser.add_argument("--fps", type=float, help="Bildquelle auf Kamera-Takt bremsen")
+    parser.add_argument("--render-every", type=int, default=1, help="nur jeden n-ten Frame zeichnen (0 = nie)")
+    parser.add_argument("--user", type=int, help="direkt als dieser Nutzer anmelden")
+    parser.add_argument("--trace-python", action="store_true", help="Python-Heap mit tracemalloc verfolgen")
+    parser.add_argument("--json", metavar="PATH", help="Bericht zusätzlich als JSON-Datei speichern")
+    parser.add_argument("--log-dir", help="Ordner für das Aktivitätslog (Standard: temporär)")
+    parser.add_argument("--state-dir", help="Ordner für die Gerätezustände (Standard: im Log-Ordner)")
+    parser.add_argument("--services", action="store_true",
+                        help="Befehlsbus, API-Server, Automationen und State-Service mitlaufen lassen")
+    args = parser.parse_args(argv)
+    if args.frames is None and args.seconds is None:
+        parser.error("--frames oder --seconds angeben")
+
+    source = VideoFrames(args.video, fps=args.fps) if args.video else BlankFrames(fps=args.fps)
+    report = run(args.frames, args.seconds, source, args.render_every, args.user, args.trace_python,
+                 log_dir=args.log_dir, state_dir=args.state_dir, services=args.services)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
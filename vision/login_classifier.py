@@ -0,0 +1,323 @@
+"""Login-Gesten: invarianter Klassifikator mit Konfidenzen und Abstimmung über Zeit.
+
+Der Klassifikator vergleicht die drehungs-, größen- und lageunabhängigen
+Merkmale einer Hand (Gelenkwinkel, Fingerkuppen-Abstände in Handgrößen,
+Daumenspreizung; siehe `vision/gestures.py`) mit Vorlagen je Nutzer
+(nächste Vorlage, vektorisiert mit NumPy). Statt eines harten Ja/Nein gibt
+er Konfidenzen zurück; eine Rückweisungs-Klasse ("keine Login-Geste")
+verhindert, dass beliebige Handhaltungen einem Nutzer zugeschlagen werden.
+
+`ConfidenceVoter` sammelt die Konfidenzen über ein Zeitfenster. Ein Login
+gilt, sobald ein Nutzer genug Evidenz (Konfidenz x Zeit) gesammelt hat und
+im Fenster klar vorne liegt; einzelne unsichere Frames setzen nichts zurück.
+
+Fehlerraten lassen sich an aufgezeichneten Handhaltungen messen:
+
+    python -m vision.login_classifier record --label 1 --seconds 10 login_samples.npz
+    python -m vision.login_classifier record --label 0 --seconds 20 login_samples.npz   # keine Login-Geste
+    python -m vision.login_classifier evaluate login_samples.npz
+
+`record` hängt an eine vorhandene Datei an. `evaluate` gibt je
+Konfidenzschwelle die Falschakzeptanz (FAR) und Falschrückweisung (FRR) pro
+Frame aus sowie die Zeit bis zum Login mit dem Abstimmungsverfahren.
+"""
+
+import argparse
+import collections
+import json
+import os
+import time
+
+import numpy as np
+
+import config
+from vision import hand_model
+from vision.gestures import ANGLES, FEATURE_SIZE, hand_features, landmark_array
+from vision.timing import CLOCK
+
+
+# invarianter Teil des Merkmalsvektors (ohne Lage, Größe und Neigung)
+INVARIANT = slice(ANGLES.start, FEATURE_SIZE)
+INVARIANT_SIZE = FEATURE_SIZE - ANGLES.start
+
+
+def login_features(points, aspect=1.0):
+    """Invariante Merkmale einer Hand aus ihren (21, 3)-Landmarks."""
+    return hand_features(points, aspect)[INVARIANT]
+
+
+def default_templates():
+    """Vorlagen für die Standard-Gesten: Faust = User 1, offene Hand = User 2.
+
+    Erzeugt aus dem Handmodell mit leicht variierter Krümmung und Spreizung,
+    damit auch nicht ganz geschlossene Fäuste und leicht gebeugte Finger passen.
+    """
+    features, labels = [], []
+    for label, amounts in ((1, (1.0, 0.85, 0.7)), (2, (0.0, 0.1, 0.2))):
+        for amount in amounts:
+            for spread in (0.7, 1.0, 1.3):
+                points = hand_model.hand_points([amount] * 5, spread=spread)
+                features.append(login_features(points))
+                labels.append(label)
+    return np.array(features), np.array(labels)
+
+
+class LoginClassifier:
+    """Nächste-Vorlage-Klassifikator mit Konfidenzen.
+
+    Args:
+        templates: (n, INVARIANT_SIZE)-Array der Vorlagen.
+        labels: (n,)-Array der Nutzer-IDs je Vorlage.
+        sigma: Abstand (im Merkmalsraum), bei dem die Ähnlichkeit auf ~37% fällt.
+        reject_distance: Abstand der Rückweisungs-Klasse; Hände, die keiner
+            Vorlage näher sind, gelten als "keine Login-Geste".
+    """
+
+    def __init__(self, templates=None, labels=None, sigma=0.8, reject_distance=1.4):
+        if templates is None:
+            templates, labels = default_templates()
+        self.sigma = sigma
+        self.reject_distance = reject_distance
+        self.set_templates(templates, labels)
+
+    def set_templates(self, templates, labels):
+        templates = np.asarray(templates, dtype=np.float64).reshape(-1, INVARIANT_SIZE)
+        labels = np.asarray(labels).reshape(-1)
+        # nach Nutzer sortiert, damit der kleinste Abstand je Nutzer ein `reduceat` ist
+        order = np.argsort(labels, kind="stable")
+        self.templates = templates[order]
+        self.labels = labels[order]
+        self.users, self._starts = np.unique(self.labels, return_index=True)
+        self._norms = (self.templates ** 2).sum(axis=1)
+
+    def scores(self, features):
+        """Konfidenzen (Nutzer-IDs, Konfidenzen) für einen Merkmalsvektor.
+
+        Die Konfidenzen summieren sich zusammen mit der Rückweisung zu 1.
+        """
+        # |t - f|^2 = |t|^2 - 2 t.f + |f|^2: ein Matrix-Vektor-Produkt für alle Vorlagen
+        squared = self._norms - 2.0 * (self.templates @ features) + features @ features
+        best = np.sqrt(np.maximum(np.minimum.reduceat(squared, self._starts), 0.0))
+        similarity = np.exp(-(best / self.sigma) ** 2)
+        reject = np.exp(-(self.reject_distance / self.sigma) ** 2)
+        return self.users, similarity / (similarity.sum() + reject)
+
+    def classify(self, features):
+        """(Nutzer-ID, Konfidenz) des wahrscheinlichsten Nutzers, bzw. (None, 0.0)."""
+        if len(self.users) == 0:
+            return None, 0.0
+        users, confidences = self.scores(features)
+        best = int(np.argmax(confidences))
+        return users[best].item(), float(confidences[best])
+
+
+class ConfidenceVoter:
+    """Sammelt Konfidenzen über `window` Sekunden und bestätigt einen Nutzer.
+
+    Jeder Frame trägt Konfidenz x Frame-Dauer als Evidenz bei (so zählt die
+    Zeit, nicht die Anzahl Frames). Bestätigt wird, wenn ein Nutzer
+    mindestens `evidence` Sekunden Evidenz hat und davon mindestens `share`
+    aller Evidenz im Fenster stammt. Frames ohne oder mit unsicherer Hand
+    tragen nichts bei, setzen aber nichts zurück.
+    """
+
+    # längere Lücken zwischen Frames zählen höchstens so viel
+    MAX_FRAME_TIME = 0.1
+
+    def __init__(self, window=config.LOGIN_WINDOW_SECONDS, evidence=config.LOGIN_EVIDENCE_SECONDS,
+                 share=0.7, min_confidence=0.6, clock=None):
+        self.window = window
+        self.evidence = evidence
+        self.share = share
+        self.min_confidence = min_confidence
+        self.clock = clock or CLOCK
+        self._votes = collections.deque()  # (Zeit, Nutzer, Evidenz)
+        self._totals = collections.Counter()
+        self._last = None
+
+    def add(self, user, confidence, now=None):
+        """Frame einbringen; gibt den bestätigten Nutzer zurück oder None."""
+        now = self.clock.now() if now is None else now
+        frame_time = 0.0 if self._last is None else min(now - self._last, self.MAX_FRAME_TIME)
+        self._last = now
+        while self._votes and self._votes[0][0] < now - self.window:
+            _, old_user, weight = self._votes.popleft()
+            self._totals[old_user] -= weight
+        if user is not None and confidence >= self.min_confidence and frame_time > 0:
+            weight = confidence * frame_time
+            self._votes.append((now, user, weight))
+            self._totals[user] += weight
+
+        leader = self.leader
+        if leader is None:
+            return None
+        total = sum(self._totals.values())
+        if self._totals[leader] >= self.evidence and self._totals[leader] >= self.share * total:
+            return leader
+        return None
+
+    @property
+    def leader(self):
+        best = max(self._totals.items(), key=lambda item: item[1], default=(None, 0.0))
+        return best[0] if best[1] > 1e-9 else None
+
+    def progress(self):
+        """Anteil der nötigen Evidenz des führenden Nutzers (0..1)."""
+        leader = self.leader
+        if leader is None or self.evidence <= 0:
+            return 0.0
+        return min(1.0, self._totals[leader] / self.evidence)
+
+    def reset(self):
+        self._votes.clear()
+        self._totals.clear()
+        self._last = None
+
+
+# ---------------------------------------------------------
+# Aufzeichnen und Auswerten
+# ---------------------------------------------------------
+def load_samples(path):
+    with np.load(path) as data:
+        return data["features"], data["labels"], data["times"]
+
+
+def save_samples(path, features, labels, times):
+    """Hängt Aufnahmen an `path` an (npz mit features, labels, times)."""
+    if os.path.exists(path):
+        old_features, old_labels, old_times = load_samples(path)
+        features = np.concatenate([old_features, features])
+        labels = np.concatenate([old_labels, labels])
+        times = np.concatenate([old_times, times])
+    tmp = path + ".tmp.npz"
+    np.savez_compressed(tmp, features=features, labels=labels, times=times)
+    os.replace(tmp, path)
+
+
+def capture_features(seconds, camera=0, preview=None):
+    """Nimmt `seconds` Sekunden lang die Login-Merkmale einer Hand von der Kamera auf.
+
+    Gibt (Merkmale, Zeiten seit Beginn) zurück. `preview(frame, hand_found)`
+    wird pro Frame mit dem gespiegelten BGR-Bild aufgerufen (z.B. Anzeige).
+    """
+    import cv2
+    import mediapipe as mp
+
+    hands = mp.solutions.hands.Hands(max_num_hands=1, min_detection_confidence=0.7)
+    cap = cv2.VideoCapture(camera)
+    features, times = [], []
+    started = time.monotonic()
+    try:
+        while time.monotonic() - started < seconds:
+            ok, frame = cap.read()
+            if not ok:
+                continue
+            frame = cv2.flip(frame, 1)
+            height, width = frame.shape[:2]
+            result = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            if result.multi_hand_landmarks:
+                points = landmark_array(result.multi_hand_landmarks[0])
+                features.append(login_features(points, width / height))
+                times.append(time.monotonic() - started)
+            if preview is not None:
+                preview(frame, bool(result.multi_hand_landmarks))
+    finally:
+        cap.release()
+        hands.close()
+    return np.array(features).reshape(-1, INVARIANT_SIZE), np.array(times)
+
+
+def record(label, seconds, path, camera=0):
+    """Nimmt `seconds` Sekunden Handhaltungen mit Label `label` auf (0 = keine Login-Geste)."""
+    features, times = capture_features(seconds, camera)
+    if len(features):
+        # Zeiten beginnen je Aufnahme bei 0; `evaluate` trennt die Aufnahmen daran
+        save_samples(path, features, np.full(len(features), label), times)
+    return len(features)
+
+
+def evaluate(classifier, features, labels, times=None, thresholds=(0.5, 0.6, 0.7, 0.8, 0.9)):
+    """FAR/FRR pro Frame je Konfidenzschwelle und Login-Dauer mit `ConfidenceVoter`.
+
+    Label 0 steht für "keine Login-Geste". FAR: Anteil der Frames, die einem
+    falschen Nutzer zugeordnet werden (bei Label 0 jedem Nutzer). FRR:
+    Anteil der Frames echter Nutzer, die zurückgewiesen werden.
+    """
+    predicted, confidence = [], []
+    for row in features:
+        user, conf = classifier.classify(row)
+        predicted.append(-1 if user is None else user)
+        confidence.append(conf)
+    predicted, confidence = np.array(predicted), np.array(confidence)
+    genuine = labels != 0
+
+    report = {"frames": int(len(labels)), "genuine": int(genuine.sum()), "thresholds": []}
+    for threshold in thresholds:
+        accepted = confidence >= threshold
+        false_accept = accepted & (predicted != labels)
+        false_reject = genuine & ~(accepted & (predicted == labels))
+        report["thresholds"].append({
+            "min_confidence": threshold,
+            "far": round(float(false_accept.mean()), 4) if len(labels) else 0.0,
+            "frr": round(float(false_reject.sum() / max(1, genuine.sum())), 4),
+        })
+
+    if times is not None:
+        # Abstimmung je Aufnahme (gleiches Label, fortlaufende Zeit): Zeit bis zum Login
+        starts = np.flatnonzero((np.diff(labels) != 0) | (np.diff(times) < 0)) + 1
+        logins, missed, false_logins = [], 0, 0
+        voter = ConfidenceVoter()
+        for segment in np.split(np.arange(len(labels)), starts):
+            if len(segment) == 0:
+                continue
+            label = labels[segment[0]]
+            first = None
+            voter.reset()
+            for j in segment:
+                user = None if predicted[j] == -1 else int(predicted[j])
+                confirmed = voter.add(user, confidence[j], now=float(times[j]))
+                if confirmed is None:
+                    continue
+                voter.reset()
+                if confirmed != label:
+                    false_logins += 1
+                elif first is None:
+                    first = float(times[j] - times[segment[0]])
+            if label != 0:
+                if first is None:
+                    missed += 1
+                else:
+                    logins.append(first)
+        report["voting"] = {
+            "logins": len(logins),
+            "missed": missed,
+            "false_logins": false_logins,
+            "median_seconds": round(float(np.median(logins)), 3) if logins else None,
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Login-Gesten aufnehmen und auswerten")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="Handhaltungen von der Kamera aufnehmen")
+    rec.add_argument("--label", type=int, required=True, help="Nutzer-ID, 0 = keine Login-Geste")
+    rec.add_argument("--seconds", type=float, default=10.0)
+    rec.add_argument("--camera", type=int, default=0)
+    rec.add_argument("path")
+    ev = sub.add_parser("evaluate", help="FAR/FRR an Aufnahmen messen")
+    ev.add_argument("path")
+    ev.add_argument("--sigma", type=float, default=0.8)
+    ev.add_argument("--reject", type=float, default=1.4, help="Abstand der Rückweisungs-Klasse")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        print(f"{record(args.label, args.seconds, args.path, args.camera)} Frames aufgenommen")
+    else:
+        features, labels, times = load_samples(args.path)
+        classifier = LoginClassifier(sigma=args.sigma, reject_distance=args.reject)
+        print(json.dumps(evaluate(classifier, features, labels, times), indent=2))
+
+
+if __name__ == "__main__":
+    main()
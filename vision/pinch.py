@@ -0,0 +1,262 @@
+"""Pinch-Erkennung in Handgrößen mit Hysterese.
+
+Der Abstand der Kuppen von Daumen und Zeigefinger wird in Handgrößen
+gemessen (Handgelenk bis Mittelfinger-Grundgelenk, siehe `PINCH` in
+`vision/gestures.py`) und hängt damit nicht vom Abstand zur Kamera ab. Ein
+Pinch beginnt, sobald der Abstand unter `enter` fällt, und endet erst über
+`exit`. Die Lücke zwischen beiden Schwellen verhindert das Flattern am
+Schwellwert, daher genügt ein einziges Frame für einen bestätigten
+`pinch_start`. Optional zählt bei sich schnell schließenden Fingern der
+vorhergesagte Abstand (`predict` Sekunden voraus).
+
+Klick-Latenz und Fehlauslösungen lassen sich an aufgezeichneten Spuren messen:
+
+    python -m vision.pinch record --label 1 --seconds 30 pinch_traces.npz   # wiederholt klicken
+    python -m vision.pinch record --label 0 --seconds 60 pinch_traces.npz   # bewegen, ohne zu klicken
+    python -m vision.pinch bench pinch_traces.npz
+
+`record` hängt an eine vorhandene Datei an. `bench` spielt die Spuren mit
+ihren Zeitstempeln ab und vergleicht die bisherige Erkennung (40 Pixel,
+zwei Frames) mit der Hysterese mit und ohne Vorhersage.
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+import config
+from vision.gestures import PINCH, hand_features, landmark_array
+from vision.timing import CLOCK, Debounce
+
+
+class PinchDetector:
+    """Pinch-Zustand einer Hand aus dem Fingerkuppen-Abstand.
+
+    `update(distance, now)` pro Frame aufrufen; gibt zurück, ob der Pinch
+    aktiv ist. `hold` verlangt zusätzlich, dass der Abstand so viele
+    Sekunden unter `enter` bleibt (0 = sofort).
+    """
+
+    def __init__(self, enter=config.PINCH_ENTER, exit=config.PINCH_EXIT,
+                 predict=config.PINCH_PREDICT_SECONDS, hold=config.PINCH_HOLD_SECONDS, clock=None):
+        self.enter = enter
+        self.exit = exit
+        self.predict = predict
+        self.clock = clock or CLOCK
+        self._enter = Debounce(hold, self.clock)
+        self.active = False
+        # Änderung des Abstands pro Sekunde (geglättet), negativ = Finger schließen sich
+        self.velocity = None
+        self._last = None
+
+    def update(self, distance, now=None):
+        now = self.clock.now() if now is None else now
+        if self._last is not None and now > self._last[1]:
+            speed = (distance - self._last[0]) / (now - self._last[1])
+            self.velocity = speed if self.velocity is None else 0.5 * (speed + self.velocity)
+        self._last = (distance, now)
+
+        if self.active:
+            if distance > self.exit:
+                self.active = False
+                self._enter.reset()
+            return self.active
+
+        entering = bool(distance < self.enter)
+        if not entering and self.predict > 0 and distance < self.exit:
+            closing = min(self.velocity or 0.0, 0.0)
+            entering = bool(distance + closing * self.predict < self.enter)
+        self.active = self._enter.update(entering, now) is not None
+        return self.active
+
+    def reset(self):
+        self.active = False
+        self.velocity = None
+        self._last = None
+        self._enter.reset()
+
+
+# ---------------------------------------------------------
+# Aufzeichnen und Auswerten
+# ---------------------------------------------------------
+def load_traces(path):
+    with np.load(path) as data:
+        return data["points"], data["labels"], data["times"], data["sizes"]
+
+
+def save_traces(path, points, labels, times, sizes):
+    """Hängt Spuren an `path` an (npz mit points, labels, times, sizes)."""
+    if os.path.exists(path):
+        old = load_traces(path)
+        points, labels, times, sizes = (np.concatenate([a, b]) for a, b in zip(old, (points, labels, times, sizes)))
+    tmp = path + ".tmp.npz"
+    np.savez_compressed(tmp, points=points, labels=labels, times=times, sizes=sizes)
+    os.replace(tmp, path)
+
+
+def record(label, seconds, path, camera=0):
+    """Nimmt `seconds` Sekunden Landmarks einer Hand auf (Label 1 = Klicks, 0 = keine).
+
+    Frames ohne Hand werden als NaN gespeichert, damit die Wiedergabe die
+    Lücken sieht. Gibt die Zahl der Frames mit Hand zurück.
+    """
+    import cv2
+    import mediapipe as mp
+
+    hands = mp.solutions.hands.Hands(max_num_hands=1, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    cap = cv2.VideoCapture(camera)
+    points, times, sizes = [], [], []
+    started = time.monotonic()
+    try:
+        while time.monotonic() - started < seconds:
+            ok, frame = cap.read()
+            if not ok:
+                continue
+            frame = cv2.flip(frame, 1)
+            result = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            if result.multi_hand_landmarks:
+                points.append(landmark_array(result.multi_hand_landmarks[0]))
+            else:
+                points.append(np.full((21, 3), np.nan))
+            times.append(time.monotonic() - started)
+            sizes.append(frame.shape[1::-1])
+    finally:
+        cap.release()
+        hands.close()
+    if points:
+        # Zeiten beginnen je Aufnahme bei 0; `benchmark` trennt die Aufnahmen daran
+        save_traces(path, np.array(points), np.full(len(points), label), np.array(times), np.array(sizes))
+    return int(sum(not np.isnan(p[0, 0]) for p in points))
+
+
+def pinch_distances(points, sizes):
+    """Fingerkuppen-Abstand je Frame: (in Handgrößen, in Pixeln); NaN ohne Hand."""
+    scaled = np.full(len(points), np.nan)
+    pixels = np.full(len(points), np.nan)
+    for i, (pts, (width, height)) in enumerate(zip(points, sizes)):
+        if np.isnan(pts[0, 0]):
+            continue
+        scaled[i] = hand_features(pts, width / height)[PINCH]
+        pixels[i] = np.hypot((pts[4, 0] - pts[8, 0]) * width, (pts[4, 1] - pts[8, 1]) * height)
+    return scaled, pixels
+
+
+def press_regions(distances, exit=config.PINCH_EXIT, release=0.6):
+    """Abschnitte [Beginn, Ende) zwischen Annähern (< exit) und klarem Öffnen (> release)."""
+    regions, start = [], None
+    for i, distance in enumerate(distances):
+        if start is None:
+            if distance < exit:
+                start = i
+        elif not distance <= release:   # weit offen oder keine Hand (NaN)
+            regions.append((start, i))
+            start = None
+    if start is not None:
+        regions.append((start, len(distances)))
+    return regions
+
+
+def detect_starts(detector, distances, times):
+    """Frames, in denen der Detektor einen Pinch beginnt (Wiedergabe mit Zeitstempeln)."""
+    starts, was_active = [], False
+    detector.reset()
+    for i, (distance, now) in enumerate(zip(distances, times)):
+        if np.isnan(distance):
+            detector.reset()
+            was_active = False
+            continue
+        active = detector.update(distance, float(now))
+        if active and not was_active:
+            starts.append(i)
+        was_active = active
+    return starts
+
+
+def default_detectors():
+    """(Name, Detektor, misst in Pixeln) der verglichenen Verfahren."""
+    return [
+        ("pixel_40px_2frames", PinchDetector(enter=40.0, exit=40.0, predict=0.0, hold=0.03), True),
+        ("hysterese", PinchDetector(predict=0.0, hold=0.0), False),
+        ("hysterese_vorhersage", PinchDetector(predict=0.05, hold=0.0), False),
+    ]
+
+
+def benchmark(points, labels, times, sizes, detectors=None, contact=0.2):
+    """Klick-Latenz und Fehlauslösungen je Detektor.
+
+    In Aufnahmen mit Label 1 ist jeder Abschnitt, in dem der Abstand unter
+    `contact` Handgrößen fällt, ein echter Klick; sein Kontaktzeitpunkt ist
+    das erste Frame darunter. Latenz = erster Pinch-Beginn im Abschnitt
+    minus Kontaktzeitpunkt (negativ = vor der Berührung erkannt).
+    Weitere Beginne im selben Abschnitt zählen als Flattern, alle übrigen
+    (und alle in Aufnahmen mit Label 0) als Fehlauslösung.
+    """
+    detectors = default_detectors() if detectors is None else detectors
+    scaled, pixels = pinch_distances(points, sizes)
+    boundaries = np.flatnonzero((np.diff(labels) != 0) | (np.diff(times) < 0)) + 1
+    segments = [s for s in np.split(np.arange(len(labels)), boundaries) if len(s)]
+    idle_seconds = sum(float(times[s[-1]] - times[s[0]]) for s in segments if labels[s[0]] == 0)
+
+    report = {"frames": int(len(labels)), "idle_seconds": round(idle_seconds, 1), "detectors": {}}
+    for name, detector, use_pixels in detectors:
+        latencies, clicks, missed, chatter, false_starts = [], 0, 0, 0, 0
+        for segment in segments:
+            seg_times = times[segment]
+            seg_scaled = scaled[segment]
+            starts = detect_starts(detector, (pixels if use_pixels else scaled)[segment], seg_times)
+            if labels[segment[0]] == 0:
+                false_starts += len(starts)
+                continue
+            matched = set()
+            for begin, end in press_regions(seg_scaled):
+                minimum = np.nanmin(seg_scaled[begin:end])
+                inside = [s for s in starts if begin <= s < end]
+                matched.update(inside)
+                if minimum >= contact:
+                    # nur angenähert, nicht berührt
+                    false_starts += len(inside)
+                    continue
+                clicks += 1
+                if not inside:
+                    missed += 1
+                    continue
+                onset = begin + int(np.argmax(seg_scaled[begin:end] < contact))
+                latencies.append(float(seg_times[inside[0]] - seg_times[onset]))
+                chatter += len(inside) - 1
+            false_starts += len([s for s in starts if s not in matched])
+        report["detectors"][name] = {
+            "clicks": clicks,
+            "missed": missed,
+            "latency_ms_median": round(1000 * float(np.median(latencies)), 1) if latencies else None,
+            "latency_ms_p90": round(1000 * float(np.percentile(latencies, 90)), 1) if latencies else None,
+            "chatter": chatter,
+            "false_starts": false_starts,
+            "false_per_minute": round(60 * false_starts / idle_seconds, 2) if idle_seconds else None,
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pinch-Spuren aufnehmen und Klick-Latenz messen")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="Landmarks von der Kamera aufnehmen")
+    rec.add_argument("--label", type=int, required=True, help="1 = wiederholt klicken, 0 = ohne Klick bewegen")
+    rec.add_argument("--seconds", type=float, default=30.0)
+    rec.add_argument("--camera", type=int, default=0)
+    rec.add_argument("path")
+    bench = sub.add_parser("bench", help="Aufnahmen abspielen und Detektoren vergleichen")
+    bench.add_argument("path")
+    bench.add_argument("--contact", type=float, default=0.2, help="Abstand (Handgrößen), ab dem ein Klick echt ist")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        print(f"{record(args.label, args.seconds, args.path, args.camera)} Frames mit Hand aufgenommen")
+    else:
+        print(json.dumps(benchmark(*load_traces(args.path), contact=args.contact), indent=2))
+
+
+if __name__ == "__main__":
+    main()
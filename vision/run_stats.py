@@ -0,0 +1,140 @@
+"""Laufzeit-Kennzahlen der Hauptschleife: Bildrate, Dauer je Schritt, Speicher.
+
+`AnzeigeFenster` misst jeden Frame in Schritten (Kamera, Tracking,
+Ereignisse, Dienste, Zeichnen, Anzeige). Die letzten `capacity` Frames
+liegen in einem Ringpuffer, daraus ergeben sich Perzentile je Schritt.
+Der Speicher (RSS, optional Python-Heap über `tracemalloc`) wird alle
+`memory_interval` Sekunden notiert; das Wachstum pro Stunde zeigt Lecks in
+Dauerläufen (siehe `vision/headless.py`).
+"""
+
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+
+def rss_bytes():
+    """Aktueller Arbeitsspeicher des Prozesses (Linux), sonst Höchstwert oder None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss ist unter Linux in KiB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RunStats:
+    """Misst Frames der Hauptschleife: `begin()`, `mark(schritt)` ..., `end()`."""
+
+    STAGES = ("capture", "tracking", "events", "services", "render", "flip")
+
+    def __init__(self, capacity=65536, memory_interval=10.0, trace_python=False, warmup=5.0):
+        self.capacity = capacity
+        self.memory_interval = memory_interval
+        self.warmup = warmup
+        self._index = {stage: i for i, stage in enumerate(self.STAGES)}
+        # Dauer je Schritt und gesamt (letzte Spalte) in Sekunden; NaN = Schritt lief nicht
+        self._samples = np.full((capacity, len(self.STAGES) + 1), np.nan)
+        self._row = np.full(len(self.STAGES) + 1, np.nan)
+        self._frame_start = None
+        self._last = None
+        self.frames = 0
+        self.started = None
+        self.trace_python = trace_python
+        # (Sekunden seit Start, RSS, Python-Heap)
+        self.memory = []
+        self._next_memory = 0.0
+
+    def begin(self):
+        now = time.perf_counter()
+        if self.started is None:
+            self.started = now
+            if self.trace_python and not tracemalloc.is_tracing():
+                tracemalloc.start()
+        self._frame_start = self._last = now
+        self._row[:] = np.nan
+
+    def mark(self, stage):
+        """Zeit seit der letzten Marke dem Schritt `stage` zuschlagen."""
+        now = time.perf_counter()
+        index = self._index[stage]
+        self._row[index] = np.nan_to_num(self._row[index]) + now - self._last
+        self._last = now
+
+    def end(self):
+        now = time.perf_counter()
+        self._row[-1] = now - self._frame_start
+        self._samples[self.frames % self.capacity] = self._row
+        self.frames += 1
+        elapsed = now - self.started
+        if elapsed >= self._next_memory:
+            self._next_memory = elapsed + self.memory_interval
+            self._sample_memory(elapsed)
+
+    def _sample_memory(self, elapsed):
+        heap = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self.memory.append((elapsed, rss_bytes(), heap))
+
+    def report(self):
+        """Kennzahlen als dict (Zeiten in ms, Speicher in MB)."""
+        if not self.frames:
+            return {"frames": 0}
+        elapsed = time.perf_counter() - self.started
+        # Endstand, sonst fehlt bei kurzen Läufen alles nach der letzten Messung
+        if not self.memory or self.memory[-1][0] < elapsed:
+            self._sample_memory(elapsed)
+        samples = self._samples[:min(self.frames, self.capacity)] * 1000.0
+        stages = {}
+        for stage, column in list(self._index.items()) + [("frame", len(self.STAGES))]:
+            # nur Frames, in denen der Schritt lief (z.B. ohne übersprungenes Zeichnen)
+            values = samples[:, column][~np.isnan(samples[:, column])]
+            if not len(values):
+                continue
+            p50, p95, p99 = np.percentile(values, (50, 95, 99))
+            stages[stage] = {
+                "frames": int(len(values)),
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(values.max()), 3),
+            }
+        return {
+            "frames": self.frames,
+            "seconds": round(elapsed, 1),
+            "fps": round(self.frames / elapsed, 1) if elapsed > 0 else None,
+            "stages": stages,
+            "memory": self._memory_report(),
+        }
+
+    def _memory_report(self):
+        # Anlaufphase (Caches, lazy geladene Views) nicht als Wachstum zählen;
+        # ohne zwei Messungen danach ist kein Wachstum angebbar
+        after_warmup = [m for m in self.memory if m[0] >= self.warmup]
+        samples = after_warmup if len(after_warmup) >= 2 else self.memory
+        report = {}
+        for name, column in (("rss", 1), ("python_heap", 2)):
+            points = np.array([(m[0], m[column]) for m in samples if m[column] is not None], dtype=np.float64)
+            if not len(points):
+                continue
+            times, values = points[:, 0], points[:, 1] / (1024 * 1024)
+            entry = {
+                "start_mb": round(float(values[0]), 1),
+                "end_mb": round(float(values[-1]), 1),
+                "samples": int(len(points)),
+            }
+            if len(after_warmup) < 2:
+                # zu kurz gelaufen: Start/Ende umfassen die Anlaufphase
+                entry["growth_mb"] = None
+            else:
+                entry["growth_mb"] = round(float(values[-1] - values[0]), 1)
+                if len(times) >= 3 and times[-1] > times[0]:
+                    entry["mb_per_hour"] = round(float(np.polyfit(times, values, 1)[0]) * 3600, 2)
+            report[name] = entry
+        return report
@@ -0,0 +1,481 @@
+"""Synthetische Hand-Landmarks für Lasttests des UI-Pfads ohne MediaPipe.
+
+Erzeugt plausible Landmark-Folgen (Handmodell aus `vision/hand_model.py`)
+mit beliebiger Bildrate und speist sie ab `HandTracker.process_hands` ein:
+Cursor-Glättung, Pinch, Gesten, Hand-Ereignisse, Hit-Test-Baum, Widgets,
+Gerätezustände und Logging laufen wie mit Kamera. Die Zeit ist simuliert
+(`ManualClock`, 1/fps pro Frame), der Lauf damit reproduzierbar und so
+schnell, wie die UI rechnen kann.
+
+Abläufe (`SCENARIOS`):
+
+- "rooms": alle Räume jeder Etage überstreichen (Hover, Vorladen der Views)
+- "sliders": jede Raum-View öffnen und alle Slider per Pinch ziehen
+- "menu": das Menü in schneller Folge öffnen und schließen
+- "fuzz": zufällige Bewegungen, Klicks, Züge, Haltungen und Aussetzer mit
+  null bis zwei Händen (Beenden-Knopf ausgenommen)
+
+Nach jedem Frame prüft `check_consistency` den Zustand von Tracker, UI und
+Gerätezuständen; eine Verletzung bricht mit `AssertionError` ab:
+
+    python -m vision.synthetic --scenario all --fuzz-seconds 120 --seed 3
+    python -m vision.synthetic --scenario fuzz --fps 60 --render-every 1 --json bericht.json
+
+Aktivitätslog und Gerätezustände landen in einem eigenen (Standard:
+temporären) Ordner; Befehlsbus, API-Server, Automationen und State-Service
+laufen nicht mit, der Lauf fasst weder die Daten des Panels noch echte
+Geräte an.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from vision.hand_model import FIST, OPEN, POINT, TWO_FINGERS, hand_points
+from vision.timing import ManualClock
+
+
+class SyntheticHand:
+    """Eine simulierte Hand; die Daumenkuppe (Landmark 4) liegt auf dem Ziel-Pixel.
+
+    Die Schritte (`move`, `tap`, `drag`, ...) sind Generatoren, die pro Frame
+    die Liste der sichtbaren Hände liefern (`[self]` oder `[]`).
+    """
+
+    # Frames, bis der geglättete Cursor am Ziel angekommen ist (Glättung 0.7 pro Frame)
+    SETTLE_FRAMES = 6
+
+    def __init__(self, fps, width, height, curls=POINT, size=0.2, handedness=None, position=None):
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.size = size
+        self.handedness = handedness
+        self.position = position or (width / 2, height / 2)
+        # 0 = Finger offen, 1 = Daumen berührt Zeigefinger
+        self.pinch = 0.0
+        self.visible = True
+        self._pose = None
+        self.set_pose(curls)
+
+    def set_pose(self, curls, roll=0.0):
+        """Haltung wechseln; das Handmodell wird nur dabei neu berechnet."""
+        self._pose = hand_points(curls, roll=roll, size=self.size, aspect=self.width / self.height)
+
+    def detection(self):
+        """(Landmarks (21, 3), Händigkeit) wie aus `HandTracker.process_result`."""
+        points = self._pose.copy()
+        points[4] += (points[8] - points[4]) * self.pinch
+        points[:, 0] += self.position[0] / self.width - points[4, 0]
+        points[:, 1] += self.position[1] / self.height - points[4, 1]
+        return points, self.handedness
+
+    def frames(self, seconds):
+        return max(1, int(round(seconds * self.fps)))
+
+    def _frame(self):
+        return [self] if self.visible else []
+
+    def hold(self, seconds=0.0, frames=0):
+        for _ in range(max(frames, self.frames(seconds) if seconds else 0)):
+            yield self._frame()
+
+    def move(self, target, seconds=0.3):
+        """Gleichmäßig (weiche Beschleunigung) zum Ziel-Pixel bewegen."""
+        start = self.position
+        count = self.frames(seconds)
+        for i in range(1, count + 1):
+            t = i / count
+            t = t * t * (3 - 2 * t)
+            self.position = (start[0] + (target[0] - start[0]) * t, start[1] + (target[1] - start[1]) * t)
+            yield self._frame()
+
+    def close(self, closed=True, seconds=0.06):
+        """Finger schließen (Pinch) bzw. öffnen."""
+        start, end = self.pinch, 1.0 if closed else 0.0
+        count = self.frames(seconds)
+        for i in range(1, count + 1):
+            self.pinch = start + (end - start) * i / count
+            yield self._frame()
+
+    def tap(self, target, seconds=0.3, press=0.05):
+        """Zum Ziel, Cursor zur Ruhe kommen lassen, kurz pinchen."""
+        yield from self.move(target, seconds)
+        yield from self.hold(frames=self.SETTLE_FRAMES)
+        yield from self.close(True)
+        yield from self.hold(press)
+        yield from self.close(False)
+        yield from self.hold(frames=self.SETTLE_FRAMES)
+
+    def drag(self, start, path, seconds=0.4):
+        """Bei `start` pinchen und gehalten über die Punkte von `path` ziehen."""
+        yield from self.move(start)
+        yield from self.hold(frames=self.SETTLE_FRAMES)
+        yield from self.close(True)
+        for point in path:
+            yield from self.move(point, seconds)
+        yield from self.hold(frames=self.SETTLE_FRAMES)
+        yield from self.close(False)
+        yield from self.hold(frames=self.SETTLE_FRAMES)
+
+    def hide(self, seconds):
+        """Hand verlässt das Bild für `seconds` Sekunden (kurz = Aussetzer, lang = "leave")."""
+        self.visible = False
+        self.pinch = 0.0
+        yield from self.hold(seconds)
+        self.visible = True
+
+
+# ---------------------------------------------------------
+# Abläufe
+# ---------------------------------------------------------
+def room_point(ui, room):
+    """Ein Pixel im Raum: Schwerpunkt oder, bei verwinkelten Räumen, ein Rasterpunkt."""
+    shape = ui.room_zones[room]
+    x, y = ui.get_room_centroid(shape)
+    if ui.room_at(x, y) == room:
+        return (x, y)
+    if hasattr(shape, "collidepoint"):
+        left, top, right, bottom = shape.left, shape.top, shape.right, shape.bottom
+    else:
+        xs, ys = [p[0] for p in shape], [p[1] for p in shape]
+        left, top, right, bottom = min(xs), min(ys), max(xs), max(ys)
+    for fy in np.linspace(0.1, 0.9, 9):
+        for fx in np.linspace(0.1, 0.9, 9):
+            x, y = int(left + (right - left) * fx), int(top + (bottom - top) * fy)
+            if ui.room_at(x, y) == room:
+                return (x, y)
+    return None
+
+
+def _floor_ids(app):
+    # aktive Etage zuerst, danach die übrigen in Anzeige-Reihenfolge
+    active = app.ui.floors.active_id
+    return [active] + [button.floor_id for button in app.ui.floor_buttons if button.floor_id != active]
+
+
+def _to_floor(app, hand, floor_id):
+    ui = app.ui
+    if ui.floors.active_id == floor_id:
+        return
+    button = next(b for b in ui.floor_buttons if b.floor_id == floor_id)
+    yield from hand.tap(button.rect.center)
+
+
+def _to_home(app, hand):
+    ui = app.ui
+    if ui.menu_button.is_open:
+        yield from hand.tap(ui.menu_button.rect.center)
+    if ui.current_view != "HOME":
+        yield from hand.tap(ui.get_view(ui.current_view).back_button.rect.center)
+
+
+def sweep_rooms(app, hands, rng, seconds=None):
+    """Überstreicht jeden Raum jeder Etage (Hover) und kehrt zur ersten Etage zurück."""
+    hand = hands[0]
+    yield from _to_home(app, hand)
+    floors = _floor_ids(app)
+    for floor_id in floors:
+        yield from _to_floor(app, hand, floor_id)
+        for room in list(app.ui.room_zones):
+            point = room_point(app.ui, room)
+            if point is not None:
+                yield from hand.move(point, 0.2)
+                yield from hand.hold(0.1)
+    yield from _to_floor(app, hand, floors[0])
+
+
+def _slider_path(widget):
+    # innerhalb 10..90 %, damit der Zug das Gerät nicht ausschaltet
+    rect = widget.slider_rect
+    if rect.width >= rect.height:
+        y = rect.centery
+        return (rect.left + rect.width * 0.5, y), [
+            (rect.left + rect.width * 0.9, y), (rect.left + rect.width * 0.1, y), (rect.left + rect.width * 0.6, y)]
+    x = rect.centerx
+    return (x, rect.top + rect.height * 0.5), [
+        (x, rect.top + rect.height * 0.1), (x, rect.top + rect.height * 0.9), (x, rect.top + rect.height * 0.4)]
+
+
+def _widget_on(widget):
+    return widget.is_on if hasattr(widget, "is_on") else widget.is_open
+
+
+def drag_sliders(app, hands, rng, seconds=None):
+    """Öffnet jede Raum-View und zieht alle Slider hin und her."""
+    hand = hands[0]
+    ui = app.ui
+    yield from _to_home(app, hand)
+    floors = _floor_ids(app)
+    for floor_id in floors:
+        yield from _to_floor(app, hand, floor_id)
+        for room in list(ui.room_zones):
+            point = room_point(ui, room)
+            if point is None or ui.registry.view_for_room(room) is None:
+                continue
+            yield from hand.tap(point)
+            if ui.current_view == "HOME":
+                continue
+            view = ui.get_view(ui.current_view)
+            for widget in view.widgets:
+                if not _widget_on(widget):
+                    yield from hand.tap(widget.rect.center)
+                start, path = _slider_path(widget)
+                yield from hand.drag(start, path)
+            yield from hand.tap(view.back_button.rect.center)
+    yield from _to_floor(app, hand, floors[0])
+
+
+def toggle_menu(app, hands, rng, seconds=None, count=40):
+    """Öffnet und schließt das Menü `count`-mal in schneller Folge."""
+    hand = hands[0]
+    yield from _to_home(app, hand)
+    center = app.ui.menu_button.rect.center
+    yield from hand.move(center)
+    for _ in range(count):
+        yield from hand.hold(frames=hand.SETTLE_FRAMES)
+        yield from hand.close(True, 0.02)
+        yield from hand.close(False, 0.02)
+    if app.ui.menu_button.is_open:
+        yield from hand.tap(center)
+
+
+POSES = (OPEN, FIST, POINT, TWO_FINGERS)
+
+
+def _random_point(app, rng):
+    # Beenden-Knopf (großzügig) aussparen, ein Klick darauf beendet den Prozess
+    forbidden = app.ui.exit_button.rect.inflate(60, 60)
+    while True:
+        point = (rng.uniform(0, app.width - 1), rng.uniform(0, app.height - 1))
+        if not forbidden.collidepoint(point):
+            return point
+
+
+def _fuzz_hand(app, hand, rng):
+    # endlose Folge zufälliger Schritte einer Hand
+    while True:
+        action = rng.random()
+        if action < 0.3:
+            yield from hand.move(_random_point(app, rng), rng.uniform(0.02, 0.5))
+        elif action < 0.55:
+            yield from hand.tap(_random_point(app, rng), rng.uniform(0.05, 0.3), rng.uniform(0.0, 0.2))
+        elif action < 0.7:
+            path = [_random_point(app, rng) for _ in range(rng.randint(1, 3))]
+            yield from hand.drag(_random_point(app, rng), path, rng.uniform(0.05, 0.4))
+        elif action < 0.8:
+            # kurzer Aussetzer (ID bleibt) oder Hand ganz weg
+            yield from hand.hide(rng.choice((rng.uniform(0.01, 0.2), rng.uniform(0.3, 1.0))))
+        elif action < 0.9:
+            hand.set_pose(rng.choice(POSES), rng.uniform(-0.6, 0.6))
+            yield from hand.hold(rng.uniform(0.0, 0.3))
+        else:
+            yield from hand.hold(rng.uniform(0.0, 0.5))
+
+
+def fuzz(app, hands, rng, seconds=60.0):
+    """Zufällige Eingaben mit bis zu zwei Händen für `seconds` simulierte Sekunden."""
+    streams = [_fuzz_hand(app, hand, rng) for hand in hands]
+    if len(hands) > 1:
+        # die zweite Hand kommt erst später dazu
+        streams[1] = itertools.chain(hands[1].hide(seconds / 4), streams[1])
+    for _ in range(hands[0].frames(seconds)):
+        yield [visible for stream in streams for visible in next(stream)]
+    # Schritte brechen mittendrin ab: Hände offen und sichtbar zurücklassen
+    for hand in hands:
+        hand.visible = True
+        hand.pinch = 0.0
+        hand.set_pose(POINT)
+    yield from _to_home(app, hands[0])
+
+
+SCENARIOS = {
+    "rooms": sweep_rooms,
+    "sliders": drag_sliders,
+    "menu": toggle_menu,
+    "fuzz": fuzz,
+}
+
+
+# ---------------------------------------------------------
+# Prüfen
+# ---------------------------------------------------------
+def check_consistency(app, now):
+    """Liste der verletzten Invarianten (leer = alles stimmig)."""
+    problems = []
+    tracked = app.tracker.tracked
+    ui = app.ui
+    if set(app.hand_cursors) != set(app.hand_dispatchers):
+        problems.append(f"Cursor {sorted(app.hand_cursors)} != Dispatcher {sorted(app.hand_dispatchers)}")
+    if not set(app.hand_dispatchers) <= set(tracked):
+        problems.append(f"Dispatcher für entfernte Hände: {sorted(set(app.hand_dispatchers) - set(tracked))}")
+    if not set(app.gesture_widgets) <= set(tracked):
+        problems.append(f"Gesten-Widgets für entfernte Hände: {sorted(set(app.gesture_widgets) - set(tracked))}")
+    for hand_id, dispatcher in app.hand_dispatchers.items():
+        hand = tracked.get(hand_id)
+        if dispatcher.captured is not None and hand is not None:
+            # Capture nur mit gehaltenem Pinch oder während eines kurzen Aussetzers
+            if not hand.last_pinch_active and hand.last_seen >= now:
+                problems.append(f"Hand {hand_id}: Capture {dispatcher.captured.name} ohne Pinch")
+
+    if ui.current_view != "HOME" and ui.registry.room_for_view(ui.current_view) is None:
+        problems.append(f"Unbekannte View {ui.current_view}")
+    for view in ui.views.values():
+        for widget in view.widgets:
+            for name in ("brightness", "position"):
+                value = getattr(widget, name, None)
+                if value is not None and not 0 <= value <= 100:
+                    problems.append(f"{widget.device_id}: {name}={value}")
+            stored = ui.device_states.get(widget.device_id)
+            if stored:
+                state = widget.get_state()
+                diff = {k: (state.get(k), v) for k, v in stored.items() if state.get(k, v) != v}
+                if diff:
+                    problems.append(f"{widget.device_id}: Widget != Gerätezustand {diff}")
+    for room, on in ui.rooms.items():
+        stored = ui.device_states.get(ui.room_state_id(room), {}).get("on", False)
+        if on != stored:
+            problems.append(f"{room}: Raum-Schalter {on} != Gerätezustand {stored}")
+    return problems
+
+
+# ---------------------------------------------------------
+# Lauf
+# ---------------------------------------------------------
+class SyntheticRun:
+    """Treibt `AnzeigeFenster` (ohne Anzeige) mit synthetischen Händen."""
+
+    def __init__(self, fps=1000.0, render_every=0, user=1, width=1280, height=720, log_dir=None, seed=0):
+        from logsystem.logger import Logger
+        from vision.anzeigefenster import AnzeigeFenster
+        from vision.headless import BlankFrames
+
+        self.fps = fps
+        self.clock = ManualClock()
+        self.log_dir = log_dir or tempfile.mkdtemp(prefix="synthetic_log_")
+        self.app = AnzeigeFenster(
+            width,
+            height,
+            frame_source=BlankFrames(width, height),
+            headless=True,
+            render_every=render_every,
+            clock=self.clock,
+            logger=Logger(os.path.join(self.log_dir, "activity_log.csv")),
+            # Gerätezustände neben dem Log; keine Befehle, Automationen oder State-Service
+            state_dir=os.path.join(self.log_dir, "device_state"),
+            services=False,
+        )
+        self.user = user
+        self.app.login(user)
+        self.rng = random.Random(seed)
+        self.hands = [
+            SyntheticHand(fps, width, height, handedness="Right"),
+            SyntheticHand(fps, width, height, handedness="Left", position=(width * 0.25, height * 0.5)),
+        ]
+        # Kamerabild für die Vorschau, falls gezeichnet wird
+        self.frame = np.zeros((height, width, 3), np.uint8)
+        self.checks = 0
+        self.relogins = 0
+        self.scenarios = []
+
+    def step(self, hands):
+        """Ein Frame: Landmarks -> Tracker -> UI, danach Invarianten prüfen."""
+        app = self.app
+        stats = app.stats
+        now = self.clock.advance(1.0 / self.fps)
+        stats.begin()
+        render = bool(app.render_every) and stats.frames % app.render_every == 0
+        detections = [hand.detection() for hand in hands]
+        stats.mark("capture")
+        app.tracker.process_hands(detections, now)
+        stats.mark("tracking")
+        app.update(now, bool(detections), render, self.frame if render else None, now)
+        stats.end()
+
+        if not app.login_done:
+            # abgemeldet (Logout-Knopf und Hand weg): direkt wieder anmelden
+            app.login(self.user)
+            self.relogins += 1
+        problems = check_consistency(app, now)
+        self.checks += 1
+        if problems:
+            raise AssertionError(f"Frame {stats.frames} ({self.scenarios[-1]}): " + "; ".join(problems))
+
+    def play(self, name, seconds=None):
+        """Spielt einen Ablauf aus `SCENARIOS` ab."""
+        self.scenarios.append(name)
+        args = () if seconds is None else (seconds,)
+        for hands in SCENARIOS[name](self.app, self.hands, self.rng, *args):
+            self.step(hands)
+        # Hände verlassen das Bild, Tracker und UI räumen auf
+        for _ in range(self.hands[0].frames(self.app.tracker.LOST_GRACE + 0.1)):
+            self.step([])
+
+    def close(self):
+        """Beendet Dienste und Logger; gibt den Bericht zurück."""
+        app = self.app
+        report = app.stats.report()
+        app._close_camera()
+        app.ui.close_services()
+        app.logger.close()
+        events = app.tracker.events.pushed
+        seconds = report.get("seconds") or 0
+        return {
+            "scenarios": self.scenarios,
+            "frames": report.get("frames", 0),
+            "simulated_seconds": round(self.clock.now(), 1),
+            "events": events,
+            "events_per_second": round(events / seconds, 1) if seconds else None,
+            "checks": self.checks,
+            "relogins": self.relogins,
+            "log_dir": self.log_dir,
+            "run": report,
+        }
+
+
+def run(scenarios=("rooms", "sliders", "menu", "fuzz"), fps=1000.0, fuzz_seconds=60.0, repeat=1,
+        render_every=0, user=1, seed=0, log_dir=None):
+    """Spielt die Abläufe `repeat`-mal ab und gibt den Bericht zurück."""
+    synthetic = SyntheticRun(fps, render_every, user, log_dir=log_dir, seed=seed)
+    started = time.perf_counter()
+    try:
+        for _ in range(repeat):
+            for name in scenarios:
+                synthetic.play(name, fuzz_seconds if name == "fuzz" else None)
+    finally:
+        report = synthetic.close()
+    report["wall_seconds"] = round(time.perf_counter() - started, 2)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="UI-Pfad mit synthetischen Händen unter Last setzen")
+    parser.add_argument("--scenario", choices=list(SCENARIOS) + ["all"], default="all")
+    parser.add_argument("--fps", type=float, default=1000.0, help="simulierte Bildrate")
+    parser.add_argument("--fuzz-seconds", type=float, default=60.0, help="simulierte Dauer des Fuzzings")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--render-every", type=int, default=0, help="nur jeden n-ten Frame zeichnen (0 = nie)")
+    parser.add_argument("--user", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-dir", help="Ordner für Aktivitätslog und Gerätezustände (Standard: temporär)")
+    parser.add_argument("--json", metavar="PATH", help="Bericht zusätzlich als JSON-Datei speichern")
+    args = parser.parse_args(argv)
+
+    scenarios = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    report = run(scenarios, args.fps, args.fuzz_seconds, args.repeat, args.render_every, args.user, args.seed,
+                 args.log_dir)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Gemeinsame Zeitbasis für Verzögerungen, Timer und Entprellung.
+
+Verhalten wie "Pinch erst nach kurzem Halten" oder "Login-Bildschirm eine
+halbe Sekunde nach dem Abmelden" hing bisher an gezählten Frames und damit
+an der tatsächlichen Bildrate (Kamera mit 30 FPS, schwankende
+Inferenzzeiten). Alle Dauern werden jetzt in Sekunden angegeben und gegen
+`time.monotonic()` gemessen, sodass sie bei jeder Bildrate gleich lang sind.
+
+- `Clock`: Zeitquelle. Standard ist `time.monotonic`; für Wiedergabe
+  aufgezeichneter Frames oder Simulationen lässt sich eine eigene Funktion
+  (oder `ManualClock`) einsetzen.
+- `Timer`: einmalige Frist (z.B. Verzögerung, Bestätigungs-Timeout).
+- `Debounce`: ein Wert gilt erst, wenn er ohne Unterbrechung eine
+  Mindestdauer anliegt.
+
+Timer und Debounce akzeptieren überall einen optionalen Zeitstempel `now`,
+damit alle Auswertungen eines Frames denselben Zeitpunkt (Aufnahmezeit des
+Kamerabilds) verwenden.
+"""
+
+import time
+
+
+class Clock:
+    """Monotone Zeitquelle in Sekunden."""
+
+    def __init__(self, source=time.monotonic):
+        self._source = source
+
+    def now(self):
+        return self._source()
+
+
+class ManualClock(Clock):
+    """Von Hand weitergestellte Uhr (Simulation, Wiedergabe aufgezeichneter Frames)."""
+
+    def __init__(self, start=0.0):
+        self._now = float(start)
+        super().__init__(lambda: self._now)
+
+    def advance(self, seconds):
+        self._now += seconds
+        return self._now
+
+    def set(self, now):
+        self._now = float(now)
+
+
+# Standard-Zeitquelle, wenn kein eigener Clock übergeben wird
+CLOCK = Clock()
+
+
+class Timer:
+    """Einmalige Frist von `duration` Sekunden ab `start()`.
+
+    Ein nicht gestarteter Timer ist weder aktiv noch abgelaufen.
+    """
+
+    def __init__(self, duration, clock=None):
+        self.duration = duration
+        self.clock = clock or CLOCK
+        self.started_at = None
+
+    def start(self, now=None, duration=None):
+        if duration is not None:
+            self.duration = duration
+        self.started_at = self.clock.now() if now is None else now
+        return self
+
+    def cancel(self):
+        self.started_at = None
+
+    @property
+    def started(self):
+        return self.started_at is not None
+
+    def elapsed(self, now=None):
+        if self.started_at is None:
+            return 0.0
+        return (self.clock.now() if now is None else now) - self.started_at
+
+    def remaining(self, now=None):
+        if self.started_at is None:
+            return 0.0
+        return max(0.0, self.duration - self.elapsed(now))
+
+    def running(self, now=None):
+        """Gestartet und noch nicht abgelaufen."""
+        return self.started_at is not None and self.elapsed(now) < self.duration
+
+    def expired(self, now=None):
+        """Gestartet und Frist erreicht."""
+        return self.started_at is not None and self.elapsed(now) >= self.duration
+
+
+class Debounce:
+    """Bestätigt einen Wert, sobald er `hold` Sekunden ohne Unterbrechung anliegt.
+
+    `update(value)` wird pro Frame mit dem aktuellen Rohwert aufgerufen
+    (None/False = nichts erkannt) und gibt den Wert zurück, solange er als
+    stabil gilt, sonst None. Wechselt der Wert, beginnt die Messung neu.
+    """
+
+    def __init__(self, hold, clock=None):
+        self.hold = hold
+        self.clock = clock or CLOCK
+        self.candidate = None
+        self.since = None
+        self._now = None
+
+    def update(self, value, now=None):
+        now = self.clock.now() if now is None else now
+        self._now = now
+        if value is None or value is False:
+            self.reset()
+            return None
+        if value != self.candidate or self.since is None:
+            self.candidate = value
+            self.since = now
+        if now - self.since >= self.hold:
+            return value
+        return None
+
+    def reset(self):
+        self.candidate = None
+        self.since = None
+
+    def held_for(self, now=None):
+        if self.since is None:
+            return 0.0
+        if now is None:
+            now = self._now if self._now is not None else self.clock.now()
+        return now - self.since
+
+    def progress(self, now=None):
+        """Anteil der Haltedauer (0..1), z.B. für eine Fortschrittsanzeige."""
+        if self.since is None:
+            return 0.0
+        if self.hold <= 0:
+            return 1.0
+        return min(1.0, self.held_for(now) / self.hold)
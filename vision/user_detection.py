@@ -1,12 +1,17 @@
-"""Erkennung einfacher Handgesten mit MediaPipe.
+"""Erkennung der Login-Gesten mit MediaPipe.
 
 Dieses Modul stellt die Klasse `UserDetector` bereit, die aus einem RGB-Frame
-einfache Gesten erkennt: Faust (gibt 1 zurück), offene Hand (gibt 2 zurück)
-oder `None`, wenn keine bekannte Geste erkannt wurde. Die Implementierung ist
-leichtgewichtig, damit sie in jedem Frame ausgeführt werden kann.
+die Login-Geste erkennt: Faust (gibt 1 zurück), offene Hand (gibt 2 zurück)
+oder `None`, wenn keine bekannte Geste erkannt wurde. Die Zuordnung übernimmt
+der invariante Klassifikator aus `vision/login_classifier.py`, damit auch
+geneigte oder nahe an der Kamera gehaltene Hände erkannt werden.
 """
 
 import mediapipe as mp
+import numpy as np
+
+from vision.gestures import landmark_array
+from vision.login_classifier import LoginClassifier, login_features
 
 
 class UserDetector:
@@ -16,14 +21,31 @@ class UserDetector:
     - Faust -> Rückgabewert 1
     - Offene Hand -> Rückgabewert 2
 
-    Die Methoden sind bewusst kurz und schnell gehalten, damit sie pro Frame
-    aufgerufen werden können.
+    `classify` liefert zusätzlich die Konfidenz (für die Abstimmung über
+    mehrere Frames in `Anmeldung`).
     """
 
-    def __init__(self):
+    def __init__(self, classifier: LoginClassifier | None = None, min_confidence=0.6):
         # MediaPipe Hands mit maximal einer Hand initialisieren
         self.mp_hands = mp.solutions.hands
         self.hands = self.mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.7)
+        self.classifier = classifier or LoginClassifier()
+        self.min_confidence = min_confidence
+        # Seitenverhältnis (Breite / Höhe) des zuletzt verarbeiteten Frames;
+        # die Landmarks sind auf Breite und Höhe normiert
+        self.aspect = 1.0
+
+    def classify(self, rgb_frame):
+        """Gibt (User-ID, Konfidenz) zurück, bzw. (None, 0.0) ohne Hand."""
+        result = self.hands.process(rgb_frame)
+
+        if not result.multi_hand_landmarks:
+            return None, 0.0
+
+        height, width = rgb_frame.shape[:2]
+        self.aspect = width / height
+        points = landmark_array(result.multi_hand_landmarks[0])
+        return self.classifier.classify(login_features(points, self.aspect))
 
     def detect_user(self, rgb_frame):
         """Verarbeitet `rgb_frame` und gibt die erkannte User-ID zurück.
@@ -34,38 +56,26 @@ class UserDetector:
         Returns:
             int|None: 1 für Faust, 2 für offene Hand, oder None wenn nichts erkannt.
         """
-        result = self.hands.process(rgb_frame)
-
-        if not result.multi_hand_landmarks:
-            return None
-
-        lm = result.multi_hand_landmarks[0].landmark
-
-        if self.is_fist(lm):
-            return 1
-
-        if self.is_open_hand(lm):
-            return 2
+        user, confidence = self.classify(rgb_frame)
+        return user if confidence >= self.min_confidence else None
 
-        return None
+    def _classify_landmarks(self, lm, aspect=None):
+        points = np.array([(p.x, p.y, p.z) for p in lm])
+        aspect = self.aspect if aspect is None else aspect
+        user, confidence = self.classifier.classify(login_features(points, aspect))
+        return user if confidence >= self.min_confidence else None
 
-    def is_fist(self, lm):
-        """Gibt True zurück, wenn die Fingerkuppen unter ihren jeweiligen Basispunkten liegen.
+    def is_fist(self, lm, aspect=None):
+        """Gibt True zurück, wenn die Landmarks `lm` als Faust klassifiziert werden.
 
-        Diese einfache Heuristik vergleicht vertikal die Positionen von Fingerkuppen
-        und den zugehörigen Basislandmarks für Zeigefinger, Mittelfinger, Ringfinger
-        und kleinen Finger.
+        `aspect` ist Breite / Höhe des Frames der Landmarks (Standard: wie im
+        zuletzt mit `classify` verarbeiteten Frame).
         """
-        return all(
-            lm[tip].y > lm[base].y for tip, base in [(8, 5), (12, 9), (16, 13), (20, 17)]
-        )
+        return self._classify_landmarks(lm, aspect) == 1
 
-    def is_open_hand(self, lm):
-        """Gibt True zurück, wenn die Fingerkuppen über ihren Basispunkten liegen.
+    def is_open_hand(self, lm, aspect=None):
+        """Gibt True zurück, wenn die Landmarks `lm` als offene Hand klassifiziert werden.
 
-        Entspricht der negativen Bedingung von `is_fist` und identifiziert eine
-        offene Hand.
+        `aspect` wie bei `is_fist`.
         """
-        return all(
-            lm[tip].y < lm[base].y for tip, base in [(8, 5), (12, 9), (16, 13), (20, 17)]
-        )
\ No newline at end of file
+        return self._classify_landmarks(lm, aspect) == 2
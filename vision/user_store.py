@@ -0,0 +1,241 @@
+"""Angelernte Nutzer und ihre Login-Gesten.
+
+Jeder Nutzer hat einen Namen, eine Cursor-Darstellung (Farbe, Form) und
+mehrere Vorlagen seiner Login-Geste (invariante Merkmale, siehe
+`vision/login_classifier.py`). Alles liegt in einer kompakten Datei
+(`USER_STORE_PATH` in `config.py`, NumPy-npz): eine float32-Matrix aller
+Vorlagen, ein Array mit dem Besitzer jeder Vorlage und die Nutzerliste als
+JSON. Die Zuordnung einer Hand ist damit eine einzige vektorisierte
+Nächste-Nachbarn-Suche über alle Vorlagen.
+
+Ohne Datei gelten die bisherigen Standard-Nutzer (Faust = User 1, offene
+Hand = User 2). Angelernt wird mit `tools/enroll_user.py`.
+
+    python -m vision.user_store --bench 500    # Zuordnungszeit bei 500 Vorlagen
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from vision.login_classifier import INVARIANT_SIZE, LoginClassifier, default_templates
+
+
+class UserProfile:
+    """Ein Nutzer mit Cursor-Darstellung und Hinweis für den Login-Bildschirm."""
+
+    def __init__(self, user_id, name, color, shape="square", hint=""):
+        self.id = user_id
+        self.name = name
+        self.color = tuple(color)
+        self.shape = shape
+        self.hint = hint
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["id"], data["name"], data["color"], data.get("shape", "square"), data.get("hint", ""))
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, "color": list(self.color), "shape": self.shape, "hint": self.hint}
+
+
+class UserStore:
+    """Nutzer und Vorlagen; `classifier()` liefert den passenden `LoginClassifier`."""
+
+    SHAPES = ("circle", "square", "diamond", "triangle")
+    PALETTE = [(255, 0, 0), (0, 255, 0), (255, 160, 0), (200, 0, 255), (0, 160, 255), (255, 255, 0)]
+    # Darstellung ohne angemeldeten Nutzer
+    NO_USER_STYLE = ((0, 255, 255), "square")
+    # so viele Vorlagen werden je Anlernen höchstens behalten
+    MAX_TEMPLATES = 12
+
+    def __init__(self, users=(), templates=None, owners=None, path=None):
+        self.path = path
+        self._users = {u.id: u for u in users}
+        self.templates = np.zeros((0, INVARIANT_SIZE), np.float32) if templates is None else np.asarray(templates, np.float32)
+        self.owners = np.zeros(0, np.int32) if owners is None else np.asarray(owners, np.int32)
+
+    @classmethod
+    def defaults(cls, path=None):
+        """Standard-Nutzer: Faust = User 1 (roter Kreis), offene Hand = User 2 (grünes Quadrat)."""
+        templates, labels = default_templates()
+        users = [
+            UserProfile(1, "User 1", cls.PALETTE[0], "circle", "Faust kurz zeigen"),
+            UserProfile(2, "User 2", cls.PALETTE[1], "square", "Hand offen zeigen (Finger sichtbar)"),
+        ]
+        return cls(users, templates, labels, path)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls.defaults(path)
+        with np.load(path) as data:
+            users = [UserProfile.from_dict(u) for u in json.loads(str(data["users"]))]
+            return cls(users, data["templates"], data["owners"], path)
+
+    @classmethod
+    def load_default(cls):
+        """Lädt die Nutzer aus `config.USER_STORE_PATH` (relativ zum Arbeitsverzeichnis)."""
+        from config import USER_STORE_PATH
+        return cls.load(os.path.join(os.getcwd(), USER_STORE_PATH))
+
+    def save(self, path=None):
+        path = path or self.path
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp,
+            templates=self.templates,
+            owners=self.owners,
+            users=np.array(json.dumps([u.to_dict() for u in self.users()], ensure_ascii=False)),
+        )
+        os.replace(tmp, path)
+
+    # ---------------------------------------------------------
+    # Abfragen
+    # ---------------------------------------------------------
+    def users(self):
+        return sorted(self._users.values(), key=lambda u: u.id)
+
+    def user(self, user_id):
+        return self._users.get(user_id)
+
+    def name(self, user_id):
+        user = self._users.get(user_id)
+        return user.name if user is not None else f"User {user_id}"
+
+    def style(self, user_id):
+        """(Farbe, Form) des Cursors für `user_id`."""
+        user = self._users.get(user_id)
+        return (user.color, user.shape) if user is not None else self.NO_USER_STYLE
+
+    def templates_of(self, user_id):
+        return self.templates[self.owners == user_id]
+
+    def classifier(self, **kwargs):
+        return LoginClassifier(self.templates, self.owners, **kwargs)
+
+    # ---------------------------------------------------------
+    # Anlernen
+    # ---------------------------------------------------------
+    def conflicts(self, features, reject_distance=1.4, user_id=None):
+        """Nutzer, deren Vorlagen den neuen Merkmalen zu nahe liegen.
+
+        Gibt [(Nutzer, mittlerer Abstand)] zurück; ist der Abstand kleiner als
+        die Rückweisungsdistanz, wären die Gesten nicht sicher zu unterscheiden.
+        """
+        features = np.asarray(features, np.float64).reshape(-1, INVARIANT_SIZE)
+        result = []
+        for user in self.users():
+            if user.id == user_id:
+                continue
+            own = self.templates_of(user.id).astype(np.float64)
+            if not len(own) or not len(features):
+                continue
+            distances = np.linalg.norm(features[:, None, :] - own[None, :, :], axis=2).min(axis=1)
+            median = float(np.median(distances))
+            if median < reject_distance:
+                result.append((user, median))
+        return result
+
+    def enroll(self, name, features, color=None, shape=None, hint="eigene Geste", force=False):
+        """Legt einen Nutzer mit den aufgenommenen Merkmalen an und gibt ihn zurück.
+
+        Wirft `ValueError`, wenn die Geste einem anderen Nutzer zu ähnlich ist
+        (außer mit `force=True`).
+        """
+        features = np.asarray(features, np.float64).reshape(-1, INVARIANT_SIZE)
+        if not len(features):
+            raise ValueError("Keine Hand erkannt – nichts anzulernen")
+        conflicts = self.conflicts(features)
+        if conflicts and not force:
+            names = ", ".join(f"{u.name} ({d:.2f})" for u, d in conflicts)
+            raise ValueError(f"Geste zu ähnlich zu: {names}")
+        user_id = max(self._users, default=0) + 1
+        count = len(self._users)
+        user = UserProfile(
+            user_id,
+            name,
+            color or self.PALETTE[count % len(self.PALETTE)],
+            shape or self.SHAPES[count % len(self.SHAPES)],
+            hint,
+        )
+        self._users[user_id] = user
+        self._add(user_id, features)
+        return user
+
+    def add_templates(self, user_id, features):
+        """Weitere Aufnahmen für einen vorhandenen Nutzer (z.B. andere Lichtverhältnisse)."""
+        if user_id not in self._users:
+            raise KeyError(f"Unbekannter Nutzer: {user_id}")
+        features = np.asarray(features, np.float64).reshape(-1, INVARIANT_SIZE)
+        combined = np.concatenate([self.templates_of(user_id).astype(np.float64), features])
+        self._remove_templates(user_id)
+        self._add(user_id, combined, limit=2 * self.MAX_TEMPLATES)
+
+    def remove(self, user_id):
+        if self._users.pop(user_id, None) is None:
+            raise KeyError(f"Unbekannter Nutzer: {user_id}")
+        self._remove_templates(user_id)
+
+    def _remove_templates(self, user_id):
+        keep = self.owners != user_id
+        self.templates = self.templates[keep]
+        self.owners = self.owners[keep]
+
+    def _add(self, user_id, features, limit=None):
+        chosen = select_templates(features, limit or self.MAX_TEMPLATES)
+        self.templates = np.concatenate([self.templates, chosen.astype(np.float32)])
+        self.owners = np.concatenate([self.owners, np.full(len(chosen), user_id, np.int32)])
+
+
+def select_templates(features, count):
+    """Wählt bis zu `count` möglichst verschiedene Aufnahmen (Farthest-Point-Sampling).
+
+    So decken wenige Vorlagen die Bandbreite der Aufnahme ab (Neigung,
+    Abstand, leicht andere Fingerhaltung), statt fast gleiche Frames zu speichern.
+    """
+    features = np.asarray(features, np.float64)
+    if len(features) <= count:
+        return features
+    # Start beim Frame, der dem Mittelwert am nächsten liegt (typische Haltung)
+    chosen = [int(np.argmin(np.linalg.norm(features - features.mean(axis=0), axis=1)))]
+    distance = np.linalg.norm(features - features[chosen[0]], axis=1)
+    while len(chosen) < count:
+        index = int(np.argmax(distance))
+        chosen.append(index)
+        distance = np.minimum(distance, np.linalg.norm(features - features[index], axis=1))
+    return features[chosen]
+
+
+def benchmark(templates=500, users=50, rounds=2000):
+    """Mittlere Zuordnungszeit einer Hand bei `templates` Vorlagen von `users` Nutzern."""
+    rng = np.random.default_rng(0)
+    store = UserStore.defaults()
+    base, _ = default_templates()
+    for i in range(users):
+        # zufällige Abwandlungen der Standard-Gesten als Stellvertreter echter Aufnahmen
+        features = base[rng.integers(len(base), size=templates // users)]
+        features = features + rng.normal(0, 0.3, features.shape)
+        store.enroll(f"Nutzer {i}", features, force=True)
+    classifier = store.classifier()
+    probes = base[rng.integers(len(base), size=rounds)] + rng.normal(0, 0.2, (rounds, INVARIANT_SIZE))
+    started = time.perf_counter()
+    for probe in probes:
+        classifier.classify(probe)
+    elapsed = (time.perf_counter() - started) / rounds
+    return {"templates": int(len(store.templates)), "users": len(store.users()), "us_per_match": round(elapsed * 1e6, 1)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Login-Nutzer: Zuordnungszeit messen")
+    parser.add_argument("--bench", type=int, default=500, metavar="TEMPLATES")
+    parser.add_argument("--users", type=int, default=50)
+    args = parser.parse_args(argv)
+    print(benchmark(args.bench, args.users))
+
+
+if __name__ == "__main__":
+    main()
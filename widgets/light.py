@@ -11,9 +11,10 @@ class LightWidget:
     - Pinch-Active + Cursor bewegen: Helligkeit ändern
     """
 
-    def __init__(self, x, y, width=220, height=120, name="Licht"):
+    def __init__(self, x, y, width=220, height=120, name="Licht", device_id=None):
         self.rect = pygame.Rect(x, y, width, height)
         self.name = name
+        self.device_id = device_id or name
 
         # Lichtzustände
         self.is_on = False
@@ -29,12 +30,49 @@ class LightWidget:
 
         pygame.font.init()
         self.font = pygame.font.SysFont("Arial", 24)
+        # Name ändert sich nie -> einmal vorrendern
+        self.name_surface = self.font.render(self.name, True, (0, 0, 0))
         self.brightness = 100
         self.last_brightness = 100
         
         #Mit Hand über Widget fahren
         self.is_hovered = False
 
+    # ---------------------------------------------------------
+    # Zustand sichern / wiederherstellen
+    # ---------------------------------------------------------
+    def get_state(self):
+        """Gibt den Gerätezustand als Dict zurück (z.B. vor dem Verwerfen der View)."""
+        return {
+            "is_on": self.is_on,
+            "brightness": self.brightness,
+            "last_brightness": self.last_brightness,
+            "slider_open": self.slider_open,
+        }
+
+    def set_state(self, state):
+        """Übernimmt einen mit `get_state` gesicherten Zustand."""
+        self.is_on = state.get("is_on", self.is_on)
+        self.brightness = state.get("brightness", self.brightness)
+        self.last_brightness = state.get("last_brightness", self.last_brightness)
+        self.slider_open = state.get("slider_open", self.is_on)
+
+    @property
+    def level(self):
+        """Aktuelle Helligkeit in Prozent (0 wenn aus)."""
+        return self.brightness if self.is_on else 0
+
+    def set_level(self, level):
+        """Helligkeit direkt setzen (z.B. Drehgeste); 0 schaltet aus."""
+        self.brightness = max(0, min(100, int(round(level))))
+        if self.brightness > 0:
+            self.last_brightness = self.brightness
+            self.is_on = True
+            self.slider_open = True
+        else:
+            self.is_on = False
+            self.slider_open = False
+
     # ---------------------------------------------------------
     # Zeichnen
     # ---------------------------------------------------------
@@ -56,8 +94,7 @@ class LightWidget:
         pygame.draw.rect(screen, border_color, self.rect, 3, border_radius=12)
 
         # Text
-        text = self.font.render(self.name, True, (0, 0, 0))
-        screen.blit(text, (self.rect.x + 10, self.rect.y + 10))
+        screen.blit(self.name_surface, (self.rect.x + 10, self.rect.y + 10))
 
         status = f"{self.brightness}%" if self.is_on else "Aus"
         status_text = self.font.render(status, True, (0, 0, 0))
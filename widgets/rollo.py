@@ -14,9 +14,10 @@ class RolloWidget:
     - Zwischenstufen möglich
     """
 
-    def __init__(self, x, y, width=220, height=120, name="Rollo"):
+    def __init__(self, x, y, width=220, height=120, name="Rollo", device_id=None):
         self.rect = pygame.Rect(x, y, width, height)
         self.name = name
+        self.device_id = device_id or name
 
         # Rollo-Zustand
         self.is_open = True
@@ -36,6 +37,41 @@ class RolloWidget:
 
         pygame.font.init()
         self.font = pygame.font.SysFont("Arial", 24)
+        # Name ändert sich nie -> einmal vorrendern
+        self.name_surface = self.font.render(self.name, True, (0, 0, 0))
+
+    def get_state(self):
+        """Gibt den Gerätezustand als Dict zurück (z.B. vor dem Verwerfen der View)."""
+        return {
+            "is_open": self.is_open,
+            "position": self.position,
+            "last_position": self.last_position,
+            "slider_open": self.slider_open,
+        }
+
+    def set_state(self, state):
+        """Übernimmt einen mit `get_state` gesicherten Zustand."""
+        self.is_open = state.get("is_open", self.is_open)
+        self.position = state.get("position", self.position)
+        self.last_position = state.get("last_position", self.last_position)
+        self.slider_open = state.get("slider_open", self.is_open)
+
+    @property
+    def level(self):
+        """Aktuelle Öffnung in Prozent (0 wenn geschlossen)."""
+        return self.position if self.is_open else 0
+
+    def set_level(self, level):
+        """Öffnung direkt setzen (z.B. Scrollgeste); bis 2% gilt als geschlossen."""
+        self.position = max(0, min(100, int(round(level))))
+        if self.position > 2:
+            self.last_position = self.position
+            self.is_open = True
+            self.slider_open = True
+        else:
+            self.position = 0
+            self.is_open = False
+            self.slider_open = False
 
     def draw(self, screen):
         # Hintergrund basierend auf Zustand
@@ -71,8 +107,7 @@ class RolloWidget:
         pygame.draw.rect(screen, border_color, self.rect, 3, border_radius=12)
 
         # Titel
-        text = self.font.render(self.name, True, (0, 0, 0))
-        screen.blit(text, (self.rect.x + 10, self.rect.y + 10))
+        screen.blit(self.name_surface, (self.rect.x + 10, self.rect.y + 10))
 
         # Status
         status = f"{self.position}% offen" if self.is_open else "Geschlossen"